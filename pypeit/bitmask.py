@@ -102,7 +102,10 @@ class BitMask:
         self.bits = { k:i for i,k in enumerate(_keys) }
         self.max_value = (1 << self.nbits)-1
         self.descr = _descr
-        
+        # Cache of the integer masks for each (set of) flag(s); see
+        # :func:`_mask`.
+        self._masks = {}
+
     def _prep_flags(self, flag):
         """Prep the flags for use."""
         # Flags must be a numpy array
@@ -120,6 +123,48 @@ class BitMask:
 #            raise TypeError('Provided bit names must be strings!')
         return _flag
 
+    def _mask(self, flag):
+        """
+        Return the integer with all the bits in ``flag`` turned on.
+
+        The flags are only validated (using :func:`_prep_flags`) the
+        first time a given flag or set of flags is requested; the
+        result is cached for subsequent calls.
+
+        Args:
+            flag (str, array-like):
+                One or more bit names.  If None, all bits are included.
+
+        Returns:
+            int: The combined bit mask.
+        """
+        key = flag if flag is None or isinstance(flag, str) \
+                    else tuple(numpy.atleast_1d(flag).ravel().tolist())
+        try:
+            return self._masks[key]
+        except KeyError:
+            pass
+        mask = 0
+        for f in self._prep_flags(flag):
+            mask |= 1 << self.bits[f]
+        self._masks[key] = mask
+        return mask
+
+    @staticmethod
+    def _typed_mask(value, mask):
+        """
+        Cast a combined bit mask to the integer type of ``value``.
+
+        This avoids type promotion when combining the mask with
+        ``value``.  Casting to a signed type wraps the highest bit, as
+        expected for a bit pattern.  If ``value`` does not have an
+        integer dtype, the mask is returned unchanged.
+        """
+        dtype = getattr(value, 'dtype', None)
+        if dtype is None or not numpy.issubdtype(dtype, numpy.integer):
+            return mask
+        return numpy.uint64(mask).astype(dtype)
+
     @staticmethod
     def _fill_sequence(keys, vals, descr=None):
         r"""
@@ -252,16 +297,7 @@ class BitMask:
             TypeError: Raised if the provided *flag* does not contain
                 one or more strings.
         """
-        _flag = self._prep_flags(flag)
-
-        out = value & (1 << self.bits[_flag[0]]) != 0
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out |= (value & (1 << self.bits[_flag[i]]) != 0)
-        return out
+        return value & self._typed_mask(value, self._mask(flag)) != 0
 
     def flagged_bits(self, value):
         """
@@ -313,16 +349,7 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
-
-        out = value ^ (1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out ^= (1 << self.bits[_flag[i]])
-        return out
+        return value ^ self._typed_mask(value, self._mask(flag))
 
     def turn_on(self, value, flag):
         """
@@ -345,16 +372,7 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
-
-        out = value | (1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out
-
-        nn = len(_flag)
-        for i in range(1,nn):
-            out |= (1 << self.bits[_flag[i]])
-        return out
+        return value | self._typed_mask(value, self._mask(flag))
 
     def turn_off(self, value, flag):
         """
@@ -378,24 +396,81 @@ class BitMask:
         if flag is None:
             raise ValueError('Provided bit name cannot be None.')
 
-        _flag = self._prep_flags(flag)
+        mask = self._mask(flag)
+        if getattr(value, 'dtype', None) is None \
+                or not numpy.issubdtype(value.dtype, numpy.integer):
+            return value & ~mask
+        return value & numpy.invert(self._typed_mask(value, mask))
 
-        out = value & ~(1 << self.bits[_flag[0]])
-        if len(_flag) == 1:
-            return out
+    def turn_on_inplace(self, value, flag, where=None):
+        """
+        Turn on one or more bits in the provided array, in place.
 
-        nn = len(_flag)
-        for i in range(1,nn):
-            out &= ~(1 << self.bits[_flag[i]])
-        return out
+        This is equivalent to::
+
+            value[where] = self.turn_on(value[where], flag)
+
+        but avoids the temporary arrays created by the indexing.
+
+        Args:
+            value (`numpy.ndarray`_):
+                Integer bitmask array, modified in place.
+            flag (str, array-like):
+                Bit name(s) to turn on.
+            where (`numpy.ndarray`_, optional):
+                Boolean array selecting the elements of ``value`` to
+                modify; must be broadcastable to the shape of
+                ``value``.  Any other valid numpy index is also
+                accepted, but is applied by indexing.  If None, all
+                elements are modified.
+
+        Returns:
+            `numpy.ndarray`_: The modified array (i.e., ``value``).
+        """
+        if flag is None:
+            raise ValueError('Provided bit name cannot be None.')
+        mask = self._typed_mask(value, self._mask(flag))
+        if where is None or getattr(where, 'dtype', None) == bool:
+            return numpy.bitwise_or(value, mask, out=value, where=True if where is None else where)
+        value[where] |= mask
+        return value
+
+    def turn_off_inplace(self, value, flag, where=None):
+        """
+        Turn off one or more bits in the provided array, in place.
+
+        This is equivalent to::
+
+            value[where] = self.turn_off(value[where], flag)
+
+        but avoids the temporary arrays created by the indexing.
+
+        Args:
+            value (`numpy.ndarray`_):
+                Integer bitmask array, modified in place.
+            flag (str, array-like):
+                Bit name(s) to turn off.
+            where (`numpy.ndarray`_, optional):
+                Boolean array selecting the elements of ``value`` to
+                modify; see :func:`turn_on_inplace`.
+
+        Returns:
+            `numpy.ndarray`_: The modified array (i.e., ``value``).
+        """
+        if flag is None:
+            raise ValueError('Provided bit name cannot be None.')
+        mask = numpy.invert(self._typed_mask(value, self._mask(flag)))
+        if where is None or getattr(where, 'dtype', None) == bool:
+            return numpy.bitwise_and(value, mask, out=value, where=True if where is None else where)
+        value[where] &= mask
+        return value
 
     def consolidate(self, value, flag_set, consolidated_flag):
         """
         Consolidate a set of flags into a single flag.
         """
-        indx = self.flagged(value, flag=flag_set)
-        value[indx] = self.turn_on(value[indx], consolidated_flag)
-        return value
+        return self.turn_on_inplace(value, consolidated_flag,
+                                    where=self.flagged(value, flag=flag_set))
 
     def unpack(self, value, flag=None):
         """
@@ -636,8 +636,10 @@ class bspline(datamodel.DataContainer):
             # KBW: Why is the dtype set to 'f' = np.float32?
             return -2, np.zeros(ydata.shape, dtype=float)
 
-        alpha, beta = solution_arrays(nn, self.npoly, self.nord, ydata, action, invvar, upper,
-                                      lower)
+        # The C extension requires double precision; this does not
+        # copy the data if they are already float64
+        alpha, beta = solution_arrays(nn, self.npoly, self.nord, np.asarray(ydata, dtype=float),
+                                      action, np.asarray(invvar, dtype=float), upper, lower)
         nfull = nn * self.npoly
 
         # Right now we are not returning the covariance, although it may arise that we should
@@ -5,6 +5,7 @@ Class for guiding calibration object generation in PypeIt
 .. include:: ../links.rst
 """
 import os
+import copy
 
 from abc import ABCMeta
 
@@ -13,6 +14,7 @@ from IPython import embed
 import numpy as np
 
 from astropy.io import fits
+from astropy.table import Table
 
 from pypeit import msgs
 from pypeit import alignframe
@@ -24,11 +26,132 @@ from pypeit import wavecalib
 from pypeit import wavetilts
 from pypeit.images import buildimage
 from pypeit.metadata import PypeItMetaData
+from pypeit.profiling import profiler
 from pypeit.core import parse
 from pypeit.par import pypeitpar
 from pypeit.spectrographs.spectrograph import Spectrograph
 
 
+class CalibrationCache(object):
+    """
+    In-memory cache of the calibration products built or loaded during
+    one execution of PypeIt.
+
+    Products are identified by their type (e.g., ``'arc'``, ``'slits'``)
+    and a key; for the master frames the key is the master key, and for
+    products evaluated for a given science frame (e.g., the tilts and
+    wavelength images) the key also includes the flexure shifts.  The
+    number of times each type of product is found (hits) or not found
+    (misses) is recorded.
+
+    The cached objects are shared by all the frames that use them, so
+    they must not be modified.  The cached arrays are made read-only.
+    """
+    def __init__(self):
+        self.products = {}
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, ctype, key):
+        """
+        Return a cached product.
+
+        Args:
+            ctype (:obj:`str`):
+                The type of product.
+            key (:obj:`str`, :obj:`tuple`):
+                The key of the product; must be hashable.
+
+        Returns:
+            object: The cached product, or None if it is not in the
+            cache.
+        """
+        if (ctype, key) in self.products:
+            self.hits[ctype] = self.hits.get(ctype, 0) + 1
+            return self.products[(ctype, key)]
+        self.misses[ctype] = self.misses.get(ctype, 0) + 1
+        return None
+
+    def set(self, ctype, key, obj):
+        """
+        Add a product to the cache.
+
+        Products that are None are not cached.
+
+        Args:
+            ctype (:obj:`str`):
+                The type of product.
+            key (:obj:`str`, :obj:`tuple`):
+                The key of the product; must be hashable.
+            obj (object):
+                The product.  If this is a `numpy.ndarray`_, it is made
+                read-only.
+        """
+        if obj is None:
+            return
+        if isinstance(obj, np.ndarray):
+            obj.flags.writeable = False
+        self.products[(ctype, key)] = obj
+
+    def evaluate(self, ctype, key, func, *args, **kwargs):
+        """
+        Return a cached product, evaluating and caching it if needed.
+
+        Args:
+            ctype (:obj:`str`):
+                The type of product.
+            key (:obj:`str`, :obj:`tuple`):
+                The key of the product; must be hashable.
+            func (callable):
+                Function that evaluates the product, called with the
+                remaining arguments.
+
+        Returns:
+            object: The product.
+        """
+        obj = self.get(ctype, key)
+        if obj is None:
+            obj = func(*args, **kwargs)
+            self.set(ctype, key, obj)
+        return obj
+
+    def __contains__(self, item):
+        return item in self.products
+
+    def clear(self):
+        """
+        Remove all the products from the cache.  The hit and miss
+        statistics are kept.
+        """
+        self.products = {}
+
+    def stats(self):
+        """
+        Return the number of hits and misses for each type of product.
+
+        Returns:
+            `astropy.table.Table`_: Table with the type of product and
+            its number of hits and misses.
+        """
+        ctypes = sorted(set(self.hits.keys()) | set(self.misses.keys()))
+        return Table(rows=[(c, self.hits.get(c, 0), self.misses.get(c, 0)) for c in ctypes],
+                     names=['ctype', 'hits', 'misses'], dtype=[str, int, int])
+
+    def report(self):
+        """
+        Print the hit and miss statistics.
+        """
+        tbl = self.stats()
+        if len(tbl) == 0:
+            return
+        msg = 'Calibration cache' + msgs.newline() \
+                + '    {0:<12} {1:>6} {2:>6}'.format('Product', 'Hits', 'Misses')
+        for row in tbl:
+            msg += msgs.newline() + '    {0:<12} {1:6d} {2:6d}'.format(row['ctype'], row['hits'],
+                                                                       row['misses'])
+        msgs.info(msg)
+
+
 class Calibrations(object):
     """
     This class is primarily designed to guide the generation of
@@ -57,6 +180,11 @@ class Calibrations(object):
         show (:obj:`bool`, optional):
             Show plots of PypeIt's results as the code progesses.
             Requires interaction from the users.
+        cache (:class:`CalibrationCache`, optional):
+            Cache with the calibration products built or loaded during
+            this execution of PypeIt.  The products in the cache are
+            used instead of loading or building them again.  If None,
+            a new (empty) cache is used.
 
     .. todo: Fix these
 
@@ -93,7 +221,7 @@ class Calibrations(object):
 
     @classmethod
     def get_instance(cls, fitstbl, par, spectrograph, caldir, qadir=None,
-                     reuse_masters=False, show=False, slitspat_num=None):
+                     reuse_masters=False, show=False, slitspat_num=None, cache=None):
         """
         """
         pypeline = spectrograph.pypeline
@@ -102,10 +230,11 @@ class Calibrations(object):
         return next(c for c in cls.__subclasses__()
                     if c.__name__ == (pypeline + 'Calibrations'))(
             fitstbl, par, spectrograph, caldir, qadir=qadir,
-                     reuse_masters=reuse_masters, show=show, slitspat_num=slitspat_num)
+                     reuse_masters=reuse_masters, show=show, slitspat_num=slitspat_num,
+                     cache=cache)
 
     def __init__(self, fitstbl, par, spectrograph, caldir, qadir=None,
-                 reuse_masters=False, show=False, slitspat_num=None):
+                 reuse_masters=False, show=False, slitspat_num=None, cache=None):
 
         # Check the types
         # TODO -- Remove this None option once we have data models for all the Calibrations
@@ -125,6 +254,7 @@ class Calibrations(object):
         # Masters
         self.reuse_masters = reuse_masters
         self.master_dir = caldir
+        self.cache = CalibrationCache() if cache is None else cache
 
         # Restrict on slits?
         self.slitspat_num = slitspat_num
@@ -237,6 +367,11 @@ class Calibrations(object):
         masterframe_name = masterframe.construct_file_name(
             buildimage.ArcImage, self.master_key_dict['arc'], master_dir=self.master_dir)
 
+        # Already loaded or built?
+        self.msarc = self.cache.get('arc', self.master_key_dict['arc'])
+        if self.msarc is not None:
+            return self.msarc
+
         # Reuse master frame?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
             self.msarc = buildimage.ArcImage.from_file(masterframe_name)
@@ -250,6 +385,7 @@ class Calibrations(object):
                                                         bias=self.msbias, bpm=self.msbpm)
             # Save
             self.msarc.to_master_file(masterframe_name)
+        self.cache.set('arc', self.master_key_dict['arc'], self.msarc)
 
         # Return
         return self.msarc
@@ -275,6 +411,11 @@ class Calibrations(object):
         masterframe_name = masterframe.construct_file_name(
             buildimage.TiltImage, self.master_key_dict['tilt'], master_dir=self.master_dir)
 
+        # Already loaded or built?
+        self.mstilt = self.cache.get('tiltimg', self.master_key_dict['tilt'])
+        if self.mstilt is not None:
+            return self.mstilt
+
         # Reuse master frame?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
             self.mstilt = buildimage.TiltImage.from_file(masterframe_name)
@@ -290,9 +431,9 @@ class Calibrations(object):
 
             # Save to Masters
             self.mstilt.to_master_file(masterframe_name)
+        self.cache.set('tiltimg', self.master_key_dict['tilt'], self.mstilt)
 
         # TODO in the future add in a tilt_inmask
-        #self._update_cache('tilt', 'tilt_inmask', self.mstilt_inmask)
 
         # Return
         return self.mstilt
@@ -321,10 +462,17 @@ class Calibrations(object):
                                                                self.master_key_dict['align'],
                                                                master_dir=self.master_dir)
 
+        # Already loaded or built?
+        self.alignments = self.cache.get('align', self.master_key_dict['align'])
+        if self.alignments is not None:
+            self.alignments.is_synced(self.slits)
+            return self.alignments
+
         # Reuse master frame?
         if os.path.isfile(masterframe_filename) and self.reuse_masters:
             self.alignments = alignframe.Alignments.from_file(masterframe_filename)
             self.alignments.is_synced(self.slits)
+            self.cache.set('align', self.master_key_dict['align'], self.alignments)
             return self.alignments
 
         msalign = buildimage.buildimage_fromlist(self.spectrograph, self.det, self.par['alignframe'], align_files,
@@ -340,6 +488,7 @@ class Calibrations(object):
         self.alignments = alignment.run(show=self.show)
         # Save to Masters
         self.alignments.to_master_file(masterframe_filename)
+        self.cache.set('align', self.master_key_dict['align'], self.alignments)
 
         return self.alignments
 
@@ -368,6 +517,11 @@ class Calibrations(object):
         if self.par['biasframe']['useframe'] is not None:
             msgs.error("Not ready to load from disk")
 
+        # Already loaded or built?
+        self.msbias = self.cache.get('bias', self.master_key_dict['bias'])
+        if self.msbias is not None:
+            return self.msbias
+
         # Try to load?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
             self.msbias = buildimage.BiasImage.from_file(masterframe_name)
@@ -379,6 +533,7 @@ class Calibrations(object):
                                                     self.par['biasframe'], bias_files)
             # Save it?
             self.msbias.to_master_file(masterframe_name)
+        self.cache.set('bias', self.master_key_dict['bias'], self.msbias)
 
         # Return
         return self.msbias
@@ -405,6 +560,11 @@ class Calibrations(object):
                                                            self.master_key_dict['dark'],
                                                            master_dir=self.master_dir)
 
+        # Already loaded or built?
+        self.msdark = self.cache.get('dark', self.master_key_dict['dark'])
+        if self.msdark is not None:
+            return self.msdark
+
         # Try to load?
         if os.path.isfile(masterframe_name) and self.reuse_masters:
             self.msdark = buildimage.DarkImage.from_file(masterframe_name)
@@ -416,6 +576,7 @@ class Calibrations(object):
                                                     self.par['darkframe'], dark_files)
             # Save it?
             self.msdark.to_master_file(masterframe_name)
+        self.cache.set('dark', self.master_key_dict['dark'], self.msdark)
 
         # Return
         return self.msdark
@@ -444,6 +605,12 @@ class Calibrations(object):
         # Generate a bad pixel mask (should not repeat)
         self.master_key_dict['bpm'] = self.fitstbl.master_key(self.frame, det=self.det)
 
+        # Already built?
+        self.msbpm = self.cache.get('bpm', self.master_key_dict['bpm'])
+        if self.msbpm is not None:
+            self.shape = self.msbpm.shape
+            return self.msbpm
+
         # Build the data-section image
         sci_image_file = self.fitstbl.frame_paths(self.frame)
 
@@ -454,6 +621,7 @@ class Calibrations(object):
         # Build it
         self.msbpm = self.spectrograph.bpm(sci_image_file, self.det, msbias=msbias)
         self.shape = self.msbpm.shape
+        self.cache.set('bpm', self.master_key_dict['bpm'], self.msbpm)
 
         # Return
         return self.msbpm
@@ -497,11 +665,19 @@ class Calibrations(object):
         #   2.  Build from scratch
         #   3.  Load any user-supplied images to over-ride any built
 
+        # Already loaded or built?
+        self.flatimages = self.cache.get('flats', self.master_key_dict['flat'])
+        if self.flatimages is not None:
+            self.flatimages.is_synced(self.slits)
+            self.slits.mask_flats(self.flatimages)
+            return self.flatimages
+
         # Load MasterFrame?
         if os.path.isfile(masterframe_filename) and self.reuse_masters:
             self.flatimages = flatfield.FlatImages.from_file(masterframe_filename)
             self.flatimages.is_synced(self.slits)
             self.slits.mask_flats(self.flatimages)
+            self.cache.set('flats', self.master_key_dict['flat'], self.flatimages)
             return self.flatimages
 
 
@@ -529,6 +705,7 @@ class Calibrations(object):
             self.flatimages.to_master_file(masterframe_filename)
             # Save slits too, in case they were tweaked
             self.slits.to_master_file()
+            self.cache.set('slits', self.master_key_dict['trace'], copy.deepcopy(self.slits))
         else:
             self.flatimages = flatfield.FlatImages(None, None, None, None)
 
@@ -548,6 +725,7 @@ class Calibrations(object):
             with fits.open(self.par['flatfield']['pixelflat_file']) as hdu:
                 self.flatimages.pixelflat = hdu[self.det].data
 
+        self.cache.set('flats', self.master_key_dict['flat'], self.flatimages)
         # Return
         return self.flatimages
 
@@ -578,10 +756,19 @@ class Calibrations(object):
         slit_masterframe_name = masterframe.construct_file_name(slittrace.SlitTraceSet,
                                                            self.master_key_dict['trace'],
                                                            master_dir=self.master_dir)
-        if os.path.isfile(slit_masterframe_name) and self.reuse_masters:
+        # Already loaded or built?  The cached slits are copied because
+        # their mask is changed by the later calibrations and the
+        # reduction.
+        cached_slits = self.cache.get('slits', self.master_key_dict['trace'])
+        if cached_slits is not None:
+            self.slits = copy.deepcopy(cached_slits)
+            # Reset the bitmask
+            self.slits.mask = self.slits.mask_init.copy()
+        elif os.path.isfile(slit_masterframe_name) and self.reuse_masters:
             self.slits = slittrace.SlitTraceSet.from_file(slit_masterframe_name)
             # Reset the bitmask
             self.slits.mask = self.slits.mask_init.copy()
+            self.cache.set('slits', self.master_key_dict['trace'], copy.deepcopy(self.slits))
         else:
             # Slits don't exist or we're not resusing them
             edge_masterframe_name = masterframe.construct_file_name(edgetrace.EdgeTraceSet,
@@ -615,6 +802,7 @@ class Calibrations(object):
             self.slits = self.edges.get_slits()
             self.edges = None
             self.slits.to_master_file(slit_masterframe_name)
+            self.cache.set('slits', self.master_key_dict['trace'], copy.deepcopy(self.slits))
 
         # User mask?
         if self.slitspat_num is not None:
@@ -648,6 +836,12 @@ class Calibrations(object):
             self.wv_calib = None
             return self.wv_calib
 
+        # Already loaded or built?
+        self.wv_calib = self.cache.get('wv_calib', self.master_key_dict['arc'])
+        if self.wv_calib is not None:
+            self.slits.mask_wvcalib(self.wv_calib)
+            return self.wv_calib
+
         # Grab arc binning (may be different from science!)
         # TODO : Do this internally when we have a wv_calib DataContainer
         binspec, binspat = parse.parse_binning(self.msarc.detector.binning)
@@ -669,6 +863,7 @@ class Calibrations(object):
             self.wv_calib = self.waveCalib.run(skip_QA=(not self.write_qa))
             # Save to Masters
             self.waveCalib.save(outfile=masterframe_name)
+        self.cache.set('wv_calib', self.master_key_dict['arc'], self.wv_calib)
 
         # Return
         return self.wv_calib
@@ -699,7 +894,12 @@ class Calibrations(object):
         # Load up?
         masterframe_name = masterframe.construct_file_name(wavetilts.WaveTilts, self.master_key_dict['tilt'],
                                                            master_dir=self.master_dir)
-        if os.path.isfile(masterframe_name) and self.reuse_masters:
+        self.wavetilts = self.cache.get('tilts', self.master_key_dict['tilt'])
+        if self.wavetilts is not None:
+            # Already loaded or built
+            self.wavetilts.is_synced(self.slits)
+            self.slits.mask_wavetilts(self.wavetilts)
+        elif os.path.isfile(masterframe_name) and self.reuse_masters:
             self.wavetilts = wavetilts.WaveTilts.from_file(masterframe_name)
             self.wavetilts.is_synced(self.slits)
             self.slits.mask_wavetilts(self.wavetilts)
@@ -717,6 +917,7 @@ class Calibrations(object):
             self.wavetilts = buildwaveTilts.run(doqa=self.write_qa, show=self.show)
             # Save?
             self.wavetilts.to_master_file(masterframe_name)
+        self.cache.set('tilts', self.master_key_dict['tilt'], self.wavetilts)
 
         return self.wavetilts
 
@@ -726,10 +927,26 @@ class Calibrations(object):
 
         """
         for step in self.steps:
-            getattr(self, 'get_{:s}'.format(step))()
+            with profiler.stage(step):
+                getattr(self, 'get_{:s}'.format(step))()
         msgs.info("Calibration complete!")
         msgs.info("#######################################################################")
 
+    def _cached(self, ctype, master_key):
+        """
+        Check if a calibration product is in the cache.
+
+        Args:
+            ctype (:obj:`str`):
+                The type of product; e.g., ``'bias'``.
+            master_key (:obj:`str`):
+                The master key of the product.
+
+        Returns:
+            bool: True if the product is in the cache.
+        """
+        return (ctype, master_key) in self.cache
+
     def _chk_set(self, items):
         """
         Check whether a needed attribute has previously been set
@@ -879,3 +1096,36 @@ def check_for_calibs(par, fitstbl, raise_error=True):
                         else:
                             msgs.warn(msg)
 
+
+def missing_calibs(par, fitstbl, calib_ID):
+    """
+    Return the calibration frame types needed to reduce the science
+    frames of a calibration group that are not yet in the metadata
+    table.
+
+    This is the same check as :func:`check_for_calibs`, for a single
+    calibration group and without reporting anything.
+
+    Args:
+        par (:class:`pypeit.par.pypeitpar.PypeItPar`):
+            Full set of parameters for the reduction.
+        fitstbl (:class:`pypeit.metadata.PypeItMetaData`):
+            The class holding the metadata for the frames.
+        calib_ID (:obj:`int`):
+            Calibration group.
+
+    Returns:
+        :obj:`list`: The missing frame types; the list is empty if the
+        calibration group is complete.
+    """
+    ftypes = ['arc', 'tilt', 'trace']
+    for key, ftype in zip(['use_biasimage', 'use_darkimage', 'use_pixelflat', 'use_illumflat'],
+                          ['bias', 'dark', 'pixelflat', 'illumflat']):
+        if not par['scienceframe']['process'][key]:
+            continue
+        # Allow for pixelflat inserted
+        if ftype == 'pixelflat' and par['calibrations']['flatfield']['pixelflat_file'] is not None:
+            continue
+        ftypes += [ftype]
+    return [ftype for ftype in ftypes
+                if not np.any(fitstbl.find_frames(ftype, calib_ID=calib_ID))]
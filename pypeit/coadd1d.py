@@ -7,6 +7,7 @@ Coadding module.
 """
 import inspect
 import os
+import functools
 
 from IPython import embed
 
@@ -20,6 +21,7 @@ from pypeit import msgs
 from pypeit.core import coadd, flux_calib
 from pypeit import datamodel
 from pypeit import io
+from pypeit import utils
 
 
 class OneSpec(datamodel.DataContainer):
@@ -123,15 +125,19 @@ class OneSpec(datamodel.DataContainer):
 class CoAdd1D(object):
 
     @classmethod
-    def get_instance(cls, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    def get_instance(cls, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False,
+                     sobjs=None):
         """
         Superclass factory method which generates the subclass instance. See __init__ docs for arguments.
         """
-        pypeline = fits.getheader(spec1dfiles[0])['PYPELINE'] + 'CoAdd1D'
+        header = fits.getheader(spec1dfiles[0]) if sobjs is None else sobjs[0].header
+        pypeline = header['PYPELINE'] + 'CoAdd1D'
         return next(c for c in cls.__subclasses__() if c.__name__ == pypeline)(
-            spec1dfiles, objids, spectrograph=spectrograph, par=par, sensfile=sensfile, debug=debug, show=show)
+            spec1dfiles, objids, spectrograph=spectrograph, par=par, sensfile=sensfile, debug=debug, show=show,
+            sobjs=sobjs)
 
-    def __init__(self, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    def __init__(self, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False,
+                 sobjs=None):
         """
 
         Args:
@@ -148,16 +154,20 @@ class CoAdd1D(object):
                Debug. Default = False
             show (bool, optional):
                Debug. Default = True
+            sobjs (list, optional):
+               List of :class:`pypeit.specobjs.SpecObjs`, one per spec1dfile, that have already been read and
+               contain (at least) the object to coadd. If provided, the spec1d files are not read again.
         """
         # Instantiate attributes
         self.spec1dfiles = spec1dfiles
         self.objids = objids
+        self.sobjs = sobjs
 
         # Optional
         if spectrograph is not None:
             self.spectrograph = spectrograph
         else:
-            header = fits.getheader(spec1dfiles[0])
+            header = fits.getheader(spec1dfiles[0]) if sobjs is None else sobjs[0].header
             self.spectrograph = load_spectrograph(header['PYP_SPEC'])
         if par is None:
             self.par = spectrograph.default_pypeit_par()['coadd1d']
@@ -195,7 +205,8 @@ class CoAdd1D(object):
         """
 
         for iexp in range(self.nexp):
-            sobjs = specobjs.SpecObjs.from_fitsfile(self.spec1dfiles[iexp])
+            sobjs = specobjs.SpecObjs.from_fitsfile(self.spec1dfiles[iexp]) if self.sobjs is None \
+                        else self.sobjs[iexp]
             indx = sobjs.name_indices(self.objids[iexp])
             if not np.any(indx):
                 msgs.error("No matching objects for {:s}.  Odds are you input the wrong OBJID".format(self.objids[iexp]))
@@ -235,7 +246,7 @@ class CoAdd1D(object):
                           mask=self.mask_coadd[wave_mask].astype(int),
                           ext_mode=self.par['ex_value'],
                           fluxed=self.par['flux_value'])
-        onespec.head0 = fits.getheader(self.spec1dfiles[0])
+        onespec.head0 = fits.getheader(self.spec1dfiles[0]) if self.sobjs is None else self.sobjs[0].header
 
         # Add on others
         if telluric is not None:
@@ -265,12 +276,13 @@ class MultiSlitCoAdd1D(CoAdd1D):
     Child of CoAdd1d for Multislit and Longslit reductions
     """
 
-    def __init__(self, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    def __init__(self, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False,
+                 sobjs=None):
         """
         See `CoAdd1D` doc string
         """
         super().__init__(spec1dfiles, objids, spectrograph=spectrograph, par = par, sensfile = sensfile,
-                         debug = debug, show = show)
+                         debug = debug, show = show, sobjs=sobjs)
 
     def coadd(self):
         """
@@ -300,13 +312,14 @@ class EchelleCoAdd1D(CoAdd1D):
     Child of CoAdd1d for Echelle reductions
     """
 
-    def __init__(self, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    def __init__(self, spec1dfiles, objids, spectrograph=None, par=None, sensfile=None, debug=False, show=False,
+                 sobjs=None):
         """
         See `CoAdd1D` doc string
 
         """
         super().__init__(spec1dfiles, objids, spectrograph=spectrograph, par = par, sensfile = sensfile,
-                         debug = debug, show = show)
+                         debug = debug, show = show, sobjs=sobjs)
 
     def coadd(self):
         """
@@ -328,3 +341,114 @@ class EchelleCoAdd1D(CoAdd1D):
             debug = self.debug, show = self.show)
 
         return wave_coadd, flux_coadd, ivar_coadd, mask_coadd
+
+
+def build_object_index(spec1dfiles):
+    """
+    Read a set of spec1d files and index the objects they contain.
+
+    Each file is read only once, such that the spectra of many objects
+    can be coadded without re-reading the files for each object.
+
+    Args:
+        spec1dfiles (list):
+            List of spec1d files.
+
+    Returns:
+        tuple: A dictionary with the :class:`pypeit.specobjs.SpecObjs`
+        read from each file, keyed by the file name, and a dictionary
+        keyed by the object name (i.e., the objid used by
+        :class:`CoAdd1D`) that provides, for each file with that
+        object, the indices of its :class:`pypeit.specobj.SpecObj`
+        objects (more than one for Echelle data).
+    """
+    specobjs_dict = {}
+    index = {}
+    for spec1dfile in spec1dfiles:
+        if spec1dfile in specobjs_dict:
+            continue
+        sobjs = specobjs.SpecObjs.from_fitsfile(spec1dfile)
+        specobjs_dict[spec1dfile] = sobjs
+        if sobjs.nobj == 0:
+            msgs.warn('No objects in {0}'.format(spec1dfile))
+            continue
+        names = np.atleast_1d(sobjs.ECH_NAME if sobjs[0].PYPELINE == 'Echelle' else sobjs.NAME)
+        for name in np.unique(names):
+            index.setdefault(name, {})[spec1dfile] = np.where(names == name)[0]
+    return specobjs_dict, index
+
+
+def coadd_object(obj, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    """
+    Coadd the spectra of a single object and write the result.
+
+    This is the function executed for each object by
+    :func:`coadd_objects`.
+
+    Args:
+        obj (tuple):
+            The list of spec1d files, the list of objids, the list of
+            :class:`pypeit.specobjs.SpecObjs` with the spectra of the
+            object, and the name of the output file.
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`, optional):
+        par (:class:`pypeit.par.pypeitpar.Coadd1DPar`, optional):
+        sensfile (str, optional):
+            File holding the sensitivity function. This is required for echelle coadds only.
+        debug (bool, optional):
+        show (bool, optional):
+    """
+    spec1dfiles, objids, sobjs, coaddfile = obj
+    coAdd1d = CoAdd1D.get_instance(spec1dfiles, objids, spectrograph=spectrograph, par=par, sensfile=sensfile,
+                                   debug=debug, show=show, sobjs=sobjs)
+    coAdd1d.run()
+    coAdd1d.save(coaddfile)
+
+
+def coadd_objects(objects, coaddfiles, spectrograph=None, par=None, sensfile=None, debug=False, show=False):
+    """
+    Coadd the spectra of many objects, writing one output file per object.
+
+    Each spec1d file is read only once, and the objects are coadded
+    concurrently using ``par['n_proc']`` processes.
+
+    Args:
+        objects (list):
+            One item per object to coadd. Each item is a list of
+            (spec1dfile, objid) tuples providing the exposures to
+            coadd for that object.
+        coaddfiles (list):
+            Output file for each object.
+        spectrograph (:class:`pypeit.spectrographs.spectrograph.Spectrograph`, optional):
+            If None, instantiated from the header of the first file.
+        par (:class:`pypeit.par.pypeitpar.Coadd1DPar`, optional):
+            If None, use the spectrograph defaults.
+        sensfile (str, optional):
+            File holding the sensitivity function. This is required for echelle coadds only.
+        debug (bool, optional):
+        show (bool, optional):
+    """
+    if len(objects) != len(coaddfiles):
+        msgs.error('Must provide one output file for each object to coadd.')
+
+    # Read each spec1d file once
+    spec1dfiles = list(dict.fromkeys([spec1dfile for obj in objects for spec1dfile, _ in obj]))
+    specobjs_dict, index = build_object_index(spec1dfiles)
+    if spectrograph is None:
+        spectrograph = load_spectrograph(specobjs_dict[spec1dfiles[0]].header['PYP_SPEC'])
+    if par is None:
+        par = spectrograph.default_pypeit_par()['coadd1d']
+
+    # Only the spectra of each object are passed to the coadd
+    tasks = []
+    for obj, coaddfile in zip(objects, coaddfiles):
+        sobjs = []
+        for spec1dfile, objid in obj:
+            if spec1dfile not in index.get(objid, {}):
+                msgs.error("No matching objects for {:s} in {:s}.  Odds are you input the wrong "
+                           "OBJID".format(objid, spec1dfile))
+            sobjs.append(specobjs_dict[spec1dfile][index[objid][spec1dfile]])
+        tasks.append(([spec1dfile for spec1dfile, _ in obj], [objid for _, objid in obj], sobjs, coaddfile))
+
+    msgs.info('Coadding {0} objects from {1} spec1d files'.format(len(tasks), len(spec1dfiles)))
+    utils.parallel_map(functools.partial(coadd_object, spectrograph=spectrograph, par=par, sensfile=sensfile,
+                                         debug=debug, show=show), tasks, n_proc=par['n_proc'])
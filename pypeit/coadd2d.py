@@ -24,11 +24,164 @@ from pypeit import reduce
 from pypeit.images import pypeitimage
 from pypeit.core import extract
 from pypeit.core import coadd, pixels
-from pypeit.core import parse
 from pypeit.spectrographs import util
 from pypeit.tests import tstutils
 from pypeit import calibrations
 from pypeit import spec2dobj
+from pypeit.images import detector_container
+
+
+class Spec2DStack(object):
+    """
+    Lazy, memory-mapped access to the images of a single detector in a
+    set of spec2d files.
+
+    Only the slits, the detector and the spatial flexure of each
+    exposure are read at instantiation.  The image extensions are
+    memory mapped, and :func:`slit_stacks` only reads the spatial
+    region covering one slit, such that the memory needed to coadd
+    many exposures scales with the width of the widest slit instead of
+    the size of the detector.
+
+    Args:
+        spec2d_files (:obj:`list`):
+            List of spec2d filenames.
+        det (:obj:`int`):
+            Detector to read.
+        dtype (`numpy.dtype`_, optional):
+            Data type used for the science, inverse-variance and sky
+            images.  The tilts and wavelength images are always read in
+            double precision.
+    """
+    # Image extensions read for each slit
+    image_ext = dict(sciimg='SCIIMG', sciivar='IVARMODEL', skymodel='SKYMODEL', tilts='TILTS',
+                     waveimg='WAVEIMG', mask='BPMMASK')
+
+    def __init__(self, spec2d_files, det, dtype=np.float32):
+        self.spec2d_files = spec2d_files
+        self.det = det
+        self.dtype = dtype
+        self.prefix = spec2dobj.spec2d_hdu_prefix(det)
+
+        self.hdul = []
+        self.slits_list = []
+        self.detectors = []
+        self.spat_flexure = []
+        self.closed = False
+        try:
+            for f in spec2d_files:
+                self.hdul.append(fits.open(f, memmap=True))
+                hdul = self.hdul[-1]
+                if self.prefix+'SCIIMG' not in hdul:
+                    msgs.error("Requested detector {} is not in this file - {}".format(det, f))
+                self.slits_list.append(slittrace.SlitTraceSet.from_hdu(hdul[self.prefix+'SLITS']))
+                self.detectors.append(detector_container.DetectorContainer.from_hdu(
+                                            hdul[self.prefix+'DETECTOR'])
+                                      if self.prefix+'DETECTOR' in hdul else None)
+                flexure = hdul[self.prefix+'SCIIMG'].header.get('SCI_SPAT_FLEXURE')
+                self.spat_flexure.append(0. if flexure is None else flexure)
+            self.nspec, self.nspat = self.hdul[0][self.prefix+'SCIIMG'].shape
+        except:
+            # Do not leave the files opened so far dangling
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self.hdul)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close all the files.
+
+        The stacks returned by :func:`slit_stacks` are copies and
+        remain valid after the files are closed.
+        """
+        for hdul in self.hdul:
+            hdul.close()
+        self.closed = True
+
+    def slit_spat_range(self, slit_idx):
+        """
+        Return the range of spatial pixels covered by a slit in any of
+        the exposures, accounting for the spatial flexure and the slit
+        padding.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Index of the slit.
+
+        Returns:
+            :obj:`tuple`: The first and last+1 spatial pixel covering
+            the slit.
+        """
+        spat_min, spat_max = self.nspat, 0
+        for slits, flexure in zip(self.slits_list, self.spat_flexure):
+            left, right, _ = slits.select_edges(flexure=flexure)
+            spat_min = min(spat_min, int(np.floor(np.amin(left[:,slit_idx]) - slits.pad)))
+            spat_max = max(spat_max, int(np.ceil(np.amax(right[:,slit_idx]) + slits.pad)) + 1)
+        return max(spat_min, 0), min(spat_max, self.nspat)
+
+    def slit_stacks(self, slit_idx):
+        """
+        Read the image stacks in the spatial region covering one slit.
+
+        The on-slit mask of each exposure is the same as the one
+        selected from :func:`~pypeit.slittrace.SlitTraceSet.slit_img`
+        for the full detector, except that pixels shared by overlapping
+        slits are included in both.  Because the spatial pixel
+        coordinates of the returned stacks start at ``spat_offset``,
+        reference traces used with the stacks must be shifted by the
+        same amount.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Index of the slit.
+
+        Returns:
+            :obj:`dict`: Dictionary with the spatial offset of the
+            region (``spat_offset``), and the science
+            (``sciimg_stack``), inverse-variance (``sciivar_stack``),
+            sky (``skymodel_stack``), bad-pixel mask (``mask_stack``),
+            tilts (``tilts_stack``), wavelength (``waveimg_stack``) and
+            on-slit mask (``thismask_stack``) image stacks, each with
+            shape (nfiles, nspec, nspat_slit).
+        """
+        if self.closed:
+            msgs.error('The spec2d files have been closed.')
+        spat_min, spat_max = self.slit_spat_range(slit_idx)
+        nfiles = len(self)
+        shape = (nfiles, self.nspec, spat_max-spat_min)
+        stacks = {}
+        for key, ext in self.image_ext.items():
+            dtype = float if key in ['tilts', 'waveimg'] \
+                        else (int if key == 'mask' else self.dtype)
+            stacks[key+'_stack'] = np.empty(shape, dtype=dtype)
+            for ifile, hdul in enumerate(self.hdul):
+                # Only the pages of the memory map holding the slit are read
+                stacks[key+'_stack'][ifile] = hdul[self.prefix+ext].data[:,spat_min:spat_max]
+
+        spat = np.arange(spat_min, spat_max)
+        spec = np.arange(self.nspec)
+        stacks['thismask_stack'] = np.zeros(shape, dtype=bool)
+        for ifile, (slits, flexure) in enumerate(zip(self.slits_list, self.spat_flexure)):
+            if slits.mask[slit_idx] > 0:
+                # Masked slits are not included in the slit image
+                continue
+            left, right, _ = slits.select_edges(flexure=flexure)
+            stacks['thismask_stack'][ifile] = (spat[None,:] > left[:,slit_idx,None] - slits.pad) \
+                        & (spat[None,:] < right[:,slit_idx,None] + slits.pad) \
+                        & (spec > slits.specmin[slit_idx])[:,None] \
+                        & (spec < slits.specmax[slit_idx])[:,None]
+        msgs.info('Read {0:.1f} MB of images for slit {1}'.format(
+                    np.sum([s.nbytes for s in stacks.values()])/2**20, slit_idx))
+        stacks['spat_offset'] = spat_min
+        return stacks
 
 
 class CoAdd2D(object):
@@ -164,6 +317,15 @@ class CoAdd2D(object):
         # If smoothing is not input, smooth by 10% of the spectral dimension
         self.sn_smooth_npix = sn_smooth_npix if sn_smooth_npix is not None else 0.1*self.nspec
 
+    def close(self):
+        """
+        Close the spec2d files memory mapped by the image stack.
+
+        This is done by :func:`coadd` once all the slits are coadded.
+        """
+        if self.stack_dict is not None:
+            self.stack_dict['stack'].close()
+
     def optimal_weights(self, slitorderid, objid, const_weights=False):
         """
         Determine optimal weights for 2d coadds. This script grabs the information from SpecObjs list for the
@@ -221,30 +383,33 @@ class CoAdd2D(object):
             embed(header='DEAL WITH bitmask')
 
         coadd_list = []
-        for slit_idx in good_slits:
-            slitord_id = self.stack_dict['slits_list'][0].slitord_id[slit_idx]
-            msgs.info('Performing 2d coadd for slit: {:d}/{:d}'.format(slit_idx, self.nslits - 1))
-            ref_trace_stack = self.reference_trace_stack(slit_idx, offsets=self.offsets,
-                                                         objid=self.objid_bri)
-            thismask_stack = self.stack_dict['slitmask_stack'] == self.stack_dict['slits_list'][0].spat_id[slit_idx]
-            # TODO Can we get rid of this one line simply making the weights returned by parse_weights an
-            # (nslit, nexp) array?
-            # This one line deals with the different weighting strategies between MultiSlit echelle. Otherwise, we
-            # would need to copy this method twice in the subclasses
-            if 'auto_echelle' in self.use_weights:
-                rms_sn, weights = self.optimal_weights(slitord_id, self.objid_bri)
-            else:
-                weights = self.use_weights
-            # Perform the 2d coadd
-            coadd_dict = coadd.compute_coadd2d(ref_trace_stack, self.stack_dict['sciimg_stack'],
-                                           self.stack_dict['sciivar_stack'],
-                                           self.stack_dict['skymodel_stack'],
-                                           self.stack_dict['mask_stack'] == 0,
-                                           self.stack_dict['tilts_stack'],
-                                               thismask_stack,
-                                           self.stack_dict['waveimg_stack'],
-                                           self.wave_grid, weights=weights)
-            coadd_list.append(coadd_dict)
+        try:
+            for slit_idx in good_slits:
+                slitord_id = self.stack_dict['slits_list'][0].slitord_id[slit_idx]
+                msgs.info('Performing 2d coadd for slit: {:d}/{:d}'.format(slit_idx, self.nslits - 1))
+                ref_trace_stack = self.reference_trace_stack(slit_idx, offsets=self.offsets,
+                                                             objid=self.objid_bri)
+                # Only read the images around this slit
+                stacks = self.stack_dict['stack'].slit_stacks(slit_idx)
+                # TODO Can we get rid of this one line simply making the weights returned by parse_weights an
+                # (nslit, nexp) array?
+                # This one line deals with the different weighting strategies between MultiSlit echelle. Otherwise, we
+                # would need to copy this method twice in the subclasses
+                if 'auto_echelle' in self.use_weights:
+                    rms_sn, weights = self.optimal_weights(slitord_id, self.objid_bri)
+                else:
+                    weights = self.use_weights
+                # Perform the 2d coadd
+                coadd_dict = coadd.compute_coadd2d(ref_trace_stack - stacks['spat_offset'],
+                                                   stacks['sciimg_stack'], stacks['sciivar_stack'],
+                                                   stacks['skymodel_stack'], stacks['mask_stack'] == 0,
+                                                   stacks['tilts_stack'], stacks['thismask_stack'],
+                                                   stacks['waveimg_stack'], self.wave_grid,
+                                                   weights=weights)
+                coadd_list.append(coadd_dict)
+        finally:
+            # All the slit regions have been read
+            self.close()
 
         return coadd_list
 
@@ -528,70 +693,37 @@ class CoAdd2D(object):
         """
         Routine to read in required images for 2d coadds given a list of spec2d files.
 
+        The images themselves are not read; they are memory mapped by a
+        :class:`Spec2DStack` and only the region covering each slit is
+        read when it is coadded.
+
         Args:
             spec2d_files: list
                List of spec2d filenames
-            det: int
-               detector in question
 
         Returns:
-            dict: Dictionary containing all the images and keys required
+            dict: Dictionary containing all the objects and keys required
             for perfomring 2d coadds.
         """
-
-        # Get the detector string
-        sdet = parse.get_dnum(self.det, prefix=False)
-
         # Get the master dir
-
         redux_path = os.getcwd()
 
-        # Grab the files
-        #head2d_list = []
+        # Memory map the images and read the slits
+        stack = Spec2DStack(spec2d_files, self.det)
+
+        # Grab the spec1d files
+        # TODO the code should run without a spec1d file, but we need to implement that
         specobjs_list = []
-        slits_list = []
-        nfiles =len(spec2d_files)
-        detectors_list = []
-        for ifile, f in enumerate(spec2d_files):
-            # Spec2d
-            spec2DObj = spec2dobj.Spec2DObj.from_file(f, self.det)
-            # TODO the code should run without a spec1d file, but we need to implement that
-            slits_list.append(spec2DObj.slits)
-            detectors_list.append(spec2DObj.detector)
-            if ifile == 0:
-                sciimg_stack = np.zeros((nfiles,) + spec2DObj.sciimg.shape, dtype=float)
-                waveimg_stack = np.zeros_like(sciimg_stack, dtype=float)
-                tilts_stack = np.zeros_like(sciimg_stack, dtype=float)
-                skymodel_stack = np.zeros_like(sciimg_stack, dtype=float)
-                sciivar_stack = np.zeros_like(sciimg_stack, dtype=float)
-                mask_stack = np.zeros_like(sciimg_stack, dtype=float)
-                slitmask_stack = np.zeros_like(sciimg_stack, dtype=float)
-
-            sciimg_stack[ifile, :, :] = spec2DObj.sciimg
-            waveimg_stack[ifile, :, :] = spec2DObj.waveimg
-            skymodel_stack[ifile, :, :] = spec2DObj.skymodel
-            sciivar_stack[ifile, :, :] = spec2DObj.ivarmodel
-            mask_stack[ifile, :, :] = spec2DObj.bpmmask
-            # TODO -- Set back after done testing
-            slitmask_stack[ifile, :, :] = spec2DObj.slits.slit_img(flexure=spec2DObj.sci_spat_flexure)
-            #slitmask_stack[ifile, :, :] = spec2DObj.slits.slit_img(flexure=0.)
-            _spat_flexure = 0. if spec2DObj.sci_spat_flexure is None else spec2DObj.sci_spat_flexure
-            #_tilt_flexure_shift = _spat_flexure - spec2DObj.tilts.spat_flexure if spec2DObj.tilts.spat_flexure is not None else _spat_flexure
-            tilts_stack[ifile,:,:] = spec2DObj.tilts #.fit2tiltimg(slitmask_stack[ifile, :, :], flexure=_tilt_flexure_shift)
-            # Spec1d
+        for f in spec2d_files:
             spec1d_file = f.replace('spec2d', 'spec1d')
             if os.path.isfile(spec1d_file):
                 sobjs = specobjs.SpecObjs.from_fitsfile(spec1d_file)
                 this_det = sobjs.DET == self.det
                 specobjs_list.append(sobjs[this_det])
 
-        return dict(specobjs_list=specobjs_list, slits_list=slits_list,
-                    slitmask_stack=slitmask_stack,
-                    sciimg_stack=sciimg_stack, sciivar_stack=sciivar_stack,
-                    skymodel_stack=skymodel_stack, mask_stack=mask_stack,
-                    tilts_stack=tilts_stack, waveimg_stack=waveimg_stack,
+        return dict(specobjs_list=specobjs_list, slits_list=stack.slits_list, stack=stack,
                     redux_path=redux_path,
-                    detectors=detectors_list,
+                    detectors=stack.detectors,
                     spectrograph=self.spectrograph.spectrograph,
                     pypeline=self.spectrograph.pypeline)
 
@@ -657,24 +789,27 @@ class MultiSlitCoAdd2D(CoAdd2D):
         objid_bri, slitidx_bri, spatid_bri, snr_bar_bri = self.get_brightest_obj(self.stack_dict['specobjs_list'],
                                                                     self.spat_ids)
         msgs.info('Determining offsets using brightest object on slit: {:d} with avg SNR={:5.2f}'.format(spatid_bri,np.mean(snr_bar_bri)))
-        thismask_stack = self.stack_dict['slitmask_stack'] == spatid_bri
+        # Only read the images around the slit with the brightest object
+        stacks = self.stack_dict['stack'].slit_stacks(slitidx_bri)
+        thismask_stack = stacks['thismask_stack']
         trace_stack_bri = np.zeros((self.nspec, self.nexp))
         # TODO Need to think abbout whether we have multiple tslits_dict for each exposure or a single one
         for iexp in range(self.nexp):
-            trace_stack_bri[:,iexp] = self.stack_dict['slits_list'][iexp].center[:,slitidx_bri]
+            trace_stack_bri[:,iexp] = self.stack_dict['slits_list'][iexp].center[:,slitidx_bri] \
+                                        - stacks['spat_offset']
 #            trace_stack_bri[:,iexp] = (self.stack_dict['tslits_dict_list'][iexp]['slit_left'][:,slitid_bri] +
 #                                       self.stack_dict['tslits_dict_list'][iexp]['slit_righ'][:,slitid_bri])/2.0
         # Determine the wavelength grid that we will use for the current slit/order
-        wave_bins = coadd.get_wave_bins(thismask_stack, self.stack_dict['waveimg_stack'], self.wave_grid)
+        wave_bins = coadd.get_wave_bins(thismask_stack, stacks['waveimg_stack'], self.wave_grid)
         dspat_bins, dspat_stack = coadd.get_spat_bins(thismask_stack, trace_stack_bri)
 
-        sci_list = [self.stack_dict['sciimg_stack'] - self.stack_dict['skymodel_stack']]
+        sci_list = [stacks['sciimg_stack'] - stacks['skymodel_stack']]
         var_list = []
 
         msgs.info('Rebinning Images')
         sci_list_rebin, var_list_rebin, norm_rebin_stack, nsmp_rebin_stack = coadd.rebin2d(
-            wave_bins, dspat_bins, self.stack_dict['waveimg_stack'], dspat_stack, thismask_stack,
-            (self.stack_dict['mask_stack'] == 0), sci_list, var_list)
+            wave_bins, dspat_bins, stacks['waveimg_stack'], dspat_stack, thismask_stack,
+            (stacks['mask_stack'] == 0), sci_list, var_list)
         thismask = np.ones_like(sci_list_rebin[0][0,:,:],dtype=bool)
         nspec_pseudo, nspat_pseudo = thismask.shape
         slit_left = np.full(nspec_pseudo, 0.0)
@@ -6,6 +6,7 @@ Coadding module.
 """
 
 import os
+import warnings
 from pkg_resources import resource_filename
 
 from IPython import embed
@@ -586,42 +587,82 @@ def solve_poly_ratio(wave, flux, ivar, flux_ref, ivar_ref, norder, mask = None,
     return ymult, (result.x, wave_min, wave_max), flux_rescale, ivar_rescale, outmask
 
 
+def _interp_cubic(x_new, x_old, y_old, fill_value=np.nan):
+    """
+    Evaluate cubic-spline interpolants of a set of vectors sampled on a
+    common grid.
+
+    This reproduces ``scipy.interpolate.interp1d(..., kind='cubic',
+    bounds_error=False, fill_value=fill_value)`` for each column of
+    ``y_old``, but builds a single spline for all the columns, which
+    is much faster than constructing one interpolator per vector.
+
+    Args:
+        x_new (`numpy.ndarray`_):
+            Coordinates at which to evaluate the interpolants. Can
+            have any shape.
+        x_old (`numpy.ndarray`_):
+            Coordinates of the data, shape (nold,).
+        y_old (`numpy.ndarray`_):
+            Data to interpolate, shape (nold,) or (nold, ncol).
+        fill_value (:obj:`float`, optional):
+            Value assigned to coordinates outside the range of
+            ``x_old``.
+
+    Returns:
+        `numpy.ndarray`_: The interpolated data with shape
+        ``x_new.shape + y_old.shape[1:]``.
+    """
+    srt = np.argsort(x_old, kind='mergesort')
+    _x_old = x_old[srt]
+    _y_old = y_old[srt].reshape(x_old.size, -1)
+    # As with interp1d, any NaN in the input data returns NaN everywhere
+    nan_col = np.any(np.isnan(_y_old), axis=0)
+    if np.any(nan_col):
+        _y_old = _y_old.copy()
+        _y_old[:, nan_col] = 1.0
+    _x_new = x_new.ravel()
+    y_new = scipy.interpolate.make_interp_spline(_x_old, _y_old, k=3, check_finite=False)(_x_new)
+    y_new[(_x_new < _x_old[0]) | (_x_new > _x_old[-1])] = fill_value
+    y_new[:, nan_col] = np.nan
+    return y_new.reshape(x_new.shape + y_old.shape[1:])
+
+
 def interp_oned(wave_new, wave_old, flux_old, ivar_old, mask_old):
     '''
     Utility routine to perform 1d linear nterpolation of spectra onto a new wavelength grid
 
     Args:
-       wave_new: ndarray, (nspec_new)
+       wave_new: ndarray, (nspec_new) or (nspec_new, nimgs)
             New wavelengths that you want to interpolate onto.
        wave_old: ndarray, (nspec_old)
             Old wavelength grid
-       flux_old: ndarray, (nspec_old)
-            Old flux on the wave_old grid
-       ivar_old: ndarray, (nspec_old)
+       flux_old: ndarray, (nspec_old) or (nspec_old, nexp)
+            Old flux on the wave_old grid. If two dimensional, all
+            spectra share the wave_old grid and wave_new must be one
+            dimensional.
+       ivar_old: ndarray, same shape as flux_old
             Old ivar on the wave_old grid
-       mask_old: ndarray, bool, (nspec_old),
+       mask_old: ndarray, bool, same shape as flux_old
             Old mask on the wave_old grid. True=Good
 
     Returns:
         (1) flux_new: ndarray, (nspec_new,) -- interpolated flux; (2)
         ivar_new: ndarray, (nspec_new,) -- interpolated ivar; (3)
         mask_new: ndarray, bool, (nspec_new,) -- interpolated mask.
-        True=Good.
+        True=Good. For multi-dimensional input, the shape is
+        wave_new.shape + flux_old.shape[1:].
     '''
 
     # Do not interpolate if the wavelength is exactly same with wave_new
     if np.array_equal(wave_new, wave_old):
         return flux_old, ivar_old, mask_old
 
-    # make the mask array to be float, used for interpolation
-    masks_float = mask_old.astype(float)
+    # Interpolate the flux, ivar, and mask (as float) with a single spline
     wave_mask = wave_old > 1.0 # Deal with the zero wavelengths
-    flux_new = scipy.interpolate.interp1d(wave_old[wave_mask], flux_old[wave_mask], kind='cubic',
-                                    bounds_error=False, fill_value=np.nan)(wave_new)
-    ivar_new = scipy.interpolate.interp1d(wave_old[wave_mask], ivar_old[wave_mask], kind='cubic',
-                                    bounds_error=False, fill_value=np.nan)(wave_new)
-    mask_new_tmp = scipy.interpolate.interp1d(wave_old[wave_mask], masks_float[wave_mask], kind='cubic',
-                                        bounds_error=False, fill_value=np.nan)(wave_new)
+    data_old = np.stack((flux_old, ivar_old, mask_old.astype(float)), axis=-1)
+    flux_new, ivar_new, mask_new_tmp = np.moveaxis(_interp_cubic(wave_new, wave_old[wave_mask],
+                                                                 data_old[wave_mask]), -1, 0)
     # Don't allow the ivar to be every less than zero
     ivar_new = (ivar_new > 0.0)*ivar_new
     mask_new = (mask_new_tmp > 0.8) & (ivar_new > 0.0) & np.isfinite(flux_new) & np.isfinite(ivar_new)
@@ -632,6 +673,10 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
     Utility routine to interpolate a set of spectra onto a new
     wavelength grid, wave_new
 
+    All spectra that share the same wavelength grid are interpolated
+    together, such that only one spline is constructed per unique
+    input wavelength grid.
+
     Args:
         wave_new: ndarray, shape (nspec,) or (nspec, nimgs),
              new wavelength grid
@@ -659,9 +704,13 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
             fluxes_inter = np.zeros((wave_new.size, nexp))
             ivars_inter  = np.zeros((wave_new.size, nexp))
             masks_inter  = np.zeros((wave_new.size, nexp), dtype=bool)
-            for ii in range(nexp):
-                fluxes_inter[:, ii], ivars_inter[:, ii], masks_inter[:, ii] = interp_oned(
-                    wave_new, waves[:, ii], fluxes[:, ii], ivars[:, ii], masks[:, ii])
+            # Interpolate all the spectra on the same wavelength grid at once
+            _waves = np.repeat(waves[:,None], nexp, axis=1) if waves.ndim == 1 else waves
+            uniq_waves, grid_indx = np.unique(_waves, axis=1, return_inverse=True)
+            for igrid in range(uniq_waves.shape[1]):
+                indx = grid_indx == igrid
+                fluxes_inter[:, indx], ivars_inter[:, indx], masks_inter[:, indx] = interp_oned(
+                    wave_new, uniq_waves[:, igrid], fluxes[:, indx], ivars[:, indx], masks[:, indx])
 
         return fluxes_inter, ivars_inter, masks_inter
 
@@ -669,14 +718,14 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
     elif (wave_new.ndim == 2):
         if fluxes.ndim != 1:
             msgs.error('If wave_new is two dimensional, all other input arrays must be one dimensional')
-        nexp = wave_new.shape[1]
-        fluxes_inter = np.zeros_like(wave_new)
-        ivars_inter = np.zeros_like(wave_new)
-        masks_inter = np.zeros_like(wave_new, dtype=bool)
-
-        for ii in range(nexp):
-            fluxes_inter[:, ii], ivars_inter[:, ii], masks_inter[:, ii] = interp_oned(
-                wave_new[:, ii], waves, fluxes, ivars, masks)
+        # Evaluate a single set of interpolants at all the new wavelengths
+        fluxes_inter, ivars_inter, masks_inter = interp_oned(wave_new, waves, fluxes, ivars, masks)
+        # Do not interpolate onto wavelengths that are exactly the same as the old ones
+        if wave_new.shape[0] == waves.size:
+            same = np.all(wave_new == waves[:, None], axis=0)
+            fluxes_inter[:, same] = fluxes[:, None]
+            ivars_inter[:, same] = ivars[:, None]
+            masks_inter[:, same] = masks[:, None]
 
         return fluxes_inter, ivars_inter, masks_inter
 
@@ -684,6 +733,47 @@ def interp_spec(wave_new, waves, fluxes, ivars, masks):
         msgs.error('Invalid size for wave_new')
 
 
+def smooth_weights(inarr, gdmsk, sn_smooth_npix):
+    """
+    Smooth a set of weight vectors, used to construct the wavelength
+    dependent weights in :func:`sn_weights`.
+
+    Each vector is median filtered using only its good pixels,
+    interpolated back onto the full pixel grid, and convolved with a
+    Gaussian kernel. Vectors that share the same good-pixel mask are
+    interpolated together, and all vectors are convolved at once.
+
+    Args:
+        inarr (`numpy.ndarray`_):
+            Input weights, shape (nspec, nvec).
+        gdmsk (`numpy.ndarray`_):
+            Boolean good-pixel mask with the same shape as ``inarr``.
+            True=Good.
+        sn_smooth_npix (:obj:`float`):
+            Number of pixels used for the median filter.
+
+    Returns:
+        `numpy.ndarray`_: The smoothed weights with the same shape as
+        ``inarr``.
+    """
+    nspec = inarr.shape[0]
+    spec_vec = np.arange(nspec)
+    sn_med2 = np.zeros_like(inarr, dtype=float)
+    uniq_msk, msk_indx = np.unique(gdmsk, axis=1, return_inverse=True)
+    for imsk in range(uniq_msk.shape[1]):
+        indx = msk_indx == imsk
+        gpm = uniq_msk[:, imsk]
+        sn_med1 = np.stack([utils.fast_running_median(inarr[gpm, ii], sn_smooth_npix)
+                            for ii in np.where(indx)[0]], axis=1)
+        sn_med2[:, indx] = _interp_cubic(spec_vec, spec_vec[gpm], sn_med1, fill_value=0.0)
+    sig_res = np.fmax(sn_smooth_npix/10.0, 3.0)
+    gauss_kernel = convolution.Gaussian1DKernel(sig_res)
+    # Convolve all the vectors at once; this is equivalent to the astropy
+    # convolution with boundary='extend' used for a single vector
+    return scipy.ndimage.convolve1d(sn_med2, gauss_kernel.array/np.sum(gauss_kernel.array), axis=0,
+                                    mode='nearest')
+
+
 def sn_weights(waves, fluxes, ivars, masks, sn_smooth_npix, const_weights=False,
                ivar_weights=False, verbose=False):
 
@@ -744,43 +834,27 @@ def sn_weights(waves, fluxes, ivars, masks, sn_smooth_npix, const_weights=False,
     ## TODO Update with sigma_clipped stats with our new cenfunc and std_func = mad_std
     sn2 = (sn_sigclip.mean(axis=0).compressed())**2 #S/N^2 value for each spectrum
     rms_sn = np.sqrt(sn2) # Root Mean S/N**2 value for all spectra
-    spec_vec = np.arange(nspec)
 
     # TODO: ivar weights is better than SN**2 or const_weights for merging orders. Enventially, we will change it to
     # TODO Should ivar weights be deprecated??
     if ivar_weights:
         if verbose:
             msgs.info("Using ivar weights for merging orders")
-        weights = np.zeros_like(flux_stack) # Should this be zeros_like?
-        for iexp in range(nstack):
-            sn_med1 = utils.fast_running_median(ivar_stack[mask_stack[:, iexp],iexp], sn_smooth_npix)
-            # TODO Change to scipy.interpolate?
-            sn_med2 = scipy.interpolate.interp1d(spec_vec[mask_stack[:, iexp]], sn_med1, kind='cubic',
-                                                 bounds_error=False, fill_value=0.0)(spec_vec)
-            sig_res = np.fmax(sn_smooth_npix/10.0, 3.0)
-            gauss_kernel = convolution.Gaussian1DKernel(sig_res)
-            sn_conv = convolution.convolve(sn_med2, gauss_kernel, boundary='extend')
-            weights[:, iexp] = sn_conv
+        weights = smooth_weights(ivar_stack, mask_stack, sn_smooth_npix)
     else:
         weights = np.zeros_like(flux_stack)
-        for iexp in range(nstack):
-            if (rms_sn[iexp] < 3.0) or const_weights:
-                weight_method = 'constant'
-                weights[:, iexp] = np.full(nspec, np.fmax(sn2[iexp], 1e-2)) # set the minimum  to be 1e-2 to avoid zeros
-            else:
-                weight_method = 'wavelength dependent'
-                # JFH THis line is experimental but it deals with cases where the spectrum drops to zero. We thus
-                # transition to using ivar_weights. This needs more work because the spectra are not rescaled at this point.
-                #sn_val[sn_val[:, iexp] < 1.0, iexp] = ivar_stack[sn_val[:, iexp] < 1.0, iexp]
-
-                sn_med1 = utils.fast_running_median(sn_val[mask_stack[:, iexp],iexp]**2, sn_smooth_npix)
-                sn_med2 = scipy.interpolate.interp1d(spec_vec[mask_stack[:, iexp]], sn_med1, kind = 'cubic',
-                                                     bounds_error = False, fill_value = 0.0)(spec_vec)
-                sig_res = np.fmax(sn_smooth_npix/10.0, 3.0)
-                gauss_kernel = convolution.Gaussian1DKernel(sig_res)
-                sn_conv = convolution.convolve(sn_med2, gauss_kernel, boundary='extend')
-                weights[:, iexp] = sn_conv
-            if verbose:
+        const = (rms_sn < 3.0) | const_weights
+        # set the minimum  to be 1e-2 to avoid zeros
+        weights[:, const] = np.fmax(sn2[const], 1e-2)[None,:]
+        if np.any(np.invert(const)):
+            # JFH This line is experimental but it deals with cases where the spectrum drops to zero. We thus
+            # transition to using ivar_weights. This needs more work because the spectra are not rescaled at this point.
+            #sn_val[sn_val[:, iexp] < 1.0, iexp] = ivar_stack[sn_val[:, iexp] < 1.0, iexp]
+            weights[:, np.invert(const)] = smooth_weights(sn_val[:, np.invert(const)]**2,
+                                                          mask_stack[:, np.invert(const)], sn_smooth_npix)
+        if verbose:
+            for iexp in range(nstack):
+                weight_method = 'constant' if const[iexp] else 'wavelength dependent'
                 msgs.info('Using {:s} weights for coadding, S/N '.format(weight_method) +
                           '= {:4.2f}, weight = {:4.2f} for {:}th exposure'.format(
                               rms_sn[iexp], np.mean(weights[:, iexp]), iexp))
@@ -908,10 +982,13 @@ def robust_median_ratio(flux, ivar, flux_ref, ivar_ref, mask=None, mask_ref=None
     best if the reference spectrum is chosen to be the higher S/N ratio spectrum, i.e. a preliminary stack that you want
     to scale each exposure to match. Note that the flux and flux_ref need to be on the same wavelength grid!!
 
+    A set of spectra can be passed as (nspec, nexp) arrays, in which case the ratios for all of them are computed at
+    once. The reference can then either be a single (nspec,) spectrum or a set of (nspec, nexp) spectra.
+
     Args:
         wave: ndarray, (nspec,)
             wavelengths grid for the spectra
-        flux: ndarray, (nspec,)
+        flux: ndarray, (nspec,) or (nspec, nexp)
             spectrum that will be rescaled.
         ivar: ndarray, (nspec,)
             inverse variance for the spectrum that will be rescaled.
@@ -941,7 +1018,8 @@ def robust_median_ratio(flux, ivar, flux_ref, ivar_ref, mask=None, mask_ref=None
             and the code returns ratio = 1.0. We also use this parameter to define the set of pixels (determined from
             the reference spectrum) to compare for the rescaling.
     Returns:
-        float: the number that must be multiplied into flux in order to get it to match up with flux_ref
+        float: the number that must be multiplied into flux in order to get it to match up with flux_ref. If flux is
+        two dimensional, an ndarray, (nexp,) with the ratio for each spectrum is returned.
     """
 
     ## Mask for reference spectrum and your spectrum
@@ -950,48 +1028,61 @@ def robust_median_ratio(flux, ivar, flux_ref, ivar_ref, mask=None, mask_ref=None
     if mask_ref is None:
         mask_ref = ivar_ref > 0.0
 
-    nspec = flux.size
-    snr_ref = flux_ref * np.sqrt(ivar_ref)
-    snr_ref_best = np.fmax(np.percentile(snr_ref[mask_ref], ref_percentile),snr_do_not_rescale)
-    calc_mask = (snr_ref > snr_ref_best) & mask_ref & mask
-
-    snr_resc = flux*np.sqrt(ivar)
-    snr_resc_med = np.median(snr_resc[calc_mask])
-
-    if (np.sum(calc_mask) > min_good*nspec) & (snr_resc_med > snr_do_not_rescale):
+    # Work with (nspec, nexp) arrays so that all spectra are treated at once
+    nspec = flux.shape[0]
+    _flux, _ivar, _mask = [np.reshape(a, (nspec, -1)) for a in (flux, ivar, mask)]
+    nexp = _flux.shape[1]
+    _flux_ref, _ivar_ref, _mask_ref = [np.broadcast_to(np.reshape(a, (nspec, -1)), (nspec, nexp))
+                                       for a in (flux_ref, ivar_ref, mask_ref)]
+
+    snr_ref = _flux_ref * np.sqrt(_ivar_ref)
+    with warnings.catch_warnings():
+        # Masked percentiles and medians of spectra without any good pixels are NaN
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        snr_ref_best = np.fmax(np.nanpercentile(np.where(_mask_ref, snr_ref, np.nan), ref_percentile, axis=0),
+                               snr_do_not_rescale)
+        calc_mask = (snr_ref > snr_ref_best[None,:]) & _mask_ref & _mask
+
+        snr_resc = _flux*np.sqrt(_ivar)
+        snr_resc_med = np.nanmedian(np.where(calc_mask, snr_resc, np.nan), axis=0)
+
+    ngood = np.sum(calc_mask, axis=0)
+    rescale = (ngood > min_good*nspec) & (snr_resc_med > snr_do_not_rescale)
+    ratio = np.ones(nexp)
+    if np.any(rescale):
         # Take the best part of the higher SNR reference spectrum
         sigclip = stats.SigmaClip(sigma=sigrej, maxiters=maxiters, cenfunc='median', stdfunc=utils.nan_mad_std)
 
-        flux_ref_ma = np.ma.MaskedArray(flux_ref, np.invert(calc_mask))
-        flux_ref_clipped, lower, upper = sigclip(flux_ref_ma, masked=True, return_bounds=True)
-        mask_ref_clipped = np.invert(flux_ref_clipped.mask)  # mask_stack = True are good values
+        flux_ref_ma = np.ma.MaskedArray(_flux_ref[:,rescale], np.invert(calc_mask[:,rescale]))
+        flux_ref_clipped, lower, upper = sigclip(flux_ref_ma, masked=True, return_bounds=True, axis=0)
+        mask_ref_clipped = np.invert(np.ma.getmaskarray(flux_ref_clipped))  # mask_stack = True are good values
 
-        flux_ma = np.ma.MaskedArray(flux_ref, np.invert(calc_mask))
-        flux_clipped, lower, upper = sigclip(flux_ma, masked=True, return_bounds=True)
-        mask_clipped = np.invert(flux_clipped.mask)  # mask_stack = True are good values
+        flux_ma = np.ma.MaskedArray(_flux_ref[:,rescale], np.invert(calc_mask[:,rescale]))
+        flux_clipped, lower, upper = sigclip(flux_ma, masked=True, return_bounds=True, axis=0)
+        mask_clipped = np.invert(np.ma.getmaskarray(flux_clipped))  # mask_stack = True are good values
 
         new_mask = mask_ref_clipped & mask_clipped
 
-        flux_ref_median = np.median(flux_ref[new_mask])
-        flux_dat_median = np.median(flux[new_mask])
+        flux_ref_median = np.nanmedian(np.where(new_mask, _flux_ref[:,rescale], np.nan), axis=0)
+        flux_dat_median = np.nanmedian(np.where(new_mask, _flux[:,rescale], np.nan), axis=0)
 
-        if (flux_ref_median < 0.0) or (flux_dat_median < 0.0):
-            msgs.warn('Negative median flux found. Not rescaling')
-            ratio = 1.0
-        else:
-            if verbose:
-                msgs.info('Used {:} good pixels for computing median flux ratio'.format(np.sum(new_mask)))
-            ratio = np.fmax(np.fmin(flux_ref_median/flux_dat_median, max_factor), 1.0/max_factor)
-    else:
-        if (np.sum(calc_mask) <= min_good*nspec):
-            msgs.warn('Found only {:} good pixels for computing median flux ratio.'.format(np.sum(calc_mask))
+        for ii, iexp in enumerate(np.where(rescale)[0]):
+            if (flux_ref_median[ii] < 0.0) or (flux_dat_median[ii] < 0.0):
+                msgs.warn('Negative median flux found. Not rescaling')
+            else:
+                if verbose:
+                    msgs.info('Used {:} good pixels for computing median flux ratio'.format(np.sum(new_mask[:,ii])))
+                ratio[iexp] = np.fmax(np.fmin(flux_ref_median[ii]/flux_dat_median[ii], max_factor), 1.0/max_factor)
+
+    for iexp in np.where(np.invert(rescale))[0]:
+        if (ngood[iexp] <= min_good*nspec):
+            msgs.warn('Found only {:} good pixels for computing median flux ratio.'.format(ngood[iexp])
             + msgs.newline() + 'No median rescaling applied')
-        if (snr_resc_med <= snr_do_not_rescale):
-            msgs.warn('Median flux ratio of pixels in reference spectrum {:} <= snr_do_not_rescale = {:}.'.format(snr_resc_med, snr_do_not_rescale)
+        if (snr_resc_med[iexp] <= snr_do_not_rescale):
+            msgs.warn('Median flux ratio of pixels in reference spectrum {:} <= snr_do_not_rescale = {:}.'.format(snr_resc_med[iexp], snr_do_not_rescale)
                       + msgs.newline() + 'No median rescaling applied')
-        ratio = 1.0
 
-    return ratio
+    return ratio if flux.ndim > 1 else ratio[0]
 
 def order_median_scale(waves, fluxes, ivars, masks, min_good=0.05, maxiters=5, max_factor=10., sigrej=3,
                        debug=False, show=False):
@@ -1107,6 +1198,34 @@ def order_median_scale(waves, fluxes, ivars, masks, min_good=0.05, maxiters=5, m
     return fluxes_new, ivars_new, order_ratios
 
 
+def choose_scale_method(sn, scale_method='auto', sn_min_polyscale=2.0, sn_min_medscale=0.5):
+    """
+    Decide on the method used to rescale a spectrum given its S/N ratio.
+
+    Args:
+        sn (float):
+            S/N of the spectrum that is being scaled. This can be computed by sn_weights.
+        scale_method (str):
+            scale method, str, default='auto'. Options are auto,
+            poly, median, none, or hand. Anything other than auto is
+            returned unchanged.
+        sn_min_polyscale: float, default=2.0
+            maximum SNR for perforing median scaling
+        sn_min_medscale: float, default=0.5
+            minimum SNR for perforing median scaling
+
+    Returns:
+        str: The scale method to use.
+    """
+    if scale_method != 'auto':
+        return scale_method
+    if sn > sn_min_polyscale:
+        return 'poly'
+    if sn > sn_min_medscale:
+        return 'median'
+    return 'none'
+
+
 def scale_spec(wave, flux, ivar, sn, wave_ref, flux_ref, ivar_ref, mask=None, mask_ref=None, scale_method='auto', min_good=0.05,
                ref_percentile=70.0, maxiters=5, sigrej=3, max_median_factor=10.0,
                npoly=None, hand_scale=None, sn_min_polyscale=2.0, sn_min_medscale=0.5, debug=False, show=False):
@@ -1188,15 +1307,8 @@ def scale_spec(wave, flux, ivar, sn, wave_ref, flux_ref, ivar_ref, mask=None, ma
     #rms_sn, weights = sn_weights(wave, flux, ivar, mask, sn_smooth_npix)
     #sn = np.sqrt(np.mean(rms_sn**2))
 
-    if scale_method == 'auto':
-        if sn > sn_min_polyscale:
-            method_used = 'poly'
-        elif ((sn <= sn_min_polyscale) and (sn > sn_min_medscale)):
-            method_used = 'median'
-        else:
-            method_used = 'none'
-    else:
-        method_used = scale_method
+    method_used = choose_scale_method(sn, scale_method=scale_method, sn_min_polyscale=sn_min_polyscale,
+                                      sn_min_medscale=sn_min_medscale)
 
     # Estimate the scale factor
     if method_used == 'poly':
@@ -1310,24 +1422,35 @@ def compute_stack(wave_grid, waves, fluxes, ivars, masks, weights, min_weight=1e
     vars_flat = utils.inverse(ivars_flat)
     weights_flat = weights[ubermask].flatten()
 
+    # Find the wavelength bin of each pixel once; the bins follow the np.histogram convention that the last bin
+    # includes its right edge
+    ngrid = wave_grid.size - 1
+    bin_flat = np.searchsorted(wave_grid, waves_flat, side='right') - 1
+    bin_flat[waves_flat == wave_grid[-1]] = ngrid - 1
+    inbin = (bin_flat >= 0) & (bin_flat < ngrid)
+    bin_flat = bin_flat[inbin]
+
+    def bin_sum(vals=None):
+        return np.bincount(bin_flat, weights=None if vals is None else vals[inbin], minlength=ngrid)
+
     # Counts how many pixels in each wavelength bin
-    nused, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False)
+    nused = bin_sum().astype(int)
 
     # Calculate the summed weights for the denominator
-    weights_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=weights_flat)
+    weights_total = bin_sum(weights_flat)
 
     # Calculate the stacked wavelength
     ## TODO: JFH Made the minimum weight 1e-8 from 1e-4. I'm not sure what this min_weight is necessary for, or
     # is achieving FW.
-    wave_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=waves_flat*weights_flat)
+    wave_stack_total = bin_sum(waves_flat*weights_flat)
     wave_stack = (weights_total > min_weight)*wave_stack_total/(weights_total+(weights_total==0.))
 
     # Calculate the stacked flux
-    flux_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=fluxes_flat*weights_flat)
+    flux_stack_total = bin_sum(fluxes_flat*weights_flat)
     flux_stack = (weights_total > min_weight)*flux_stack_total/(weights_total+(weights_total==0.))
 
     # Calculate the stacked ivar
-    var_stack_total, wave_edges = np.histogram(waves_flat,bins=wave_grid,density=False,weights=vars_flat*weights_flat**2)
+    var_stack_total = bin_sum(vars_flat*weights_flat**2)
     var_stack = (weights_total > min_weight)*var_stack_total/(weights_total+(weights_total==0.))**2
     ivar_stack = utils.inverse(var_stack)
 
@@ -1701,59 +1824,30 @@ def update_errors(fluxes, ivars, masks, fluxes_stack, ivars_stack, masks_stack,
     else:
         nexp = np.shape(fluxes)[1]
 
-    outchi = np.zeros_like(ivars)
-    maskchi = np.zeros_like(outchi,dtype=bool)
-    rejivars = np.zeros_like(outchi)
-    sigma_corrs = np.zeros(nexp)
-    outmasks = np.copy(masks)
+    # var_tot = total variance of the quantity (fluxes - fluxes_stack), i.e. the quadrature sum of the two variances
+    var_tot = utils.inverse(ivars_stack) + utils.inverse(ivars)
+    mask_tot = masks & masks_stack
+    ivar_tot = utils.inverse(var_tot)
 
-    # Loop on images to update noise model for rejection
-    for iexp in range(nexp):
-        if fluxes.ndim>1:
-            # Grab the spectrum
-            thisflux = fluxes[:, iexp]
-            thisivar = ivars[:, iexp]
-            thismask = outmasks[:,iexp]
-            # Grab the stack interpolated with the same grid as the current exposure
-            thisflux_stack = fluxes_stack[:, iexp]
-            thisvar_stack = utils.inverse(ivars_stack[:, iexp])
-            thismask_stack = masks_stack[:, iexp]
-        else:
-            thisflux = fluxes
-            thisivar = ivars
-            thismask = outmasks
-            # Grab the stack interpolated with the same grid as the current exposure
-            thisflux_stack = fluxes_stack
-            thisvar_stack = utils.inverse(ivars_stack)
-            thismask_stack = masks_stack
-
-        # var_tot = total variance of the quantity (fluxes - fluxes_stack), i.e. the quadrature sum of the two variances
-        var_tot = thisvar_stack + utils.inverse(thisivar)
-        mask_tot = thismask & thismask_stack
-        ivar_tot = utils.inverse(var_tot)
-
-        # Impose the S/N clipping threshold before computing chi and renormalizing the errors
-        ivar_clip = mask_tot*utils.clip_ivar(thisflux_stack, ivar_tot, sn_clip, mask=mask_tot)
-        # TODO Do we need the offset code to re-center the chi? If so add it right here into the chi
-        chi = np.sqrt(ivar_clip)*(thisflux - thisflux_stack)
-        # Adjust errors to reflect the statistics of the distribution of errors. This fixes cases where the
-        # the noise model is not quite right
-        this_sigma_corr, igood = renormalize_errors(chi, mask_tot, clip=6.0, max_corr=5.0, title=title, debug=debug)
-        ivar_tot_corr = ivar_clip/this_sigma_corr ** 2
-        # TODO is this correct below? JFH Thinks no
-        #ivar_cap = utils.clip_ivar(thisflux_stack, ivar_tot_corr, sn_clip, mask=mask_tot)
-        #ivar_cap = np.minimum(ivar_tot_corr, (sn_clip/(thisflux_stack + (thisflux_stack <= 0.0))) ** 2)
-        if fluxes.ndim>1:
-            sigma_corrs[iexp] = this_sigma_corr
-            rejivars[:, iexp] = ivar_tot_corr
-            outchi[:, iexp] = chi
-            maskchi[:, iexp] = igood
-        else:
-            sigma_corrs = np.array([this_sigma_corr])
-            rejivars = ivar_tot_corr
-            outchi = chi
-            maskchi = igood
+    # Impose the S/N clipping threshold before computing chi and renormalizing the errors
+    ivar_clip = mask_tot*utils.clip_ivar(fluxes_stack, ivar_tot, sn_clip, mask=mask_tot)
+    # TODO Do we need the offset code to re-center the chi? If so add it right here into the chi
+    outchi = np.sqrt(ivar_clip)*(fluxes - fluxes_stack)
 
+    # Adjust errors to reflect the statistics of the distribution of errors. This fixes cases where the
+    # the noise model is not quite right
+    _outchi = outchi.reshape(outchi.shape[0], nexp)
+    _mask_tot = mask_tot.reshape(outchi.shape[0], nexp)
+    sigma_corrs = np.zeros(nexp)
+    maskchi = np.zeros_like(_mask_tot)
+    for iexp in range(nexp):
+        sigma_corrs[iexp], maskchi[:, iexp] = renormalize_errors(_outchi[:, iexp], _mask_tot[:, iexp], clip=6.0,
+                                                                 max_corr=5.0, title=title, debug=debug)
+    maskchi = maskchi.reshape(outchi.shape)
+    rejivars = ivar_clip/(sigma_corrs**2 if fluxes.ndim > 1 else sigma_corrs[0]**2)
+    # TODO is this correct below? JFH Thinks no
+    #ivar_cap = utils.clip_ivar(thisflux_stack, ivar_tot_corr, sn_clip, mask=mask_tot)
+    #ivar_cap = np.minimum(ivar_tot_corr, (sn_clip/(thisflux_stack + (thisflux_stack <= 0.0))) ** 2)
 
     return rejivars, sigma_corrs, outchi, maskchi
 
@@ -2013,15 +2107,46 @@ def scale_spec_stack(wave_grid, waves, fluxes, ivars, masks, sn, weights, ref_pe
     fluxes_scale = np.zeros_like(fluxes)
     ivars_scale = np.zeros_like(ivars)
     scales = np.zeros_like(fluxes)
-    scale_method_used = []
+    scale_method_used = [choose_scale_method(sn[iexp], scale_method=scale_method, sn_min_polyscale=sn_min_polyscale,
+                                             sn_min_medscale=sn_min_medscale) for iexp in range(nexp)]
+    for iexp in range(nexp):
+        if scale_method_used[iexp] not in ['poly', 'median', 'hand', 'none']:
+            msgs.error("Scale method not recognized! Check documentation for available options")
+        if scale_method_used[iexp] == 'hand' and (hand_scale is None or hand_scale[iexp] is None):
+            msgs.error("Need to provide hand_scale parameter, single value")
+
+    # Scale factors that are constant with wavelength are determined for all exposures at once
+    med_scale = np.ones(nexp)
+    median = np.array(scale_method_used) == 'median'
+    if np.any(median):
+        # Interpolate the stack onto the wavelengths of all exposures at once
+        flux_stack_nat, ivar_stack_nat, mask_stack_nat = interp_spec(
+            waves[:, median], wave_stack, flux_stack, ivar_stack, mask_stack)
+        med_scale[median] = robust_median_ratio(fluxes[:, median], ivars[:, median], flux_stack_nat, ivar_stack_nat,
+                                                mask=masks[:, median], mask_ref=mask_stack_nat,
+                                                ref_percentile=ref_percentile, maxiters=maxiter_scale,
+                                                sigrej=sigrej_scale)
+    hand = np.array(scale_method_used) == 'hand'
+    if np.any(hand):
+        med_scale[hand] = np.asarray(hand_scale)[hand]
+    const = np.invert(np.array(scale_method_used) == 'poly')
+    scales[:, const] = med_scale[None,const]
+    fluxes_scale[:, const] = fluxes[:, const]*med_scale[None,const]
+    ivars_scale[:, const] = ivars[:, const]/med_scale[None,const]**2
+
     for iexp in range(nexp):
-        hand_scale_iexp = None if hand_scale is None else hand_scale[iexp]
-        fluxes_scale[:, iexp], ivars_scale[:, iexp], scales[:, iexp], scale_method_iexp = scale_spec(
+        if const[iexp]:
+            if show:
+                scale_spec_qa(waves[:, iexp], fluxes[:, iexp], ivars[:, iexp], wave_stack, flux_stack, ivar_stack,
+                              scales[:, iexp], scale_method_used[iexp], mask=masks[:, iexp], mask_ref=mask_stack,
+                              title='Scaling Applied to the Data')
+            continue
+        # The polynomial scaling is fit separately for each exposure
+        fluxes_scale[:, iexp], ivars_scale[:, iexp], scales[:, iexp], _ = scale_spec(
             waves[:, iexp], fluxes[:, iexp], ivars[:, iexp], sn[iexp], wave_stack, flux_stack, ivar_stack,
             mask=masks[:, iexp], mask_ref=mask_stack, ref_percentile=ref_percentile, maxiters=maxiter_scale,
-            sigrej=sigrej_scale, scale_method=scale_method, hand_scale=hand_scale_iexp, sn_min_polyscale=sn_min_polyscale,
+            sigrej=sigrej_scale, scale_method='poly', sn_min_polyscale=sn_min_polyscale,
             sn_min_medscale=sn_min_medscale, debug=debug, show=show)
-        scale_method_used.append(scale_method_iexp)
 
     return fluxes_scale, ivars_scale, scales, scale_method_used
 
@@ -2919,11 +3044,45 @@ def compute_coadd2d(ref_trace_stack, sciimg_stack, sciivar_stack, skymodel_stack
 
 
 
+def rebin2d_indices(spec_bins, spat_bins, spec, spat):
+    """
+    Find the flattened index of the 2D bin holding each sample.
+
+    The bins are identical to those used by `numpy.histogram2d`_: each
+    bin includes its lower edge, except for the last bin in each
+    dimension, which also includes its upper edge.  Samples outside the
+    bins (or NaN) are flagged.
+
+    Args:
+        spec_bins (`numpy.ndarray`_):
+            Edges of the spectral bins, shape = (nspec_rebin+1,).
+        spat_bins (`numpy.ndarray`_):
+            Edges of the spatial bins, shape = (nspat_rebin+1,).
+        spec (`numpy.ndarray`_):
+            Spectral coordinate of each sample.
+        spat (`numpy.ndarray`_):
+            Spatial coordinate of each sample.
+
+    Returns:
+        tuple: The index of each sample in the flattened array with
+        shape (nspec_rebin, nspat_rebin), and a boolean array selecting
+        the samples that fall in a bin.  The index of samples outside
+        the bins is meaningless.
+    """
+    ispec = np.searchsorted(spec_bins, spec, side='right')
+    ispec[spec == spec_bins[-1]] -= 1
+    ispat = np.searchsorted(spat_bins, spat, side='right')
+    ispat[spat == spat_bins[-1]] -= 1
+    inbin = (ispec > 0) & (ispec < spec_bins.size) & (ispat > 0) & (ispat < spat_bins.size)
+    return (ispec - 1)*(spat_bins.size - 1) + ispat - 1, inbin
+
+
 def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack, inmask_stack, sci_list, var_list):
     """
     Rebin a set of images and propagate variance onto a new spectral and spatial grid. This routine effectively
-    "recitifies" images using np.histogram2d which is extremely fast and effectiveluy performs
-    nearest grid point interpolation.
+    "recitifies" images using the same bins as np.histogram2d, which effectively performs nearest grid point
+    interpolation. The bin of each pixel is computed once per image (see :func:`rebin2d_indices`) and all the
+    images are accumulated with np.bincount.
 
     Args:
         spec_bins: float ndarray, shape = (nspec_rebin)
@@ -2989,34 +3148,36 @@ def rebin2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
         var_list_out.append(np.zeros(shape_out))
 
     for img in range(nimgs):
-        # This fist image is purely for bookeeping purposes to determine the number of times each pixel
-        # could have been sampled
+        # The bin of each on-slit pixel is computed once and used for
+        # all the rebinned images
         thismask = thismask_stack[img, :, :]
-        spec_rebin_this = waveimg_stack[img, :, :][thismask]
-        spat_rebin_this = spatimg_stack[img, :, :][thismask]
-
-        nsmp_rebin_stack[img, :, :], spec_edges, spat_edges = np.histogram2d(spec_rebin_this, spat_rebin_this,
-                                                               bins=[spec_bins, spat_bins], density=False)
+        bin_indx, inbin = rebin2d_indices(spec_bins, spat_bins, waveimg_stack[img, :, :][thismask],
+                                          spatimg_stack[img, :, :][thismask])
 
-        finmask = thismask & inmask_stack[img,:,:]
-        spec_rebin = waveimg_stack[img, :, :][finmask]
-        spat_rebin = spatimg_stack[img, :, :][finmask]
-        norm_img, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                          bins=[spec_bins, spat_bins], density=False)
+        # This fist image is purely for bookeeping purposes to determine the number of times each pixel
+        # could have been sampled
+        nsmp_rebin_stack[img, :, :] = np.bincount(bin_indx[inbin], minlength=nspec_rebin*nspat_rebin
+                                                  ).reshape(nspec_rebin, nspat_rebin)
+
+        # On-slit, unmasked pixels that fall in one of the bins
+        gpm = inmask_stack[img, :, :][thismask] & inbin
+        finmask = thismask.copy()
+        finmask[thismask] = gpm
+        fin_indx = bin_indx[gpm]
+        norm_img = np.bincount(fin_indx, minlength=nspec_rebin*nspat_rebin
+                               ).reshape(nspec_rebin, nspat_rebin).astype(float)
         norm_rebin_stack[img, :, :] = norm_img
 
         # Rebin the science images
         for indx, sci in enumerate(sci_list):
-            weigh_sci, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                               bins=[spec_bins, spat_bins], density=False,
-                                                               weights=sci[img,:,:][finmask])
+            weigh_sci = np.bincount(fin_indx, weights=sci[img, :, :][finmask],
+                                    minlength=nspec_rebin*nspat_rebin).reshape(nspec_rebin, nspat_rebin)
             sci_list_out[indx][img, :, :] = (norm_img > 0.0) * weigh_sci/(norm_img + (norm_img == 0.0))
 
         # Rebin the variance images, note the norm_img**2 factor for correct error propagation
         for indx, var in enumerate(var_list):
-            weigh_var, spec_edges, spat_edges = np.histogram2d(spec_rebin, spat_rebin,
-                                                               bins=[spec_bins, spat_bins], density=False,
-                                                               weights=var[img, :, :][finmask])
+            weigh_var = np.bincount(fin_indx, weights=var[img, :, :][finmask],
+                                    minlength=nspec_rebin*nspat_rebin).reshape(nspec_rebin, nspat_rebin)
             var_list_out[indx][img, :, :] = (norm_img > 0.0)*weigh_var/(norm_img + (norm_img == 0.0))**2
 
 
@@ -3112,7 +3273,7 @@ def update_sync_dict(sync_dict, in_indx, in_files, in_names, sync_toler=3):
     sync_dict[indx]['files'] += files[keep].tolist()
     sync_dict[indx]['names'] += names[keep].tolist()
 
-def sync_pair(spec1_file, spec2_file, det, sync_dict=None, sync_toler=3, debug=False):
+def sync_pair(spec1_file, spec2_file, det, sync_dict=None, sync_toler=3, debug=False, spec1=None, spec2=None):
     """
     Routine to sync up spectra in a pair of :class:`pypeit.specobjs.Specobjs`
     objects.
@@ -3124,6 +3285,10 @@ def sync_pair(spec1_file, spec2_file, det, sync_dict=None, sync_toler=3, debug=F
         sync_dict (dict):
         sync_toler (int):
         debug:
+        spec1 (:class:`pypeit.specobjs.SpecObjs`, optional):
+            Spectra already read from spec1_file. If None, read from the file.
+        spec2 (:class:`pypeit.specobjs.SpecObjs`, optional):
+            Spectra already read from spec2_file. If None, read from the file.
 
     Returns:
         dict:  The dict with the book-keeping
@@ -3136,8 +3301,8 @@ def sync_pair(spec1_file, spec2_file, det, sync_dict=None, sync_toler=3, debug=F
     if sync_dict is None:
         sync_dict = {}
     # Load spectra, restricted by det
-    spec1 = specobjs.SpecObjs.from_fitsfile(spec1_file, det=det)
-    spec2 = specobjs.SpecObjs.from_fitsfile(spec2_file, det=det)
+    spec1 = specobjs.SpecObjs.from_fitsfile(spec1_file, det=det) if spec1 is None else spec1[spec1.DET == det]
+    spec2 = specobjs.SpecObjs.from_fitsfile(spec2_file, det=det) if spec2 is None else spec2[spec2.DET == det]
 
     # Max spat
     maxspat = int(np.max(np.concatenate([spec1.SPAT_PIXPOS, spec2.SPAT_PIXPOS]))) + 10
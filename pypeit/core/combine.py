@@ -141,7 +141,10 @@ def weighted_combine(weights, sci_list, var_list, inmask_stack,
         mask_stack = inmask_stack  # mask_stack = True are good values
 
     nused = np.sum(mask_stack, axis=0)
-    weights_stack = broadcast_weights(weights, shape)
+    # Keep the precision of the input images (e.g., float32) for the
+    # weighted sums
+    weights_stack = broadcast_weights(weights, shape).astype(np.result_type(*sci_list, *var_list),
+                                                             copy=False)
     weights_mask_stack = weights_stack*mask_stack
 
     weights_sum = np.sum(weights_mask_stack, axis=0)
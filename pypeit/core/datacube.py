@@ -0,0 +1,438 @@
+"""
+Module containing routines used to resample slit-based IFU data onto a
+datacube.
+
+Each good detector pixel is assigned a footprint in the slit coordinate
+system (the slice it belongs to, its fractional position along the
+slice, and its wavelength), which is then projected onto the sky and
+drizzled onto the (RA, Dec, wavelength) voxels of the cube.  The
+fraction of each detector pixel that falls in each voxel is stored in
+a sparse matrix, such that the resampling of any image taken with the
+same calibrations and pointing is a single sparse matrix-vector
+product.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import numpy as np
+from scipy import sparse
+
+from astropy import wcs
+
+from pypeit import msgs
+
+from IPython import embed
+
+
+def slit_fraction(spec, spat, slit_idx, left, right, align_traces=None, locations=None):
+    """
+    Compute the fractional position of a set of detector positions
+    along their slit.
+
+    If alignment traces are provided, the fractional position is
+    interpolated (and extrapolated beyond the outermost traces) between
+    the traces, which follow constant positions on the sky; otherwise,
+    the position is measured with respect to the slit edges.
+
+    Args:
+        spec (`numpy.ndarray`_):
+            Integer spectral pixel of each position.
+        spat (`numpy.ndarray`_):
+            Spatial (floating-point) pixel coordinate of each
+            position.
+        slit_idx (`numpy.ndarray`_):
+            Index of the slit that each position falls in.
+        left (`numpy.ndarray`_):
+            Left slit edges, shape (nspec, nslits).
+        right (`numpy.ndarray`_):
+            Right slit edges, shape (nspec, nslits).
+        align_traces (`numpy.ndarray`_, optional):
+            Alignment traces, shape (nspec, nalign, nslits); see
+            :class:`pypeit.alignframe.Alignments`.
+        locations (array-like, optional):
+            Fractional slit position of each alignment trace.  Must be
+            provided with ``align_traces``.
+
+    Returns:
+        `numpy.ndarray`_: Fractional position along the slit (0 at
+        the left edge and 1 at the right edge).
+    """
+    if align_traces is None or align_traces.shape[1] < 2:
+        _left = left[spec, slit_idx]
+        return (spat - _left) / (right[spec, slit_idx] - _left)
+
+    if locations is None or len(locations) != align_traces.shape[1]:
+        msgs.error('Must provide the fractional location of each alignment trace.')
+    srt = np.argsort(locations)
+    _locations = np.asarray(locations, dtype=float)[srt]
+    traces = align_traces[spec, :, slit_idx][:, srt]
+    # Index of the alignment trace to the right of each position,
+    # limited such that positions outside the traces are extrapolated
+    # from the outermost pair
+    indx = np.clip(np.sum(spat[:, None] > traces, axis=1), 1, traces.shape[1]-1)
+    x0 = np.take_along_axis(traces, indx[:, None]-1, axis=1)[:, 0]
+    x1 = np.take_along_axis(traces, indx[:, None], axis=1)[:, 0]
+    return _locations[indx-1] + (spat - x0) * (_locations[indx] - _locations[indx-1]) / (x1 - x0)
+
+
+def pixel_footprints(waveimg, slitid_img, spat_id, left, right, gpm=None, align_traces=None,
+                     locations=None):
+    """
+    Construct the footprint of each detector pixel in the slit
+    coordinate system.
+
+    Args:
+        waveimg (`numpy.ndarray`_):
+            Wavelength of each detector pixel.
+        slitid_img (`numpy.ndarray`_):
+            Image with the ``spat_id`` of the slit that each pixel
+            falls in; pixels not in any slit are -1 (see
+            :func:`pypeit.slittrace.SlitTraceSet.slit_img`).
+        spat_id (`numpy.ndarray`_):
+            The ``spat_id`` of all slits, ordered by their spatial
+            position, which sets the index of each slice.
+        left (`numpy.ndarray`_):
+            Left slit edges, shape (nspec, nslits).
+        right (`numpy.ndarray`_):
+            Right slit edges, shape (nspec, nslits).
+        gpm (`numpy.ndarray`_, optional):
+            Pixels to include.  If None, all pixels with a positive
+            wavelength are included.  Pixels excluded here cannot be
+            resampled with the weights constructed from the
+            footprints; pixels that are only bad in some exposures
+            should instead be masked by
+            :func:`accumulate_cube`.
+        align_traces (`numpy.ndarray`_, optional):
+            Alignment traces; see :func:`slit_fraction`.
+        locations (array-like, optional):
+            Fractional slit position of each alignment trace.
+
+    Returns:
+        :obj:`dict`: Dictionary with the flattened index of each
+        included pixel in the detector image (``pix``), the index of
+        its slice (``slice``), its fractional position along the slice
+        and its extent in the same units (``frac`` and ``dfrac``), and
+        its wavelength and extent in wavelength (``wave`` and
+        ``dwave``).  The shape of the detector image and number of
+        slices are provided by ``shape`` and ``nslice``.
+    """
+    nspec = waveimg.shape[0]
+    _gpm = (slitid_img >= 0) & (waveimg > 0)
+    if gpm is not None:
+        _gpm &= gpm
+    spec, spat = np.where(_gpm)
+    slit_idx = np.searchsorted(spat_id, slitid_img[spec, spat])
+    if np.any(slit_idx >= spat_id.size) or np.any(spat_id[slit_idx] != slitid_img[spec, spat]):
+        msgs.error('Slit image includes slits that are not in the list of slit IDs.')
+
+    # Fractional position of the pixel edges along the slit
+    frac0 = slit_fraction(spec, spat-0.5, slit_idx, left, right, align_traces=align_traces,
+                          locations=locations)
+    frac1 = slit_fraction(spec, spat+0.5, slit_idx, left, right, align_traces=align_traces,
+                          locations=locations)
+
+    # Wavelength extent of each pixel, measured along the center of
+    # each slit
+    dwave = np.zeros(spec.size, dtype=float)
+    rows = np.arange(nspec)
+    for s in range(spat_id.size):
+        indx = slit_idx == s
+        if not np.any(indx):
+            continue
+        cen = np.clip(np.round(0.5*(left[:, s]+right[:, s])).astype(int), 0, waveimg.shape[1]-1)
+        wcen = waveimg[rows, cen]
+        good = wcen > 0
+        if np.sum(good) < 2:
+            msgs.error('Slit {0} does not have a valid wavelength solution.'.format(spat_id[s]))
+        dwcen = np.absolute(np.gradient(np.interp(rows, rows[good], wcen[good])))
+        dwave[indx] = dwcen[spec[indx]]
+
+    return dict(pix=np.ravel_multi_index((spec, spat), waveimg.shape), slice=slit_idx,
+                frac=0.5*(frac0+frac1), dfrac=np.absolute(frac1-frac0),
+                wave=waveimg[spec, spat], dwave=dwave, shape=waveimg.shape,
+                nslice=spat_id.size)
+
+
+def sky_offsets(footprint, slit_length, slice_width, posang=0.):
+    """
+    Project the centers of the pixel footprints onto the sky.
+
+    At a position angle of 0, the slices are stacked toward the East
+    and the length of each slice is oriented North-South.  The
+    offsets are relative to the center of the field.
+
+    Args:
+        footprint (:obj:`dict`):
+            Pixel footprints; see :func:`pixel_footprints`.
+        slit_length (:obj:`float`):
+            Length of each slice on the sky in arcsec.
+        slice_width (:obj:`float`):
+            Width of each slice on the sky in arcsec.
+        posang (:obj:`float`, optional):
+            Position angle of the field in degrees East of North.
+
+    Returns:
+        :obj:`tuple`: Two `numpy.ndarray`_ objects with the offsets
+        to the East and North in arcsec.
+    """
+    along = (footprint['frac'] - 0.5) * slit_length
+    across = (footprint['slice'] - 0.5*(footprint['nslice']-1)) * slice_width
+    cosa, sina = np.cos(np.radians(posang)), np.sin(np.radians(posang))
+    return across*cosa + along*sina, along*cosa - across*sina
+
+
+def cube_grid(footprint, ra, dec, slit_length, slice_width, spat_scale, posang=0.,
+              wave_min=None, wave_max=None, nwave=None):
+    """
+    Define a datacube grid that covers all the pixel footprints.
+
+    Args:
+        footprint (:obj:`dict`):
+            Pixel footprints; see :func:`pixel_footprints`.
+        ra (:obj:`float`):
+            Right ascension of the field center in degrees, used as
+            the reference of the grid.
+        dec (:obj:`float`):
+            Declination of the field center in degrees, used as the
+            reference of the grid.
+        slit_length (:obj:`float`):
+            Length of each slice on the sky in arcsec.
+        slice_width (:obj:`float`):
+            Width of each slice on the sky in arcsec.
+        spat_scale (:obj:`float`):
+            Size of each spaxel in arcsec.
+        posang (:obj:`float`, optional):
+            Position angle of the field in degrees East of North.
+        wave_min (:obj:`float`, optional):
+            Central wavelength of the first wavelength channel.  If
+            None, use the minimum wavelength of all pixels.
+        wave_max (:obj:`float`, optional):
+            Central wavelength of the last wavelength channel.  If
+            None, use the maximum wavelength of all pixels.
+        nwave (:obj:`int`, optional):
+            Number of wavelength channels.  If None, the number of
+            spectral pixels on the detector is used.
+
+    Returns:
+        :obj:`dict`: The grid definition, with the reference
+        coordinates (``ra0``, ``dec0``), the spaxel size in arcsec
+        (``dspat``), the number of spaxels along RA and Dec (``nx``,
+        ``ny``), the central wavelength of the first channel
+        (``wave0``), the channel width (``dwave``), and the number of
+        channels (``nwave``).
+    """
+    east, north = sky_offsets(footprint, slit_length, slice_width, posang=posang)
+    # Include the full extent of the slices
+    pad = 0.5*(slice_width + np.amax(footprint['dfrac'])*slit_length)
+    nx = int(np.ceil(2*(np.amax(np.absolute(east)) + pad)/spat_scale))
+    ny = int(np.ceil(2*(np.amax(np.absolute(north)) + pad)/spat_scale))
+    _wave_min = np.amin(footprint['wave']) if wave_min is None else wave_min
+    _wave_max = np.amax(footprint['wave']) if wave_max is None else wave_max
+    _nwave = footprint['shape'][0] if nwave is None else int(nwave)
+    return dict(ra0=ra, dec0=dec, dspat=spat_scale, nx=nx, ny=ny, wave0=_wave_min,
+                dwave=(_wave_max-_wave_min)/max(_nwave-1, 1), nwave=_nwave)
+
+
+def cube_wcs(grid):
+    """
+    Construct the world coordinate system of a datacube grid.
+
+    The cube arrays have shape (nx, ny, nwave), such that the
+    transpose of the cube matches the FITS axis order of the WCS.
+
+    Args:
+        grid (:obj:`dict`):
+            The grid definition; see :func:`cube_grid`.
+
+    Returns:
+        `astropy.wcs.WCS`_: The WCS of the cube.
+    """
+    w = wcs.WCS(naxis=3)
+    w.wcs.ctype = ['RA---TAN', 'DEC--TAN', 'AWAV']
+    w.wcs.cunit = ['deg', 'deg', 'Angstrom']
+    w.wcs.crpix = [0.5*(grid['nx']-1)+1, 0.5*(grid['ny']-1)+1, 1.]
+    w.wcs.crval = [grid['ra0'], grid['dec0'], grid['wave0']]
+    w.wcs.cdelt = [-grid['dspat']/3600., grid['dspat']/3600., grid['dwave']]
+    return w
+
+
+def _box_overlap(cen, half, n):
+    """
+    Compute the fraction of a set of 1D boxes that overlaps with each
+    unit-width grid cell.
+
+    Args:
+        cen (`numpy.ndarray`_):
+            Box centers in grid pixel coordinates.
+        half (`numpy.ndarray`_):
+            Box half-widths in grid pixels.
+        n (:obj:`int`):
+            Number of grid cells.
+
+    Returns:
+        :obj:`tuple`: The grid cell index and overlapping fraction,
+        both with shape (ncen, noverlap), where noverlap is the
+        maximum number of cells overlapped by any box.  The fraction
+        is 0 for cells outside the grid.
+    """
+    lo = cen - half
+    hi = cen + half
+    nmax = int(np.ceil(2*np.amax(half))) + 1
+    k = np.floor(lo + 0.5).astype(int)[:, None] + np.arange(nmax)[None, :]
+    frac = np.clip(np.minimum(hi[:, None], k+0.5) - np.maximum(lo[:, None], k-0.5), 0, None) \
+                / (hi-lo)[:, None]
+    frac[(k < 0) | (k >= n)] = 0.
+    return k, frac
+
+
+def generate_cube_weights(footprint, grid, ra, dec, slit_length, slice_width, posang=0.,
+                          chunk=2**17):
+    """
+    Construct the sparse matrix that resamples a detector image onto a
+    datacube.
+
+    Each pixel footprint is approximated as a box in the cube
+    coordinates: the pixel extent along the slice and the slice width
+    are projected onto the RA and Dec axes, and the extent in
+    wavelength is set by the local dispersion.  The weight of each
+    pixel in each voxel is the fraction of this box within the voxel,
+    such that the weights of a pixel fully within the cube sum to 1.
+    The (flat) sky projection is accurate for fields that are much
+    smaller than a degree.
+
+    The matrix only depends on the calibrations, through the
+    footprints, and on the pointing, such that it can be reused for
+    all exposures taken with the same calibrations at the same
+    position.
+
+    Args:
+        footprint (:obj:`dict`):
+            Pixel footprints; see :func:`pixel_footprints`.
+        grid (:obj:`dict`):
+            The grid definition; see :func:`cube_grid`.
+        ra (:obj:`float`):
+            Right ascension of the field center for this exposure in
+            degrees.
+        dec (:obj:`float`):
+            Declination of the field center for this exposure in
+            degrees.
+        slit_length (:obj:`float`):
+            Length of each slice on the sky in arcsec.
+        slice_width (:obj:`float`):
+            Width of each slice on the sky in arcsec.
+        posang (:obj:`float`, optional):
+            Position angle of the field in degrees East of North.
+        chunk (:obj:`int`, optional):
+            Number of pixels to process at once; this limits the
+            size of the intermediate arrays.
+
+    Returns:
+        `scipy.sparse.csr_matrix`_: Weight matrix with shape (nvox,
+        npix), where nvox is the number of voxels in the cube and
+        npix is the number of pixels in the detector image.
+    """
+    east, north = sky_offsets(footprint, slit_length, slice_width, posang=posang)
+    # Offset of the exposure with respect to the grid reference
+    east += (ra - grid['ra0']) * np.cos(np.radians(grid['dec0'])) * 3600.
+    north += (dec - grid['dec0']) * 3600.
+
+    # Pixel centers and half-widths in voxel coordinates; the
+    # footprint is rotated by the position angle, and its projected
+    # extent is used along each axis
+    cosa, sina = np.absolute(np.cos(np.radians(posang))), np.absolute(np.sin(np.radians(posang)))
+    along = footprint['dfrac'] * slit_length
+    xcen = 0.5*(grid['nx']-1) - east/grid['dspat']
+    ycen = 0.5*(grid['ny']-1) + north/grid['dspat']
+    xhalf = 0.5*(cosa*slice_width + sina*along)/grid['dspat']
+    yhalf = 0.5*(sina*slice_width + cosa*along)/grid['dspat']
+    zcen = (footprint['wave'] - grid['wave0'])/grid['dwave']
+    zhalf = 0.5*footprint['dwave']/grid['dwave']
+
+    shape = (grid['nx'], grid['ny'], grid['nwave'])
+    npix = footprint['pix'].size
+    itype = np.int32 if max(np.prod(shape), np.prod(footprint['shape'])) < 2**31 else np.int64
+    vox, pix, wgt = [], [], []
+    for s in range(0, npix, chunk):
+        e = min(s+chunk, npix)
+        kx, wx = _box_overlap(xcen[s:e], xhalf[s:e], shape[0])
+        ky, wy = _box_overlap(ycen[s:e], yhalf[s:e], shape[1])
+        kz, wz = _box_overlap(zcen[s:e], zhalf[s:e], shape[2])
+        w = (wx[:, :, None, None] * wy[:, None, :, None] * wz[:, None, None, :]).reshape(e-s, -1)
+        i, j = np.where(w > 0)
+        jx, jy, jz = np.unravel_index(j, (kx.shape[1], ky.shape[1], kz.shape[1]))
+        # Limit the memory footprint of the matrix; 32-bit indices
+        # are sufficient for cubes with up to 2**31 voxels
+        vox += [np.ravel_multi_index((kx[i, jx], ky[i, jy], kz[i, jz]), shape).astype(itype)]
+        pix += [footprint['pix'][s:e][i].astype(itype)]
+        wgt += [w[i, j].astype(np.float32)]
+
+    if len(wgt) == 0:
+        msgs.warn('No pixels fall within the datacube.')
+        return sparse.csr_matrix((np.prod(shape), np.prod(footprint['shape'])))
+    return sparse.csr_matrix((np.concatenate(wgt), (np.concatenate(vox), np.concatenate(pix))),
+                             shape=(np.prod(shape), np.prod(footprint['shape'])))
+
+
+def accumulate_cube(weights, flux, var, gpm=None, sums=None):
+    """
+    Add an exposure to the weighted sums used to construct a datacube.
+
+    Only the sums, each with one element per voxel, are kept between
+    exposures, such that any number of exposures can be combined with
+    a fixed amount of memory.
+
+    Args:
+        weights (`scipy.sparse.csr_matrix`_):
+            Resampling weights; see :func:`generate_cube_weights`.
+        flux (`numpy.ndarray`_):
+            Detector image to resample.
+        var (`numpy.ndarray`_):
+            Variance of the detector image.
+        gpm (`numpy.ndarray`_, optional):
+            Good-pixel mask of the detector image.  If None, all
+            pixels are good.
+        sums (:obj:`dict`, optional):
+            Sums returned by a previous call for other exposures.  If
+            None, the sums are started from this exposure.
+
+    Returns:
+        :obj:`dict`: The sums of the weights (``wsum``), the weighted
+        flux (``fsum``), and the variance weighted by the squared
+        weights (``vsum``) in each voxel.
+    """
+    _gpm = np.ones(flux.size, dtype=float) if gpm is None else gpm.ravel().astype(float)
+    _sums = dict(wsum=weights.dot(_gpm), fsum=weights.dot(flux.ravel()*_gpm),
+                 vsum=weights.multiply(weights).dot(var.ravel()*_gpm))
+    if sums is None:
+        return _sums
+    for key in _sums.keys():
+        sums[key] += _sums[key]
+    return sums
+
+
+def finalize_cube(sums, grid):
+    """
+    Construct the datacube from the accumulated sums.
+
+    The flux in each voxel is the weighted mean of the pixels that
+    overlap it, and its variance neglects the covariance between
+    neighboring voxels.
+
+    Args:
+        sums (:obj:`dict`):
+            Sums returned by :func:`accumulate_cube`.
+        grid (:obj:`dict`):
+            The grid definition; see :func:`cube_grid`.
+
+    Returns:
+        :obj:`tuple`: Three `numpy.ndarray`_ objects with shape (nx,
+        ny, nwave): the flux, its variance, and the sum of the
+        weights, which is 0 for voxels without any data.
+    """
+    shape = (grid['nx'], grid['ny'], grid['nwave'])
+    good = sums['wsum'] > 0
+    flux = np.zeros(good.size, dtype=float)
+    var = np.zeros(good.size, dtype=float)
+    flux[good] = sums['fsum'][good]/sums['wsum'][good]
+    var[good] = sums['vsum'][good]/sums['wsum'][good]**2
+    return flux.reshape(shape), var.reshape(shape), sums['wsum'].reshape(shape)
@@ -36,6 +36,8 @@ def extract_optimal(sciimg,ivar, mask, waveimg, skyimg, rn2_img, thismask, oprof
     Return value is None. The specobj object is changed in place with the boxcar and optimal dictionaries being filled
     with the extraction parameters.
 
+    This is a wrapper for :func:`extract_optimal_batch` for a single object.
+
     Args:
         sciimg (np.ndarray): float ndarray shape (nspec, nspat)
            Science frame
@@ -63,77 +65,205 @@ def extract_optimal(sciimg,ivar, mask, waveimg, skyimg, rn2_img, thismask, oprof
                object profile has been masked
 
     """
-    # Setup
-    imgminsky = sciimg - skyimg
-    nspat = imgminsky.shape[1]
-    nspec = imgminsky.shape[0]
+    extract_optimal_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, thismask, oprof[:,:,None],
+                          box_radius, [spec], min_frac_use=min_frac_use)
+    return
+
+
+def extract_boxcar(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius, spec):
+    """
+    Perform boxcar extraction for a single SpecObj
+
+    SpecObj is filled in place. This is a wrapper for
+    :func:`extract_boxcar_batch` for a single object.
+
+    Args:
+        sciimg (np.ndarray):
+            Science image
+        ivar (np.ndarray):
+            inverse variance of science frame. Can be a model or deduced from the image itself.
+        mask (np.ndarray):
+            mask indicating which pixels are good. Good pixels = True, Bad Pixels = False
+        waveimg (np.ndarray):
+            Wavelength image. float 2-d array with shape (nspec, nspat)
+        skyimg (np.ndarray):
+            Image containing our model of the sky
+        rn2_img (np.ndarray):
+            Image containing the read noise squared (including digitization noise due to gain, i.e. this is an effective read noise)
+        box_radius (float):
+            Size of boxcar window in floating point pixels in the spatial direction.
+        spec (:class:`pypeit.specobj.SpecObj`):
+            This is the container that holds object, trace,
+            and extraction information for the object in question.
+            This routine operates one object at a time.
+    """
+    extract_boxcar_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius, [spec])
+
+
+def _window_stack(img, cols, outwin):
+    """
+    Stack the spatial windows of many objects extracted from a single image.
+
+    Args:
+        img (np.ndarray):
+            Image with shape (nspec, nspat)
+        cols (np.ndarray):
+            int ndarray shape (nobj, nsub). Spatial pixels in the window of
+            each object.
+        outwin (np.ndarray):
+            bool ndarray shape (nobj, 1, nsub). Pixels that fall outside the
+            window of each object; these are set to 0.
+
+    Returns:
+        np.ndarray: Stacked windows with shape (nobj, nspec, nsub)
+    """
+    sub = np.moveaxis(img[:,cols], 1, 0)
+    sub[np.broadcast_to(outwin, sub.shape)] = 0
+    return sub
+
+
+def extract_optimal_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, thismask, oprofs, box_radius,
+                          sobjs, min_frac_use=0.05, objmask_radius=None):
+    """
+    Optimally extract many objects on the same slit at once.
+
+    The images shared by all objects (sky-subtracted image, noise variance)
+    are computed once, and the sub-image window of each object (the spatial
+    range over which its profile is positive) is stacked into a single
+    (nobj, nspec, nsub) array so that all the optimal spectra are computed in
+    one pass. The results are identical to calling :func:`extract_optimal`
+    for each object.
+
+    Args:
+        sciimg (np.ndarray): float ndarray shape (nspec, nspat)
+           Science frame
+        ivar (np.ndarray): float ndarray shape (nspec, nspat)
+           inverse variance of science frame. Can be a model or deduced from the image itself.
+        mask (np.ndarray): boolean ndarray
+           mask indicating which pixels are good. Good pixels = True, Bad Pixels = False
+        waveimg  (np.ndarray):  float ndarray
+            Wavelength image. float 2-d array with shape (nspec, nspat)
+        skyimg (np.ndarray): float ndarray shape (nspec, nspat)
+            Image containing our model of the sky
+        rn2_img (np.ndarray): float ndarray shape (nspec, nspat)
+            Image containing the read noise squared (including digitization noise due to gain, i.e. this is an effective read noise)
+        thismask (np.ndarray): bool ndarray shape (nspec, nspat)
+            Image indicating which pixels are on the slit/order in question. True=Good.
+        oprofs (np.ndarray): float ndarray shape (nspec, nspat, nobj)
+            Images containing the profiles of the objects that we are extracting
+        box_radius (float):
+            Size of boxcar window in floating point pixels in the spatial direction.
+        sobjs (list):
+            List (or :class:`pypeit.specobjs.SpecObjs`) with the nobj
+            :class:`pypeit.specobj.SpecObj` objects to extract. These are
+            filled in place.
+        min_frac_use (float, optional): default = 0.05. If the sum of object profile arcoss the spatial direction
+               are less than this value, the optimal extraction of this spectral pixel is masked because the majority of the
+               object profile has been masked
+        objmask_radius (float, optional):
+            If provided, the mask of each object is further restricted to
+            the pixels within this many pixels of its trace.
 
+    Returns:
+        dict: Dictionary with the ``OPT_*`` arrays, each with shape (nobj,
+        nspec). Objects with a profile that is zero everywhere are not
+        filled and have ``OPT_MASK`` set to False.
+    """
+    # Setup
+    nspec, nspat = sciimg.shape
+    nobj = len(sobjs)
     spec_vec = np.arange(nspec)
     spat_vec = np.arange(nspat)
 
+    # Images shared by all objects
+    imgminsky = sciimg - skyimg
     # TODO This makes no sense for difference imaging? Not sure we need NIVAR anyway
     var_no = np.abs(skyimg - np.sqrt(2.0) * np.sqrt(rn2_img)) + rn2_img
 
-    ispec, ispat = np.where(oprof > 0.0)
-
-    # Exit gracefully if we have no positive object profiles, since that means something was wrong with object fitting
-    if not np.any(oprof > 0.0):
-        msgs.warn('Object profile is zero everywhere. This aperture is junk.')
-        return None
-
-    mincol = np.min(ispat)
-    maxcol = np.max(ispat) + 1
-    nsub = maxcol - mincol
+    out = dict([(key, np.zeros((nobj, nspec), dtype=float))
+                for key in ['OPT_WAVE', 'OPT_COUNTS', 'OPT_COUNTS_IVAR', 'OPT_COUNTS_SIG',
+                            'OPT_COUNTS_NIVAR', 'OPT_COUNTS_SKY', 'OPT_COUNTS_RN', 'OPT_FRAC_USE',
+                            'OPT_CHI2']])
+    out['OPT_MASK'] = np.zeros((nobj, nspec), dtype=bool)
 
-    mask_sub = mask[:,mincol:maxcol]
-    thismask_sub = thismask[:, mincol:maxcol]
-    wave_sub = waveimg[:,mincol:maxcol]
-    ivar_sub = np.fmax(ivar[:,mincol:maxcol],0.0) # enforce positivity since these are used as weights
-    vno_sub = np.fmax(var_no[:,mincol:maxcol],0.0)
-
-    rn2_sub = rn2_img[:,mincol:maxcol]
-    img_sub = imgminsky[:,mincol:maxcol]
-    sky_sub = skyimg[:,mincol:maxcol]
-    oprof_sub = oprof[:,mincol:maxcol]
+    # Find the sub-image window of each object
+    mincol = np.zeros(nobj, dtype=int)
+    maxcol = np.zeros(nobj, dtype=int)
+    gdobj = np.zeros(nobj, dtype=bool)
+    for iobj in range(nobj):
+        ispat, = np.where(np.any(oprofs[:,:,iobj] > 0.0, axis=0))
+        # Skip objects with no positive object profiles, since that means something was wrong with object fitting
+        if ispat.size == 0:
+            msgs.warn('Object profile is zero everywhere. This aperture is junk.')
+            continue
+        gdobj[iobj] = True
+        mincol[iobj] = np.min(ispat)
+        maxcol[iobj] = np.max(ispat) + 1
+    gdobj, = np.where(gdobj)
+    if gdobj.size == 0:
+        return out
+
+    # Stack the windows of all objects into a common width
+    nsub = np.max(maxcol[gdobj] - mincol[gdobj])
+    cols = mincol[gdobj,None] + np.arange(nsub)[None,:]
+    outwin = (cols >= maxcol[gdobj,None])[:,None,:]
+    cols = np.fmin(cols, nspat-1)
+
+    trace_spat = np.array([sobjs[iobj].TRACE_SPAT for iobj in gdobj])
+    trace_spec = np.array([spec_vec if sobjs[iobj].trace_spec is None else sobjs[iobj].trace_spec
+                           for iobj in gdobj])
+
+    mask_sub = _window_stack(mask, cols, outwin)
+    if objmask_radius is not None:
+        mask_sub &= (np.absolute(cols[:,None,:] - trace_spat[:,:,None]) <= objmask_radius)
+    thismask_sub = _window_stack(thismask, cols, outwin)
+    wave_sub = _window_stack(waveimg, cols, outwin)
+    ivar_sub = np.fmax(_window_stack(ivar, cols, outwin),0.0) # enforce positivity since these are used as weights
+    vno_sub = np.fmax(_window_stack(var_no, cols, outwin),0.0)
+
+    rn2_sub = _window_stack(rn2_img, cols, outwin)
+    img_sub = _window_stack(imgminsky, cols, outwin)
+    sky_sub = _window_stack(skyimg, cols, outwin)
+    oprof_sub = oprofs[spec_vec[None,:,None], cols[:,None,:], gdobj[:,None,None]]
+    oprof_sub[np.broadcast_to(outwin, oprof_sub.shape)] = 0.0
     # enforce normalization and positivity of object profiles
-    norm = np.nansum(oprof_sub,axis = 1)
-    norm_oprof = np.outer(norm, np.ones(nsub))
-    oprof_sub = np.fmax(oprof_sub/norm_oprof, 0.0)
+    norm = np.nansum(oprof_sub, axis=2)
+    oprof_sub = np.fmax(oprof_sub/norm[:,:,None], 0.0)
 
-    ivar_denom = np.nansum(mask_sub*oprof_sub, axis=1)
-    mivar_num = np.nansum(mask_sub*ivar_sub*oprof_sub**2, axis=1)
+    ivar_denom = np.nansum(mask_sub*oprof_sub, axis=2)
+    mivar_num = np.nansum(mask_sub*ivar_sub*oprof_sub**2, axis=2)
     mivar_opt = mivar_num/(ivar_denom + (ivar_denom == 0.0))
-    flux_opt = np.nansum(mask_sub*ivar_sub*img_sub*oprof_sub, axis=1)/(mivar_num + (mivar_num == 0.0))
+    flux_opt = np.nansum(mask_sub*ivar_sub*img_sub*oprof_sub, axis=2)/(mivar_num + (mivar_num == 0.0))
     # Optimally extracted noise variance (sky + read noise) only. Since
     # this variance is not the same as that used for the weights, we
     # don't get the usual cancellation. Additional denom factor is the
     # analog of the numerator in Horne's variance formula. Note that we
     # are only weighting by the profile (ivar_sub=1) because
     # otherwise the result depends on the signal (bad).
-    nivar_num = np.nansum(mask_sub*oprof_sub**2, axis=1) # Uses unit weights
-    nvar_opt = ivar_denom*((mask_sub*vno_sub*oprof_sub**2).sum(axis=1))/(nivar_num**2 + (nivar_num**2 == 0.0))
+    nivar_num = np.nansum(mask_sub*oprof_sub**2, axis=2) # Uses unit weights
+    nvar_opt = ivar_denom*((mask_sub*vno_sub*oprof_sub**2).sum(axis=2))/(nivar_num**2 + (nivar_num**2 == 0.0))
     nivar_opt = 1.0/(nvar_opt + (nvar_opt == 0.0))
     # Optimally extract sky and (read noise)**2 in a similar way
-    sky_opt = ivar_denom*(np.nansum(mask_sub*sky_sub*oprof_sub**2, axis=1))/(nivar_num**2 + (nivar_num**2 == 0.0))
-    rn2_opt = ivar_denom*(np.nansum(mask_sub*rn2_sub*oprof_sub**2, axis=1))/(nivar_num**2 + (nivar_num**2 == 0.0))
+    sky_opt = ivar_denom*(np.nansum(mask_sub*sky_sub*oprof_sub**2, axis=2))/(nivar_num**2 + (nivar_num**2 == 0.0))
+    rn2_opt = ivar_denom*(np.nansum(mask_sub*rn2_sub*oprof_sub**2, axis=2))/(nivar_num**2 + (nivar_num**2 == 0.0))
     rn_opt = np.sqrt(rn2_opt)
     rn_opt[np.isnan(rn_opt)]=0.0
 
-    tot_weight = np.nansum(mask_sub*ivar_sub*oprof_sub, axis=1)
-    prof_norm = np.nansum(oprof_sub, axis=1)
-    frac_use = (prof_norm > 0.0)*np.nansum((mask_sub*ivar_sub > 0.0)*oprof_sub, axis=1)/(prof_norm + (prof_norm == 0.0))
+    tot_weight = np.nansum(mask_sub*ivar_sub*oprof_sub, axis=2)
+    prof_norm = np.nansum(oprof_sub, axis=2)
+    frac_use = (prof_norm > 0.0)*np.nansum((mask_sub*ivar_sub > 0.0)*oprof_sub, axis=2)/(prof_norm + (prof_norm == 0.0))
 
     # Use the same weights = oprof^2*mivar for the wavelenghts as the flux.
     # Note that for the flux, one of the oprof factors cancels which does
     # not for the wavelengths.
-    wave_opt = np.nansum(mask_sub*ivar_sub*wave_sub*oprof_sub**2, axis=1)/(mivar_num + (mivar_num == 0.0))
+    wave_opt = np.nansum(mask_sub*ivar_sub*wave_sub*oprof_sub**2, axis=2)/(mivar_num + (mivar_num == 0.0))
     mask_opt = (tot_weight > 0.0) & (frac_use > min_frac_use) & (mivar_num > 0.0) & (ivar_denom > 0.0) & \
                np.isfinite(wave_opt) & (wave_opt > 0.0)
 
     # Interpolate wavelengths over masked pixels
     badwvs = (mivar_num <= 0) | np.invert(np.isfinite(wave_opt)) | (wave_opt <= 0.0)
     if badwvs.any():
-        oprof_smash = np.nansum(thismask_sub*oprof_sub**2, axis=1)
+        oprof_smash = np.nansum(thismask_sub*oprof_sub**2, axis=2)
         # Can we use the profile average wavelengths instead?
         oprof_good = badwvs & (oprof_smash > 0.0)
         if oprof_good.any():
@@ -144,34 +274,44 @@ def extract_optimal(sciimg,ivar, mask, waveimg, skyimg, rn2_img, thismask, oprof
         if oprof_bad.any():
             # For pixels with completely bad profile values, interpolate from trace.
             f_wave = scipy.interpolate.RectBivariateSpline(spec_vec,spat_vec, waveimg*thismask)
-            wave_opt[oprof_bad] = f_wave(spec.trace_spec[oprof_bad], spec.TRACE_SPAT[oprof_bad],
-                                         grid=False)
+            wave_opt[oprof_bad] = f_wave(trace_spec[oprof_bad], trace_spat[oprof_bad], grid=False)
 
-    flux_model = np.outer(flux_opt,np.ones(nsub))*oprof_sub
-    chi2_num = np.nansum((img_sub - flux_model)**2*ivar_sub*mask_sub,axis=1)
-    chi2_denom = np.fmax(np.nansum(ivar_sub*mask_sub > 0.0, axis=1) - 1.0, 1.0)
+    flux_model = flux_opt[:,:,None]*oprof_sub
+    chi2_num = np.nansum((img_sub - flux_model)**2*ivar_sub*mask_sub,axis=2)
+    chi2_denom = np.fmax(np.nansum(ivar_sub*mask_sub > 0.0, axis=2) - 1.0, 1.0)
     chi2 = chi2_num/chi2_denom
 
+    out['OPT_WAVE'][gdobj] = wave_opt               # Optimally extracted wavelengths
+    out['OPT_COUNTS'][gdobj] = flux_opt             # Optimally extracted flux
+    out['OPT_COUNTS_IVAR'][gdobj] = mivar_opt       # Inverse variance of optimally extracted flux using modelivar image
+    out['OPT_COUNTS_SIG'][gdobj] = np.sqrt(utils.inverse(mivar_opt))
+    out['OPT_COUNTS_NIVAR'][gdobj] = nivar_opt      # Optimally extracted noise variance (sky + read noise) only
+    out['OPT_MASK'][gdobj] = mask_opt               # Mask for optimally extracted flux
+    out['OPT_COUNTS_SKY'][gdobj] = sky_opt          # Optimally extracted sky
+    out['OPT_COUNTS_RN'][gdobj] = rn_opt            # Square root of optimally extracted read noise squared
+    out['OPT_FRAC_USE'][gdobj] = frac_use           # Fraction of pixels in the object profile subimage used for this extraction
+    out['OPT_CHI2'][gdobj] = chi2                   # Reduced chi2 of the model fit for this spectral pixel
+
     # Fill in the optimally extraction tags
-    spec.OPT_WAVE = wave_opt    # Optimally extracted wavelengths
-    spec.OPT_COUNTS = flux_opt    # Optimally extracted flux
-    spec.OPT_COUNTS_IVAR = mivar_opt   # Inverse variance of optimally extracted flux using modelivar image
-    spec.OPT_COUNTS_SIG = np.sqrt(utils.inverse(mivar_opt))
-    spec.OPT_COUNTS_NIVAR = nivar_opt  # Optimally extracted noise variance (sky + read noise) only
-    spec.OPT_MASK = mask_opt    # Mask for optimally extracted flux
-    spec.OPT_COUNTS_SKY = sky_opt      # Optimally extracted sky
-    spec.OPT_COUNTS_RN = rn_opt        # Square root of optimally extracted read noise squared
-    spec.OPT_FRAC_USE = frac_use    # Fraction of pixels in the object profile subimage used for this extraction
-    spec.OPT_CHI2 = chi2            # Reduced chi2 of the model fit for this spectral pixel
+    for iobj in gdobj:
+        for key in out.keys():
+            setattr(sobjs[iobj], key, out[key][iobj].copy())
 
-    return
+    return out
 
 
-def extract_boxcar(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius, spec):
+def extract_boxcar_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius, sobjs,
+                         objmask_radius=None):
     """
-    Perform boxcar extraction for a single SpecObj
+    Perform boxcar extraction for many SpecObj at once.
 
-    SpecObj is filled in place
+    The images shared by all objects are computed once, and the boxcar
+    aperture of every object at every spectral position is collected into a
+    single (nobj, nspec, nwin) stack so that all the extracted quantities
+    share the same aperture weights. The results are identical to calling
+    :func:`extract_boxcar` for each object.
+
+    The SpecObj are filled in place.
 
     Args:
         sciimg (np.ndarray):
@@ -188,64 +328,93 @@ def extract_boxcar(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius, spe
             Image containing the read noise squared (including digitization noise due to gain, i.e. this is an effective read noise)
         box_radius (float):
             Size of boxcar window in floating point pixels in the spatial direction.
-        spec (:class:`pypeit.specobj.SpecObj`):
-            This is the container that holds object, trace,
-            and extraction information for the object in question.
-            This routine operates one object at a time.
+        sobjs (list):
+            List (or :class:`pypeit.specobjs.SpecObjs`) with the
+            :class:`pypeit.specobj.SpecObj` objects to extract. All objects
+            must have traces with the same length.
+        objmask_radius (float, optional):
+            If provided, the mask of each object is further restricted to
+            the pixels within this many pixels of its trace.
+
+    Returns:
+        dict: Dictionary with the ``BOX_*`` arrays, each with shape (nobj,
+        ntrace).
     """
     # Setup
-    imgminsky = sciimg - skyimg
-    nspat = imgminsky.shape[1]
-    nspec = imgminsky.shape[0]
-
+    nspec, nspat = sciimg.shape
     spec_vec = np.arange(nspec)
     spat_vec = np.arange(nspat)
-    if spec.trace_spec is None:
-        spec.trace_spec = spec_vec
+    for spec in sobjs:
+        if spec.trace_spec is None:
+            spec.trace_spec = spec_vec
 
+    # Images shared by all objects
+    imgminsky = sciimg - skyimg
     # TODO This makes no sense for difference imaging? Not sure we need NIVAR anyway
     var_no = np.abs(skyimg - np.sqrt(2.0) * np.sqrt(rn2_img)) + rn2_img
+    varimg = 1.0/(ivar + (ivar == 0.0))
+
+    # Aperture of each object at each spectral position. This follows
+    # the uniform weighting of pypeit.core.moment.moment1d.
+    trace_spec = np.array([spec.trace_spec for spec in sobjs])
+    trace_spat = np.array([spec.TRACE_SPAT for spec in sobjs], dtype=float)
+    row = trace_spec.astype(int)[:,:,None]
+    i1 = np.floor(trace_spat - box_radius + 0.5).astype(int)
+    i2 = np.floor(trace_spat + box_radius + 0.5).astype(int)
+    c = i1[:,:,None]-1+np.arange(int(np.amax(np.amin(i2-i1)-1,0))+4)[None,None,:]
+    ih = np.clip(c,0,nspat-1)
+    wt = ((c >= 0) & (c < nspat)) * np.clip(box_radius - np.abs(c - trace_spat[:,:,None]) + 0.5,0,1)
+
+    mask_ap = mask[row,ih]
+    if objmask_radius is not None:
+        mask_ap &= (np.absolute(c - trace_spat[:,:,None]) <= objmask_radius)
+    ivar_ap = ivar[row,ih]
+    wave_ap = waveimg[row,ih]
 
     # Fill in the boxcar extraction tags
-    flux_box = moment1d(imgminsky*mask, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
+    flux_box = np.sum(imgminsky[row,ih]*mask_ap*wt, axis=2)
     # Denom is computed in case the trace goes off the edge of the image
-    box_denom = moment1d(waveimg*mask > 0.0, spec.TRACE_SPAT, 2*box_radius,
-                         row=spec.trace_spec)[0]
-    wave_box = moment1d(waveimg*mask, spec.TRACE_SPAT, 2*box_radius,
-                        row=spec.trace_spec)[0] / (box_denom + (box_denom == 0.0))
-    varimg = 1.0/(ivar + (ivar == 0.0))
-    var_box = moment1d(varimg*mask, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
-    nvar_box = moment1d(var_no*mask, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
-    sky_box = moment1d(skyimg*mask, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
-    rn2_box = moment1d(rn2_img*mask, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
+    box_denom = np.sum((wave_ap*mask_ap > 0.0)*wt, axis=2)
+    wave_box = np.sum(wave_ap*mask_ap*wt, axis=2) / (box_denom + (box_denom == 0.0))
+    var_box = np.sum(varimg[row,ih]*mask_ap*wt, axis=2)
+    nvar_box = np.sum(var_no[row,ih]*mask_ap*wt, axis=2)
+    sky_box = np.sum(skyimg[row,ih]*mask_ap*wt, axis=2)
+    rn2_box = np.sum(rn2_img[row,ih]*mask_ap*wt, axis=2)
     rn_posind = (rn2_box > 0.0)
     rn_box = np.zeros(rn2_box.shape,dtype=float)
     rn_box[rn_posind] = np.sqrt(rn2_box[rn_posind])
-    pixtot = moment1d(ivar*0 + 1.0, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
-    pixmsk = moment1d(ivar*mask == 0.0, spec.TRACE_SPAT, 2*box_radius, row=spec.trace_spec)[0]
+    pixtot = np.sum((ivar_ap*0 + 1.0)*wt, axis=2)
+    pixmsk = np.sum((ivar_ap*mask_ap == 0.0)*wt, axis=2)
     # If every pixel is masked then mask the boxcar extraction
     mask_box = (pixmsk != pixtot) & np.isfinite(wave_box) & (wave_box > 0.0)
     bad_box = (wave_box <= 0.0) | np.invert(np.isfinite(wave_box)) | (box_denom == 0.0)
     # interpolate bad wavelengths over masked pixels
     if bad_box.any():
         f_wave = scipy.interpolate.RectBivariateSpline(spec_vec, spat_vec, waveimg)
-        wave_box[bad_box] = f_wave(spec.trace_spec[bad_box], spec.TRACE_SPAT[bad_box], grid=False)
+        wave_box[bad_box] = f_wave(trace_spec[bad_box], trace_spat[bad_box], grid=False)
 
     ivar_box = 1.0/(var_box + (var_box == 0.0))
     nivar_box = 1.0/(nvar_box + (nvar_box == 0.0))
 
-    # Fill em up!
-    spec.BOX_WAVE = wave_box
-    spec.BOX_COUNTS = flux_box*mask_box
-    spec.BOX_COUNTS_IVAR = ivar_box*mask_box
-    spec.BOX_COUNTS_SIG = np.sqrt(utils.inverse(ivar_box*mask_box))
-    spec.BOX_COUNTS_NIVAR = nivar_box*mask_box
-    spec.BOX_MASK = mask_box
-    spec.BOX_COUNTS_SKY = sky_box
-    spec.BOX_COUNTS_RN = rn_box
-    spec.BOX_RADIUS = box_radius
+    out = {}
+    out['BOX_WAVE'] = wave_box
+    out['BOX_COUNTS'] = flux_box*mask_box
+    out['BOX_COUNTS_IVAR'] = ivar_box*mask_box
+    out['BOX_COUNTS_SIG'] = np.sqrt(utils.inverse(ivar_box*mask_box))
+    out['BOX_COUNTS_NIVAR'] = nivar_box*mask_box
+    out['BOX_MASK'] = mask_box
+    out['BOX_COUNTS_SKY'] = sky_box
+    out['BOX_COUNTS_RN'] = rn_box
     # TODO - Confirm this should be float, not int
-    spec.BOX_NPIX = pixtot-pixmsk
+    out['BOX_NPIX'] = pixtot-pixmsk
+
+    # Fill em up!
+    for iobj, spec in enumerate(sobjs):
+        for key in out.keys():
+            setattr(spec, key, out[key][iobj].copy())
+        spec.BOX_RADIUS = box_radius
+
+    return out
 
 
 def findfwhm(model, sig_x):
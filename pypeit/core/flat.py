@@ -107,6 +107,79 @@ def sorted_flat_data(data, coo, gpm=None):
     return gpm, srt, coo_data, flat_data
 
 
+def relative_slit_scale(flat, waveimg, slitid_img, spat_id, gpm=None):
+    """
+    Compute the relative scaling of slits with overlapping wavelength
+    coverage, as for the slices of an IFU.
+
+    The slits are sorted by their minimum wavelength, and each slit is
+    scaled to the previous one using the ratio of the median flat
+    counts in the wavelength range covered by both.  The pixels are
+    grouped by slit once, such that each slit is only searched in its
+    own pixels.
+
+    Args:
+        flat (`numpy.ndarray`_):
+            Flat-field image.
+        waveimg (`numpy.ndarray`_):
+            Wavelength image.
+        slitid_img (`numpy.ndarray`_):
+            Image with the ``spat_id`` of the slit that each pixel
+            falls in; pixels not in any slit are -1.
+        spat_id (`numpy.ndarray`_):
+            Sorted ``spat_id`` of all slits.
+        gpm (`numpy.ndarray`_, optional):
+            Good-pixel mask used to measure the ratios.  If None, all
+            pixels are used.
+
+    Returns:
+        `numpy.ndarray`_: Image with the relative scaling of the slit
+        that each pixel falls in; the scaling of the bluest slit and
+        of pixels not in any slit is 1.
+    """
+    nslits = spat_id.size
+    _gpm = np.ones(flat.shape, dtype=bool) if gpm is None else gpm
+
+    # Group the pixels by slit
+    slitid = slitid_img.ravel()
+    pix = np.flatnonzero(slitid >= 0)
+    slit_idx = np.clip(np.searchsorted(spat_id, slitid[pix]), 0, nslits-1)
+    indx = spat_id[slit_idx] == slitid[pix]
+    pix, slit_idx = pix[indx], slit_idx[indx]
+    srt = np.argsort(slit_idx, kind='stable')
+    pix, slit_idx = pix[srt], slit_idx[srt]
+    bounds = np.searchsorted(slit_idx, np.arange(nslits+1))
+    wave = waveimg.ravel()[pix]
+    data = flat.ravel()[pix]
+    good = _gpm.ravel()[pix]
+
+    # Wavelength range of each slit
+    nonempty = bounds[1:] > bounds[:-1]
+    wvmin = np.full(nslits, np.inf)
+    wvmax = np.full(nslits, -np.inf)
+    wvmin[nonempty] = np.minimum.reduceat(wave, bounds[:-1][nonempty])
+    wvmax[nonempty] = np.maximum.reduceat(wave, bounds[:-1][nonempty])
+
+    # Scale each slit to the previous one in wavelength
+    swslt = np.argsort(wvmin)
+    scale = np.ones(nslits, dtype=float)
+    for a, b in zip(swslt[:-1], swslt[1:]):
+        wa, wb = wave[bounds[a]:bounds[a+1]], wave[bounds[b]:bounds[b+1]]
+        olap_a = good[bounds[a]:bounds[a+1]] & (wa > wvmin[b]) & (wa < wvmax[b])
+        olap_b = good[bounds[b]:bounds[b+1]] & (wb > wvmin[a]) & (wb < wvmax[a])
+        if not np.any(olap_a) or not np.any(olap_b):
+            msgs.warn('Slits {0} and {1} do not overlap in wavelength; '.format(spat_id[a],
+                      spat_id[b]) + 'assuming the same scaling.')
+            scale[b] = scale[a]
+            continue
+        scale[b] = scale[a] * np.median(data[bounds[a]:bounds[a+1]][olap_a]) \
+                        / np.median(data[bounds[b]:bounds[b+1]][olap_b])
+
+    relscl = np.ones(flat.size, dtype=float)
+    relscl[pix] = scale[slit_idx]
+    return relscl.reshape(flat.shape)
+
+
 def illum_filter(spat_flat_data_raw, med_width):
     """
     Filter the flat data to produce the empirical illumination
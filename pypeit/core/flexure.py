@@ -119,50 +119,102 @@ def load_sky_spectrum(sky_file):
     return xspectrum1d.XSpectrum1D.from_file(sky_file)
 
 
-def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
-    """ Calculate shift between object sky spectrum and archive sky spectrum
+# Process-wide cache of preprocessed archive sky spectra, keyed by the
+# sky file name. See :func:`get_arx_sky`.
+_arx_sky_cache = {}
+# Maximum number of smoothed archive spectra kept for each sky file; the
+# least recently used one is dropped first.
+_max_smoothed = 16
+
+
+def _sky_lines(skyspec):
+    """
+    Detect the brightest sky lines and measure their widths.
+
+    Args:
+        skyspec (:class:`linetools.spectra.xspectrum1d.XSpectrum1d`):
+            Sky spectrum
+
+    Returns:
+        tuple: The dispersion (Angstrom per pixel) at each pixel, the
+        pixel indices of the (at most) 5 brightest lines, and the
+        widths of these lines in pixels.
+    """
+    amp, amp_cont, cent, wid, _, w, yprep, nsig = arc.detect_lines(skyspec.flux.value)
+    # Keep only 5 brightest amplitude lines (keep is array of indices
+    # within w of the 5 brightest)
+    keep = np.argsort(amp[w])[-5:]
+    # Calculate wavelength (Angstrom per pixel)
+    disp = np.append(skyspec.wavelength.value[1]-skyspec.wavelength.value[0],
+                     skyspec.wavelength.value[1:]-skyspec.wavelength.value[:-1])
+    idx = (cent+0.5).astype(np.int)[w][keep]   # The +0.5 is for rounding
+    return disp, idx, wid[w][keep]
+
+
+def get_arx_sky(sky_file):
+    """
+    Load and preprocess an archived sky spectrum for use with
+    :func:`spec_flex_shift_batch`.
+
+    The archive spectrum is read and its sky lines are measured only
+    once per process. The result also holds a cache of the smoothed
+    archive spectra, which is filled as needed by
+    :func:`spec_flex_shift_batch`.
+
+    Args:
+        sky_file (str):
+            Archived sky file
+
+    Returns:
+        dict: Dictionary with the archived spectrum (``spec``), the
+        measured sky lines (``lines``; see :func:`_sky_lines`), and the
+        cache of smoothed spectra (``smoothed``).
+    """
+    if sky_file not in _arx_sky_cache:
+        arx_skyspec = load_sky_spectrum(sky_file)
+        _arx_sky_cache[sky_file] = dict(spec=arx_skyspec, lines=_sky_lines(arx_skyspec), smoothed={})
+    return _arx_sky_cache[sky_file]
+
+
+def _spec_flex_prep(obj_skyspec, arx_skyspec, arx_lines=None, smooth_cache=None, smooth_bin=None):
+    """
+    Prepare the object and archived sky spectra for the cross-correlation
+    used to measure the flexure shift.
+
+    This matches the resolution of the archived spectrum to the object
+    spectrum, rebins both onto the overlapping object wavelengths,
+    normalizes them, and subtracts their continua.
 
     Args:
         obj_skyspec (:class:`linetools.spectra.xspectrum1d.XSpectrum1d`):
             Spectrum of the sky related to our object
         arx_skyspec (:class:`linetools.spectra.xspectrum1d.XSpectrum1d`):
             Archived sky spectrum
-        mxshft (float, optional):
-            Maximum allowed shift from flexure;  note there are cases that
-            have been known to exceed even 30 pixels..
+        arx_lines (tuple, optional):
+            Sky lines measured in the archived spectrum; see
+            :func:`_sky_lines`. If None, they are measured here.
+        smooth_cache (dict, optional):
+            Cache of smoothed archived spectra keyed by the smoothing
+            kernel. If None, the archived spectrum is always smoothed.
+            The cache holds at most ``_max_smoothed`` spectra.
+        smooth_bin (float, optional):
+            Width in pixels of the bins used to key ``smooth_cache``.
+            If None or 0, only identical smoothing kernels are reused such
+            that the result does not depend on the cache.
 
     Returns:
-        dict: Contains flexure info
+        dict: The preprocessed spectra and the continuum-subtracted
+        fluxes to cross-correlate, or None if the preparation failed.
     """
-
-    # TODO None of these routines should have dependencies on XSpectrum1d!
-
     # Determine the brightest emission lines
     msgs.warn("If we use Paranal, cut down on wavelength early on")
-    arx_amp, arx_amp_cont, arx_cent, arx_wid, _, arx_w, arx_yprep, nsig \
-            = arc.detect_lines(arx_skyspec.flux.value)
-    obj_amp, obj_amp_cont, obj_cent, obj_wid, _, obj_w, obj_yprep, nsig_obj \
-            = arc.detect_lines(obj_skyspec.flux.value)
-
-    # Keep only 5 brightest amplitude lines (xxx_keep is array of
-    # indices within arx_w of the 5 brightest)
-    arx_keep = np.argsort(arx_amp[arx_w])[-5:]
-    obj_keep = np.argsort(obj_amp[obj_w])[-5:]
-
-    # Calculate wavelength (Angstrom per pixel)
-    arx_disp = np.append(arx_skyspec.wavelength.value[1]-arx_skyspec.wavelength.value[0],
-                         arx_skyspec.wavelength.value[1:]-arx_skyspec.wavelength.value[:-1])
-    obj_disp = np.append(obj_skyspec.wavelength.value[1]-obj_skyspec.wavelength.value[0],
-                         obj_skyspec.wavelength.value[1:]-obj_skyspec.wavelength.value[:-1])
+    arx_disp, arx_idx, arx_wid = _sky_lines(arx_skyspec) if arx_lines is None else arx_lines
+    obj_disp, obj_idx, obj_wid = _sky_lines(obj_skyspec)
 
     # Calculate resolution (lambda/delta lambda_FWHM)..maybe don't need
     # this? can just use sigmas
-    arx_idx = (arx_cent+0.5).astype(np.int)[arx_w][arx_keep]   # The +0.5 is for rounding
-    arx_res = arx_skyspec.wavelength.value[arx_idx]/\
-              (arx_disp[arx_idx]*(2*np.sqrt(2*np.log(2)))*arx_wid[arx_w][arx_keep])
-    obj_idx = (obj_cent+0.5).astype(np.int)[obj_w][obj_keep]   # The +0.5 is for rounding
-    obj_res = obj_skyspec.wavelength.value[obj_idx]/ \
-              (obj_disp[obj_idx]*(2*np.sqrt(2*np.log(2)))*obj_wid[obj_w][obj_keep])
+    arx_res = arx_skyspec.wavelength.value[arx_idx]/(arx_disp[arx_idx]*(2*np.sqrt(2*np.log(2)))*arx_wid)
+    obj_res = obj_skyspec.wavelength.value[obj_idx]/(obj_disp[obj_idx]*(2*np.sqrt(2*np.log(2)))*obj_wid)
 
     if not np.all(np.isfinite(obj_res)):
         msgs.warn('Failed to measure the resolution of the object spectrum, likely due to error '
@@ -172,8 +224,8 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
                                                                      np.median(obj_res)))
 
     # Determine sigma of gaussian for smoothing
-    arx_sig2 = np.power(arx_disp[arx_idx]*arx_wid[arx_w][arx_keep], 2)
-    obj_sig2 = np.power(obj_disp[obj_idx]*obj_wid[obj_w][obj_keep], 2)
+    arx_sig2 = np.power(arx_disp[arx_idx]*arx_wid, 2)
+    obj_sig2 = np.power(obj_disp[obj_idx]*obj_wid, 2)
 
     arx_med_sig2 = np.median(arx_sig2)
     obj_med_sig2 = np.median(obj_sig2)
@@ -181,7 +233,20 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
     if obj_med_sig2 >= arx_med_sig2:
         smooth_sig = np.sqrt(obj_med_sig2-arx_med_sig2)  # Ang
         smooth_sig_pix = smooth_sig / np.median(arx_disp[arx_idx])
-        arx_skyspec = arx_skyspec.gauss_smooth(smooth_sig_pix*2*np.sqrt(2*np.log(2)))
+        if smooth_cache is None:
+            arx_skyspec = arx_skyspec.gauss_smooth(smooth_sig_pix*2*np.sqrt(2*np.log(2)))
+        else:
+            if smooth_bin is not None and smooth_bin > 0:
+                # Use the center of the resolution bin
+                smooth_sig_pix = (np.floor(smooth_sig_pix/smooth_bin) + 0.5)*smooth_bin
+            if smooth_sig_pix in smooth_cache:
+                # Move to the end to mark as most recently used
+                smooth_cache[smooth_sig_pix] = smooth_cache.pop(smooth_sig_pix)
+            else:
+                smooth_cache[smooth_sig_pix] = arx_skyspec.gauss_smooth(smooth_sig_pix*2*np.sqrt(2*np.log(2)))
+                if len(smooth_cache) > _max_smoothed:
+                    del smooth_cache[next(iter(smooth_cache))]
+            arx_skyspec = smooth_cache[smooth_sig_pix]
     else:
         msgs.warn("Prefer archival sky spectrum to have higher resolution")
         smooth_sig_pix = 0.
@@ -192,15 +257,6 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
     min_wave = max(np.amin(arx_skyspec.wavelength.value), np.amin(obj_skyspec.wavelength.value))
     max_wave = min(np.amax(arx_skyspec.wavelength.value), np.amax(obj_skyspec.wavelength.value))
 
-    #Smooth higher resolution spectrum by smooth_sig (flux is conserved!)
-#    if np.median(obj_res) >= np.median(arx_res):
-#        msgs.warn("New Sky has higher resolution than Archive.  Not smoothing")
-        #obj_sky_newflux = ndimage.gaussian_filter(obj_sky.flux, smooth_sig)
-#    else:
-        #tmp = ndimage.gaussian_filter(arx_sky.flux, smooth_sig)
-#        arx_skyspec = arx_skyspec.gauss_smooth(smooth_sig_pix*2*np.sqrt(2*np.log(2)))
-        #arx_sky.flux = ndimage.gaussian_filter(arx_sky.flux, smooth_sig)
-
     # Define wavelengths of overlapping spectra
     keep_idx = np.where((obj_skyspec.wavelength.value>=min_wave) &
                          (obj_skyspec.wavelength.value<=max_wave))[0]
@@ -257,10 +313,26 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
     # Consider sharpness filtering (e.g. LowRedux)
     msgs.work("Consider taking median first [5 pixel]")
 
-    #Cross correlation of spectra
-    #corr = np.correlate(arx_skyspec.flux, obj_skyspec.flux, "same")
-    corr = np.correlate(arx_sky_flux, obj_sky_flux, "same")
+    return dict(obj_skyspec=obj_skyspec, arx_skyspec=arx_skyspec, obj_sky_flux=obj_sky_flux,
+                arx_sky_flux=arx_sky_flux, smooth=smooth_sig_pix)
+
 
+def _spec_flex_peak(corr, prep, mxshft):
+    """
+    Find the flexure shift from the peak of the cross-correlation.
+
+    Args:
+        corr (`numpy.ndarray`_):
+            Cross-correlation of the archived and object sky spectra,
+            as computed by `numpy.correlate`_ with ``mode='same'``.
+        prep (dict):
+            Preprocessed spectra from :func:`_spec_flex_prep`.
+        mxshft (int):
+            Maximum allowed shift from flexure
+
+    Returns:
+        dict: Contains flexure info
+    """
     #Create array around the max of the correlation function for fitting for subpixel max
     # Restrict to pixels within maxshift of zero lag
     lag0 = corr.size//2
@@ -285,13 +357,103 @@ def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
     #model = (fit[2]*(subpix_grid**2.))+(fit[1]*subpix_grid)+fit[0]
 
     return dict(polyfit=fit, shift=shift, subpix=subpix_grid,
-                corr=corr[subpix_grid.astype(np.int)], sky_spec=obj_skyspec, arx_spec=arx_skyspec,
-                corr_cen=corr.size/2, smooth=smooth_sig_pix, success=success)
+                corr=corr[subpix_grid.astype(np.int)], sky_spec=prep['obj_skyspec'],
+                arx_spec=prep['arx_skyspec'], corr_cen=corr.size/2, smooth=prep['smooth'], success=success)
+
 
+def spec_flex_shift(obj_skyspec, arx_skyspec, mxshft=20):
+    """ Calculate shift between object sky spectrum and archive sky spectrum
 
-def spec_flexure_obj(specobjs, slitord, bpm, method, sky_file, mxshft=None):
+    Args:
+        obj_skyspec (:class:`linetools.spectra.xspectrum1d.XSpectrum1d`):
+            Spectrum of the sky related to our object
+        arx_skyspec (:class:`linetools.spectra.xspectrum1d.XSpectrum1d`):
+            Archived sky spectrum
+        mxshft (float, optional):
+            Maximum allowed shift from flexure;  note there are cases that
+            have been known to exceed even 30 pixels..
+
+    Returns:
+        dict: Contains flexure info
+    """
+
+    # TODO None of these routines should have dependencies on XSpectrum1d!
+
+    prep = _spec_flex_prep(obj_skyspec, arx_skyspec)
+    if prep is None:
+        return None
+
+    #Cross correlation of spectra
+    #corr = np.correlate(arx_skyspec.flux, obj_skyspec.flux, "same")
+    corr = np.correlate(prep['arx_sky_flux'], prep['obj_sky_flux'], "same")
+    return _spec_flex_peak(corr, prep, mxshft)
+
+
+def spec_flex_shift_batch(obj_skyspecs, arx_sky, mxshft=20, smooth_bin=None):
+    """
+    Calculate the shifts between a set of object sky spectra and an
+    archived sky spectrum.
+
+    This is equivalent to calling :func:`spec_flex_shift` for each
+    object sky spectrum, except that the archive-side work (measuring
+    the sky lines and smoothing to the object resolution) is performed
+    only once per archive and resolution, and all the
+    cross-correlations are computed with a single batched FFT.
+
+    Args:
+        obj_skyspecs (list):
+            List of :class:`linetools.spectra.xspectrum1d.XSpectrum1d`
+            objects with the sky spectra related to each object.
+        arx_sky (dict):
+            Preprocessed archived sky spectrum; see
+            :func:`get_arx_sky`.
+        mxshft (float, optional):
+            Maximum allowed shift from flexure.
+        smooth_bin (float, optional):
+            Width (in pixels) of the bins in smoothing kernel width used
+            to reuse smoothed archive spectra across objects with
+            slightly different resolution. If None or 0, smoothed spectra
+            are only reused for identical kernels and the shifts are
+            identical to :func:`spec_flex_shift`.
+
+    Returns:
+        list: List of dictionaries with the flexure info for each
+        object; see :func:`spec_flex_shift`. Objects for which the
+        calculation failed have a value of None.
+    """
+    preps = [_spec_flex_prep(obj_skyspec, arx_sky['spec'], arx_lines=arx_sky['lines'],
+                             smooth_cache=arx_sky['smoothed'], smooth_bin=smooth_bin)
+                for obj_skyspec in obj_skyspecs]
+    good = [i for i, prep in enumerate(preps) if prep is not None]
+    fdicts = [None]*len(preps)
+    if len(good) == 0:
+        return fdicts
+
+    # Batched cross-correlation of all spectra. Zero-padding to a common
+    # length does not change the correlation at any lag.
+    npix = np.array([preps[i]['obj_sky_flux'].size for i in good])
+    nfft = int(2**np.ceil(np.log2(2*np.amax(npix))))
+    arx_flux = np.zeros((len(good), np.amax(npix)), dtype=float)
+    obj_flux = np.zeros((len(good), np.amax(npix)), dtype=float)
+    for j, i in enumerate(good):
+        arx_flux[j,:npix[j]] = preps[i]['arx_sky_flux']
+        obj_flux[j,:npix[j]] = preps[i]['obj_sky_flux']
+    corr_all = np.fft.irfft(np.fft.rfft(arx_flux, n=nfft, axis=-1)
+                            * np.conj(np.fft.rfft(obj_flux, n=nfft, axis=-1)), n=nfft, axis=-1)
+    for j, i in enumerate(good):
+        # Select the lags returned by numpy.correlate with mode='same'
+        corr = corr_all[j,(np.arange(npix[j]) - npix[j]//2) % nfft]
+        fdicts[i] = _spec_flex_peak(corr, preps[i], mxshft)
+    return fdicts
+
+
+def spec_flexure_obj(specobjs, slitord, bpm, method, sky_file, mxshft=None, smooth_bin=None):
     """Correct wavelengths for flexure, object by object
 
+    The archived sky spectrum is loaded and preprocessed only once (see
+    :func:`get_arx_sky`) and the shifts for all objects are measured
+    together using :func:`spec_flex_shift_batch`.
+
     Args:
         specobjs (:class:`pypeit.specobjs.Specobjs`):
         slitord (`numpy.ndarray`_):
@@ -305,6 +467,10 @@ def spec_flexure_obj(specobjs, slitord, bpm, method, sky_file, mxshft=None):
             Sky file
         mxshft (int, optional):
             Passed to flex_shift()
+        smooth_bin (float, optional):
+            Width (in pixels) of the bins in smoothing kernel width used
+            to share smoothed archive spectra among objects; see
+            :func:`spec_flex_shift_batch`.
 
     Returns:
         list:  list of dicts containing flexure results
@@ -314,11 +480,27 @@ def spec_flexure_obj(specobjs, slitord, bpm, method, sky_file, mxshft=None):
     sv_fdict = None
     msgs.work("Consider doing 2 passes in flexure as in LowRedux")
     # Load Archive
-    sky_spectrum = load_sky_spectrum(sky_file)
+    arx_sky = get_arx_sky(sky_file)
 
     nslits = len(bpm)
     gdslits = np.where(np.invert(bpm))[0]
 
+    # Measure the shifts for all extracted objects at once
+    obj_skys = {}
+    for islit in gdslits:
+        indx = specobjs.slitorder_indices(slitord[islit])
+        for ss, specobj in enumerate(specobjs[indx]):
+            if specobj is None or specobj['BOX_WAVE'] is None:
+                continue
+            if method not in ['boxcar', 'slitcen']:
+                msgs.error("Not ready for this flexure method: {}".format(method))
+            # Generate 1D spectrum for object
+            obj_skys[islit,ss] = xspectrum1d.XSpectrum1D.from_tuple((specobj.BOX_WAVE, specobj.BOX_COUNTS_SKY))
+    msgs.info("Measuring flexure for {:d} objects".format(len(obj_skys)))
+    fdicts = dict(zip(obj_skys.keys(), spec_flex_shift_batch(list(obj_skys.values()), arx_sky,
+                                                                    mxshft=mxshft,
+                                                                    smooth_bin=smooth_bin)))
+
     # Loop on objects
     flex_list = []
 
@@ -347,17 +529,10 @@ def spec_flexure_obj(specobjs, slitord, bpm, method, sky_file, mxshft=None):
                 continue
             msgs.info("Working on flexure for object # {:d}".format(specobj.OBJID) + "in slit # {:d}".format(islit))
             # Using boxcar
-            if method in ['boxcar', 'slitcen']:
-                sky_wave = specobj.BOX_WAVE #.to('AA').value
-                sky_flux = specobj.BOX_COUNTS_SKY
-            else:
-                msgs.error("Not ready for this flexure method: {}".format(method))
-
-            # Generate 1D spectrum for object
-            obj_sky = xspectrum1d.XSpectrum1D.from_tuple((sky_wave, sky_flux))
+            sky_wave = specobj.BOX_WAVE #.to('AA').value
 
-            # Calculate the shift
-            fdict = spec_flex_shift(obj_sky, sky_spectrum, mxshft=mxshft)
+            # Shift calculated above
+            fdict = fdicts[islit,ss]
             punt = False
             if fdict is None:
                 msgs.warn("Flexure shift calculation failed for this spectrum.")
@@ -355,7 +355,9 @@ def extinction_correction(wave, airmass, extinct):
     ----------
     wave : ndarray
         Wavelengths for interpolation. Should be sorted Assumes
-        Angstroms
+        Angstroms.  If 2D, each row is treated as a separate spectrum
+        observed at the same airmass, such that all the spectra of an
+        exposure are corrected in a single call.
     airmass : float
         Airmass
     extinct : Table
@@ -372,25 +374,108 @@ def extinction_correction(wave, airmass, extinct):
     # Interpolate
     f_mag_ext = interpolate.interp1d(extinct['wave'], extinct['mag_ext'], bounds_error=False,
                                      fill_value=0.)
-    mag_ext = f_mag_ext(wave)#.to('AA').value)
+    mag_ext = np.atleast_2d(f_mag_ext(wave))#.to('AA').value)
 
     # Deal with outside wavelengths
-    gdv = np.where(mag_ext > 0.)[0]
-
-    if len(gdv) == 0:
+    gdv = mag_ext > 0.
+    has_gdv = np.any(gdv, axis=1)
+    npix = mag_ext.shape[1]
+    first = np.argmax(gdv, axis=1)
+    last = npix - 1 - np.argmax(gdv[:,::-1], axis=1)
+    low = has_gdv & (first != 0)
+    high = has_gdv & np.logical_not(low) & (last != npix - 1)
+
+    if not np.all(has_gdv):
         msgs.warn("No valid extinction data available at this wavelength range. Extinction correction not applied")
-    elif gdv[0] != 0:  # Low wavelengths
-        mag_ext[0:gdv[0]] = mag_ext[gdv[0]]
+    if np.any(low):  # Low wavelengths
+        rows = np.arange(mag_ext.shape[0])
+        fill = np.arange(npix)[None,:] < first[:,None]
+        mag_ext = np.where(fill & low[:,None], mag_ext[rows,first][:,None], mag_ext)
         msgs.warn("Extrapolating at low wavelengths using last valid value")
-    elif gdv[-1] != (mag_ext.size - 1):  # High wavelengths
-        mag_ext[gdv[-1] + 1:] = mag_ext[gdv[-1]]
+    if np.any(high):  # High wavelengths
+        rows = np.arange(mag_ext.shape[0])
+        fill = np.arange(npix)[None,:] > last[:,None]
+        mag_ext = np.where(fill & high[:,None], mag_ext[rows,last][:,None], mag_ext)
         msgs.warn("Extrapolating at high wavelengths using last valid value")
-    else:
+    if np.any(has_gdv & np.logical_not(low) & np.logical_not(high)):
         msgs.info("Extinction data covered the whole spectra. Correct it!")
     # Evaluate
     flux_corr = 10.0 ** (0.4 * mag_ext * airmass)
     # Return
-    return flux_corr
+    return flux_corr.reshape(np.shape(wave))
+
+
+def apply_sensfunc(wave_sens, sensfunc, wave, counts, counts_ivar, exptime, extinct=None,
+                   airmass=None, extrap_sens=False):
+    """
+    Apply a sensitivity function to a set of spectra
+
+    This is the vectorized equivalent of
+    :func:`pypeit.specobj.SpecObj.apply_flux_calib`: all the spectra
+    of an exposure can be flux calibrated by the same sensitivity
+    function in a single call.
+
+    Args:
+        wave_sens (`numpy.ndarray`_):
+            Wavelengths of the sensitivity function
+        sensfunc (`numpy.ndarray`_):
+            Sensitivity function
+        wave (`numpy.ndarray`_):
+            Wavelengths of the spectra, shape (nspec,) or (nspectra, nspec).
+            Wavelengths <= 1 are treated as masked.
+        counts (`numpy.ndarray`_):
+            Counts of the spectra; same shape as ``wave``
+        counts_ivar (`numpy.ndarray`_):
+            Inverse variance of the counts; same shape as ``wave``
+        exptime (float):
+            Exposure time
+        extinct (`astropy.table.Table`_, optional):
+            Extinction data; see :func:`load_extinction_data`. If
+            None, the spectra are not corrected for extinction.
+        airmass (float, optional):
+            Airmass of the exposure; required for the extinction
+            correction.
+        extrap_sens (bool, optional):
+            Allow spectra that extend beyond the sensitivity function
+            (instead of crashing out).  As for the single-spectrum
+            method, the sensitivity function is not defined (NaN)
+            beyond its wavelength range.
+
+    Returns:
+        tuple: The flux, its error, and its inverse variance, all with
+        the same shape as ``wave``.
+    """
+    srt = np.argsort(wave_sens)
+    _wave_sens = wave_sens[srt]
+    wave_mask = wave > 1.0  # filter out masked regions or bad wavelengths
+    outside = wave_mask & ((wave < _wave_sens[0]) | (wave > _wave_sens[-1]))
+    if np.any(outside):
+        if extrap_sens:
+            msgs.warn("our data extends beyond the bounds of your sensfunc. You should be adjusting the par['sensfunc']['extrap_blu'] and/or par['sensfunc']['extrap_red'] to extrapolate further and recreate your sensfunc. But we are extrapolating per your direction. Good luck!")
+        else:
+            msgs.error("Your data extends beyond the bounds of your sensfunc. " + msgs.newline() +
+                       "Adjust the par['sensfunc']['extrap_blu'] and/or par['sensfunc']['extrap_red'] to extrapolate "
+                       "further and recreate your sensfunc.")
+    senstot = np.zeros(wave.shape, dtype=float)
+    senstot[wave_mask] = np.interp(wave[wave_mask], _wave_sens, sensfunc[srt])
+    senstot[outside] = np.nan
+
+    if extinct is not None:
+        if airmass is None:
+            msgs.error('You must specify the airmass if we are extinction correcting')
+        senstot *= extinction_correction(wave, airmass, extinct)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flam = counts * senstot / exptime
+        flam_sig = (senstot / exptime) / (np.sqrt(counts_ivar))
+        flam_ivar = counts_ivar / (senstot / exptime) ** 2
+
+    # Mask bad pixels
+    msk = (senstot <= 0.) | (counts_ivar <= 0.)
+    flam[msk] = 0.
+    flam_sig[msk] = 0.
+    flam_ivar[msk] = 0.
+    return flam, flam_sig, flam_ivar
 
 
 ### Routines for standard sensfunc started from here
@@ -703,34 +703,33 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img,
             msgs.info('--------------------------REDUCING: Iteration # ' + '{:2d}'.format(iiter) + ' of ' +
                       '{:2d}'.format(niter) + '---------------------------------------------------')
             img_minsky = sciimg - skyimage
+            group_sobjs = [sobjs[iobj] for iobj in group]
+            if iiter == 1:
+                # If this is the first iteration, initiate profile fitting
+                # with a simple boxcar extraction of all objects in the group.
+                extract.extract_boxcar_batch(sciimg, modelivar, outmask, waveimg, skyimage, rn2_img,
+                                             box_rad, group_sobjs)
+            else:
+                # For later iterations, profile fitting is based on an
+                # optimal extraction of all objects in the group.
+                extract.extract_boxcar_batch(sciimg, modelivar, outmask, waveimg, skyimage, rn2_img,
+                                             box_rad, group_sobjs, objmask_radius=2.0*box_rad)
+                extract.extract_optimal_batch(sciimg, modelivar, outmask, waveimg, skyimage, rn2_img,
+                                              thismask, obj_profiles, box_rad, group_sobjs,
+                                              objmask_radius=2.0*box_rad)
             for ii in range(objwork):
                 iobj = group[ii]
                 if iiter == 1:
-                    # If this is the first iteration, print status message. Initiate profile fitting with a simple
-                    # boxcar extraction.
+                    # If this is the first iteration, print status message.
                     msgs.info("----------------------------------- PROFILE FITTING --------------------------------------------------------")
                     msgs.info("Fitting profile for obj # " + "{:}".format(sobjs[iobj].OBJID) + " of {:}".format(nobj))
                     msgs.info("At x = {:5.2f}".format(sobjs[iobj].SPAT_PIXPOS) + " on slit # {:}".format(sobjs[iobj].slit_order))
                     msgs.info("------------------------------------------------------------------------------------------------------------")
 
-                    # TODO -- Use extract_specobj_boxcar to avoid code duplication
-                    extract.extract_boxcar(sciimg, modelivar, outmask, waveimg,
-                                           skyimage, rn2_img, box_rad, sobjs[iobj])
                     flux = sobjs[iobj].BOX_COUNTS
                     fluxivar = sobjs[iobj].BOX_COUNTS_IVAR * sobjs[iobj].BOX_MASK
                     wave = sobjs[iobj].BOX_WAVE
                 else:
-                    # For later iterations, profile fitting is based on an optimal extraction
-                    last_profile = obj_profiles[:, :, ii]
-                    trace = np.outer(sobjs[iobj].TRACE_SPAT, np.ones(nspat))
-                    objmask = ((spat_img >= (trace - 2.0 * box_rad)) & (spat_img <= (trace + 2.0 * box_rad)))
-                    # Boxcar
-                    extract.extract_boxcar(sciimg, modelivar, (outmask & objmask),
-                                                   waveimg, skyimage, rn2_img, box_rad,
-                                                   sobjs[iobj])
-                    # Optimal
-                    extract.extract_optimal(sciimg, modelivar, (outmask & objmask), waveimg, skyimage, rn2_img, thismask,
-                                            last_profile, box_rad, sobjs[iobj])
                     # If the extraction is bad do not update
                     if 'OPT_MASK' in sobjs[iobj].keys():
                         if sobjs[iobj].OPT_MASK.any():
@@ -842,21 +841,20 @@ def local_skysub_extract(sciimg, sciivar, tilts, waveimg, global_sky, rn2_img,
         outmask_extract = outmask if use_2dmodel_mask else inmask
 
         # Now that the iterations of profile fitting and sky subtraction are completed,
-        # loop over the objwork objects in this grouping and perform the final extractions.
-        for ii in range(objwork):
-            iobj = group[ii]
+        # extract all the objwork objects in this grouping at once.
+        group_sobjs = [sobjs[iobj] for iobj in group]
+        for iobj in group:
             msgs.info('Extracting obj # {:d}'.format(iobj + 1) + ' of {:d}'.format(nobj) +
                       ' with objid = {:d}'.format(sobjs[iobj].OBJID) + ' on slit # {:d}'.format(sobjs[iobj].slit_order) +
                       ' at x = {:5.2f}'.format(sobjs[iobj].SPAT_PIXPOS))
-            this_profile = obj_profiles[:, :, ii]
-            trace = np.outer(sobjs[iobj].TRACE_SPAT, np.ones(nspat))
-            # Optimal
-            objmask = ((spat_img >= (trace - 2.0 * box_rad)) & (spat_img <= (trace + 2.0 * box_rad)))
-            extract.extract_optimal(sciimg, modelivar * thismask, (outmask_extract & objmask), waveimg, skyimage, rn2_img, thismask, this_profile,
-                            box_rad, sobjs[iobj])
-            # Boxcar
-            extract.extract_boxcar(sciimg, modelivar*thismask, (outmask_extract & objmask),
-                                           waveimg, skyimage, rn2_img, box_rad, sobjs[iobj])
+        # Optimal
+        extract.extract_optimal_batch(sciimg, modelivar * thismask, outmask_extract, waveimg, skyimage, rn2_img,
+                                      thismask, obj_profiles, box_rad, group_sobjs,
+                                      objmask_radius=2.0*box_rad)
+        # Boxcar
+        extract.extract_boxcar_batch(sciimg, modelivar*thismask, outmask_extract, waveimg, skyimage, rn2_img,
+                                     box_rad, group_sobjs, objmask_radius=2.0*box_rad)
+        for iobj in group:
             sobjs[iobj].min_spat = min_spat
             sobjs[iobj].max_spat = max_spat
 
@@ -1102,7 +1100,7 @@ def ech_local_skysub_extract(sciimg, sciivar, fullmask, tilts, waveimg, global_s
     # For extractmask, True = Good, False = Bad
     iextract = (fullmask == 0) & (extractmask == False)
     # Undefined inverse variances
-    outmask[iextract] = bitmask.turn_on(outmask[iextract], 'EXTRACT')
+    bitmask.turn_on_inplace(outmask, 'EXTRACT', where=iextract)
 
     # Return
     return skymodel, objmodel, ivarmodel, outmask, sobjs
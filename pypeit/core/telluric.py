@@ -8,7 +8,10 @@ import numpy as np
 import scipy
 import matplotlib.pyplot as plt
 import os
+import functools
 import pickle
+import inspect
+import itertools
 from pypeit.core import load, flux_calib
 from pypeit.core.wavecal import wvutils
 from astropy import table
@@ -22,8 +25,12 @@ from sklearn import mixture
 
 from IPython import embed
 from pypeit.spectrographs.util import load_spectrograph
+from pypeit.par.pypeitpar import TelluricPar
 
 
+# Vectorized evaluation of the differential evolution population requires scipy >= 1.9
+_de_vectorized = 'vectorized' in inspect.signature(scipy.optimize.differential_evolution).parameters
+
 ##############################
 #  Telluric model functions  #
 ##############################
@@ -122,11 +129,83 @@ def pca_lnprior(theta,pca_dict):
     return gaussian_mixture_model.score_samples(A.reshape(1,-1))
 
 
+# Maximum number of telluric grids (or trimmed wavelength slabs of a
+# grid) kept in the process-wide cache of :func:`load_telluric_grid`.
+_max_telluric_grids = 4
+
+
+@functools.lru_cache(maxsize=_max_telluric_grids)
+def load_telluric_grid(filename, mtime, wave_min=None, wave_max=None, pad=0):
+    """
+    Read the telluric grid from a file, optionally trimmed to be within
+    wave_min and wave_max adding a padding if requested, and cache the
+    result.
+
+    The file is opened using a memory map, such that only the trimmed
+    wavelength slab of the 5-d model grid is read from disk, and it is
+    closed once the arrays are read. The result is cached for the
+    duration of the process, keeping at most ``_max_telluric_grids``
+    grids; use :func:`read_telluric_grid` instead of calling this
+    function directly. The returned arrays are shared by all calls
+    with the same arguments and are therefore read-only.
+
+    Args:
+        filename (str):
+           Absolute path to the telluric grid file
+        mtime (float):
+           Modification time of the file, used to invalidate the cache
+           when the file changes.
+        wave_min (float):
+           Minimum wavelength at which the grid is desired
+        wave_max (float):
+           Maximum wavelength at which the grid is desired.
+        pad:
+           Padding to be added to the grid boundaries if wave_min or wave_max are input
+
+    Returns:
+        tuple: Returns the (trimmed) wavelength grid in Angstroms
+        (`numpy.ndarray`_), the (trimmed) 5-d model grid
+        (`numpy.ndarray`_), and the header of the primary HDU
+        (`astropy.io.fits.Header`_).
+    """
+    msgs.info('Reading telluric grid: {0}'.format(filename))
+    with fits.open(filename, memmap=True) as hdul:
+        wave_grid_full = 10.0*hdul[1].data
+        nspec_full = wave_grid_full.size
+
+        if wave_min is not None:
+            ind_lower = np.argmin(np.abs(wave_grid_full - wave_min)) - pad
+        else:
+            ind_lower = 0
+        if wave_max is not None:
+            ind_upper = np.argmin(np.abs(wave_grid_full - wave_max)) + pad
+        else:
+            ind_upper=nspec_full
+        wave_grid = np.array(wave_grid_full[ind_lower:ind_upper])
+        # Only the trimmed slab is read into memory
+        model_grid = np.array(hdul[0].data[:,:,:,:, ind_lower:ind_upper])
+        header = hdul[0].header.copy()
+    wave_grid.flags.writeable = False
+    model_grid.flags.writeable = False
+    return wave_grid, model_grid, header
+
+
+def clear_telluric_grid_cache():
+    """
+    Empty the process-wide cache of telluric grids.
+    """
+    load_telluric_grid.cache_clear()
+
+
 def read_telluric_grid(filename, wave_min=None, wave_max=None, pad = 0):
     """
     Reads in the telluric grid from a file, and optionally trims the grid to be in within
     wave_min and wave_max adding a padding if requested.
 
+    The grid is read through :func:`load_telluric_grid`, such that only
+    the trimmed wavelength slab is read from disk, and the same grid is
+    only read once per process.
+
     Args:
         filename (str):
            Telluric grid filename
@@ -143,29 +222,18 @@ def read_telluric_grid(filename, wave_min=None, wave_max=None, pad = 0):
 
     """
 
-    hdul = fits.open(filename)
-    wave_grid_full = 10.0*hdul[1].data
-    model_grid_full = hdul[0].data
-    nspec_full = wave_grid_full.size
+    wave_grid, model_grid, header = load_telluric_grid(os.path.abspath(filename),
+                                                       os.path.getmtime(filename),
+                                                       wave_min=wave_min, wave_max=wave_max,
+                                                       pad=pad)
 
-    if wave_min is not None:
-        ind_lower = np.argmin(np.abs(wave_grid_full - wave_min)) - pad
-    else:
-        ind_lower = 0
-    if wave_max is not None:
-        ind_upper = np.argmin(np.abs(wave_grid_full - wave_max)) + pad
-    else:
-        ind_upper=nspec_full
-    wave_grid = wave_grid_full[ind_lower:ind_upper]
-    model_grid = model_grid_full[:,:,:,:, ind_lower:ind_upper]
-
-    pg = hdul[0].header['PRES0']+hdul[0].header['DPRES']*np.arange(0,hdul[0].header['NPRES'])
-    tg = hdul[0].header['TEMP0']+hdul[0].header['DTEMP']*np.arange(0,hdul[0].header['NTEMP'])
-    hg = hdul[0].header['HUM0']+hdul[0].header['DHUM']*np.arange(0,hdul[0].header['NHUM'])
-    if hdul[0].header['NAM'] > 1:
-        ag = hdul[0].header['AM0']+hdul[0].header['DAM']*np.arange(0,hdul[0].header['NAM'])
+    pg = header['PRES0']+header['DPRES']*np.arange(0,header['NPRES'])
+    tg = header['TEMP0']+header['DTEMP']*np.arange(0,header['NTEMP'])
+    hg = header['HUM0']+header['DHUM']*np.arange(0,header['NHUM'])
+    if header['NAM'] > 1:
+        ag = header['AM0']+header['DAM']*np.arange(0,header['NAM'])
     else:
-        ag = hdul[0].header['AM0']+1*np.arange(0,1)
+        ag = header['AM0']+1*np.arange(0,1)
 
     dwave, dloglam, resln_guess, pix_per_sigma = wvutils.get_sampling(wave_grid)
     tell_pad_pix = int(np.ceil(10.0 * pix_per_sigma))
@@ -176,50 +244,87 @@ def read_telluric_grid(filename, wave_min=None, wave_max=None, pad = 0):
     return tell_dict
 
 
-def interp_telluric_grid(theta,tell_dict):
+def _grid_interp_weights(value, grid, method):
+    """
+    Compute the indices and weights used to interpolate along one axis of the telluric grid.
+
+    Args:
+        value (:obj:`float`, `numpy.ndarray`_):
+            Location(s) at which to interpolate.
+        grid (`numpy.ndarray`_):
+            Regularly spaced grid along this axis.
+        method (str):
+            Interpolation method. See
+            :func:`~pypeit.par.pypeitpar.TelluricPar.valid_grid_interp`.
+
+    Returns:
+        tuple: Lists with the grid indices and the associated weights.
+        Each element has the same shape as ``value``.
+    """
+    value = np.asarray(value, dtype=float)
+    if len(grid) == 1:
+        return [np.zeros(value.shape, dtype=int)], [np.ones(value.shape)]
+    findx = (value - grid[0])/(grid[1] - grid[0])
+    if method == 'nearest':
+        return [np.round(findx).astype(int)], [np.ones(value.shape)]
+    findx = np.clip(findx, 0, len(grid)-1)
+    indx = np.minimum(np.floor(findx).astype(int), len(grid)-2)
+    frac = findx - indx
+    return [indx, indx+1], [1.0-frac, frac]
+
+
+def interp_telluric_grid(theta, tell_dict, ind_lower=None, ind_upper=None):
     """
     Routine to interpolate the telluric model grid onto an arbitrary location. The telluric models live
     in a four dimensional parameter space of (pressure, temperature, humidity, airmass). This routine
-    performs nearest gridpoint interpolation to evaluate the telluric model at an arbitrary location in this 4-d space.
+    performs either nearest gridpoint interpolation or multilinear interpolation to evaluate the telluric model at
+    an arbitrary location in this 4-d space. The method is set by ``tell_dict['grid_interp']``, which can
+    be 'nearest' (default) or 'linear'.
 
     Args:
         theta (`numpy.ndarray`_):
            Four dimensional telluric model parameter vector, where:
                pressure, temperature, humidity, airmass = theta
+           To evaluate a set of models at once, theta can also have shape (4, npop).
         tell_dict (dict):
             Dictionary containing the telluric grid
+        ind_lower (int):
+            Lower index into the telluric model wave_grid used to trim the output model. If None, start at
+            the first pixel.
+        ind_upper (int):
+            Upper index (inclusive) into the telluric model wave_grid used to trim the output model. If
+            None, end at the last pixel.
 
     Returns:
         model_grid (`numpy.ndarray`_):
             Telluric model evaluated at the location theta. The shape of this output is the same size of the telluric
-            grid (read in by read_telluric_grid above, and possibly trimmed)
+            grid (read in by read_telluric_grid above, and possibly trimmed), unless ind_lower or ind_upper are
+            provided. If theta is two dimensional, the output has shape (npop, nspec).
 
     """
 
-    pg = tell_dict['pressure_grid']
-    tg = tell_dict['temp_grid']
-    hg = tell_dict['h2o_grid']
-    ag = tell_dict['airmass_grid']
+    method = tell_dict.get('grid_interp', 'nearest')
+    if method not in TelluricPar.valid_grid_interp():
+        msgs.error('Unknown telluric grid interpolation method: {0}'.format(method))
     model_grid = tell_dict['tell_grid']
-    press,temp,hum,airmass = theta
-    if len(pg) > 1:
-        p_ind = int(np.round((press-pg[0])/(pg[1]-pg[0])))
-    else:
-        p_ind = 0
-    if len(tg) > 1:
-        t_ind = int(np.round((temp-tg[0])/(tg[1]-tg[0])))
-    else:
-        t_ind = 0
-    if len(hg) > 1:
-        h_ind = int(np.round((hum-hg[0])/(hg[1]-hg[0])))
-    else:
-        h_ind = 0
-    if len(ag) > 1:
-        a_ind = int(np.round((airmass-ag[0])/(ag[1]-ag[0])))
-    else:
-        a_ind = 0
-
-    return model_grid[p_ind,t_ind,h_ind,a_ind]
+    wave_slice = slice(0 if ind_lower is None else ind_lower, None if ind_upper is None else ind_upper + 1)
+    indx, wgts = zip(*[_grid_interp_weights(value, tell_dict[key], method)
+                       for value, key in zip(theta, ['pressure_grid', 'temp_grid', 'h2o_grid', 'airmass_grid'])])
+
+    if method == 'nearest':
+        return model_grid[indx[0][0], indx[1][0], indx[2][0], indx[3][0], wave_slice]
+
+    # Multilinear interpolation; only the (at most 16) corners of the
+    # enclosing hypercube with non-zero weight are accessed
+    tell_model = None
+    for corner in itertools.product(*[range(len(i)) for i in indx]):
+        wgt = np.prod([wgts[axis][c] for axis, c in enumerate(corner)], axis=0)
+        if np.all(wgt == 0.0):
+            continue
+        _model = np.expand_dims(wgt, -1)*model_grid[indx[0][corner[0]], indx[1][corner[1]], indx[2][corner[2]],
+                                                    indx[3][corner[3]], wave_slice]
+        tell_model = _model if tell_model is None else tell_model + _model
+    return tell_model
 
 def conv_telluric(tell_model, dloglam, res):
     """
@@ -283,6 +388,108 @@ def shift_telluric(tell_model, loglam, dloglam, shift, stretch):
     return tell_model_shift
 
 
+def conv_telluric_vec(tell_model, dloglam, res):
+    """
+    Vectorized version of :func:`conv_telluric`, which convolves a set of telluric models, each to its own
+    resolution, using a single batched FFT convolution.
+
+    Args:
+        tell_model (`numpy.ndarray`_):
+            Input telluric models at the native resolution of the telluric model grid with shape (npop, nspec).
+        dloglam (float):
+            Wavelength spacing of the telluric grid expressed as a a dlog10(lambda), i.e. stored in the
+            tell_dict as tell_dict['dloglam']
+        res (`numpy.ndarray`_):
+            Desired resolution for each model expressed as lambda/dlambda with shape (npop,).
+
+    Returns:
+        convolved_model (`numpy.ndarray`_):
+            Resolution convolved telluric models. Shape = same size as input tell_model.
+
+    """
+    # Build the same kernels as conv_telluric
+    kernels = []
+    for _res in np.atleast_1d(res):
+        pix_per_sigma = 1.0/_res/(dloglam*np.log(10.0))/(2.0 * np.sqrt(2.0 * np.log(2)))
+        sig2pix = 1.0/pix_per_sigma
+        x = np.hstack([-1*np.flip(np.arange(sig2pix,4,sig2pix)),np.arange(0,4,sig2pix)])
+        kernels += [(1.0/(np.sqrt(2*np.pi)))*np.exp(-0.5*(x)**2)*sig2pix]
+    # Zero-pad the kernels to a common odd length, keeping the center
+    # pixel used by the 'same' convolution mode aligned
+    nkern = np.amax([k.size for k in kernels])
+    nkern += 1 - nkern % 2
+    g = np.zeros((len(kernels), nkern), dtype=float)
+    for i, k in enumerate(kernels):
+        offset = (nkern-1)//2 - (k.size-1)//2
+        g[i,offset:offset+k.size] = k
+    return scipy.signal.fftconvolve(tell_model, g, mode='same', axes=-1)
+
+
+def shift_telluric_vec(tell_model, loglam, dloglam, shift, stretch):
+    """
+    Vectorized version of :func:`shift_telluric`, which applies a different shift and stretch to each of a set of
+    telluric models.
+
+    Args:
+        tell_model (`numpy.ndarray`_):
+            Input telluric models with shape (npop, nspec).
+        loglam (`numpy.ndarray`_):
+            The log10 of the wavelength grid on which the tell_model is evaluated, shape (nspec,).
+        dloglam (float):
+            Wavelength spacing of the telluric grid expressed as a a dlog10(lambda), i.e. stored in the
+            tell_dict as tell_dict['dloglam']
+        shift (`numpy.ndarray`_):
+            Desired shift for each model, shape (npop,).
+        stretch (`numpy.ndarray`_):
+            Desired stretch for each model, shape (npop,).
+    Returns:
+        shifted_model (`numpy.ndarray`_):
+            Shifted telluric models. Shape = same size as input tell_model.
+
+    """
+    nspec = loglam.size
+    loglam_shift = loglam[0] + np.arange(nspec)[None,:] * dloglam * np.asarray(stretch)[:,None] \
+                        + np.asarray(shift)[:,None] * dloglam
+    # Batched linear interpolation, equivalent to np.interp for each model
+    indx = np.clip(np.searchsorted(loglam, loglam_shift, side='right') - 1, 0, nspec-2)
+    frac = np.clip((loglam_shift - loglam[indx])/(loglam[indx+1] - loglam[indx]), 0.0, 1.0)
+    fp_lo = np.take_along_axis(tell_model, indx, axis=-1)
+    fp_hi = np.take_along_axis(tell_model, indx+1, axis=-1)
+    return fp_lo + frac*(fp_hi - fp_lo)
+
+
+def _telluric_pad_indices(tell_dict, ind_lower, ind_upper):
+    """
+    Determine the padded index range of the telluric grid needed to
+    convolve the model between ind_lower and ind_upper, and the slice
+    limits used to trim the padding after the convolution.
+
+    Args:
+        tell_dict (dict):
+            Dictionary containing the telluric grid.
+        ind_lower (int):
+            Lower index into the telluric model wave_grid. Can be None.
+        ind_upper (int):
+            Upper index into the telluric model wave_grid. Can be None.
+
+    Returns:
+        tuple: The lower and upper (inclusive) indices of the padded
+        range, and a tuple with the start and end used to trim the
+        padded model.
+    """
+    ind_lower = 0 if ind_lower is None else ind_lower
+    ind_upper = tell_dict['wave_grid'].size - 1 if ind_upper is None else ind_upper
+    # Deal with padding for the convolutions
+    ind_lower_pad = np.fmax(ind_lower - tell_dict['tell_pad_pix'], 0)
+    ind_upper_pad = np.fmin(ind_upper + tell_dict['tell_pad_pix'], tell_dict['wave_grid'].size - 1)
+    ## FW: There is an extreme case with ind_upper == ind_upper_pad, the previous -0 won't work
+    if ind_upper_pad == ind_upper:
+        ind_upper_final = ind_upper_pad
+    else:
+        ind_upper_final = ind_upper - ind_upper_pad
+    return ind_lower_pad, ind_upper_pad, (ind_lower - ind_lower_pad, ind_upper_final)
+
+
 def eval_telluric(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
     """
     Routine to evaluate the telluric model at an arbitrary location in
@@ -300,9 +507,10 @@ def eval_telluric(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
 
     This routine performs the following steps:
 
-       1. nearest grid point interpolation of the telluric model onto a
-          new location in the 4-d space (pressure, temperature,
-          humidity, airmass)
+       1. nearest grid point or multilinear interpolation (see
+          :func:`interp_telluric_grid`) of the telluric model onto a new
+          location in the 4-d space (pressure, temperature, humidity,
+          airmass)
 
        2. convolution of the atmosphere model to the resolution set by
           resln.
@@ -333,20 +541,13 @@ def eval_telluric(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
     """
 
     ntheta = len(theta_tell)
-    tellmodel_hires = interp_telluric_grid(theta_tell[:4], tell_dict)
 
-    ind_lower = 0 if ind_lower is None else ind_lower
-    ind_upper = tell_dict['wave_grid'].size - 1 if ind_upper is None else ind_upper
-    # Deal with padding for the convolutions
-    ind_lower_pad = np.fmax(ind_lower - tell_dict['tell_pad_pix'], 0)
-    ind_upper_pad = np.fmin(ind_upper + tell_dict['tell_pad_pix'], tell_dict['wave_grid'].size - 1)
-    ## FW: There is an extreme case with ind_upper == ind_upper_pad, the previous -0 won't work
-    if ind_upper_pad == ind_upper:
-        ind_upper_final = ind_upper_pad
-    else:
-        ind_upper_final = ind_upper - ind_upper_pad
-    tell_pad_tuple = (ind_lower - ind_lower_pad, ind_upper_final)
-    tellmodel_conv = conv_telluric(tellmodel_hires[ind_lower_pad:ind_upper_pad + 1], tell_dict['dloglam'], theta_tell[4])
+    ind_lower_pad, ind_upper_pad, tell_pad_tuple = _telluric_pad_indices(tell_dict, ind_lower, ind_upper)
+    ind_upper_final = tell_pad_tuple[1]
+    # Only interpolate the portion of the grid needed for the padded model
+    tellmodel_hires = interp_telluric_grid(theta_tell[:4], tell_dict, ind_lower=ind_lower_pad,
+                                           ind_upper=ind_upper_pad)
+    tellmodel_conv = conv_telluric(tellmodel_hires, tell_dict['dloglam'], theta_tell[4])
 
     if ntheta == 7:
         tellmodel_out = shift_telluric(tellmodel_conv, np.log10(tell_dict['wave_grid'][ind_lower_pad: ind_upper_pad+1]), tell_dict['dloglam'],
@@ -356,6 +557,77 @@ def eval_telluric(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
         return tellmodel_conv[tell_pad_tuple[0]:ind_upper_final]
 
 
+def eval_telluric_vec(theta_tell, tell_dict, ind_lower=None, ind_upper=None):
+    """
+    Vectorized version of :func:`eval_telluric`, which evaluates the telluric model for a population of
+    parameter vectors at once. The grid interpolation, resolution convolution (using a batched FFT), and shift
+    are all performed on the full population in single operations.
+
+    Args:
+        theta_tell (`numpy.ndarray`_):
+            Set of five or seven dimensional parameter vectors describing the atmosphere with shape (ntheta,
+            npop). See :func:`eval_telluric` for a description of the parameters.
+        tell_dict (dict):
+            Dictionary containing the telluric grid.
+        ind_lower (int):
+            Lower index into the telluric model wave_grid to trim down
+            the telluric model.
+        ind_upper:
+            Upper index into the telluric model wave_grid to trim down
+            the telluric model.
+
+    Returns:
+        `numpy.ndarray`_: Telluric models with shape (npop, nspec)
+        evaluated at the desired locations in atmosphere parameter space.
+    """
+    ntheta = theta_tell.shape[0]
+    ind_lower_pad, ind_upper_pad, tell_pad_tuple = _telluric_pad_indices(tell_dict, ind_lower, ind_upper)
+    tellmodel_hires = interp_telluric_grid(theta_tell[:4], tell_dict, ind_lower=ind_lower_pad,
+                                           ind_upper=ind_upper_pad)
+    tellmodel_conv = conv_telluric_vec(tellmodel_hires, tell_dict['dloglam'], theta_tell[4])
+    if ntheta == 7:
+        tellmodel_conv = shift_telluric_vec(tellmodel_conv,
+                                            np.log10(tell_dict['wave_grid'][ind_lower_pad: ind_upper_pad+1]),
+                                            tell_dict['dloglam'], theta_tell[5], theta_tell[6])
+    return tellmodel_conv[:,tell_pad_tuple[0]:tell_pad_tuple[1]]
+
+
+def trim_tell_dict(tell_dict, ind_lower, ind_upper):
+    """
+    Trim the telluric grid to the wavelength range (including the
+    padding for the convolution) needed to evaluate the model between
+    ind_lower and ind_upper.
+
+    This is used to limit the amount of data that is sent to the
+    worker processes when the differential evolution population is
+    evaluated in parallel. Models evaluated with the trimmed dictionary
+    and the returned indices are identical to those evaluated with the
+    full dictionary.
+
+    Args:
+        tell_dict (dict):
+            Dictionary containing the telluric grid.
+        ind_lower (int):
+            Lower index into the telluric model wave_grid.
+        ind_upper (int):
+            Upper index into the telluric model wave_grid.
+
+    Returns:
+        tuple: The trimmed telluric grid dictionary, and the lower and
+        upper indices relative to the trimmed grid.
+    """
+    ind_lower_pad, ind_upper_pad, _ = _telluric_pad_indices(tell_dict, ind_lower, ind_upper)
+    if ind_upper_pad == ind_upper:
+        # Model extends to the end of the grid; keep the full grid
+        # below ind_lower so that the trimming of the convolution
+        # padding is unchanged
+        ind_lower_pad = 0
+    _tell_dict = tell_dict.copy()
+    _tell_dict['wave_grid'] = tell_dict['wave_grid'][ind_lower_pad:ind_upper_pad+1]
+    _tell_dict['tell_grid'] = np.array(tell_dict['tell_grid'][...,ind_lower_pad:ind_upper_pad+1])
+    return _tell_dict, ind_lower - ind_lower_pad, ind_upper - ind_lower_pad
+
+
 ############################
 #  Fitting routines        #
 ############################
@@ -402,6 +674,55 @@ def tellfit_chi2(theta, flux, thismask, arg_dict):
         loss_function = np.sum(np.square(huber_vec * totalmask))
         return loss_function
 
+def tellfit_chi2_vec(theta, flux, thismask, arg_dict):
+    """
+    Vectorized version of :func:`tellfit_chi2`, which evaluates the loss function for the full differential
+    evolution population at once. The telluric models for all candidates are computed with
+    :func:`eval_telluric_vec`; the user provided object model function is called for each candidate.
+
+    Args:
+        theta (`numpy.ndarray`_):
+           Parameter vectors for the object + telluric model with shape (ntheta, npop), following the calling
+           sequence for vectorized functions in scipy.optimize.differential_evolution. A single parameter vector
+           with shape (ntheta,) is also allowed.
+        flux (`numpy.ndarray`_):
+           The flux of the object being fit
+        thismask (`numpy.ndarray`_, boolean):
+           A mask indicating which values are to be fit. This is a good pixel mask, i.e. True=Good
+        arg_dict (dict):
+           A dictionary containing the parameters needed to evaluate the telluric model and the object model. See
+           documentation of tellfit for a detailed description.
+    Returns:
+        loss_function (`numpy.ndarray`_):
+           The value of the loss function for each of the npop parameter vectors. If theta is one dimensional, a
+           float is returned.
+
+    """
+    theta = np.asarray(theta)
+    if theta.ndim == 1:
+        return tellfit_chi2_vec(theta[:,None], flux, thismask, arg_dict)[0]
+
+    obj_model_func = arg_dict['obj_model_func']
+    flux_ivar = arg_dict['ivar']
+
+    theta_obj = theta[:-7]
+    theta_tell = theta[-7:]
+    tell_model = eval_telluric_vec(theta_tell, arg_dict['tell_dict'],
+                                   ind_lower=arg_dict['ind_lower'], ind_upper=arg_dict['ind_upper'])
+    obj_model = np.zeros_like(tell_model)
+    modelmask = np.zeros(tell_model.shape, dtype=bool)
+    for ipop in range(theta.shape[1]):
+        obj_model[ipop], modelmask[ipop] = obj_model_func(theta_obj[:,ipop], arg_dict['obj_dict'])
+
+    totalmask = thismask[None,:] & modelmask
+    chi_vec = totalmask * (flux[None,:] - tell_model*obj_model) * np.sqrt(flux_ivar)[None,:]
+    robust_scale = 2.0
+    huber_vec = scipy.special.huber(robust_scale, chi_vec)
+    loss_function = np.sum(np.square(huber_vec * totalmask), axis=1)
+    loss_function[np.invert(np.any(modelmask, axis=1))] = np.inf
+    return loss_function
+
+
 def tellfit(flux, thismask, arg_dict, **kwargs_opt):
     """
     Routine to perform the object + telluric model fitting for telluric
@@ -456,7 +777,23 @@ def tellfit(flux, thismask, arg_dict, **kwargs_opt):
 
         **kwargs_opt (dict):
             Optional arguments for the differential evolution
-            optimization
+            optimization. Two additional keywords control how the
+            population is evaluated:
+
+                - ``vectorized`` (bool): If True, evaluate the full
+                  population with a single call to
+                  :func:`tellfit_chi2_vec`. Requires scipy >= 1.9;
+                  otherwise a warning is issued and the population is
+                  evaluated one candidate at a time.
+                - ``workers`` (int): If vectorized is False and workers
+                  is not 1, the population is evaluated in parallel
+                  using this number of processes (-1 uses all
+                  available CPUs).
+
+            In both cases, the population is updated once per
+            generation (``updating='deferred'``), such that the results
+            are reproducible but not identical to the default serial
+            evaluation.
 
     Returns:
         tuple:  Returns three objects:
@@ -478,7 +815,27 @@ def tellfit(flux, thismask, arg_dict, **kwargs_opt):
     flux_ivar = arg_dict['ivar'] # Inverse variance of flux or counts
     bounds = arg_dict['bounds']  # bounds for differential evolution optimizaton
     seed = arg_dict['seed']      # Seed for differential evolution optimizaton
-    result = scipy.optimize.differential_evolution(tellfit_chi2, bounds, args=(flux, thismask, arg_dict,), seed=seed,
+
+    # Set how the population is evaluated
+    vectorized = kwargs_opt.pop('vectorized', False)
+    workers = kwargs_opt.pop('workers', 1)
+    if vectorized and not _de_vectorized:
+        msgs.warn('Vectorized differential evolution requires scipy>=1.9.  Evaluating the population '
+                  'one member at a time.')
+        vectorized = False
+    chi2_func = tellfit_chi2
+    fit_dict = arg_dict
+    if vectorized:
+        chi2_func = tellfit_chi2_vec
+        kwargs_opt.update(vectorized=True, updating='deferred')
+    elif workers != 1:
+        # Only send the relevant portion of the telluric grid to the worker processes
+        fit_dict = arg_dict.copy()
+        fit_dict['tell_dict'], fit_dict['ind_lower'], fit_dict['ind_upper'] \
+                = trim_tell_dict(arg_dict['tell_dict'], arg_dict['ind_lower'], arg_dict['ind_upper'])
+        kwargs_opt.update(workers=workers, updating='deferred')
+
+    result = scipy.optimize.differential_evolution(chi2_func, bounds, args=(flux, thismask, fit_dict,), seed=seed,
                                                    **kwargs_opt)
 
     theta_obj  = result.x[:-7]
@@ -1108,7 +1465,7 @@ def sensfunc_telluric(wave, counts, counts_ivar, counts_mask, exptime, airmass,
                       polyorder=8, mask_abs_lines=True,
                       delta_coeff_bounds=(-20.0, 20.0), minmax_coeff_bounds=(-5.0, 5.0),
                       sn_clip=30.0, only_orders=None, tol=1e-3, popsize=30, recombination=0.7, polish=True, disp=False,
-                      debug_init=False, debug=False):
+                      grid_interp='nearest', vectorized=False, workers=1, n_proc=1, debug_init=False, debug=False):
     """
     Function to compute a sensitivity function and a telluric model from the PypeIt spec1d file of a standard star spectrum
 
@@ -1186,6 +1543,20 @@ def sensfunc_telluric(wave, counts, counts_ivar, counts_mask, exptime, airmass,
         indicating the status of the optimization. See above for a description of the output and how to know
         if things are working well.
 
+    grid_interp : str, optional, default='nearest'
+        Method used to interpolate the telluric model grid, either 'nearest' or 'linear'. See
+        :func:`interp_telluric_grid`.
+
+    vectorized : bool, optional, default=False
+        Evaluate the full differential evolution population in a single vectorized call. See :func:`tellfit`.
+
+    workers : int, optional, default=1
+        Number of processes used to evaluate the differential evolution population if vectorized is False.
+        See :func:`tellfit`.
+
+    n_proc : int, optional, default=1
+        Number of processes used to fit the orders concurrently. See :class:`Telluric`.
+
     debug_init : bool, optional, default=False
         Show plots to the screen useful for debugging model initialization
 
@@ -1241,7 +1612,8 @@ def sensfunc_telluric(wave, counts, counts_ivar, counts_mask, exptime, airmass,
     TelObj = Telluric(wave, counts, counts_ivar, mask_tot, telgridfile, obj_params,
                       init_sensfunc_model, eval_sensfunc_model,  ech_orders=ech_orders, sn_clip=sn_clip, tol=tol,
                       popsize=popsize, recombination=recombination,
-                      polish=polish, disp=disp, debug=debug)
+                      polish=polish, disp=disp, grid_interp=grid_interp, vectorized=vectorized, workers=workers,
+                      n_proc=n_proc, debug=debug)
 
     TelObj.run(only_orders=only_orders)
     # Append the sensfunc to the output table for convenience
@@ -1623,6 +1995,28 @@ def poly_telluric(spec1dfile, telgridfile, telloutfile, outfile, z_obj=0.0, func
 
 
 
+def _robust_tellfit(args):
+    """
+    Perform the iterative object + telluric model fit for a single order.
+
+    This is a top-level function so that it can be used with
+    :func:`pypeit.utils.parallel_map`.
+
+    Args:
+        args (tuple):
+            The message to print, the flux, the argument dictionary
+            for :func:`tellfit`, and the keyword arguments for
+            :func:`pypeit.utils.robust_optimize`. See
+            :func:`Telluric.get_fit_args`.
+
+    Returns:
+        tuple: The result of :func:`pypeit.utils.robust_optimize`.
+    """
+    msg, flux, arg_dict, kwargs = args
+    msgs.info(msg)
+    return utils.robust_optimize(flux, tellfit, arg_dict, **kwargs)
+
+
 class Telluric(object):
     """
     This class performs a joint fit of a spectrum with a model describing the object spectrum, and a model
@@ -1771,6 +2165,23 @@ class Telluric(object):
             Argument for scipy.optimize.differential_evolution which will  display status messages to the screen
             indicating the status of the optimization. See above for a description of the output and how to know
             if things are working well.
+        grid_interp (str): default='nearest'
+            Method used to interpolate the telluric model grid in the (pressure, temperature, humidity, airmass)
+            space. Options are 'nearest' for nearest gridpoint lookup or 'linear' for multilinear interpolation.
+            The latter yields a smooth loss function which typically converges in fewer evaluations.
+        vectorized (bool): default=False
+            If True, the differential evolution population is evaluated in a single vectorized call for each
+            generation (see tellfit_chi2_vec), which is much faster than evaluating each candidate separately. This
+            requires scipy >= 1.9.
+        workers (int): default=1
+            If vectorized is False, the differential evolution population is evaluated in parallel using this number
+            of processes. Use -1 to use all available CPUs. Ignored if the orders are fit concurrently (see n_proc).
+        n_proc (int): default=1
+            Number of processes used to fit the orders concurrently. The orders are independent until the final
+            assembly of the output tables, and each order is fit with its own seed, such that the results do not
+            depend on n_proc. If less than 1, all available CPUs are used. If more than one order is fit
+            concurrently, the population of each order is evaluated serially, irrespective of workers, but
+            updated as if it were evaluated in parallel.
         debug (bool): default=False
             If True, QA plots will be shown to the screen indicating the quality of the fits. Specifically, the residual
             distributions will be shown at each iteration, and the fit will be shown at the end (for each order).
@@ -1783,11 +2194,15 @@ class Telluric(object):
                  sn_clip=30.0, airmass_guess=1.5, resln_guess=None,
                  resln_frac_bounds=(0.5, 1.5), pix_shift_bounds=(-5.0, 5.0), pix_stretch_bounds=(0.9,1.1),
                  maxiter=3, sticky=True, lower=3.0, upper=3.0,
-                 seed=777, tol=1e-3, popsize=30, recombination=0.7, polish=True, disp=False, debug=False):
+                 seed=777, tol=1e-3, popsize=30, recombination=0.7, polish=True, disp=False,
+                 grid_interp='nearest', vectorized=False, workers=1, n_proc=1, debug=False):
 
         # Turn on disp for the differential_evolution if debug mode is turned on.
         if debug:
             disp = True
+            if n_proc != 1:
+                msgs.warn('Debugging QA requires the orders to be fit serially.  Setting n_proc=1.')
+                n_proc = 1
 
         # This init function performs the following steps:
         # 1) assignement of relevant input arguments
@@ -1817,6 +2232,10 @@ class Telluric(object):
         self.recombination = recombination
         self.polish = polish
         self.disp = disp
+        self.grid_interp = grid_interp
+        self.vectorized = vectorized
+        self.workers = workers
+        self.n_proc = n_proc
         self.debug = debug
 
         # 2) Reshape all spectra to be (nspec, norders)
@@ -1830,6 +2249,9 @@ class Telluric(object):
 
         # 3) Read the telluric grid and initalize associated parameters
         self.tell_dict = self.read_telluric_grid()
+        if self.grid_interp not in TelluricPar.valid_grid_interp():
+            msgs.error('Unknown telluric grid interpolation method: {0}'.format(self.grid_interp))
+        self.tell_dict['grid_interp'] = self.grid_interp
         self.wave_grid = self.tell_dict['wave_grid']
         self.ngrid = self.wave_grid.size
         self.resln_guess = wvutils.get_sampling(self.wave_in_arr)[2] if resln_guess is None else resln_guess
@@ -1889,6 +2311,9 @@ class Telluric(object):
         """
         Loops over orders/slits, runs the telluric correction, and evaluates the object and telluric models.
 
+        If ``n_proc`` is not 1, the orders are fit concurrently using a pool of processes. Each order is fit with
+        its own seed (see ``seed``), such that the results are identical to fitting the orders one after another.
+
         Parameters
         ----------
         only_orders
@@ -1908,16 +2333,21 @@ class Telluric(object):
         self.tellmodel_list = [None]*self.norders
         self.theta_obj_list = [None]*self.norders
         self.theta_tell_list = [None]*self.norders
-        for counter, iord in enumerate(self.srt_order_tell):
-            if iord not in good_orders:
-                continue
-            msgs.info('Fitting object + telluric model for order: {:d}, {:d}/{:d}'.format(iord, counter, self.norders) +
-                      ' with user supplied function: {:s}'.format(self.init_obj_model.__name__))
-            self.result_list[iord], ymodel, ivartot, self.outmask_list[iord] = utils.robust_optimize(
-                self.flux_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord], tellfit, self.arg_dict_list[iord],
-                inmask=self.mask_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord],
-                maxiter=self.maxiter, lower=self.lower, upper=self.upper, sticky=self.sticky,
-                tol=self.tol, popsize=self.popsize, recombination=self.recombination, polish=self.polish, disp=self.disp)
+        fit_orders = [iord for iord in self.srt_order_tell if iord in good_orders]
+        parallel = self.n_proc != 1 and len(fit_orders) > 1
+        if parallel and self.workers != 1:
+            msgs.warn('Orders are fit concurrently (n_proc={0}).  Evaluating the differential '.format(self.n_proc)
+                      + 'evolution population serially in each process (workers=1) to avoid nested pools.')
+        fit_args = [self.get_fit_args(iord, parallel=parallel) for iord in fit_orders]
+        if parallel:
+            msgs.info('Fitting {:d} orders using a pool of processes'.format(len(fit_orders)))
+            fits = utils.parallel_map(_robust_tellfit, fit_args, n_proc=self.n_proc)
+        else:
+            # Fits are performed as the results are assigned below
+            fits = map(_robust_tellfit, fit_args)
+        # Assemble the results in order of telluric strength
+        for iord, fit in zip(fit_orders, fits):
+            self.result_list[iord], ymodel, ivartot, self.outmask_list[iord] = fit
             self.theta_obj_list[iord] = self.result_list[iord].x[:-7]
             self.theta_tell_list[iord] = self.result_list[iord].x[-7:]
             self.obj_model_list[iord], modelmask = self.eval_obj_model(self.theta_obj_list[iord], self.obj_dict_list[iord])
@@ -1927,6 +2357,41 @@ class Telluric(object):
             if self.debug:
                 self.show_fit_qa(iord)
 
+    def get_fit_args(self, iord, parallel=False):
+        """
+        Construct the arguments used to fit a single order with :func:`_robust_tellfit`.
+
+        Args:
+            iord (int):
+                The order to fit.
+            parallel (bool, optional):
+                The orders are fit in parallel. The telluric grid is trimmed to the wavelength range needed for
+                this order (see :func:`trim_tell_dict`), which limits the amount of data sent to the processes
+                and does not change the result of the fit, and the differential evolution population is
+                evaluated serially (``workers=1``) so that each process does not start its own pool. The result
+                is the same as evaluating the population in parallel.
+
+        Returns:
+            tuple: The arguments passed to :func:`_robust_tellfit`.
+        """
+        counter = np.where(self.srt_order_tell == iord)[0][0]
+        msg = 'Fitting object + telluric model for order: {:d}, {:d}/{:d}'.format(iord, counter, self.norders) \
+                + ' with user supplied function: {:s}'.format(self.init_obj_model.__name__)
+        arg_dict = self.arg_dict_list[iord]
+        if parallel:
+            arg_dict = arg_dict.copy()
+            arg_dict['tell_dict'], arg_dict['ind_lower'], arg_dict['ind_upper'] \
+                    = trim_tell_dict(self.tell_dict, self.ind_lower[iord], self.ind_upper[iord])
+        kwargs = dict(inmask=self.mask_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord],
+                      maxiter=self.maxiter, lower=self.lower, upper=self.upper, sticky=self.sticky,
+                      tol=self.tol, popsize=self.popsize, recombination=self.recombination, polish=self.polish,
+                      disp=self.disp, vectorized=self.vectorized, workers=self.workers)
+        if parallel and self.workers != 1:
+            # Avoid starting a pool within each process, but update the
+            # population as if it were evaluated in parallel
+            kwargs.update(workers=1, updating='deferred')
+        return msg, self.flux_arr[self.ind_lower[iord]:self.ind_upper[iord]+1, iord], arg_dict, kwargs
+
     def save(self, outfile):
         """
         Method for writing astropy tables containing the telluric and object model fits to a multi-extension fits file
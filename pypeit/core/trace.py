@@ -17,6 +17,7 @@ from IPython import embed
 
 import numpy as np
 from scipy import ndimage, signal, interpolate
+import numba as nb
 from matplotlib import pyplot as plt
 
 from astropy.stats import sigma_clipped_stats, sigma_clip
@@ -511,6 +512,156 @@ def prepare_sobel_for_trace(sobel_sig, bpm=None, boxcar=5, side='left'):
     return utils.boxcar_smooth_rows(img, boxcar, wgt=wgt, replace='zero')
 
 
+# Internal flags set by _recenter_row; see masked_centroid for their meaning
+_CENTROID_FLAGS = [(1, 'MATHERROR'), (2, 'OUTSIDEAPERTURE'), (4, 'EDGEBUFFER'), (8, 'MOMENTERROR'),
+                   (16, 'LARGESHIFT')]
+
+
+@nb.jit(nopython=True, cache=True)
+def _pairwise_sum(a, n):
+    """
+    Sum the first n elements of a vector in the same order as numpy.
+
+    This mimics numpy's pairwise summation so that the compiled centroid
+    kernel gives results that are bit-identical to those from
+    :func:`pypeit.core.moment.moment1d`.
+    """
+    if n < 8:
+        res = 0.
+        for i in range(n):
+            res += a[i]
+        return res
+    if n <= 128:
+        r = a[:8].copy()
+        m = n - n % 8
+        for i in range(8, m, 8):
+            for j in range(8):
+                r[j] += a[i+j]
+        res = ((r[0] + r[1]) + (r[2] + r[3])) + ((r[4] + r[5]) + (r[6] + r[7]))
+        for i in range(m, n):
+            res += a[i]
+        return res
+    n2 = n // 2
+    n2 -= n2 % 8
+    return _pairwise_sum(a, n2) + _pairwise_sum(a[n2:], n - n2)
+
+
+@nb.jit(nopython=True, cache=True)
+def _recenter_row(flux, ivar, bpm, fwgt, row, cen, radius, maxshift, maxerror, fill_error, xc, xe,
+                  xf):
+    """
+    Compiled equivalent of :func:`masked_centroid` for a single row,
+    with uniform weighting and ``fill='bound'``.
+
+    The new centers, errors, and flags for ``row`` are written to
+    ``xc``, ``xe``, and ``xf``, respectively. Flags are the integer
+    codes in ``_CENTROID_FLAGS``. No limit is applied if ``maxshift``
+    or ``maxerror`` are infinite.
+    """
+    nc = flux.shape[1]
+    nt = cen.size
+    tiny = np.finfo(np.float64).tiny
+
+    # Length of the integration window, as set by moment1d
+    mindiff = nc + 1
+    for j in range(nt):
+        i1 = int(np.floor(cen[j] - radius[j] + 0.5))
+        i2 = int(np.floor(cen[j] + radius[j] + 0.5))
+        mindiff = min(mindiff, i2 - i1)
+    nwin = max(mindiff - 1, 0) + 4
+
+    wt = np.empty(nwin, dtype=np.float64)
+    integ = np.empty(nwin, dtype=np.float64)
+    integc = np.empty(nwin, dtype=np.float64)
+    var = np.empty(nwin, dtype=np.float64)
+    for j in range(nt):
+        x = cen[j]
+        i1 = int(np.floor(x - radius[j] + 0.5))
+        # Zeroth and first moments
+        for k in range(nwin):
+            c = i1 - 1 + k
+            ih = min(max(c, 0), nc-1)
+            w = min(max(radius[j] - abs(c - x) + 0.5, 0.), 1.)
+            wt[k] = w if c >= 0 and c < nc and not bpm[row,ih] and ivar[row,ih] > 0 else 0.
+            integ[k] = flux[row,ih] * wt[k] * fwgt[row,ih]
+            integc[k] = integ[k] * c
+        mu0 = _pairwise_sum(integ, nwin)
+        num = _pairwise_sum(integc, nwin)
+        matherr = abs(num) * tiny >= abs(mu0)
+        xfit = x
+        xerr = fill_error
+        if not matherr:
+            xfit = num / mu0
+            matherr = not np.isfinite(xfit)
+        if matherr:
+            xfit = x
+        else:
+            # Error in the first moment
+            for k in range(nwin):
+                c = i1 - 1 + k
+                ih = min(max(c, 0), nc-1)
+                v = wt[k] * (c - xfit)
+                v *= v
+                var[k] = 0. if abs(v) * tiny >= abs(ivar[row,ih]) \
+                            or not np.isfinite(v / ivar[row,ih]) else v / ivar[row,ih]
+            s = _pairwise_sum(var, nwin)
+            if s >= 0 and np.isfinite(np.sqrt(s)):
+                e = np.sqrt(s)
+                if not abs(e) * tiny >= abs(mu0) and np.isfinite(e / abs(mu0)):
+                    xerr = e / abs(mu0)
+
+        # Flag the centroid
+        flg = 1 if matherr else 0
+        if abs(xfit - x) > radius[j] + 0.5:
+            flg |= 2
+        if xfit < radius[j] - 0.5 or xfit > nc - 0.5 - radius[j]:
+            flg |= 4
+        if flg > 0:
+            xfit = x
+            xerr = fill_error
+        bad = flg > 0
+        if np.isfinite(maxshift):
+            if abs(xfit - x) > maxshift:
+                flg |= 16
+            xfit = min(max(xfit - x, -maxshift), maxshift) + x
+        if xerr > maxerror:
+            flg |= 8
+            bad = True
+        if bad:
+            xfit = x
+            xerr = fill_error
+        xc[row,j] = xfit
+        xe[row,j] = xerr
+        xf[row,j] = flg
+
+
+@nb.jit(nopython=True, cache=True)
+def _follow_centroid(flux, ivar, bpm, fwgt, start_row, start_cen, radius, maxshift_start,
+                     maxshift_follow, maxerror, fill_error):
+    """
+    Compiled row-sequential recentering for all traces; see
+    :func:`follow_centroid`.
+    """
+    nr = flux.shape[0]
+    nt = start_cen.size
+    xc = np.empty((nr,nt), dtype=np.float64)
+    xe = np.empty((nr,nt), dtype=np.float64)
+    xf = np.zeros((nr,nt), dtype=np.uint8)
+
+    # Recenter the starting row
+    _recenter_row(flux, ivar, bpm, fwgt, start_row, start_cen, radius, maxshift_start, maxerror,
+                  fill_error, xc, xe, xf)
+    # Go to higher indices using the result from the previous row
+    for i in range(start_row+1,nr):
+        _recenter_row(flux, ivar, bpm, fwgt, i, xc[i-1], radius, maxshift_follow, maxerror,
+                      fill_error, xc, xe, xf)
+    # Go to lower indices using the result from the previous row
+    for i in range(start_row-1,-1,-1):
+        _recenter_row(flux, ivar, bpm, fwgt, i, xc[i+1], radius, maxshift_follow, maxerror,
+                      fill_error, xc, xe, xf)
+    return xc, xe, xf
+
+
 def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None, width=6.0,
                     maxshift_start=0.5, maxshift_follow=0.15, maxerror=0.2, continuous=True,
                     bitmask=None):
@@ -531,9 +682,10 @@ def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None,
     but treats the calculation of the centroids sequentially where
     the result for each row is dependent on and starts from the
     result from the previous row. The only independent measurement is
-    the one performed at the input `start_row`. This function is much
-    slower than :func:`masked_centroid` because of this introduced
-    dependency.
+    the one performed at the input `start_row`. Because of this
+    introduced dependency, the recentering of all rows and traces is
+    done by a compiled (numba) kernel that reproduces the calculation
+    of :func:`masked_centroid` for each row, including the mask flags.
 
     .. note::
         - This is an adaptation of ``trace_crude`` from ``idlspec2d``.
@@ -607,13 +759,11 @@ def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None,
     # Shape of the image with pixel weights
     nr, nc = flux.shape
 
-    # Instantiate theses supplementary arrays here to speed things up
-    # in iterative calling of moment1d. moment1d will check the array
-    # sizes. TODO: moment1d no longer instantiates these if they're not
-    # provided, so this likely isn't necessary; testing required.
-    _ivar = np.ones_like(flux, dtype=float) if ivar is None else ivar
-    _bpm = np.zeros_like(flux, dtype=bool) if bpm is None else bpm
-    _fwgt = np.ones_like(flux, dtype=float) if fwgt is None else fwgt
+    # Instantiate the supplementary arrays for the compiled kernel
+    _flux = np.asarray(flux, dtype=float)
+    _ivar = np.ones_like(_flux) if ivar is None else np.asarray(ivar, dtype=float)
+    _bpm = np.zeros(_flux.shape, dtype=bool) if bpm is None else np.asarray(bpm, dtype=bool)
+    _fwgt = np.ones_like(_flux) if fwgt is None else np.asarray(fwgt, dtype=float)
 
     # Number of starting coordinates
     _cen = np.atleast_1d(start_cen)
@@ -624,34 +774,34 @@ def follow_centroid(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None,
     # Check the dimensionality
     if _cen.ndim != 1:
         raise ValueError('Input coordinates to be at most 1D.')
-
-    # Instantiate output; just repeat input for all image rows.
-    xc = np.tile(_cen, (nr,1)).astype(float)
-    xe = np.zeros_like(xc, dtype=float)
-    xm = np.zeros_like(xc, dtype=bool) if bitmask is None \
-                else np.zeros_like(xc, dtype=bitmask.minimum_dtype())
+    _width = np.atleast_1d(width).astype(float)
+    if _width.size == 1:
+        _width = np.full(nt, _width[0], dtype=float)
+    if _width.shape != _cen.shape:
+        raise ValueError('width must either be a single value or have the same shape as start_cen.')
 
     # NOTE: This is effectively the old trace_crude_init
 
-    # Recenter the starting row
-    i = start_row
-    xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i,:], width, ivar=_ivar, bpm=_bpm,
-                                                fwgt=_fwgt, row=i, maxshift=maxshift_start,
-                                                maxerror=maxerror, bitmask=bitmask, fill='bound')
-
-    # Go to higher indices using the result from the previous row
-    for i in range(start_row+1,nr):
-        xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i-1,:], width, ivar=_ivar, bpm=_bpm,
-                                                    fwgt=_fwgt, row=i, maxshift=maxshift_follow,
-                                                    maxerror=maxerror, bitmask=bitmask,
-                                                    fill='bound')
-
-    # Go to lower indices using the result from the previous row
-    for i in range(start_row-1,-1,-1):
-        xc[i,:], xe[i,:], xm[i,:] = masked_centroid(flux, xc[i+1,:], width, ivar=_ivar, bpm=_bpm,
-                                                    fwgt=_fwgt, row=i, maxshift=maxshift_follow,
-                                                    maxerror=maxerror, bitmask=bitmask,
-                                                    fill='bound')
+    # Recenter the starting row and then follow the centroids to higher
+    # and then lower rows, each time starting from the result for the
+    # previous row. This is done for all traces at once by a compiled
+    # kernel that reproduces the calculation in masked_centroid (with
+    # fill='bound') for each row.
+    xc, xe, xf = _follow_centroid(_flux, _ivar, _bpm, _fwgt, int(start_row), _cen.astype(float),
+                                  _width/2,
+                                  np.inf if maxshift_start is None else float(maxshift_start),
+                                  np.inf if maxshift_follow is None else float(maxshift_follow),
+                                  np.inf if maxerror is None else float(maxerror), -1.)
+
+    # Convert the flags
+    if bitmask is None:
+        xm = (xf & 15) > 0
+    else:
+        xm = np.zeros_like(xc, dtype=bitmask.minimum_dtype())
+        for flg, key in _CENTROID_FLAGS:
+            indx = (xf & flg) > 0
+            if np.any(indx):
+                xm[indx] = bitmask.turn_on(xm[indx], key)
 
     # NOTE: In edgearr_tcrude, skip_bad (roughly opposite of continuous
     # here) was True by default, meaning continuous would be False by
@@ -812,13 +962,13 @@ def masked_centroid(flux, cen, width, ivar=None, bpm=None, fwgt=None, row=None,
     # Toggle the mask bits
     if bitmask is not None:
         xmsk = np.zeros_like(xfit, dtype=bitmask.minimum_dtype())
-        xmsk[matherr] = bitmask.turn_on(xmsk[matherr], 'MATHERROR')
-        xmsk[outside_ap] = bitmask.turn_on(xmsk[outside_ap], 'OUTSIDEAPERTURE')
-        xmsk[edge_buffer] = bitmask.turn_on(xmsk[edge_buffer], 'EDGEBUFFER')
+        bitmask.turn_on_inplace(xmsk, 'MATHERROR', where=matherr)
+        bitmask.turn_on_inplace(xmsk, 'OUTSIDEAPERTURE', where=outside_ap)
+        bitmask.turn_on_inplace(xmsk, 'EDGEBUFFER', where=edge_buffer)
         if maxerror is not None:
-            xmsk[large_error] = bitmask.turn_on(xmsk[large_error], 'MOMENTERROR')
+            bitmask.turn_on_inplace(xmsk, 'MOMENTERROR', where=large_error)
         if maxshift is not None:
-            xmsk[large_shift] = bitmask.turn_on(xmsk[large_shift], 'LARGESHIFT')
+            bitmask.turn_on_inplace(xmsk, 'LARGESHIFT', where=large_shift)
 
     # Return the new centers, errors, and flags
     return xfit, xerr, indx if bitmask is None else xmsk
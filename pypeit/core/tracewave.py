@@ -142,7 +142,7 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
                      tilts_guess=None, fwhm=4.0, spat_order=3, maxdev_tracefit=0.02,
                      sigrej_trace=3.0, max_badpix_frac=0.30, tcrude_maxerr=1.0,
                      tcrude_maxshift=3.0, tcrude_maxshift0=3.0, tcrude_nave=5,
-                     show_tracefits=False):
+                     show_tracefits=False, batch_lines=True, max_stack_pix=2**22):
     """
     Use a PCA model to determine the best object (or slit edge) traces for echelle spectrographs.
 
@@ -194,6 +194,13 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
         to improve the tracing.
     show_tracefits: bool, default = False, optional
         If true the fits will be shown to each arc line trace by iterative_fitting
+    batch_lines: bool, default = True, optional
+        Trace the lines away from the image edges together, placing a spectral window
+        around each line side-by-side in a single sub-image. If False, each line is traced
+        one at a time using the full spectral extent of the slit sub-image.
+    max_stack_pix: int, default = 2**22, optional
+        Maximum number of pixels in the sub-image of the lines traced together; lines are
+        traced in as many groups as needed to respect this limit.
     """
 
     # TODO: Explain procedure in docstring
@@ -213,23 +220,16 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
 
     lines_spat_int = np.round(lines_spat).astype(int)
 
-    spat_min = np.zeros(nlines, dtype=int)
-    spat_max = np.zeros(nlines, dtype=int)
+    # We sub-image each tilt using a symmetric window about the
+    # (integer) spatial location of each line, which is the slitcen
+    # evaluated at the line spectral position. spat_min and spat_max
+    # are the minimum and maximum location of the sub-image.
+    spat_min = lines_spat_int - trace_int
+    spat_max = lines_spat_int + trace_int + 1
 
     if inmask is None:
         inmask = thismask
 
-    # TODO: Clean up all the commented code here and below.
-    # The sub arrays hold the sub-imaged tilts
-    # tilts_sub = np.zeros((nsub, nlines))       # Thee trace_fweight (or gweighed) tilts
-
-    # tilts_sub_err = np.zeros((nsub, nlines))   # errors on the tilts (only used for masking but not weighted fitting)
-    # tilts_sub_mask = np.zeros((nsub, nlines), dtype=bool)  # mask indicating where the tilts are actually covered in the sub image, i.e. where thismask != False
-    # tilts_sub_spec = np.outer(np.ones(nsub), lines_spec)   # spectral coordinate of each tilt, which is the arc line spectral pixel location
-    # tilts_sub_spec_fit = np.zeros((nsub, nlines))   # spectral position determined by evaluating the tilt fit at the center of the slit
-
-    # tilts_sub_dspat = np.zeros_like(tilts_sub_spat) # delta position of the tilt in pixels, i.e. difference between slitcen and the spatial coordinate above
-
     # PCA fitting uses the sub-imaged fits, so we need them
     tilts_sub_fit = np.zeros((nsub, nlines))  # legendre polynomial fits to the tilt traces
     tilts_sub_spat = np.outer(np.arange(nsub), np.ones(nlines))  # spatial coordinate along each tilt
@@ -252,17 +252,57 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
     inmask_trans = (inmask * thismask).T.astype(float)
     thismask_trans = thismask.T
 
+    # Lines with a full sub-image that are well away from the spectral
+    # edges of the image are all traced at once, with their sub-images
+    # placed side-by-side. The remaining lines, whose tracing is
+    # affected by the image edges, are traced one at a time.
+    # Only a spectral window of +/- margin around each of these lines is
+    # included in the stacked sub-image, and the number of lines in
+    # each group is limited to bound its size.
+    margin = nsub + 4*fwhm
+    together = (spat_min >= 0) & (spat_max <= nspat - 1) & (lines_spec > margin) \
+                    & (lines_spec < nspec - 1 - margin)
+    if not batch_lines:
+        together[:] = False
+    nwin = int(np.fmin(2*np.ceil(margin) + 1, nspec))
+    gap = int(np.ceil(3*fwhm)) + 1
+    ngrp = int(np.fmax(max_stack_pix // (nsub * (nwin + gap)), 1))
+    line_groups = np.array_split(np.where(together)[0], np.ceil(np.sum(together)/ngrp)) \
+                    if np.any(together) else []
+    line_groups += [np.array([iline]) for iline in np.where(np.invert(together))[0]]
+
     # 1) Trace the tilts from a guess. If no guess is provided from a previous iteration use trace_crude
-    for iline in range(nlines):
-        # We sub-image each tilt using a symmetric window about the (integer) spatial location of each line,
-        # which is the slitcen evaluated at the line spectral position.
-        spat_min[iline] = lines_spat_int[iline] - trace_int  # spat_min is the minium location of the sub-image
-        spat_max[iline] = lines_spat_int[iline] + trace_int + 1  # spat_max is the maximum location of the sub-image
-        min_spat = np.fmax(spat_min[iline], 0)  # These min_spat and max_spat are to prevent leaving the image
-        max_spat = np.fmin(spat_max[iline], nspat - 1)
-        sub_img = arcimg_trans[min_spat:max_spat, :]
-        sub_inmask = inmask_trans[min_spat:max_spat, :]
-        sub_thismask = thismask_trans[min_spat:max_spat, :]
+    for lines in line_groups:
+        # These min_spat and max_spat are to prevent leaving the image.
+        # All lines in a group have the same sub-image size.
+        min_spat = np.fmax(spat_min[lines], 0)
+        max_spat = np.fmin(spat_max[lines], nspat - 1)
+        nsub_img = max_spat[0] - min_spat[0]
+
+        # Spectral window of each line in the image and in the stacked
+        # sub-image; offset converts the spectral position in the image
+        # to the one in the stacked sub-image. Lines traced one at a
+        # time use the full spectral range.
+        if together[lines[0]]:
+            _nwin = nwin
+            spec_start = np.clip(np.round(lines_spec[lines]).astype(int) - (nwin - 1)//2, 0,
+                                 nspec - nwin)
+            stack_start = np.arange(len(lines)) * (nwin + gap)
+        else:
+            _nwin = nspec
+            spec_start = np.zeros(1, dtype=int)
+            stack_start = np.zeros(1, dtype=int)
+        offset = stack_start - spec_start
+        sub_img = np.zeros((nsub_img, stack_start[-1] + _nwin), dtype=float)
+        sub_inmask = np.zeros(sub_img.shape, dtype=float)
+        sub_thismask = np.zeros(sub_img.shape, dtype=bool)
+        for i, iline in enumerate(lines):
+            s = slice(stack_start[i], stack_start[i] + _nwin)
+            ss = slice(spec_start[i], spec_start[i] + _nwin)
+            sub_img[:,s] = arcimg_trans[min_spat[i]:max_spat[i], ss]
+            sub_inmask[:,s] = inmask_trans[min_spat[i]:max_spat[i], ss]
+            sub_thismask[:,s] = thismask_trans[min_spat[i]:max_spat[i], ss]
+
         if do_crude:  # First time tracing, do a trace crude
             # NOTE: follow_centroid behaves differently from the old
             # trace_crude_init within 2-4 pixels at the trace edge
@@ -272,30 +312,30 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
             # TODO: This also returns error estimates and a mask, but
             # those weren't used in the previous version of the code.
             smsub_img = utils.boxcar_smooth_rows(sub_img, tcrude_nave, wgt=sub_inmask)
-            #            ivar = np.sqrt(smsub_img)
             ivar = None
             tilts_guess_now, tge, tgm \
-                = trace.follow_centroid(smsub_img,
-                                        (sub_img.shape[0] - 1) // 2, lines_spec[iline], ivar=ivar,
+                = trace.follow_centroid(smsub_img, (sub_img.shape[0] - 1) // 2,
+                                        lines_spec[lines] + offset, ivar=ivar,
                                         bpm=np.invert(sub_inmask.astype(bool)), width=3 * fwhm,
                                         maxshift_start=tcrude_maxshift0,
                                         maxshift_follow=tcrude_maxshift,
                                         maxerror=tcrude_maxerr, continuous=False)
-            tilts_guess_now = tilts_guess_now.flatten()
         else:
             # A guess was provided, use that as the crutch, but
             # determine if it is a full trace or a sub-trace
-            if tilts_guess.shape[0] == nspat:
-                # This is full image size tilt trace, sub-window it
-                tilts_guess_now = tilts_guess[min_spat:max_spat, iline]
-            else:
+            tilts_guess_now = np.zeros((nsub_img, len(lines)), dtype=float)
+            for i, iline in enumerate(lines):
+                if tilts_guess.shape[0] == nspat:
+                    # This is full image size tilt trace, sub-window it
+                    tilts_guess_now[:,i] = tilts_guess[min_spat[i]:max_spat[i], iline]
                 # If it is a sub-trace, deal with falling off the image
-                if spat_min[iline] < 0:
-                    tilts_guess_now = tilts_guess[-spat_min[iline]:, iline]
+                elif spat_min[iline] < 0:
+                    tilts_guess_now[:,i] = tilts_guess[-spat_min[iline]:, iline]
                 elif spat_max[iline] > (nspat - 1):
-                    tilts_guess_now = tilts_guess[:-(spat_max[iline] - nspat + 1), iline]
+                    tilts_guess_now[:,i] = tilts_guess[:-(spat_max[iline] - nspat + 1), iline]
                 else:
-                    tilts_guess_now = tilts_guess[:, iline]
+                    tilts_guess_now[:,i] = tilts_guess[:, iline]
+            tilts_guess_now += offset[None,:]
 
         # Checks that virtually all the pixels in the window about the
         # line to fit are *unmasked* for each spatial position. Note
@@ -307,18 +347,17 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
         # of the slit. If we proceed with everything masked the
         # iter_tracefit fitting will crash. TODO: Check this is true
         # with new trace.fit_trace function...
-        if (np.sum(tilts_sub_mask_box) < 0.8 * nsub):
-            tilts_sub_mask_box = np.ones_like(tilts_sub_mask_box)
+        tilts_sub_mask_box[:,np.sum(tilts_sub_mask_box, axis=0) < 0.8 * nsub] = True
 
         # Do iterative flux-weighted tracing and polynomial fitting to
-        # refine these traces. This must also be done in a loop since
-        # the sub image is different for every aperture, i.e. each
-        # aperature has its own image.
+        # refine these traces. Each trace in the stacked sub-image is
+        # fit independently.
+        idx = np.array([str(iline) for iline in lines])
         tilts_sub_fit_out, tilts_sub_out, tilts_sub_err_out, tilts_sub_bpm_out, tset_out \
             = trace.fit_trace(sub_img, tilts_guess_now, spat_order,
                               bpm=np.invert(sub_inmask.astype(bool)),
                               trace_bpm=np.invert(tilts_sub_mask_box), fwhm=fwhm,
-                              maxdev=maxdev, niter=6, idx=str(iline), debug=show_tracefits,
+                              maxdev=maxdev, niter=6, idx=idx, debug=show_tracefits,
                               xmin=0.0, xmax=float(nsub - 1), flavor='tilts')
 
         # Update the spatial positions to include based on the fitted
@@ -329,72 +368,44 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
         # flux-weighted tracing
         if gauss:
             # Re-check if spatial pixels should be unmasked.
-            if (np.sum(tilts_sub_mask_box) < 0.8 * nsub):
-                tilts_sub_mask_box = np.ones_like(tilts_sub_mask_box)
+            tilts_sub_mask_box[:,np.sum(tilts_sub_mask_box, axis=0) < 0.8 * nsub] = True
             # Re-measure using Gaussian weighting and refit
             tilts_sub_fit_out, tilts_sub_out, tilts_sub_err_out, tilts_sub_bpm_out, _ \
                 = trace.fit_trace(sub_img, tilts_sub_fit_out, spat_order,
                                   bpm=np.invert(sub_inmask.astype(bool)),
                                   trace_bpm=np.invert(tilts_sub_mask_box),
                                   weighting='gaussian', fwhm=fwhm, maxdev=maxdev, niter=3,
-                                  idx=str(iline), debug=show_tracefits, xmin=0.0,
+                                  idx=idx, debug=show_tracefits, xmin=0.0,
                                   xmax=float(nsub - 1))
             tilts_sub_mask_box = moment1d(sub_thismask, tilts_sub_fit_out, fwhm)[0] > 0.99 * fwhm
 
-        # Pack the results into arrays, accounting for possibly falling off the image
-        # Deal with possibly falling off the chip
-
         # This is the same for all cases since it is the evaluation of a fit
         # TODO: Why is the TraceSet from the first fit used, even when
         # `gauss=True`? I guess in the current usage `gauss` is always
         # False...
-        tilts_sub_fit[:, iline] = tset_out.xy(tilts_sub_spat[:, iline].reshape(1, nsub))[1]
+        tilts_sub_fit[:, lines] = tset_out.xy(tilts_sub_spat[:, lines].T.copy())[1].T - offset[None,:]
 
         # We use the tset_out.xy to evaluate the trace across the whole
         # sub-image even for pixels off the slit. This guarantees that
         # the fits are always evaluated across the whole sub-image
         # which is required for the PCA step.
 
-        # TODO: Clean this up: put the common statements up top,
-        # leaving only the ones that are actually dependent on the if
-        # statements in their respective blocks. Do we need to keep the
-        # commented code?
-        if spat_min[iline] < 0:
-            # tilts_sub[      -spat_min[iline]:,iline] = tilts_sub_out.flatten()
-            # tilts_sub_err[  -spat_min[iline]:,iline] = tilts_sub_err_out.flatten()
-            # tilts_sub_mask[ -spat_min[iline]:,iline] = tilts_sub_mask_box.flatten()
-            # tilts_sub_dspat[-spat_min[iline]:,iline] = tilts_dspat[min_spat:max_spat,iline]
-            tilts[min_spat:max_spat, iline] = tilts_sub_out.flatten()  # tilts_sub[     -spat_min[iline]:,iline]
-            tilts_fit[min_spat:max_spat, iline] = tilts_sub_fit[-spat_min[iline]:, iline]
-            tilts_err[min_spat:max_spat, iline] = tilts_sub_err_out.flatten()  # tilts_sub_err[ -spat_min[iline]:,iline]
-            tilts_bpm[min_spat:max_spat, iline] = tilts_sub_bpm_out.flatten()
-            tilts_mask[min_spat:max_spat,
-            iline] = tilts_sub_mask_box.flatten()  # tilts_sub_mask[-spat_min[iline]:,iline]
-        elif spat_max[iline] > (nspat - 1):
-            # tilts_sub[      :-(spat_max[iline] - nspat + 1),iline] = tilts_sub_out.flatten()
-            # tilts_sub_err[  :-(spat_max[iline] - nspat + 1),iline] = tilts_sub_err_out.flatten()
-            # tilts_sub_mask[ :-(spat_max[iline] - nspat + 1),iline] = tilts_sub_mask_box.flatten()
-            # tilts_sub_dspat[:-(spat_max[iline] - nspat + 1),iline] = tilts_dspat[min_spat:max_spat,iline]
-            tilts[min_spat:max_spat,
-            iline] = tilts_sub_out.flatten()  # tilts_sub[     :-(spat_max[iline] - nspat + 1),iline]
-            tilts_fit[min_spat:max_spat, iline] = tilts_sub_fit[:-(spat_max[iline] - nspat + 1), iline]
-            tilts_err[min_spat:max_spat,
-            iline] = tilts_sub_err_out.flatten()  # tilts_sub_err[ :-(spat_max[iline] - nspat + 1),iline]
-            tilts_bpm[min_spat:max_spat,
-            iline] = tilts_sub_bpm_out.flatten()  # tilts_sub_err[ :-(spat_max[iline] - nspat + 1),iline]
-            tilts_mask[min_spat:max_spat,
-            iline] = tilts_sub_mask_box.flatten()  # tilts_sub_mask[:-(spat_max[iline] - nspat + 1),iline]
-        else:
-            # tilts_sub[      :,iline] = tilts_sub_out.flatten()
-            # tilts_sub_err[  :,iline] = tilts_sub_err_out.flatten()
-            # tilts_sub_mask[ :,iline] = tilts_sub_mask_box.flatten()
-            # tilts_sub_dspat[:,iline] = tilts_dspat[min_spat:max_spat,iline]
-            tilts[min_spat:max_spat, iline] = tilts_sub_out.flatten()  # tilts_sub[     :,iline]
-            tilts_fit[min_spat:max_spat, iline] = tilts_sub_fit[:, iline]
-            tilts_err[min_spat:max_spat, iline] = tilts_sub_err_out.flatten()  # tilts_sub_err[ :,iline]
-            tilts_bpm[min_spat:max_spat, iline] = tilts_sub_bpm_out.flatten()  # tilts_sub_err[ :,iline]
-            tilts_mask[min_spat:max_spat, iline] = tilts_sub_mask_box.flatten()  # tilts_sub_mask[:,iline]
+        # Pack the results into arrays, accounting for possibly falling
+        # off the chip
+        for i, iline in enumerate(lines):
+            ms = slice(min_spat[i], max_spat[i])
+            tilts[ms, iline] = tilts_sub_out[:,i] - offset[i]
+            tilts_err[ms, iline] = tilts_sub_err_out[:,i]
+            tilts_bpm[ms, iline] = tilts_sub_bpm_out[:,i]
+            tilts_mask[ms, iline] = tilts_sub_mask_box[:,i]
+            if spat_min[iline] < 0:
+                tilts_fit[ms, iline] = tilts_sub_fit[-spat_min[iline]:, iline]
+            elif spat_max[iline] > (nspat - 1):
+                tilts_fit[ms, iline] = tilts_sub_fit[:-(spat_max[iline] - nspat + 1), iline]
+            else:
+                tilts_fit[ms, iline] = tilts_sub_fit[:, iline]
 
+    for iline in range(nlines):
         # Now use these fits to the traces to get a more robust value
         # of the tilt spectral position and spatial offset from the
         # trace than what was initially determined from the 1d arc line
@@ -407,19 +418,6 @@ def trace_tilts_work(arcimg, lines_spec, lines_spat, thismask, slit_cen, inmask=
         # iterates to zero on where the two cross.
         # TODO: Under what conditions does the interpolation fail? Can
         # we replace the try-except block with an if-else block?
-
-        # ToDO Fix this later with an iterative thing that also updates spatial reference position of the tilt
-        # imask = tilts_mask[:, iline]
-        # slit_cen_spat_ontilt = np.interp(tilts_fit[imask,iline],spec_vec, slit_cen)
-        # delta_spat = slit_cen_spat_ontilt - tilts_spat[imask,iline]
-        # Grab the monotonic indices
-        # ediff = np.ediff1d(delta_spat,to_begin=0.0)
-        # mono_ind = np.sign(ediff) == np.sign(np.median(ediff))
-        # zero_cross_spat = (scipy.interpolate.interp1d(delta_spat[mono_ind],(tilts_spat[imask,iline])[mono_ind],assume_sorted=False))(0.0)
-        # spec_fit_now = np.interp(zero_cross_spat,tilts_spat[imask,iline], tilts_fit[imask,iline])
-        # spat_fit_now = np.interp(spec_fit_now,spec_vec, slit_cen)
-        # tilts_spec[:, iline] = np.full(nspat, spec_fit_now)
-
         tilts_dspat[:, iline] = (spat_vec - lines_spat[iline])
         imask = tilts_mask[:, iline]
         try:
@@ -1049,6 +1049,28 @@ class DataContainer:
         """
         return self.datamodel.keys()
 
+    def set_float_dtype(self, dtype, keys=None):
+        """
+        Change the type of the floating-point array data, in place.
+
+        Arrays that already have the requested type are not copied.
+
+        Args:
+            dtype (:obj:`str`, `numpy.dtype`_):
+                The floating-point type; e.g., ``'float32'``.
+            keys (:obj:`list`, optional):
+                The datamodel keys of the arrays to convert.  If None,
+                all `numpy.ndarray`_ items with a floating-point type
+                are converted.  Items that are None are ignored.
+        """
+        _dtype = np.dtype(dtype)
+        if not np.issubdtype(_dtype, np.floating):
+            msgs.error('{0} is not a floating-point type.'.format(_dtype))
+        _keys = self.keys() if keys is None else keys
+        for key in _keys:
+            if isinstance(self[key], np.ndarray) and np.issubdtype(self[key].dtype, np.floating):
+                self[key] = self[key].astype(_dtype, copy=False)
+
     # TODO: Always have this return an HDUList instead of either that
     # or a normal list?
     def to_hdu(self, hdr=None, add_primary=False, primary_hdr=None,
@@ -1,16 +1,23 @@
 """
 Module to setup the PypeIt debugger
 """
-import matplotlib.pyplot as plt
 import numpy as np
 
-# These need to be outside of the def's
-try:
+
+# The ginga and matplotlib imports are deferred until first use
+def show_image(*args, **kwargs):
+    """ Wrapper for :func:`pypeit.ginga.show_image`
+    """
     from pypeit.ginga import show_image
-except ImportError:  # Ginga is not yet required
-    pass
-else:
+    return show_image(*args, **kwargs)
+
+
+def clear_canvas(*args, **kwargs):
+    """ Wrapper for :func:`pypeit.ginga.clear_canvas`
+    """
     from pypeit.ginga import clear_canvas
+    return clear_canvas(*args, **kwargs)
+
 
 # ADD-ONs from xastropy
 def plot1d(*args, **kwargs):
@@ -36,6 +43,8 @@ def plot1d(*args, **kwargs):
       True for a scatter plot
     NOTE: Any extra parameters are fed as kwargs to plt.plot()
     """
+    import matplotlib.pyplot as plt
+
     # Error checking
     if len(args) == 0:
         print('x_guis.simple_splot: No arguments!')
@@ -5,11 +5,14 @@ Implements the flat-field class.
 .. include:: ../links.rst
 """
 import os
+import copy
 import inspect
 import numpy as np
 
 from scipy import interpolate
 
+from astropy.table import Table
+
 from matplotlib import pyplot as plt
 
 from IPython import embed
@@ -35,9 +38,14 @@ class FlatImages(datamodel.DataContainer):
     All of the items in the datamodel are required for instantiation,
       although they can be None (but shouldn't be)
 
+    The illumination-flat bsplines are written to disk as a single
+    packed table (see :func:`pack_spat_bsplines`) and the individual
+    :class:`pypeit.bspline.bspline` objects are only reconstructed
+    when requested.
+
     """
     minimum_version = '1.1.0'
-    version = '1.1.0'
+    version = '1.2.0'
 
     # I/O
     output_to_disk = None  # This writes all items that are not None
@@ -56,6 +64,9 @@ class FlatImages(datamodel.DataContainer):
                          desc='Mirrors SlitTraceSet mask for the Flat-specific flags'),
         'spat_bsplines': dict(otype=np.ndarray, atype=bspline.bspline,
                               desc='B-spline models for Illumination flat'),
+        'spat_bspl_table': dict(otype=Table,
+                                desc='Breakpoints and coefficients of all the Illumination '
+                                     'flat B-splines packed into a single table'),
         'spat_id': dict(otype=np.ndarray, atype=np.integer, desc='Slit spat_id '),
     }
 
@@ -73,10 +84,227 @@ class FlatImages(datamodel.DataContainer):
         self.master_dir = None
 
     def _validate(self):
-        #
-        if self.spat_bsplines is not None and len(self.spat_bsplines) > 0:
-            if len(self.spat_id) != len(self.spat_bsplines):
+        # Use the internal dictionary to avoid reconstructing the
+        # bsplines from the packed table
+        spat_bsplines = self.__dict__['spat_bsplines']
+        if spat_bsplines is not None and len(spat_bsplines) > 0:
+            if len(self.spat_id) != len(spat_bsplines):
                 msgs.error("Bsplines are out of sync with the slit IDs")
+            if self.spat_bspl_table is None:
+                self.spat_bspl_table = self.pack_spat_bsplines(spat_bsplines)
+        if self.spat_bspl_table is not None and len(self.spat_bspl_table) > 0 \
+                and self.spat_bspl_table['SLITIDX'][-1] >= len(self.spat_id):
+            msgs.error("Packed bsplines are out of sync with the slit IDs")
+
+    @property
+    def spat_bsplines(self):
+        """
+        The illumination-flat bsplines for all slits.
+
+        If the object was read from disk, the bsplines are
+        reconstructed from :attr:`spat_bspl_table` the first time
+        they are accessed.
+        """
+        if self.__dict__['spat_bsplines'] is None and self.spat_bspl_table is not None:
+            self.spat_bsplines = np.asarray([self.get_spat_bspline(i)
+                                             for i in range(len(self.spat_id))])
+        return self.__dict__['spat_bsplines']
+
+    def __getitem__(self, item):
+        """Get an item, reconstructing the bsplines if necessary."""
+        return self.spat_bsplines if item == 'spat_bsplines' \
+                    else super(FlatImages, self).__getitem__(item)
+
+    @staticmethod
+    def pack_spat_bsplines(spat_bsplines):
+        """
+        Pack a set of bsplines into a single table.
+
+        The table has one row per breakpoint, sorted by the index of
+        the slit (``SLITIDX``) so that the breakpoints of each slit
+        are contiguous; see :func:`spat_bspl_offsets`. The
+        coefficients are shifted by the order of the bspline so that
+        row ``j`` holds the coefficient associated with breakpoint
+        ``j+nord``; the first ``nord`` rows of each slit are padded
+        with 0. Empty bsplines (e.g., for masked slits) have no rows.
+        The parameters shared by all bsplines (``nord``, ``npoly``,
+        ``xmin``, ``xmax``, ``funcname``) are kept in the table
+        metadata.
+
+        Args:
+            spat_bsplines (array-like):
+                List of :class:`pypeit.bspline.bspline` objects, one
+                per slit.
+
+        Returns:
+            `astropy.table.Table`_: The packed bsplines.
+        """
+        indx = [i for i in range(len(spat_bsplines)) if spat_bsplines[i].breakpoints is not None]
+        meta = {}
+        for key in ['nord', 'npoly', 'xmin', 'xmax', 'funcname']:
+            vals = np.unique([spat_bsplines[i][key] for i in indx])
+            if vals.size > 1:
+                msgs.error('Cannot pack bsplines with different values of {0}.'.format(key))
+            if vals.size == 1:
+                meta[key.upper()] = vals[0].item()
+        npoly = meta.get('NPOLY', 1)
+        nbkpt = np.array([spat_bsplines[i].breakpoints.size for i in indx], dtype=int)
+
+        slitidx = np.repeat(np.array(indx, dtype=int), nbkpt)
+        if len(indx) == 0:
+            breakpoints = np.zeros(0, dtype=float)
+            mask = np.zeros(0, dtype=bool)
+            coeff = np.zeros(0, dtype=float)
+            icoeff = np.zeros(0, dtype=float)
+        else:
+            breakpoints = np.concatenate([spat_bsplines[i].breakpoints for i in indx])
+            mask = np.concatenate([spat_bsplines[i].mask for i in indx])
+            # Pad the start of each slit so that the coefficients line
+            # up with their breakpoints
+            pad = np.zeros((meta['NORD'], npoly), dtype=float)
+            coeff = np.concatenate([np.append(pad, spat_bsplines[i].coeff.reshape(npoly,-1).T,
+                                              axis=0) for i in indx])
+            icoeff = np.concatenate([np.append(pad, spat_bsplines[i].icoeff.reshape(npoly,-1).T,
+                                               axis=0) for i in indx])
+            if npoly == 1:
+                coeff = coeff[:,0]
+                icoeff = icoeff[:,0]
+        return Table([slitidx, breakpoints, mask, coeff, icoeff],
+                     names=['SLITIDX', 'BREAKPOINTS', 'BKPT_MASK', 'COEFF', 'ICOEFF'], meta=meta)
+
+    def spat_bspl_offsets(self):
+        """
+        Return the offsets of each slit in :attr:`spat_bspl_table`.
+
+        Returns:
+            `numpy.ndarray`_: Vector with ``nslits+1`` elements; the
+            rows for slit ``i`` are ``offsets[i]:offsets[i+1]``.
+        """
+        return np.searchsorted(np.asarray(self.spat_bspl_table['SLITIDX']),
+                               np.arange(len(self.spat_id)+1))
+
+    def get_spat_bspline(self, slit_idx):
+        """
+        Return the illumination-flat bspline for a single slit.
+
+        The bspline is reconstructed from :attr:`spat_bspl_table`
+        without instantiating the bsplines of any of the other slits.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Index of the slit.
+
+        Returns:
+            :class:`pypeit.bspline.bspline`: The bspline; empty if
+            there is no model for this slit.
+        """
+        if self.__dict__['spat_bsplines'] is not None:
+            return self.__dict__['spat_bsplines'][slit_idx]
+        spat_bspl = bspline.bspline(None)
+        if self.spat_bspl_table is None:
+            return spat_bspl
+        offsets = self.spat_bspl_offsets()
+        rows = slice(offsets[slit_idx], offsets[slit_idx+1])
+        if rows.start == rows.stop:
+            return spat_bspl
+        meta = self.spat_bspl_table.meta
+        spat_bspl.nord = int(meta['NORD'])
+        spat_bspl.npoly = int(meta['NPOLY'])
+        spat_bspl.xmin = float(meta['XMIN'])
+        spat_bspl.xmax = float(meta['XMAX'])
+        spat_bspl.funcname = str(meta['FUNCNAME'])
+        spat_bspl.breakpoints = np.array(self.spat_bspl_table['BREAKPOINTS'][rows], dtype=float)
+        spat_bspl.mask = np.array(self.spat_bspl_table['BKPT_MASK'][rows], dtype=bool)
+        coeff = np.array(self.spat_bspl_table['COEFF'][rows], dtype=float)[spat_bspl.nord:]
+        icoeff = np.array(self.spat_bspl_table['ICOEFF'][rows], dtype=float)[spat_bspl.nord:]
+        spat_bspl.coeff = coeff if spat_bspl.npoly == 1 else coeff.T.copy()
+        spat_bspl.icoeff = icoeff if spat_bspl.npoly == 1 else icoeff.T.copy()
+        return spat_bspl
+
+    def eval_spat_bsplines(self, slitidx, spat_coo):
+        """
+        Evaluate the illumination-flat bsplines for a set of pixels.
+
+        All of the pixels, regardless of their slit, are evaluated at
+        once directly from :attr:`spat_bspl_table`. The result is
+        identical to calling
+        :func:`pypeit.bspline.bspline.bspline.value` for each slit,
+        except that pixels in slits without a valid bspline are set
+        to 1.
+
+        Args:
+            slitidx (`numpy.ndarray`_):
+                Index of the slit associated with each pixel.
+            spat_coo (`numpy.ndarray`_):
+                Normalized spatial coordinate of each pixel in its
+                slit. Shape must match ``slitidx``.
+
+        Returns:
+            `numpy.ndarray`_: The bspline model for each pixel.
+        """
+        illum = np.ones(spat_coo.shape, dtype=float)
+        if self.spat_bspl_table is None or len(self.spat_bspl_table) == 0:
+            return illum
+        meta = self.spat_bspl_table.meta
+        nord = int(meta['NORD'])
+        offsets = self.spat_bspl_offsets()
+
+        if int(meta['NPOLY']) != 1:
+            # Evaluate 2D bsplines one slit at a time
+            for slit_idx in np.unique(slitidx):
+                if offsets[slit_idx] == offsets[slit_idx+1]:
+                    continue
+                indx = slitidx == slit_idx
+                illum[indx] = self.get_spat_bspline(slit_idx).value(spat_coo[indx])[0]
+            return illum
+
+        # Only the good breakpoints are used in the evaluation
+        gpm = np.asarray(self.spat_bspl_table['BKPT_MASK'])
+        bkpt = np.asarray(self.spat_bspl_table['BREAKPOINTS'])[gpm]
+        coeff = np.asarray(self.spat_bspl_table['COEFF'])[gpm]
+        goff = np.append(0, np.cumsum(gpm))[offsets]
+
+        # Find the breakpoint interval for each pixel; this is done
+        # slit-by-slit but only over the pixels in each slit
+        _slitidx = slitidx.ravel()
+        _spat_coo = spat_coo.ravel()
+        srt = np.argsort(_slitidx, kind='stable')
+        bounds = np.searchsorted(_slitidx[srt], np.arange(len(self.spat_id)+1))
+        ileft = np.full(_spat_coo.size, -1, dtype=int)
+        for slit_idx in np.where(np.diff(bounds) > 0)[0]:
+            ngood = goff[slit_idx+1] - goff[slit_idx]
+            if ngood < 2*nord:
+                # Empty or unusable bspline
+                continue
+            indx = srt[bounds[slit_idx]:bounds[slit_idx+1]]
+            _bkpt = bkpt[goff[slit_idx]:goff[slit_idx+1]]
+            ileft[indx] = goff[slit_idx] + np.clip(np.searchsorted(_bkpt, _spat_coo[indx]) - 1,
+                                                   nord-1, ngood-nord-1)
+        indx = ileft > -1
+        x = _spat_coo[indx]
+        ileft = ileft[indx]
+
+        # Basis functions; see bspline.bsplvn
+        vnikx = np.zeros((x.size, nord), dtype=float)
+        deltap = vnikx.copy()
+        deltam = vnikx.copy()
+        vnikx[:,0] = 1.0
+        for j in range(nord-1):
+            deltap[:,j] = bkpt[ileft+j+1] - x
+            deltam[:,j] = x - bkpt[ileft-j]
+            vmprev = 0.0
+            for l in range(j+1):
+                vm = vnikx[:,l]/(deltap[:,l] + deltam[:,j-l])
+                vnikx[:,l] = vm*deltap[:,l] + vmprev
+                vmprev = vm*deltam[:,j-l]
+            vnikx[:,j+1] = vmprev
+
+        # Coefficient for breakpoint ileft+1+k; see pack_spat_bsplines
+        model = np.zeros(x.size, dtype=float)
+        for k in range(nord):
+            model += vnikx[:,k]*coeff[ileft+1+k]
+        illum.flat[np.where(indx)[0]] = model
+        return illum
 
     def is_synced(self, slits):
         """
@@ -97,6 +325,9 @@ class FlatImages(datamodel.DataContainer):
         HDU per image.  Any extras are in the HDU header of
         the primary image.
 
+        The bsplines are written as the single packed table in
+        :attr:`spat_bspl_table`.
+
         Returns:
             :obj:`list`: A list of dictionaries, each list element is
             written to its own fits extension. See the description
@@ -106,19 +337,12 @@ class FlatImages(datamodel.DataContainer):
 
         # Rest of the datamodel
         for key in self.keys():
-            # Skip None
-            if self[key] is None:
+            # Skip None and the bsplines themselves
+            if key == 'spat_bsplines' or self.__dict__[key] is None:
                 continue
             # Array?
-            if self.datamodel[key]['otype'] == np.ndarray and key != 'spat_bsplines':
+            if self.datamodel[key]['otype'] in [np.ndarray, Table]:
                 d.append({key: self[key]})
-            elif key == 'spat_bsplines':
-                for ss, spat_bspl in enumerate(self[key]):
-                    # Naming
-                    spat_bspl.hdu_prefix = 'SPAT_ID-{}_'.format(self.spat_id[ss])
-                    dkey = 'bspline-{}'.format(self.spat_id[ss])
-                    # Save
-                    d.append({dkey: spat_bspl})
             else: # Add to header of the primary image
                 d[0][key] = self[key]
         # Return
@@ -126,6 +350,7 @@ class FlatImages(datamodel.DataContainer):
 
     def fit2illumflat(self, slits, initial=False, flexure_shift=None):
         """
+        Construct the illumination flat for all the good slits.
 
         Args:
             slits (:class:`pypeit.slittrace.SlitTraceSet`):
@@ -133,52 +358,27 @@ class FlatImages(datamodel.DataContainer):
             flexure_shift (float, optional):
 
         Returns:
+            `numpy.ndarray`_: The illumination flat.
 
         """
         illumflat = np.ones_like(self.procflat)
-        # Loop
-        for slit_idx in range(slits.nslits):
-            # Skip masked
-            if slits.mask[slit_idx] != 0:
-                continue
-            # Skip those without a bspline
-            # DO it
-            _slitid_img = slits.slit_img(slitidx=slit_idx, initial=initial, flexure=flexure_shift)
-            onslit = _slitid_img == slits.spat_id[slit_idx]
-            spat_coo = slits.spatial_coordinate_image(slitidx=slit_idx,
-                                                      initial=initial,
-                                                      slitid_img=_slitid_img,
-                                                      flexure_shift=flexure_shift)
-
-            illumflat[onslit] = self.spat_bsplines[slit_idx].value(spat_coo[onslit])[0]
+        # Skip masked
+        gpm = slits.mask == 0
+        if not np.any(gpm):
+            return illumflat
+        # Image with the index of all the good slits
+        slitidx_img = slits.slit_img(slitidx=np.where(gpm)[0], initial=initial,
+                                     flexure=flexure_shift, use_spatial=False)
+        spec, spat = np.where(slitidx_img > -1)
+        slitidx = slitidx_img[spec,spat]
+        # Spatial coordinates; see SlitTraceSet.spatial_coordinate_image
+        left, right, _ = slits.select_edges(initial=initial, flexure=flexure_shift)
+        spat_coo = (spat - left[spec,slitidx])/(right-left)[spec,slitidx]
+        # Evaluate all the bsplines at once
+        illumflat[spec,spat] = self.eval_spat_bsplines(slitidx, spat_coo)
         # TODO -- Update the internal one?  Or remove it altogether??
         return illumflat
 
-    @classmethod
-    def _parse(cls, hdu, ext=None, transpose_table_arrays=False, debug=False,
-               hdu_prefix=None):
-        # Grab everything but the bspline's
-        _d, dm_version_passed, dm_type_passed = super(FlatImages, cls)._parse(hdu)
-        # Now the bsplines
-        list_of_bsplines = []
-        spat_ids = []
-        for ihdu in hdu:
-            if 'BSPLINE' in ihdu.name:
-                ibspl = bspline.bspline.from_hdu(ihdu)
-                if ibspl.version != bspline.bspline.version:
-                    msgs.warn("Your bspline is out of date!!")
-                list_of_bsplines.append(ibspl)
-                # Grab SPAT_ID for checking
-                i0 = ihdu.name.find('ID-')
-                i1 = ihdu.name.find('_BSP')
-                spat_ids.append(int(ihdu.name[i0+3:i1]))
-        # Check
-        if spat_ids != _d['spat_id'].tolist():
-            msgs.error("Bad parsing of the MasterFlat")
-        # Finish
-        _d['spat_bsplines'] = np.asarray(list_of_bsplines)
-        return _d, dm_version_passed, dm_type_passed
-
     def show(self, slits=None, wcs_match=True):
         """
         Simple wrapper to show_flats()
@@ -208,6 +408,70 @@ class FlatImages(datamodel.DataContainer):
         show_flats(self.pixelflat, illumflat, self.procflat, self.flat_model,
                    wcs_match=wcs_match, slits=slits)
 
+
+class RelativeScale(datamodel.DataContainer):
+    """
+    Simple DataContainer for the relative scaling of the slits of a
+    slit-based IFU
+
+    The scaling only depends on the flat, tilt, and arc calibrations,
+    such that it is written as a master frame with the master key of
+    the flat, and the keys of the tilt and arc masters used are
+    recorded to confirm that it can be reused.
+
+    """
+    minimum_version = '1.0.0'
+    version = '1.0.0'
+
+    # I/O
+    output_to_disk = None  # This writes all items that are not None
+    hdu_prefix = None
+
+    # Master fun
+    master_type = 'RelScale'
+    master_file_format = 'fits'
+
+    datamodel = {
+        'scaleimg': dict(otype=np.ndarray, atype=np.floating,
+                         desc='Relative scaling of each pixel'),
+        'tilt_key': dict(otype=str, desc='Master key of the tilts used'),
+        'arc_key': dict(otype=str, desc='Master key of the wavelength calibration used'),
+        'PYP_SPEC': dict(otype=str, desc='PypeIt spectrograph name'),
+        'spat_id': dict(otype=np.ndarray, atype=np.integer, desc='Slit spat_id '),
+    }
+
+    def __init__(self, scaleimg=None, tilt_key=None, arc_key=None, PYP_SPEC=None,
+                 spat_id=None):
+        # Parse
+        args, _, _, values = inspect.getargvalues(inspect.currentframe())
+        d = dict([(k,values[k]) for k in args[1:]])
+        # Setup the DataContainer
+        datamodel.DataContainer.__init__(self, d=d)
+
+    def _init_internals(self):
+        # Master stuff
+        self.master_key = None
+        self.master_dir = None
+
+    def is_synced(self, slits, tilt_key=None, arc_key=None):
+        """
+        Check that the relative scaling was constructed with the
+        provided slits and calibrations.
+
+        Args:
+            slits (:class:`pypeit.slittrace.SlitTraceSet`):
+            tilt_key (str, optional):
+                Master key of the tilts
+            arc_key (str, optional):
+                Master key of the wavelength calibration
+
+        Returns:
+            bool: True if the relative scaling can be reused.
+        """
+        return np.array_equal(self.spat_id, slits.spat_id) and self.tilt_key == tilt_key \
+                    and self.arc_key == arc_key
+
+
 class FlatField(object):
     """
     Builds pixel-level flat-field and the illumination flat-field.
@@ -466,7 +730,14 @@ class FlatField(object):
         ``tweak_slits``, ``tweak_slits_thresh``,
         ``tweak_slits_maxfrac``, ``rej_sticky``, ``slit_trim``,
         ``slit_illum_pad``, ``illum_iter``, ``illum_rej``, and
-        ``twod_fit_npoly``, ``saturated_slits``.
+        ``twod_fit_npoly``, ``saturated_slits``, and ``n_proc``.
+
+        If ``n_proc`` is not 1, the slits are modeled concurrently by a
+        pool of processes and the results are assembled in slit order,
+        giving results identical to the serial calculation. If
+        ``rej_sticky`` is True, slits that are close enough to alter
+        each other's good-pixel mask are modeled in sequence by the
+        same process. Debug mode always models the slits serially.
 
         **Revision History**:
 
@@ -489,11 +760,7 @@ class FlatField(object):
         self.list_of_spat_bsplines = []
 
         # Set parameters (for convenience;
-        spec_samp_fine = self.flatpar['spec_samp_fine']
-        spec_samp_coarse = self.flatpar['spec_samp_coarse']
         tweak_slits = self.flatpar['tweak_slits']
-        tweak_slits_thresh = self.flatpar['tweak_slits_thresh']
-        tweak_slits_maxfrac = self.flatpar['tweak_slits_maxfrac']
         # If sticky, points rejected at each stage (spec, spat, 2d) are
         # propagated to the next stage
         sticky = self.flatpar['rej_sticky']
@@ -546,24 +813,20 @@ class FlatField(object):
         self.msillumflat = np.ones_like(rawflat)
         self.flat_model = np.zeros_like(rawflat)
 
-        # Allocate work arrays only once
-        spec_model = np.ones_like(rawflat)
-        norm_spec = np.ones_like(rawflat)
-        norm_spec_spat = np.ones_like(rawflat)
-        twod_model = np.ones_like(rawflat)
+        # Images shared by the models of all slits
+        fitdata = dict(rawflat=rawflat, flat_log=flat_log, gpm_log=gpm_log, ivar_log=ivar_log,
+                       median_slit_widths=median_slit_widths, slitid_img_init=slitid_img_init,
+                       padded_slitid_img=padded_slitid_img, trimmed_slitid_img=trimmed_slitid_img)
 
         # #################################################
-        # Model each slit independently
+        # Select the slits to model
+        fit_slits = []
         for slit_idx, slit_spat in enumerate(self.slits.spat_id):
             # Is this a good slit??
             if self.slits.mask[slit_idx] != 0:
                 msgs.info('Skipping bad slit: {}'.format(slit_spat))
-                self.list_of_spat_bsplines.append(bspline.bspline(None))
                 continue
 
-            msgs.info('Modeling the flat-field response for slit spat_id={}: {}/{}'.format(
-                        slit_spat, slit_idx+1, self.slits.nslits))
-
             # Find the pixels on the initial slit
             onslit_init = slitid_img_init == slit_spat
 
@@ -602,342 +865,59 @@ class FlatField(object):
                     # Should never get here
                     raise NotImplementedError('Unknown behavior for saturated slits: {0}'.format(
                                               saturated_slits))
-                self.list_of_spat_bsplines.append(bspline.bspline(None))
                 continue
 
             # Demand at least 10 pixels per row (on average) per degree
-            # of the polynomial.
-            # NOTE: This is not used until the 2D fit. Defined here to
-            # be close to the definition of ``onslit``.
+            # of the polynomial. The order is set by the first slit
+            # that is modeled.
+            # NOTE: This is not used until the 2D fit.
             if npoly is None:
                 # Approximate number of pixels sampling each spatial pixel
                 # for this (original) slit.
                 npercol = np.fmax(np.floor(np.sum(onslit_init)/nspec),1.0)
                 npoly  = np.clip(7, 1, int(np.ceil(npercol/10.)))
-            
+
             # TODO: Always calculate the optimized `npoly` and warn the
             #  user if npoly is provided but higher than the nominal
             #  calculation?
 
-            # Create an image with the spatial coordinates relative to the left edge of this slit
-            spat_coo_init = self.slits.spatial_coordinate_image(slitidx=slit_idx, full=True, initial=True)
-
-            # Find pixels on the padded and trimmed slit coordinates
-            onslit_padded = padded_slitid_img == slit_spat
-            onslit_trimmed = trimmed_slitid_img == slit_spat
-
-            # ----------------------------------------------------------
-            # Collapse the slit spatially and fit the spectral function
-            # TODO: Put this stuff in a self.spectral_fit method?
-
-            # Create the tilts image for this slit
-            # TODO -- JFH Confirm the sign of this shift is correct!
-            _flexure = 0. if self.wavetilts.spat_flexure is None else self.wavetilts.spat_flexure
-            tilts = tracewave.fit2tilts(rawflat.shape, self.wavetilts['coeffs'][:,:,slit_idx],
-                                        self.wavetilts['func2d'], spat_shift=-1*_flexure)
-            # Convert the tilt image to an image with the spectral pixel index
-            spec_coo = tilts * (nspec-1)
-
-            # Only include the trimmed set of pixels in the flat-field
-            # fit along the spectral direction.
-            spec_gpm = onslit_trimmed & gpm_log  # & (rawflat < nonlinear_counts)
-            spec_nfit = np.sum(spec_gpm)
-            spec_ntot = np.sum(onslit_init)
-            msgs.info('Spectral fit of flatfield for {0}/{1} '.format(spec_nfit, spec_ntot)
-                      + ' pixels in the slit.')
-            # Set this to a parameter?
-            if spec_nfit/spec_ntot < 0.5:
-                # TODO: Shouldn't this raise an exception or continue to the next slit instead?
-                msgs.warn('Spectral fit includes only {:.1f}'.format(100*spec_nfit/spec_ntot)
-                          + '% of the pixels on this slit.' + msgs.newline()
-                          + '          Either the slit has many bad pixels or the number of '
-                            'trimmed pixels is too large.')
-
-            # Sort the pixels by their spectral coordinate.
-            # TODO: Include ivar and sorted gpm in outputs?
-            spec_gpm, spec_srt, spec_coo_data, spec_flat_data \
-                    = flat.sorted_flat_data(flat_log, spec_coo, gpm=spec_gpm)
-            # NOTE: By default np.argsort sorts the data over the last
-            # axis. Just to avoid the possibility (however unlikely) of
-            # spec_coo[spec_gpm] returning an array, all the arrays are
-            # explicitly flattened.
-            spec_ivar_data = ivar_log[spec_gpm].ravel()[spec_srt]
-            spec_gpm_data = gpm_log[spec_gpm].ravel()[spec_srt]
-
-            # Rejection threshold for spectral fit in log(image)
-            # TODO: Make this a parameter?
-            logrej = 0.5
-
-            # Fit the spectral direction of the blaze.
-            # TODO: Figure out how to deal with the fits going crazy at
-            #  the edges of the chip in spec direction
-            # TODO: Can we add defaults to bspline_profile so that we
-            #  don't have to instantiate invvar and profile_basis
-            spec_bspl, spec_gpm_fit, spec_flat_fit, _, exit_status \
-                    = utils.bspline_profile(spec_coo_data, spec_flat_data, spec_ivar_data,
-                                            np.ones_like(spec_coo_data), ingpm=spec_gpm_data,
-                                            nord=4, upper=logrej, lower=logrej,
-                                            kwargs_bspline={'bkspace': spec_samp_fine},
-                                            kwargs_reject={'groupbadpix': True, 'maxrej': 5})
-
-            if exit_status > 1:
-                # TODO -- MAKE A FUNCTION
-                msgs.warn('Flat-field spectral response bspline fit failed!  Not flat-fielding '
-                          'slit {0} and continuing!'.format(slit_spat))
-                self.slits.mask[slit_idx] = self.slits.bitmask.turn_on(self.slits.mask[slit_idx], 'BADFLATCALIB')
-                self.list_of_spat_bsplines.append(bspline.bspline(None))
-                continue
+            fit_slits += [slit_idx]
 
-            # Debugging/checking spectral fit
-            if debug:
-                utils.bspline_qa(spec_coo_data, spec_flat_data, spec_bspl, spec_gpm_fit,
-                                 spec_flat_fit, xlabel='Spectral Pixel', ylabel='log(flat counts)',
-                                 title='Spectral Fit for slit={:d}'.format(slit_spat))
-
-            if sticky:
-                # Add rejected pixels to gpm
-                gpm[spec_gpm] = (spec_gpm_fit & spec_gpm_data)[np.argsort(spec_srt)]
-
-            # Construct the model of the flat-field spectral shape
-            # including padding on either side of the slit.
-            spec_model[...] = 1.
-            spec_model[onslit_padded] = np.exp(spec_bspl.value(spec_coo[onslit_padded])[0])
-            # ----------------------------------------------------------
-
-            # ----------------------------------------------------------
-            # To fit the spatial response, first normalize out the
-            # spectral response, and then collapse the slit spectrally.
-
-            # Normalize out the spectral shape of the flat
-            norm_spec[...] = 1.
-            norm_spec[onslit_padded] = rawflat[onslit_padded] \
-                                            / np.fmax(spec_model[onslit_padded],1.0)
-
-            # Find pixels fot fit in the spatial direction:
-            #   - Fit pixels in the padded slit that haven't been masked
-            #     by the BPM
-            spat_gpm = onslit_padded & gpm #& (rawflat < nonlinear_counts)
-            #   - Fit pixels with non-zero flux and less than 70% above
-            #     the average spectral profile.
-            spat_gpm &= (norm_spec > 0.0) & (norm_spec < 1.7)
-            #   - Determine maximum counts in median filtered flat
-            #     spectrum model.
-            spec_interp = interpolate.interp1d(spec_coo_data, spec_flat_fit, kind='linear',
-                                               assume_sorted=True, bounds_error=False,
-                                               fill_value=-np.inf)
-            spec_sm = utils.fast_running_median(np.exp(spec_interp(np.arange(nspec))),
-                                                np.fmax(np.ceil(0.10*nspec).astype(int),10))
-            #   - Only fit pixels with at least values > 10% of this maximum and no less than 1.
-            spat_gpm &= (spec_model > 0.1*np.amax(spec_sm)) & (spec_model > 1.0)
-
-            # Report
-            spat_nfit = np.sum(spat_gpm)
-            spat_ntot = np.sum(onslit_padded)
-            msgs.info('Spatial fit of flatfield for {0}/{1} '.format(spat_nfit, spat_ntot)
-                      + ' pixels in the slit.')
-            if spat_nfit/spat_ntot < 0.5:
-                # TODO: Shouldn't this raise an exception or continue to the next slit instead?
-                msgs.warn('Spatial fit includes only {:.1f}'.format(100*spat_nfit/spat_ntot)
-                          + '% of the pixels on this slit.' + msgs.newline()
-                          + '          Either the slit has many bad pixels, the model of the '
-                          'spectral shape is poor, or the illumination profile is very irregular.')
-
-            # First fit -- With initial slits
-            exit_status, spat_coo_data,  spat_flat_data, spat_bspl, spat_gpm_fit, \
-                spat_flat_fit, spat_flat_data_raw \
-                        = self.spatial_fit(norm_spec, spat_coo_init, median_slit_widths[slit_idx],
-                                           spat_gpm, gpm, debug=debug)
-
-            if tweak_slits:
-                # TODO: Should the tweak be based on the bspline fit?
-                # TODO: Will this break if
-                left_thresh, left_shift, self.slits.left_tweak[:,slit_idx], right_thresh, \
-                    right_shift, self.slits.right_tweak[:,slit_idx] \
-                        = flat.tweak_slit_edges(self.slits.left_init[:,slit_idx],
-                                                self.slits.right_init[:,slit_idx],
-                                                spat_coo_data, spat_flat_data,
-                                                thresh=tweak_slits_thresh,
-                                                maxfrac=tweak_slits_maxfrac, debug=debug)
-                # TODO: Because the padding doesn't consider adjacent
-                #  slits, calling slit_img for individual slits can be
-                #  different from the result when you construct the
-                #  image for all slits. Fix this...
-
-                # Update the onslit mask
-                _slitid_img = self.slits.slit_img(slitidx=slit_idx, initial=False)
-                onslit_tweak = _slitid_img == slit_spat
-                spat_coo_tweak = self.slits.spatial_coordinate_image(slitidx=slit_idx,
-                                                               slitid_img=_slitid_img)
-
-                # Construct the empirical illumination profile
-                # TODO This is extremely inefficient, because we only need to re-fit the illumflat, but
-                #  spatial_fit does both the reconstruction of the illumination function and the bspline fitting.
-                #  Only the b-spline fitting needs be reddone with the new tweaked spatial coordinates, so that would
-                #  save a ton of runtime. It is not a trivial change becauase the coords are sorted, etc.
-                exit_status, spat_coo_data, spat_flat_data, spat_bspl, spat_gpm_fit, \
-                    spat_flat_fit, spat_flat_data_raw = self.spatial_fit(
-                    norm_spec, spat_coo_tweak, median_slit_widths[slit_idx], spat_gpm, gpm, debug=False)
-
-                spat_coo_final = spat_coo_tweak
-            else:
-                _slitid_img = slitid_img_init
-                spat_coo_final = spat_coo_init
-                onslit_tweak = onslit_init
-
-            # Add an approximate pixel axis at the top
-            if debug:
-                # TODO: Move this into a qa plot that gets saved
-                ax = utils.bspline_qa(spat_coo_data, spat_flat_data, spat_bspl, spat_gpm_fit,
-                                      spat_flat_fit, show=False)
-                ax.scatter(spat_coo_data, spat_flat_data_raw, marker='.', s=1, zorder=0, color='k',
-                           label='raw data')
-                # Force the center of the slit to be at the center of the plot for the hline
-                ax.set_xlim(-0.1,1.1)
-                ax.axvline(0.0, color='lightgreen', linestyle=':', linewidth=2.0,
-                           label='original left edge', zorder=8)
-                ax.axvline(1.0, color='red', linestyle=':', linewidth=2.0,
-                           label='original right edge', zorder=8)
-                if tweak_slits and left_shift > 0:
-                    label = 'threshold = {:5.2f}'.format(tweak_slits_thresh) \
-                                + ' % of max of left illumprofile'
-                    ax.axhline(left_thresh, xmax=0.5, color='lightgreen', linewidth=3.0,
-                               label=label, zorder=10)
-                    ax.axvline(left_shift, color='lightgreen', linestyle='--', linewidth=3.0,
-                               label='tweaked left edge', zorder=11)
-                if tweak_slits and right_shift > 0:
-                    label = 'threshold = {:5.2f}'.format(tweak_slits_thresh) \
-                                + ' % of max of right illumprofile'
-                    ax.axhline(right_thresh, xmin=0.5, color='red', linewidth=3.0, label=label,
-                               zorder=10)
-                    ax.axvline(1-right_shift, color='red', linestyle='--', linewidth=3.0,
-                               label='tweaked right edge', zorder=20)
-                ax.legend()
-                ax.set_xlabel('Normalized Slit Position')
-                ax.set_ylabel('Normflat Spatial Profile')
-                ax.set_title('Illumination Function Fit for slit={:d}'.format(slit_spat))
-                plt.show()
-
-            # ----------------------------------------------------------
-            # Construct the illumination profile with the tweaked edges
-            # of the slit
-            if exit_status <= 1:
-                # TODO -- JFH -- Check this is ok for flexure!!
-                self.msillumflat[onslit_tweak] = spat_bspl.value(spat_coo_final[onslit_tweak])[0]
-                self.list_of_spat_bsplines.append(spat_bspl)
-            else:
-                # Save the nada
-                msgs.warn('Slit illumination profile bspline fit failed!  Spatial profile not '
-                          'included in flat-field model for slit {0}!'.format(slit_spat))
-                self.slits.mask[slit_idx] = self.slits.bitmask.turn_on(self.slits.mask[slit_idx], 'BADFLATCALIB')
+        # #################################################
+        # Model each slit independently
+        n_proc = 1 if debug else self.flatpar['n_proc']
+        results = None
+        if n_proc != 1 and len(fit_slits) > 1:
+            # If sticky, slits that are close enough to alter each
+            # other's good-pixel mask are modeled in sequence by the
+            # same process.
+            groups = self._independent_slit_groups(fit_slits) if sticky \
+                        else [[slit_idx] for slit_idx in fit_slits]
+            msgs.info('Modeling {0} slits in {1} independent group(s) using {2} '.format(
+                      len(fit_slits), len(groups), n_proc) + 'processes.')
+            # Only send the data needed to model the slits to each process
+            _self = copy.copy(self)
+            _self.rawflatimg = None
+            _self.mspixelflat = None
+            _self.msillumflat = None
+            _self.flat_model = None
+            group_results = utils.parallel_map(_fit_slit_group, groups, n_proc=n_proc,
+                                               initializer=_init_fit_slit_group,
+                                               initargs=(_self, gpm, npoly, fitdata))
+            results = {}
+            for group, _results in zip(groups, group_results):
+                results.update(zip(group, _results))
+
+        if results is None:
+            # Allocate the work images once for all slits
+            fitdata = dict(fitdata, **_fit_slit_work_images(rawflat))
+        for slit_idx in range(self.slits.nslits):
+            if slit_idx not in fit_slits:
                 self.list_of_spat_bsplines.append(bspline.bspline(None))
                 continue
-
-            # ----------------------------------------------------------
-            # Fit the 2D residuals of the 1D spectral and spatial fits.
-            msgs.info('Performing 2D illumination + scattered light flat field fit')
-
-            # Construct the spectrally and spatially normalized flat
-            norm_spec_spat[...] = 1.
-            norm_spec_spat[onslit_tweak] = rawflat[onslit_tweak] / np.fmax(spec_model[onslit_tweak], 1.0) \
-                                                    / np.fmax(self.msillumflat[onslit_tweak], 0.01)
-
-            # Sort the pixels by their spectral coordinate. The mask
-            # uses the nominal padding defined by the slits object.
-            twod_gpm, twod_srt, twod_spec_coo_data, twod_flat_data \
-                    = flat.sorted_flat_data(norm_spec_spat, spec_coo, gpm=onslit_tweak)
-            # Also apply the sorting to the spatial coordinates
-            twod_spat_coo_data = spat_coo_final[twod_gpm].ravel()[twod_srt]
-            # TODO: Reset back to origin gpm if sticky is true?
-            twod_gpm_data = gpm[twod_gpm].ravel()[twod_srt]
-            # Only fit data with less than 30% variations
-            # TODO: Make 30% a parameter?
-            twod_gpm_data &= np.absolute(twod_flat_data - 1) < 0.3
-            # Here we ignore the formal photon counting errors and
-            # simply assume that a typical error per pixel. This guess
-            # is somewhat aribtrary. We then set the rejection
-            # threshold with sigrej_twod
-            # TODO: Make twod_sig and twod_sigrej parameters?
-            twod_sig = 0.01
-            twod_ivar_data = twod_gpm_data.astype(float)/(twod_sig**2)
-            twod_sigrej = 4.0
-
-            poly_basis = basis.fpoly(2.0*twod_spat_coo_data - 1.0, npoly)
-
-            # Perform the full 2d fit
-            twod_bspl, twod_gpm_fit, twod_flat_fit, _ , exit_status \
-                    = utils.bspline_profile(twod_spec_coo_data, twod_flat_data, twod_ivar_data,
-                                            poly_basis, ingpm=twod_gpm_data, nord=4,
-                                            upper=twod_sigrej, lower=twod_sigrej,
-                                            kwargs_bspline={'bkspace': spec_samp_coarse},
-                                            kwargs_reject={'groupbadpix': True, 'maxrej': 10})
-            if debug:
-                # TODO: Make a plot that shows the residuals in the 2D
-                # image
-                resid = twod_flat_data - twod_flat_fit
-                goodpix = twod_gpm_fit & twod_gpm_data
-                badpix = np.invert(twod_gpm_fit) & twod_gpm_data
-
-                plt.clf()
-                ax = plt.gca()
-                ax.plot(twod_spec_coo_data[goodpix], resid[goodpix], color='k', marker='o',
-                        markersize=0.2, mfc='k', fillstyle='full', linestyle='None',
-                        label='good points')
-                ax.plot(twod_spec_coo_data[badpix], resid[badpix], color='red', marker='+',
-                        markersize=0.5, mfc='red', fillstyle='full', linestyle='None',
-                        label='masked')
-                ax.axhline(twod_sigrej*twod_sig, color='lawngreen', linestyle='--',
-                           label='rejection thresholds', zorder=10, linewidth=2.0)
-                ax.axhline(-twod_sigrej*twod_sig, color='lawngreen', linestyle='--', zorder=10,
-                           linewidth=2.0)
-#                ax.set_ylim(-0.05, 0.05)
-                ax.legend()
-                ax.set_xlabel('Spectral Pixel')
-                ax.set_ylabel('Residuals from pixelflat 2-d fit')
-                ax.set_title('Spectral Residuals for slit={:d}'.format(slit_spat))
-                plt.show()
-
-                plt.clf()
-                ax = plt.gca()
-                ax.plot(twod_spat_coo_data[goodpix], resid[goodpix], color='k', marker='o',
-                        markersize=0.2, mfc='k', fillstyle='full', linestyle='None',
-                        label='good points')
-                ax.plot(twod_spat_coo_data[badpix], resid[badpix], color='red', marker='+',
-                        markersize=0.5, mfc='red', fillstyle='full', linestyle='None',
-                        label='masked')
-                ax.axhline(twod_sigrej*twod_sig, color='lawngreen', linestyle='--',
-                           label='rejection thresholds', zorder=10, linewidth=2.0)
-                ax.axhline(-twod_sigrej*twod_sig, color='lawngreen', linestyle='--', zorder=10,
-                           linewidth=2.0)
-#                ax.set_ylim((-0.05, 0.05))
-#                ax.set_xlim(-0.02, 1.02)
-                ax.legend()
-                ax.set_xlabel('Normalized Slit Position')
-                ax.set_ylabel('Residuals from pixelflat 2-d fit')
-                ax.set_title('Spatial Residuals for slit={:d}'.format(slit_spat))
-                plt.show()
-
-            # Save the 2D residual model
-            twod_model[...] = 1.
-            if exit_status > 1:
-                msgs.warn('Two-dimensional fit to flat-field data failed!  No higher order '
-                          'flat-field corrections included in model of slit {0}!'.format(slit_spat))
-            else:
-                twod_model[twod_gpm] = twod_flat_fit[np.argsort(twod_srt)]
-
-            # Construct the full flat-field model
-            # TODO: Why is the 0.05 here for the illumflat compared to the 0.01 above?
-            self.flat_model[onslit_tweak] = twod_model[onslit_tweak] \
-                                        * np.fmax(self.msillumflat[onslit_tweak], 0.05) \
-                                        * np.fmax(spec_model[onslit_tweak], 1.0)
-
-            # Construct the pixel flat
-            #self.mspixelflat[onslit] = rawflat[onslit]/self.flat_model[onslit]
-            #self.mspixelflat[onslit_tweak] = 1.
-            #trimmed_slitid_img_anew = self.slits.slit_img(pad=-trim, slitidx=slit_idx)
-            #onslit_trimmed_anew = trimmed_slitid_img_anew == slit_spat
-            self.mspixelflat[onslit_tweak] = rawflat[onslit_tweak]/self.flat_model[onslit_tweak]
-            # TODO: Add some code here to treat the edges and places where fits
-            #  go bad?
+            result = self._fit_slit(slit_idx, gpm, npoly, fitdata, debug=debug) \
+                        if results is None else results[slit_idx]
+            self._assign_slit_fit(slit_idx, result)
 
         # Set the pixelflat to 1.0 wherever the flat was nonlinear
         self.mspixelflat[rawflat >= nonlinear_counts] = 1.0
@@ -951,6 +931,458 @@ class FlatField(object):
         # 100% to avoid creating edge effects, etc.
         self.mspixelflat = np.clip(self.mspixelflat, 0.5, 2.0)
 
+    def _fit_slit(self, slit_idx, gpm, npoly, fitdata, debug=False):
+        """
+        Model the flat-field response of a single slit.
+
+        This performs the spectral, illumination, and 2D fits described
+        by :func:`fit` for one slit. The only attributes changed are the
+        tweaked slit edges for this slit in :attr:`slits`; all other
+        results are returned so that they can be assembled into the
+        full images by :func:`_assign_slit_fit`.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Index of the slit to model.
+            gpm (`numpy.ndarray`_):
+                Good-pixel mask for the full image. If the
+                ``rej_sticky`` parameter is True, this is altered in
+                place.
+            npoly (:obj:`int`):
+                Order of the polynomial used in the 2D fit.
+            fitdata (:obj:`dict`):
+                Images and arrays shared by all slits, as constructed
+                by :func:`fit`, and the work images reused by each
+                slit; see :func:`_fit_slit_work_images`.
+            debug (:obj:`bool`, optional):
+                Show plots useful for debugging.
+
+        Returns:
+            :obj:`dict`: The results of the fit for this slit. The
+            dictionary provides the mask flag to set for the slit
+            (``flag``; None if the fit succeeded), the bspline fit to
+            the illumination profile (``spat_bspl``), the tweaked slit
+            edges (``tweak``), the flattened indices of the pixels on
+            the slit (``onslit``), and the illumination, flat model and
+            pixel flat values for those pixels (``illumflat``,
+            ``flat_model``, ``pixelflat``). Entries are None for stages
+            that were not reached.
+        """
+        result = dict(flag=None, spat_bspl=bspline.bspline(None), tweak=None, onslit=None,
+                      illumflat=None, flat_model=None, pixelflat=None)
+
+        # Set parameters (for convenience;
+        spec_samp_fine = self.flatpar['spec_samp_fine']
+        spec_samp_coarse = self.flatpar['spec_samp_coarse']
+        tweak_slits = self.flatpar['tweak_slits']
+        tweak_slits_thresh = self.flatpar['tweak_slits_thresh']
+        tweak_slits_maxfrac = self.flatpar['tweak_slits_maxfrac']
+        # If sticky, points rejected at each stage (spec, spat, 2d) are
+        # propagated to the next stage
+        sticky = self.flatpar['rej_sticky']
+
+        # Shared images
+        rawflat = fitdata['rawflat']
+        nspec = rawflat.shape[0]
+        flat_log = fitdata['flat_log']
+        gpm_log = fitdata['gpm_log']
+        ivar_log = fitdata['ivar_log']
+        median_slit_widths = fitdata['median_slit_widths']
+        slitid_img_init = fitdata['slitid_img_init']
+
+        slit_spat = self.slits.spat_id[slit_idx]
+        msgs.info('Modeling the flat-field response for slit spat_id={}: {}/{}'.format(
+                    slit_spat, slit_idx+1, self.slits.nslits))
+
+        # Find the pixels on the initial slit
+        onslit_init = slitid_img_init == slit_spat
+
+        # Find pixels on the padded and trimmed slit coordinates
+        onslit_padded = fitdata['padded_slitid_img'] == slit_spat
+        onslit_trimmed = fitdata['trimmed_slitid_img'] == slit_spat
+
+        # Create an image with the spatial coordinates relative to the left edge of this slit
+        spat_coo_init = self.slits.spatial_coordinate_image(slitidx=slit_idx, full=True, initial=True)
+
+        # ----------------------------------------------------------
+        # Collapse the slit spatially and fit the spectral function
+        # TODO: Put this stuff in a self.spectral_fit method?
+
+        # Create the tilts image for this slit
+        # TODO -- JFH Confirm the sign of this shift is correct!
+        _flexure = 0. if self.wavetilts.spat_flexure is None else self.wavetilts.spat_flexure
+        tilts = tracewave.fit2tilts(rawflat.shape, self.wavetilts['coeffs'][:,:,slit_idx],
+                                    self.wavetilts['func2d'], spat_shift=-1*_flexure)
+        # Convert the tilt image to an image with the spectral pixel index
+        spec_coo = tilts * (nspec-1)
+
+        # Only include the trimmed set of pixels in the flat-field
+        # fit along the spectral direction.
+        spec_gpm = onslit_trimmed & gpm_log  # & (rawflat < nonlinear_counts)
+        spec_nfit = np.sum(spec_gpm)
+        spec_ntot = np.sum(onslit_init)
+        msgs.info('Spectral fit of flatfield for {0}/{1} '.format(spec_nfit, spec_ntot)
+                  + ' pixels in the slit.')
+        # Set this to a parameter?
+        if spec_nfit/spec_ntot < 0.5:
+            # TODO: Shouldn't this raise an exception or continue to the next slit instead?
+            msgs.warn('Spectral fit includes only {:.1f}'.format(100*spec_nfit/spec_ntot)
+                      + '% of the pixels on this slit.' + msgs.newline()
+                      + '          Either the slit has many bad pixels or the number of '
+                        'trimmed pixels is too large.')
+
+        # Sort the pixels by their spectral coordinate.
+        # TODO: Include ivar and sorted gpm in outputs?
+        spec_gpm, spec_srt, spec_coo_data, spec_flat_data \
+                = flat.sorted_flat_data(flat_log, spec_coo, gpm=spec_gpm)
+        # NOTE: By default np.argsort sorts the data over the last
+        # axis. Just to avoid the possibility (however unlikely) of
+        # spec_coo[spec_gpm] returning an array, all the arrays are
+        # explicitly flattened.
+        spec_ivar_data = ivar_log[spec_gpm].ravel()[spec_srt]
+        spec_gpm_data = gpm_log[spec_gpm].ravel()[spec_srt]
+
+        # Rejection threshold for spectral fit in log(image)
+        # TODO: Make this a parameter?
+        logrej = 0.5
+
+        # Fit the spectral direction of the blaze.
+        # TODO: Figure out how to deal with the fits going crazy at
+        #  the edges of the chip in spec direction
+        # TODO: Can we add defaults to bspline_profile so that we
+        #  don't have to instantiate invvar and profile_basis
+        spec_bspl, spec_gpm_fit, spec_flat_fit, _, exit_status \
+                = utils.bspline_profile(spec_coo_data, spec_flat_data, spec_ivar_data,
+                                        np.ones_like(spec_coo_data), ingpm=spec_gpm_data,
+                                        nord=4, upper=logrej, lower=logrej,
+                                        kwargs_bspline={'bkspace': spec_samp_fine},
+                                        kwargs_reject={'groupbadpix': True, 'maxrej': 5})
+
+        if exit_status > 1:
+            # TODO -- MAKE A FUNCTION
+            msgs.warn('Flat-field spectral response bspline fit failed!  Not flat-fielding '
+                      'slit {0} and continuing!'.format(slit_spat))
+            result['flag'] = 'BADFLATCALIB'
+            return result
+
+        # Debugging/checking spectral fit
+        if debug:
+            utils.bspline_qa(spec_coo_data, spec_flat_data, spec_bspl, spec_gpm_fit,
+                             spec_flat_fit, xlabel='Spectral Pixel', ylabel='log(flat counts)',
+                             title='Spectral Fit for slit={:d}'.format(slit_spat))
+
+        if sticky:
+            # Add rejected pixels to gpm
+            gpm[spec_gpm] = (spec_gpm_fit & spec_gpm_data)[np.argsort(spec_srt)]
+
+        # Construct the model of the flat-field spectral shape
+        # including padding on either side of the slit.
+        spec_model = fitdata['spec_model']
+        spec_model[...] = 1.
+        spec_model[onslit_padded] = np.exp(spec_bspl.value(spec_coo[onslit_padded])[0])
+        # ----------------------------------------------------------
+
+        # ----------------------------------------------------------
+        # To fit the spatial response, first normalize out the
+        # spectral response, and then collapse the slit spectrally.
+
+        # Normalize out the spectral shape of the flat
+        norm_spec = fitdata['norm_spec']
+        norm_spec[...] = 1.
+        norm_spec[onslit_padded] = rawflat[onslit_padded] \
+                                        / np.fmax(spec_model[onslit_padded],1.0)
+
+        # Find pixels fot fit in the spatial direction:
+        #   - Fit pixels in the padded slit that haven't been masked
+        #     by the BPM
+        spat_gpm = onslit_padded & gpm #& (rawflat < nonlinear_counts)
+        #   - Fit pixels with non-zero flux and less than 70% above
+        #     the average spectral profile.
+        spat_gpm &= (norm_spec > 0.0) & (norm_spec < 1.7)
+        #   - Determine maximum counts in median filtered flat
+        #     spectrum model.
+        spec_interp = interpolate.interp1d(spec_coo_data, spec_flat_fit, kind='linear',
+                                           assume_sorted=True, bounds_error=False,
+                                           fill_value=-np.inf)
+        spec_sm = utils.fast_running_median(np.exp(spec_interp(np.arange(nspec))),
+                                            np.fmax(np.ceil(0.10*nspec).astype(int),10))
+        #   - Only fit pixels with at least values > 10% of this maximum and no less than 1.
+        spat_gpm &= (spec_model > 0.1*np.amax(spec_sm)) & (spec_model > 1.0)
+
+        # Report
+        spat_nfit = np.sum(spat_gpm)
+        spat_ntot = np.sum(onslit_padded)
+        msgs.info('Spatial fit of flatfield for {0}/{1} '.format(spat_nfit, spat_ntot)
+                  + ' pixels in the slit.')
+        if spat_nfit/spat_ntot < 0.5:
+            # TODO: Shouldn't this raise an exception or continue to the next slit instead?
+            msgs.warn('Spatial fit includes only {:.1f}'.format(100*spat_nfit/spat_ntot)
+                      + '% of the pixels on this slit.' + msgs.newline()
+                      + '          Either the slit has many bad pixels, the model of the '
+                      'spectral shape is poor, or the illumination profile is very irregular.')
+
+        # First fit -- With initial slits
+        exit_status, spat_coo_data,  spat_flat_data, spat_bspl, spat_gpm_fit, \
+            spat_flat_fit, spat_flat_data_raw \
+                    = self.spatial_fit(norm_spec, spat_coo_init, median_slit_widths[slit_idx],
+                                       spat_gpm, gpm, debug=debug)
+
+        if tweak_slits:
+            # TODO: Should the tweak be based on the bspline fit?
+            # TODO: Will this break if
+            left_thresh, left_shift, self.slits.left_tweak[:,slit_idx], right_thresh, \
+                right_shift, self.slits.right_tweak[:,slit_idx] \
+                    = flat.tweak_slit_edges(self.slits.left_init[:,slit_idx],
+                                            self.slits.right_init[:,slit_idx],
+                                            spat_coo_data, spat_flat_data,
+                                            thresh=tweak_slits_thresh,
+                                            maxfrac=tweak_slits_maxfrac, debug=debug)
+            result['tweak'] = (self.slits.left_tweak[:,slit_idx].copy(),
+                               self.slits.right_tweak[:,slit_idx].copy())
+            # TODO: Because the padding doesn't consider adjacent
+            #  slits, calling slit_img for individual slits can be
+            #  different from the result when you construct the
+            #  image for all slits. Fix this...
+
+            # Update the onslit mask
+            _slitid_img = self.slits.slit_img(slitidx=slit_idx, initial=False)
+            onslit_tweak = _slitid_img == slit_spat
+            spat_coo_tweak = self.slits.spatial_coordinate_image(slitidx=slit_idx,
+                                                           slitid_img=_slitid_img)
+
+            # Construct the empirical illumination profile
+            # TODO This is extremely inefficient, because we only need to re-fit the illumflat, but
+            #  spatial_fit does both the reconstruction of the illumination function and the bspline fitting.
+            #  Only the b-spline fitting needs be reddone with the new tweaked spatial coordinates, so that would
+            #  save a ton of runtime. It is not a trivial change becauase the coords are sorted, etc.
+            exit_status, spat_coo_data, spat_flat_data, spat_bspl, spat_gpm_fit, \
+                spat_flat_fit, spat_flat_data_raw = self.spatial_fit(
+                norm_spec, spat_coo_tweak, median_slit_widths[slit_idx], spat_gpm, gpm, debug=False)
+
+            spat_coo_final = spat_coo_tweak
+        else:
+            _slitid_img = slitid_img_init
+            spat_coo_final = spat_coo_init
+            onslit_tweak = onslit_init
+
+        # Add an approximate pixel axis at the top
+        if debug:
+            # TODO: Move this into a qa plot that gets saved
+            ax = utils.bspline_qa(spat_coo_data, spat_flat_data, spat_bspl, spat_gpm_fit,
+                                  spat_flat_fit, show=False)
+            ax.scatter(spat_coo_data, spat_flat_data_raw, marker='.', s=1, zorder=0, color='k',
+                       label='raw data')
+            # Force the center of the slit to be at the center of the plot for the hline
+            ax.set_xlim(-0.1,1.1)
+            ax.axvline(0.0, color='lightgreen', linestyle=':', linewidth=2.0,
+                       label='original left edge', zorder=8)
+            ax.axvline(1.0, color='red', linestyle=':', linewidth=2.0,
+                       label='original right edge', zorder=8)
+            if tweak_slits and left_shift > 0:
+                label = 'threshold = {:5.2f}'.format(tweak_slits_thresh) \
+                            + ' % of max of left illumprofile'
+                ax.axhline(left_thresh, xmax=0.5, color='lightgreen', linewidth=3.0,
+                           label=label, zorder=10)
+                ax.axvline(left_shift, color='lightgreen', linestyle='--', linewidth=3.0,
+                           label='tweaked left edge', zorder=11)
+            if tweak_slits and right_shift > 0:
+                label = 'threshold = {:5.2f}'.format(tweak_slits_thresh) \
+                            + ' % of max of right illumprofile'
+                ax.axhline(right_thresh, xmin=0.5, color='red', linewidth=3.0, label=label,
+                           zorder=10)
+                ax.axvline(1-right_shift, color='red', linestyle='--', linewidth=3.0,
+                           label='tweaked right edge', zorder=20)
+            ax.legend()
+            ax.set_xlabel('Normalized Slit Position')
+            ax.set_ylabel('Normflat Spatial Profile')
+            ax.set_title('Illumination Function Fit for slit={:d}'.format(slit_spat))
+            plt.show()
+
+        # ----------------------------------------------------------
+        # Construct the illumination profile with the tweaked edges
+        # of the slit
+        if exit_status <= 1:
+            # TODO -- JFH -- Check this is ok for flexure!!
+            illumflat = spat_bspl.value(spat_coo_final[onslit_tweak])[0]
+            result['onslit'] = np.where(onslit_tweak.ravel())[0]
+            result['illumflat'] = illumflat
+            result['spat_bspl'] = spat_bspl
+        else:
+            # Save the nada
+            msgs.warn('Slit illumination profile bspline fit failed!  Spatial profile not '
+                      'included in flat-field model for slit {0}!'.format(slit_spat))
+            result['flag'] = 'BADFLATCALIB'
+            return result
+
+        # ----------------------------------------------------------
+        # Fit the 2D residuals of the 1D spectral and spatial fits.
+        msgs.info('Performing 2D illumination + scattered light flat field fit')
+
+        # Construct the spectrally and spatially normalized flat
+        norm_spec_spat = fitdata['norm_spec_spat']
+        norm_spec_spat[...] = 1.
+        norm_spec_spat[onslit_tweak] = rawflat[onslit_tweak] / np.fmax(spec_model[onslit_tweak], 1.0) \
+                                                / np.fmax(illumflat, 0.01)
+
+        # Sort the pixels by their spectral coordinate. The mask
+        # uses the nominal padding defined by the slits object.
+        twod_gpm, twod_srt, twod_spec_coo_data, twod_flat_data \
+                = flat.sorted_flat_data(norm_spec_spat, spec_coo, gpm=onslit_tweak)
+        # Also apply the sorting to the spatial coordinates
+        twod_spat_coo_data = spat_coo_final[twod_gpm].ravel()[twod_srt]
+        # TODO: Reset back to origin gpm if sticky is true?
+        twod_gpm_data = gpm[twod_gpm].ravel()[twod_srt]
+        # Only fit data with less than 30% variations
+        # TODO: Make 30% a parameter?
+        twod_gpm_data &= np.absolute(twod_flat_data - 1) < 0.3
+        # Here we ignore the formal photon counting errors and
+        # simply assume that a typical error per pixel. This guess
+        # is somewhat aribtrary. We then set the rejection
+        # threshold with sigrej_twod
+        # TODO: Make twod_sig and twod_sigrej parameters?
+        twod_sig = 0.01
+        twod_ivar_data = twod_gpm_data.astype(float)/(twod_sig**2)
+        twod_sigrej = 4.0
+
+        poly_basis = basis.fpoly(2.0*twod_spat_coo_data - 1.0, npoly)
+
+        # Perform the full 2d fit
+        twod_bspl, twod_gpm_fit, twod_flat_fit, _ , exit_status \
+                = utils.bspline_profile(twod_spec_coo_data, twod_flat_data, twod_ivar_data,
+                                        poly_basis, ingpm=twod_gpm_data, nord=4,
+                                        upper=twod_sigrej, lower=twod_sigrej,
+                                        kwargs_bspline={'bkspace': spec_samp_coarse},
+                                        kwargs_reject={'groupbadpix': True, 'maxrej': 10})
+        if debug:
+            # TODO: Make a plot that shows the residuals in the 2D
+            # image
+            resid = twod_flat_data - twod_flat_fit
+            goodpix = twod_gpm_fit & twod_gpm_data
+            badpix = np.invert(twod_gpm_fit) & twod_gpm_data
+
+            plt.clf()
+            ax = plt.gca()
+            ax.plot(twod_spec_coo_data[goodpix], resid[goodpix], color='k', marker='o',
+                    markersize=0.2, mfc='k', fillstyle='full', linestyle='None',
+                    label='good points')
+            ax.plot(twod_spec_coo_data[badpix], resid[badpix], color='red', marker='+',
+                    markersize=0.5, mfc='red', fillstyle='full', linestyle='None',
+                    label='masked')
+            ax.axhline(twod_sigrej*twod_sig, color='lawngreen', linestyle='--',
+                       label='rejection thresholds', zorder=10, linewidth=2.0)
+            ax.axhline(-twod_sigrej*twod_sig, color='lawngreen', linestyle='--', zorder=10,
+                       linewidth=2.0)
+#                ax.set_ylim(-0.05, 0.05)
+            ax.legend()
+            ax.set_xlabel('Spectral Pixel')
+            ax.set_ylabel('Residuals from pixelflat 2-d fit')
+            ax.set_title('Spectral Residuals for slit={:d}'.format(slit_spat))
+            plt.show()
+
+            plt.clf()
+            ax = plt.gca()
+            ax.plot(twod_spat_coo_data[goodpix], resid[goodpix], color='k', marker='o',
+                    markersize=0.2, mfc='k', fillstyle='full', linestyle='None',
+                    label='good points')
+            ax.plot(twod_spat_coo_data[badpix], resid[badpix], color='red', marker='+',
+                    markersize=0.5, mfc='red', fillstyle='full', linestyle='None',
+                    label='masked')
+            ax.axhline(twod_sigrej*twod_sig, color='lawngreen', linestyle='--',
+                       label='rejection thresholds', zorder=10, linewidth=2.0)
+            ax.axhline(-twod_sigrej*twod_sig, color='lawngreen', linestyle='--', zorder=10,
+                       linewidth=2.0)
+#                ax.set_ylim((-0.05, 0.05))
+#                ax.set_xlim(-0.02, 1.02)
+            ax.legend()
+            ax.set_xlabel('Normalized Slit Position')
+            ax.set_ylabel('Residuals from pixelflat 2-d fit')
+            ax.set_title('Spatial Residuals for slit={:d}'.format(slit_spat))
+            plt.show()
+
+        # Save the 2D residual model
+        twod_model = fitdata['twod_model']
+        twod_model[...] = 1.
+        if exit_status > 1:
+            msgs.warn('Two-dimensional fit to flat-field data failed!  No higher order '
+                      'flat-field corrections included in model of slit {0}!'.format(slit_spat))
+        else:
+            twod_model[twod_gpm] = twod_flat_fit[np.argsort(twod_srt)]
+
+        # Construct the full flat-field model
+        # TODO: Why is the 0.05 here for the illumflat compared to the 0.01 above?
+        result['flat_model'] = twod_model[onslit_tweak] \
+                                    * np.fmax(illumflat, 0.05) \
+                                    * np.fmax(spec_model[onslit_tweak], 1.0)
+
+        # Construct the pixel flat
+        #self.mspixelflat[onslit] = rawflat[onslit]/self.flat_model[onslit]
+        #self.mspixelflat[onslit_tweak] = 1.
+        #trimmed_slitid_img_anew = self.slits.slit_img(pad=-trim, slitidx=slit_idx)
+        #onslit_trimmed_anew = trimmed_slitid_img_anew == slit_spat
+        result['pixelflat'] = rawflat[onslit_tweak]/result['flat_model']
+        # TODO: Add some code here to treat the edges and places where fits
+        #  go bad?
+
+        return result
+
+    def _assign_slit_fit(self, slit_idx, result):
+        """
+        Assign the results of :func:`_fit_slit` to the full flat-field
+        images, the list of illumination bsplines, and the slit mask.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Index of the modeled slit.
+            result (:obj:`dict`):
+                Results returned by :func:`_fit_slit`.
+        """
+        if result['tweak'] is not None:
+            self.slits.left_tweak[:,slit_idx], self.slits.right_tweak[:,slit_idx] = result['tweak']
+        if result['flag'] is not None:
+            self.slits.mask[slit_idx] = self.slits.bitmask.turn_on(self.slits.mask[slit_idx],
+                                                                   result['flag'])
+        self.list_of_spat_bsplines.append(result['spat_bspl'])
+        if result['illumflat'] is not None:
+            self.msillumflat.flat[result['onslit']] = result['illumflat']
+        if result['flat_model'] is not None:
+            self.flat_model.flat[result['onslit']] = result['flat_model']
+            self.mspixelflat.flat[result['onslit']] = result['pixelflat']
+
+    def _independent_slit_groups(self, slit_indx):
+        """
+        Group slits that could alter each other's good-pixel mask.
+
+        When ``rej_sticky`` is True, the rejections from the model of
+        one slit are propagated to the pixels in its padded footprint,
+        which can overlap the footprint of the adjacent slits. Slits are
+        grouped if their spatial extents, including the maximum
+        padding used by :func:`_fit_slit`, overlap.
+
+        Args:
+            slit_indx (array-like):
+                Indices of the slits to group.
+
+        Returns:
+            :obj:`list`: List of lists with the indices of the slits in
+            each group, sorted in the order in which they must be
+            modeled.
+        """
+        pad = 1 + max([np.amax(np.absolute(np.atleast_1d(p)))
+                       for p in [self.flatpar['slit_illum_pad'], self.flatpar['slit_trim'],
+                                 self.slits.pad]])
+        slit_indx = np.asarray(slit_indx)
+        lo = np.amin(self.slits.left_init[:,slit_indx], axis=0) - pad
+        hi = np.amax(self.slits.right_init[:,slit_indx], axis=0) + pad
+        groups = []
+        end = None
+        for i in np.argsort(lo):
+            if end is None or lo[i] > end:
+                groups += [[]]
+                end = hi[i]
+            groups[-1] += [slit_indx[i]]
+            end = max(end, hi[i])
+        return [sorted(g) for g in groups]
+
     def spatial_fit(self, norm_spec, spat_coo, median_slit_width, spat_gpm, gpm, debug=False):
         """
         Perform the spatial fit
@@ -1012,6 +1444,53 @@ class FlatField(object):
                spat_flat_fit, spat_flat_data_raw
 
 
+# Data shared by all slits modeled by a process; see _init_fit_slit_group
+_fit_slit_data = None
+
+
+def _fit_slit_work_images(rawflat):
+    """
+    Allocate the full-detector images used by
+    :func:`FlatField._fit_slit`, which are reset and reused for each
+    slit.
+    """
+    return {key: np.ones_like(rawflat)
+                for key in ['spec_model', 'norm_spec', 'norm_spec_spat', 'twod_model']}
+
+
+def _init_fit_slit_group(flatfield, gpm, npoly, fitdata):
+    """
+    Set the data shared by all slits modeled by a process; see
+    :func:`_fit_slit_group`.
+    """
+    global _fit_slit_data
+    # Allocate the work images once per process
+    _fit_slit_data = (flatfield, gpm, npoly,
+                      dict(fitdata, **_fit_slit_work_images(fitdata['rawflat'])))
+
+
+def _fit_slit_group(slit_indx):
+    """
+    Model the flat-field response for a group of slits in sequence.
+
+    This is the function executed by each process when modeling slits
+    in parallel; see :func:`FlatField.fit`. The data shared by all
+    slits must have first been set by :func:`_init_fit_slit_group`.
+
+    Args:
+        slit_indx (:obj:`list`):
+            Indices of the slits to model.
+
+    Returns:
+        :obj:`list`: The results from :func:`FlatField._fit_slit` for
+        each slit.
+    """
+    flatfield, gpm, npoly, fitdata = _fit_slit_data
+    # Each group of slits starts from the input good-pixel mask
+    _gpm = gpm.copy()
+    return [flatfield._fit_slit(slit_idx, _gpm, npoly, fitdata) for slit_idx in slit_indx]
+
+
 def show_flats(pixelflat, illumflat, procflat, flat_model, wcs_match=True, slits=None):
     """
     Interface to ginga to show a set of flat images
@@ -5,9 +5,11 @@ import matplotlib.pyplot as plt
 from astropy.io import fits
 
 from pypeit import msgs
+from pypeit import utils
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit import sensfunc
 from pypeit import specobjs
+from pypeit.core import flux_calib
 from astropy import table
 from IPython import embed
 
@@ -45,14 +47,78 @@ class FluxCalibrate(object):
         self.par = self.spectrograph.default_pypeit_par()['fluxcalib'] if par is None else par
         self.debug = debug
 
-        sens_last = None
-        for spec1, sens, outfile in zip(self.spec1dfiles, self.sensfiles, self.outfiles):
-            # Read in the data
-            sobjs = specobjs.SpecObjs.from_fitsfile(spec1)
-            if sens != sens_last:
-                wave, sensfunction, meta_table, out_table, header_sens = sensfunc.SensFunc.load(sens)
-            self.flux_calib(sobjs, wave, sensfunction, meta_table)
-            sobjs.write_to_fits(sobjs.header, outfile, overwrite=True)
+        # Extinction data only depend on the observatory
+        self.extinct = None
+        if self.par['extinct_correct']:
+            self.extinct = flux_calib.load_extinction_data(self.spectrograph.telescope['longitude'],
+                                                           self.spectrograph.telescope['latitude'])
+
+        # Load each sensitivity function once
+        self.sens = {}
+        for sens in self.sensfiles:
+            if sens not in self.sens.keys():
+                self.sens[sens] = sensfunc.SensFunc.load(sens)[:3]
+
+        # Flux and write the files, optionally in parallel
+        utils.parallel_map(self.flux_file, list(zip(self.spec1dfiles, self.sensfiles, self.outfiles)),
+                           n_proc=self.par['n_proc'])
+
+    def flux_file(self, files):
+        """
+        Flux calibrate one spec1d file and write the result.
+
+        Args:
+            files (tuple):
+                The names of the spec1d file, the sensitivity function
+                file (which must be in :attr:`sens`), and the output
+                file.
+        """
+        spec1, sens, outfile = files
+        # Read in the data
+        sobjs = specobjs.SpecObjs.from_fitsfile(spec1)
+        wave, sensfunction, meta_table = self.sens[sens]
+        self.flux_calib(sobjs, wave, sensfunction, meta_table)
+        sobjs.write_to_fits(sobjs.header, outfile, overwrite=True)
+
+    def apply_sensfunc(self, sobjs, wave, sensfunction, exptime, airmass):
+        """
+        Apply one sensitivity function to all the spectra of an
+        exposure.
+
+        The boxcar and optimal spectra of all the objects are stacked
+        (grouped by their length) and flux calibrated at once by
+        :func:`pypeit.core.flux_calib.apply_sensfunc`.
+
+        Args:
+            sobjs (iterable):
+               :class:`pypeit.specobj.SpecObj` objects to flux
+            wave (ndarray):
+               wavelength array for sensitivity function (nspec,)
+            sensfunction (ndarray):
+               sensitivity function
+            exptime (float):
+               Exposure time
+            airmass (float):
+               Airmass of the exposure
+
+        """
+        spectra = [(sobj, attr) for sobj in sobjs for attr in ['BOX', 'OPT']
+                        if sobj[attr+'_WAVE'] is not None]
+        if len(spectra) == 0:
+            return
+        msgs.info('Fluxing {0} spectra'.format(len(spectra)))
+        nspec = np.array([sobj[attr+'_WAVE'].size for sobj, attr in spectra])
+        for n in np.unique(nspec):
+            grp = [spectra[i] for i in np.where(nspec == n)[0]]
+            flam, flam_sig, flam_ivar = flux_calib.apply_sensfunc(
+                wave, sensfunction, np.stack([sobj[attr+'_WAVE'] for sobj, attr in grp]),
+                np.stack([sobj[attr+'_COUNTS'] for sobj, attr in grp]),
+                np.stack([sobj[attr+'_COUNTS_IVAR'] for sobj, attr in grp]), exptime,
+                extinct=self.extinct, airmass=airmass, extrap_sens=self.par['extrap_sens'])
+            for i, (sobj, attr) in enumerate(grp):
+                sobj[attr+'_FLAM'] = flam[i]
+                sobj[attr+'_FLAM_SIG'] = flam_sig[i]
+                sobj[attr+'_FLAM_IVAR'] = flam_ivar[i]
 
     def flux_calib(self, sobjs, wave, sensfunction, meta_table):
         """
@@ -94,16 +160,8 @@ class MultiSlitFC(FluxCalibrate):
         """
 
         # Run
-        for sci_obj in sobjs:
-            sci_obj.apply_flux_calib(wave, sensfunction,
-                                     sobjs.header['EXPTIME'],
-                                     extinct_correct=self.par['extinct_correct'],
-                                     longitude=self.spectrograph.telescope['longitude'],
-                                     latitude=self.spectrograph.telescope['latitude'],
-                                     extrap_sens=self.par['extrap_sens'],
-                                     airmass=float(sobjs.header['AIRMASS']))
-
-
+        self.apply_sensfunc(sobjs, wave, sensfunction, sobjs.header['EXPTIME'],
+                            float(sobjs.header['AIRMASS']))
 
 
 class EchelleFC(FluxCalibrate):
@@ -111,8 +169,8 @@ class EchelleFC(FluxCalibrate):
     Child of FluxSpec for Echelle reductions
     """
 
-    def __init__(self, spec1dfiles, sensfiles, par=None, debug=False):
-        super().__init__(spec1dfiles, sensfiles, par=par, debug=debug)
+    def __init__(self, spec1dfiles, sensfiles, par=None, debug=False, outfiles=None):
+        super().__init__(spec1dfiles, sensfiles, par=par, debug=debug, outfiles=outfiles)
 
 
     def flux_calib(self, sobjs, wave, sensfunction, meta_table):
@@ -135,20 +193,14 @@ class EchelleFC(FluxCalibrate):
         # for applying to data for cases where not all orders are present in the data as in the sensfunc, etc.,
         # i.e. X-shooter with the K-band blocking filter.
         ech_orders = np.array(meta_table['ECH_ORDERS']).flatten()
-        #norders = ech_orders.size
         for sci_obj in sobjs:
-            # JFH Is there a more elegant pythonic way to do this without looping over both orders and sci_obj?
-            indx = np.where(ech_orders == sci_obj.ECH_ORDER)[0]
-            if indx.size==1:
-                sci_obj.apply_flux_calib(wave[:, indx[0]],sensfunction[:,indx[0]],
-                                         sobjs.header['EXPTIME'],
-                                         extinct_correct=self.par['extinct_correct'],
-                                         extrap_sens = self.par['extrap_sens'],
-                                         longitude=self.spectrograph.telescope['longitude'],
-                                         latitude=self.spectrograph.telescope['latitude'],
-                                         airmass=float(sobjs.header['AIRMASS']))
-            elif indx.size == 0:
+            if np.sum(ech_orders == sci_obj.ECH_ORDER) == 0:
                 msgs.info('Unable to flux calibrate order = {:} as it is not in your sensitivity function. '
                           'Something is probably wrong with your sensitivity function.'.format(sci_obj.ECH_ORDER))
-            else:
+            elif np.sum(ech_orders == sci_obj.ECH_ORDER) > 1:
                 msgs.error('This should not happen')
+        # Flux all the objects in each order at once
+        for iord, order in enumerate(ech_orders):
+            self.apply_sensfunc([sci_obj for sci_obj in sobjs if sci_obj.ECH_ORDER == order],
+                                wave[:, iord], sensfunction[:, iord], sobjs.header['EXPTIME'],
+                                float(sobjs.header['AIRMASS']))
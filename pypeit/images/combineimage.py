@@ -17,7 +17,7 @@ from pypeit.par import pypeitpar
 from pypeit import utils
 
 from pypeit.images import pypeitimage
-from pypeit.images import rawimage
+from pypeit.images.framecache import frame_cache
 from pypeit.images import imagebitmask
 
 from IPython import embed
@@ -82,15 +82,18 @@ class CombineImage(object):
             :class:`pypeit.images.pypeitimage.PypeItImage`:
 
         """
+        # The master calibrations are the same for all the files
+        masters = dict(bias=bias, bpm=bpm, dark=dark, flatimages=flatimages, slits=slits)
+        masters_checksum = frame_cache.masters_checksum(self.par, **masters) \
+                                if frame_cache.enabled else None
         # Loop on the files
         nimages = len(self.files)
         lampstat = []
         for kk, ifile in enumerate(self.files):
-            # Load raw image
-            rawImage = rawimage.RawImage(ifile, self.spectrograph, self.det)
-            # Process
-            pypeitImage = rawImage.process(self.par, bias=bias, bpm=bpm, dark=dark,
-                                           flatimages=flatimages, slits=slits)
+            # Load and process the raw image, unless it is already in
+            # the processed frame cache
+            pypeitImage = frame_cache.process(ifile, self.spectrograph, self.det, self.par,
+                                              masters_checksum=masters_checksum, **masters)
             #embed(header='96 of combineimage')
             # Are we all done?
             if nimages == 1:
@@ -98,9 +101,9 @@ class CombineImage(object):
             elif kk == 0:
                 # Get ready
                 shape = (nimages, pypeitImage.image.shape[0], pypeitImage.image.shape[1])
-                img_stack = np.zeros(shape)
-                ivar_stack= np.zeros(shape)
-                rn2img_stack = np.zeros(shape)
+                img_stack = np.zeros(shape, dtype=self.par['float_dtype'])
+                ivar_stack= np.zeros(shape, dtype=self.par['float_dtype'])
+                rn2img_stack = np.zeros(shape, dtype=self.par['float_dtype'])
                 crmask_stack = np.zeros(shape, dtype=bool)
                 # Mask
                 bitmask = imagebitmask.ImageBitMask()
@@ -124,9 +127,7 @@ class CombineImage(object):
             # TODO This seems kludgy to me. Why not just pass ignore_saturation to process_one and ignore the saturation
             # when the mask is actually built, rather than untoggling the bit here
             if ignore_saturation:  # Important for calibrations as we don't want replacement by 0
-                indx = pypeitImage.bitmask.flagged(pypeitImage.fullmask, flag=['SATURATION'])
-                pypeitImage.fullmask[indx] = pypeitImage.bitmask.turn_off(
-                    pypeitImage.fullmask[indx], 'SATURATION')
+                pypeitImage.bitmask.turn_off_inplace(pypeitImage.fullmask, 'SATURATION')
             mask_stack[kk, :, :] = pypeitImage.fullmask
 
         # Check that the lamps being combined are all the same:
@@ -168,6 +169,7 @@ class CombineImage(object):
         nonlinear_counts = self.spectrograph.nonlinear_counts(pypeitImage.detector,
                                                               apply_gain=self.par['apply_gain'])
         final_pypeitImage.build_mask(saturation=nonlinear_counts)
+        final_pypeitImage.set_float_dtype(self.par['float_dtype'])
         # Return
         return final_pypeitImage
 
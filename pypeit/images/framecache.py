@@ -0,0 +1,373 @@
+"""
+On-disk cache of processed raw frames.
+
+Processing a raw frame (overscan subtraction, trimming, orientation,
+bias and dark subtraction, gain, flat-fielding, and cosmic-ray masking)
+only depends on the raw file, the processing parameters, and the
+master calibrations used.  When iterating on the parameters of the
+later steps of the reduction (e.g., object finding or extraction),
+``run_pypeit`` re-processes every raw frame with identical results.
+
+The module-level :data:`frame_cache` is disabled by default.  Once
+enabled (e.g., with ``run_pypeit --proc_cache``), every frame processed
+by :class:`~pypeit.images.combineimage.CombineImage` is written to the
+cache directory, and the processing is skipped in subsequent runs
+where nothing it depends on has changed.  The processed images are
+stored in single precision, in losslessly compressed FITS files.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import os
+import hashlib
+
+import numpy as np
+
+from astropy.io import fits
+from astropy.table import Table
+
+from IPython import embed
+
+from pypeit import msgs
+from pypeit import __version__
+from pypeit import datamodel
+from pypeit.images import pypeitimage
+from pypeit.images import rawimage
+from pypeit.images import detector_container
+
+
+class ProcessedFrameCache(object):
+    """
+    Store and retrieve processed raw frames.
+
+    Each processed frame is written to a FITS file named after a key
+    that combines:
+
+        - the checksum of the raw file,
+        - the spectrograph and detector,
+        - the parameters in :attr:`process_keys`, and
+        - the checksum of the master calibrations used by the
+          processing (bias, dark, bad-pixel mask, flats, and slits).
+
+    Changing any of them therefore yields a new entry instead of
+    returning a stale one.
+
+    Attributes:
+        cache_dir (:obj:`str`):
+            Directory with the processed frames.  If None, the cache is
+            disabled.
+        hits (:obj:`int`):
+            Number of frames read from the cache.
+        misses (:obj:`int`):
+            Number of frames processed and written to the cache.
+    """
+    version = '1.0.0'
+    """
+    Version of the cached file format; changing it invalidates all
+    cached frames.
+    """
+
+    process_keys = ['trim', 'apply_gain', 'orient', 'overscan_method', 'overscan_par',
+                    'use_overscan', 'use_biasimage', 'use_darkimage', 'use_pixelflat',
+                    'use_illumflat', 'spat_flexure_correct', 'mask_cr', 'lamaxiter', 'grow',
+                    'rmcompact', 'sigclip', 'sigfrac', 'objlim', 'float_dtype']
+    """
+    The :class:`~pypeit.par.pypeitpar.ProcessImagesPar` parameters used
+    to process a single frame.  The others only affect how the frames
+    are combined.
+    """
+
+    def __init__(self):
+        self.cache_dir = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        """
+        Flag that the processed frames are cached.
+        """
+        return self.cache_dir is not None
+
+    def enable(self, cache_dir):
+        """
+        Start caching the processed frames.
+
+        Args:
+            cache_dir (:obj:`str`):
+                Directory for the processed frames.  Created if it
+                does not exist.
+        """
+        self.cache_dir = cache_dir
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def disable(self):
+        """
+        Stop caching the processed frames.
+        """
+        self.cache_dir = None
+
+    @staticmethod
+    def file_checksum(ifile, blocksize=2**20):
+        """
+        Compute the checksum of a file.
+
+        Args:
+            ifile (:obj:`str`):
+                File name.
+            blocksize (:obj:`int`, optional):
+                Number of bytes read at once.
+
+        Returns:
+            :obj:`str`: The SHA-1 hex digest of the file contents.
+        """
+        sha = hashlib.sha1()
+        with open(ifile, 'rb') as f:
+            for block in iter(lambda: f.read(blocksize), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _update_hash(sha, obj):
+        """
+        Add an object to a running hash.
+
+        Args:
+            sha (:obj:`hashlib.sha1`):
+                The running hash.
+            obj (object):
+                The object to add.  Arrays, tables, and
+                :class:`~pypeit.datamodel.DataContainer` objects (and
+                lists, tuples, and dictionaries of them) are hashed by
+                their contents; anything else by its ``repr``.
+        """
+        if isinstance(obj, np.ndarray) and obj.dtype == object:
+            # E.g., an array of bsplines
+            for item in obj.flat:
+                ProcessedFrameCache._update_hash(sha, item)
+        elif isinstance(obj, np.ndarray):
+            sha.update(str((obj.dtype.str, obj.shape)).encode())
+            sha.update(np.ascontiguousarray(obj).tobytes())
+        elif isinstance(obj, datamodel.DataContainer):
+            for key in obj.keys():
+                sha.update(key.encode())
+                ProcessedFrameCache._update_hash(sha, obj[key])
+        elif isinstance(obj, Table):
+            for name in obj.colnames:
+                sha.update(name.encode())
+                ProcessedFrameCache._update_hash(sha, np.asarray(obj[name]))
+        elif isinstance(obj, (list, tuple)):
+            for item in obj:
+                ProcessedFrameCache._update_hash(sha, item)
+        elif isinstance(obj, dict):
+            for key in sorted(obj.keys()):
+                sha.update(str(key).encode())
+                ProcessedFrameCache._update_hash(sha, obj[key])
+        else:
+            sha.update(repr(obj).encode())
+
+    def masters_checksum(self, par, bias=None, bpm=None, dark=None, flatimages=None,
+                         slits=None):
+        """
+        Compute the checksum of the master calibrations used to process
+        a frame.
+
+        Only the calibrations actually used with the provided
+        parameters are included.  The arguments are the same as for
+        :func:`~pypeit.images.rawimage.RawImage.process`.
+
+        Returns:
+            :obj:`str`: The SHA-1 hex digest.
+        """
+        sha = hashlib.sha1()
+        sha.update(repr([(key, par[key]) for key in self.process_keys]).encode())
+        if par['use_biasimage']:
+            self._update_hash(sha, None if bias is None else bias.image)
+        if par['use_darkimage']:
+            self._update_hash(sha, None if dark is None else dark.image)
+        if par['use_pixelflat'] or par['use_illumflat']:
+            self._update_hash(sha, bpm)
+            self._update_hash(sha, flatimages)
+        if par['use_illumflat'] or par['spat_flexure_correct']:
+            self._update_hash(sha, slits)
+        return sha.hexdigest()
+
+    def frame_key(self, ifile, spectrograph, det, masters_checksum):
+        """
+        Construct the key of a processed frame.
+
+        Args:
+            ifile (:obj:`str`):
+                Raw file name.
+            spectrograph (:class:`~pypeit.spectrographs.spectrograph.Spectrograph`):
+                Spectrograph used to take the data.
+            det (:obj:`int`):
+                1-indexed detector number.
+            masters_checksum (:obj:`str`):
+                Checksum of the processing parameters and master
+                calibrations; see :func:`masters_checksum`.
+
+        Returns:
+            :obj:`str`: The key.
+        """
+        sha = hashlib.sha1()
+        sha.update(repr((self.version, __version__, spectrograph.spectrograph, det,
+                         self.file_checksum(ifile), masters_checksum)).encode())
+        return sha.hexdigest()
+
+    def frame_file(self, key):
+        """
+        Return the name of the file with a processed frame.
+
+        Args:
+            key (:obj:`str`):
+                The key of the frame; see :func:`frame_key`.
+
+        Returns:
+            :obj:`str`: The file name.
+        """
+        return os.path.join(self.cache_dir, 'proc_{0}.fits'.format(key))
+
+    def process(self, ifile, spectrograph, det, par, masters_checksum=None, **kwargs):
+        """
+        Process a raw frame, or read it from the cache.
+
+        Args:
+            ifile (:obj:`str`):
+                Raw file name.
+            spectrograph (:class:`~pypeit.spectrographs.spectrograph.Spectrograph`):
+                Spectrograph used to take the data.
+            det (:obj:`int`):
+                1-indexed detector number.
+            par (:class:`~pypeit.par.pypeitpar.ProcessImagesPar`):
+                Parameters that dictate the processing of the image.
+            masters_checksum (:obj:`str`, optional):
+                Checksum of the master calibrations; see
+                :func:`masters_checksum`.  Computed from ``kwargs`` if
+                not provided.
+            **kwargs:
+                Master calibrations passed to
+                :func:`~pypeit.images.rawimage.RawImage.process`.
+
+        Returns:
+            :class:`~pypeit.images.pypeitimage.PypeItImage`: The
+            processed image.
+        """
+        if not self.enabled:
+            return rawimage.RawImage(ifile, spectrograph, det).process(par, **kwargs)
+
+        if masters_checksum is None:
+            masters_checksum = self.masters_checksum(par, **kwargs)
+        ofile = self.frame_file(self.frame_key(ifile, spectrograph, det, masters_checksum))
+        if os.path.isfile(ofile):
+            msgs.info('Reading processed frame {0} from {1}'.format(os.path.basename(ifile),
+                                                                     ofile))
+            self.hits += 1
+            return self.read(ofile, float_dtype=par['float_dtype'])
+
+        pypeitImage = rawimage.RawImage(ifile, spectrograph, det).process(par, **kwargs)
+        self.write(pypeitImage, ofile)
+        self.misses += 1
+        return pypeitImage
+
+    @staticmethod
+    def write(pypeitImage, ofile):
+        """
+        Write a processed frame to the cache.
+
+        The file is first written to a temporary file and then renamed,
+        such that an interrupted run never leaves a truncated frame in
+        the cache.
+
+        Args:
+            pypeitImage (:class:`~pypeit.images.pypeitimage.PypeItImage`):
+                The processed image.
+            ofile (:obj:`str`):
+                Output file name.
+        """
+        prihdr = fits.Header()
+        prihdr['PYP_SPEC'] = pypeitImage.PYP_SPEC
+        if pypeitImage.spat_flexure is not None:
+            prihdr['SPATFLEX'] = pypeitImage.spat_flexure
+        prihdr['PROCSTEP'] = ','.join(pypeitImage.process_steps)
+        prihdr['MASKTYPE'] = pypeitImage.fullmask.dtype.name
+        prihdr['BPMTYPE'] = pypeitImage.bpm.dtype.name
+        hdus = [fits.PrimaryHDU(header=prihdr)]
+        # Images in single precision
+        for key in ['image', 'ivar', 'rn2img']:
+            if pypeitImage[key] is not None:
+                hdus += [fits.CompImageHDU(data=pypeitImage[key].astype(np.float32),
+                                           name=key.upper(), compression_type='GZIP_2',
+                                           quantize_level=0.)]
+        # Masks
+        hdus += [fits.CompImageHDU(data=pypeitImage.bpm.astype(np.int32), name='BPM'),
+                 fits.CompImageHDU(data=pypeitImage.fullmask.astype(np.int32),
+                                   name='FULLMASK')]
+        if pypeitImage.crmask is not None:
+            hdus += [fits.CompImageHDU(data=pypeitImage.crmask.astype(np.int16),
+                                       name='CRMASK')]
+        # Detector
+        hdus += pypeitImage.detector.to_hdu()
+        # Raw headers, kept verbatim
+        for i, hdr in enumerate(pypeitImage.rawheadlist):
+            hdus += [fits.ImageHDU(data=np.frombuffer(hdr.tostring().encode(), dtype=np.uint8),
+                                   name='RAWHEAD{0}'.format(i))]
+
+        tmpfile = ofile + '.tmp'
+        fits.HDUList(hdus).writeto(tmpfile, overwrite=True)
+        os.replace(tmpfile, ofile)
+
+    @staticmethod
+    def read(ifile, float_dtype='float64'):
+        """
+        Read a processed frame from the cache.
+
+        Args:
+            ifile (:obj:`str`):
+                File with the processed frame.
+            float_dtype (:obj:`str`, optional):
+                Precision of the returned images; see
+                :func:`~pypeit.datamodel.DataContainer.set_float_dtype`.
+
+        Returns:
+            :class:`~pypeit.images.pypeitimage.PypeItImage`: The
+            processed image.
+        """
+        with fits.open(ifile, memmap=False) as hdu:
+            prihdr = hdu[0].header
+            d = {}
+            for key in ['image', 'ivar', 'rn2img']:
+                d[key] = hdu[key.upper()].data.astype(float_dtype) \
+                            if key.upper() in hdu else None
+            d['bpm'] = hdu['BPM'].data.astype(prihdr['BPMTYPE'])
+            d['fullmask'] = hdu['FULLMASK'].data.astype(prihdr['MASKTYPE'])
+            d['crmask'] = hdu['CRMASK'].data.astype(bool) if 'CRMASK' in hdu else None
+            d['detector'] = detector_container.DetectorContainer.from_hdu(hdu['DETECTOR'])
+            d['spat_flexure'] = prihdr['SPATFLEX'] if 'SPATFLEX' in prihdr else None
+            d['PYP_SPEC'] = prihdr['PYP_SPEC']
+            rawheadlist = [fits.Header.fromstring(h.data.tobytes().decode())
+                           for h in hdu if h.name.startswith('RAWHEAD')]
+
+        pypeitImage = pypeitimage.PypeItImage(**d)
+        pypeitImage.rawheadlist = rawheadlist
+        pypeitImage.process_steps = prihdr['PROCSTEP'].split(',') \
+                                        if len(prihdr['PROCSTEP']) > 0 else []
+        return pypeitImage
+
+    def report(self):
+        """
+        Report the number of frames read from and written to the cache.
+        """
+        if self.enabled:
+            msgs.info('Processed frame cache: {0} read, {1} processed'.format(self.hits,
+                                                                              self.misses))
+
+
+frame_cache = ProcessedFrameCache()
+"""
+The processed-frame cache used by
+:class:`~pypeit.images.combineimage.CombineImage`.
+"""
@@ -244,37 +244,37 @@ class PypeItImage(datamodel.DataContainer):
         # Bad pixel mask
         if self.bpm is not None:
             indx = self.bpm.astype(bool)
-            self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'BPM')
+            self.bitmask.turn_on_inplace(self.fullmask, 'BPM', where=indx)
 
         # Cosmic rays
         if self.crmask is not None:
             indx = self.crmask.astype(bool)
-            self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'CR')
+            self.bitmask.turn_on_inplace(self.fullmask, 'CR', where=indx)
 
         # Saturated pixels
         indx = self.image >= _saturation
-        self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'SATURATION')
+        self.bitmask.turn_on_inplace(self.fullmask, 'SATURATION', where=indx)
 
         # Minimum counts
         indx = self.image <= _mincounts
-        self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'MINCOUNTS')
+        self.bitmask.turn_on_inplace(self.fullmask, 'MINCOUNTS', where=indx)
 
         # Undefined counts
         indx = np.invert(np.isfinite(self.image))
-        self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'IS_NAN')
+        self.bitmask.turn_on_inplace(self.fullmask, 'IS_NAN', where=indx)
 
         if self.ivar is not None:
             # Bad inverse variance values
             indx = np.invert(self.ivar > 0.0)
-            self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'IVAR0')
+            self.bitmask.turn_on_inplace(self.fullmask, 'IVAR0', where=indx)
 
             # Undefined inverse variances
             indx = np.invert(np.isfinite(self.ivar))
-            self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'IVAR_NAN')
+            self.bitmask.turn_on_inplace(self.fullmask, 'IVAR_NAN', where=indx)
 
         if slitmask is not None:
             indx = slitmask == -1
-            self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'OFFSLITS')
+            self.bitmask.turn_on_inplace(self.fullmask, 'OFFSLITS', where=indx)
 
 
     def update_mask_slitmask(self, slitmask):
@@ -289,7 +289,7 @@ class PypeItImage(datamodel.DataContainer):
         # Pixels excluded from any slit.
         indx = slitmask == -1
         # Finish
-        self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'OFFSLITS')
+        self.bitmask.turn_on_inplace(self.fullmask, 'OFFSLITS', where=indx)
 
     def update_mask_cr(self, crmask_new):
         """
@@ -302,9 +302,9 @@ class PypeItImage(datamodel.DataContainer):
             crmask_new (`numpy.ndarray`_):
                 New CR mask
         """
-        self.fullmask = self.bitmask.turn_off(self.fullmask, 'CR')
+        self.bitmask.turn_off_inplace(self.fullmask, 'CR')
         indx = crmask_new.astype(bool)
-        self.fullmask[indx] = self.bitmask.turn_on(self.fullmask[indx], 'CR')
+        self.bitmask.turn_on_inplace(self.fullmask, 'CR', where=indx)
 
     def sub(self, other, par):
         """
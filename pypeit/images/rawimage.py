@@ -262,6 +262,8 @@ class RawImage(object):
                                                               apply_gain=self.par['apply_gain'])
         # Build
         pypeitImage.build_mask(saturation=nonlinear_counts)
+        # Set the precision of the stored images
+        pypeitImage.set_float_dtype(self.par['float_dtype'])
 
         # Return
         return pypeitImage
@@ -0,0 +1,368 @@
+"""
+Incremental reductions of a night of data.
+
+:class:`IncrementalReduction` watches a directory of raw frames while
+they are being taken.  New frames are typed and assigned to
+configurations and calibration groups as they land (see
+:class:`pypeit.metadata.PypeItMetaData`), the master calibrations of a
+group are built as soon as the group is complete, and each science or
+standard frame is reduced as soon as the masters of its group are
+ready.  The outputs are the same as running ``pypeit_setup`` and
+``run_pypeit`` at the end of the night: one PypeIt file is written (and
+kept up to date) for each configuration in
+``<redux_path>/<spectrograph>_<setup>``, and the masters and reduced
+frames are written next to it.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import os
+import time
+
+from IPython import embed
+
+import numpy as np
+
+from configobj import ConfigObj
+
+from pypeit import msgs
+from pypeit import pypeit
+from pypeit import calibrations
+from pypeit.par import PypeItPar
+from pypeit.metadata import PypeItMetaData
+from pypeit.spectrographs.util import load_spectrograph
+
+
+class IncrementalReduction(object):
+    """
+    Reduce the frames in a raw directory as they arrive.
+
+    Each call to :func:`update` reads the headers of the new frames
+    only, then re-types and re-groups the full set of frames, which is
+    fast.  Configurations are labeled in the order in which they are
+    found, so the setup and calibration group of a frame do not change
+    as the night goes on.
+
+    A calibration group is complete when it has all the frame types
+    needed to reduce its science frames; see
+    :func:`pypeit.calibrations.missing_calibs`.  Because the number of
+    frames of each type is not known in advance, the masters are built
+    when the first science or standard frame of the group arrives, or
+    ``calib_wait`` seconds after the last calibration frame of the group
+    was read, whichever comes first.  Calibration frames that arrive
+    after the masters are built are not used; re-run ``run_pypeit`` on
+    the PypeIt file to include them.
+
+    Args:
+        spectrograph (:obj:`str`):
+            Name of the spectrograph.
+        raw_path (:obj:`str`):
+            Directory with the raw frames.
+        redux_path (:obj:`str`, optional):
+            Top-level directory for the outputs.  If None, set to the
+            current working directory.
+        cfg_lines (:obj:`list`, optional):
+            User-level configuration lines added to each PypeIt file.
+        extension (:obj:`str`, optional):
+            File extension of the raw frames.  Gzipped frames are also
+            included.
+        settle (:obj:`float`, optional):
+            Seconds a new file must remain unmodified before it is read,
+            so that frames still being written are not read.
+        calib_wait (:obj:`float`, optional):
+            Seconds to wait after the last calibration frame of a
+            complete calibration group is read before building its
+            masters, if no science or standard frame of the group has
+            arrived.
+
+    Attributes:
+        fitstbl (:class:`pypeit.metadata.PypeItMetaData`):
+            Metadata for all typed frames read so far.  None until at
+            least one frame has been assigned a configuration.
+        pypeits (:obj:`dict`):
+            The :class:`pypeit.pypeit.PypeIt` driver for each
+            configuration.
+        arrival (:obj:`dict`):
+            Time at which each frame was read, keyed by file name.
+        calibrated (:obj:`dict`):
+            Status of the masters of each calibration group, ``'ok'`` or
+            ``'failed'``, and the time at which they were built.
+        reduced (:obj:`dict`):
+            Status of each reduced science or standard exposure, keyed by
+            the file name of its first frame: ``'ok'``, ``'exists'`` (for
+            outputs found on disk), or ``'failed'``.
+        missing (:obj:`dict`):
+            Frame types missing from each calibration group.
+        late_calibs (:obj:`list`):
+            Calibration frames that arrived after the masters of their
+            group were built.
+    """
+    def __init__(self, spectrograph, raw_path, redux_path=None, cfg_lines=None,
+                 extension='.fits', settle=10., calib_wait=300.):
+        self.spectrograph = load_spectrograph(spectrograph)
+        self.raw_path = raw_path
+        self.redux_path = os.getcwd() if redux_path is None else redux_path
+        self.extension = extension
+        self.settle = settle
+        self.calib_wait = calib_wait
+
+        # Merge the user configuration lines with the spectrograph name
+        cfg = ConfigObj(['[rdx]', 'spectrograph = {0}'.format(spectrograph)])
+        if cfg_lines is not None:
+            cfg.merge(ConfigObj(cfg_lines))
+        self.cfg_lines = cfg.write()
+        self.par = PypeItPar.from_cfg_lines(
+                        cfg_lines=self.spectrograph.default_pypeit_par().to_config(),
+                        merge_with=self.cfg_lines)
+
+        # Header metadata of all frames read so far, in the order they
+        # were read
+        self.metadata = None
+        self.fitstbl = None
+        self.pypeits = {}
+        self.arrival = {}
+        self.calibrated = {}
+        self.reduced = {}
+        self.late_calibs = []
+        self.missing = {}
+
+    def is_raw(self, filename):
+        """
+        Check if a file name has the extension of the raw frames.
+        """
+        return filename.endswith(self.extension) or filename.endswith(self.extension + '.gz')
+
+    def scan(self):
+        """
+        Find the new frames in the raw directory.
+
+        Returns:
+            :obj:`list`: Full paths to the frames that have not been read
+            and have not been modified for at least :attr:`settle`
+            seconds, ordered by modification time.
+        """
+        now = time.time()
+        new = []
+        for f in os.listdir(self.raw_path):
+            if f in self.arrival or not self.is_raw(f):
+                continue
+            _f = os.path.join(self.raw_path, f)
+            try:
+                mtime = os.path.getmtime(_f)
+            except OSError:
+                # File was removed
+                continue
+            if now - mtime < self.settle:
+                # Still being written
+                continue
+            new += [(mtime, _f)]
+        return [f for mtime, f in sorted(new)]
+
+    def classify(self, files):
+        """
+        Read the headers of new frames, then type and group all frames.
+
+        Frames that cannot be typed are not included in
+        :attr:`fitstbl`.
+
+        Args:
+            files (:obj:`list`):
+                Full paths to the new frames.
+        """
+        meta = PypeItMetaData(self.spectrograph, self.par, files=files, strict=False)
+        now = time.time()
+        for f in meta['filename']:
+            self.arrival[f] = now
+        if self.metadata is None:
+            self.metadata = {k: [] for k in meta.keys()}
+        for k in self.metadata.keys():
+            self.metadata[k] += meta[k].tolist()
+
+        fitstbl = PypeItMetaData(self.spectrograph, self.par, data=self.metadata)
+        fitstbl.get_frame_types(flag_unknown=True)
+        fitstbl.table = fitstbl.table[fitstbl['framebit'] > 0]
+        ignore_frames = ['bias', 'dark']
+        if not np.any(np.invert(np.any([fitstbl.find_frames(ftype) for ftype in ignore_frames],
+                                       axis=0))):
+            msgs.info('No frames to use to define the configurations yet.')
+            return
+        cfgs = fitstbl.unique_configurations(ignore_frames=ignore_frames)
+        fitstbl.set_configurations(cfgs, ignore_frames=ignore_frames)
+        fitstbl.set_calibration_groups(global_frames=ignore_frames)
+        fitstbl.set_combination_groups()
+        self.fitstbl = fitstbl
+
+        # Keep the PypeIt files up to date
+        for setup in np.unique(self.fitstbl['setup']):
+            if setup == 'None':
+                continue
+            pypeit_file = self.fitstbl.write_pypeit(os.path.join(self.redux_path, 'pypeit'),
+                                                    cfg_lines=self.cfg_lines,
+                                                    write_bkg_pairs=True, configs=[setup])[0]
+            if setup not in self.pypeits.keys():
+                self.pypeits[setup] = pypeit.PypeIt(pypeit_file, reuse_masters=True,
+                                                    overwrite=False, calib_only=True,
+                                                    redux_path=os.path.dirname(pypeit_file))
+            self.pypeits[setup].fitstbl = self.fitstbl
+
+    def update(self, flush=False):
+        """
+        Read any new frames, then build the masters and reduce the
+        exposures that are ready.
+
+        Args:
+            flush (:obj:`bool`, optional):
+                Do not wait for more calibration frames before building
+                the masters of the complete calibration groups.
+
+        Returns:
+            :obj:`int`: The number of new frames.
+        """
+        files = self.scan()
+        if len(files) > 0:
+            msgs.info('Found {0} new frame(s) in {1}'.format(len(files), self.raw_path))
+            self.classify(files)
+        if self.fitstbl is None:
+            return len(files)
+        for i in range(self.fitstbl.n_calib_groups):
+            if self.build_masters(i, flush=flush):
+                self.reduce_group(i)
+        return len(files)
+
+    def build_masters(self, calib_ID, flush=False):
+        """
+        Build the masters of a calibration group if the group is
+        complete.
+
+        Args:
+            calib_ID (:obj:`int`):
+                Calibration group.
+            flush (:obj:`bool`, optional):
+                Do not wait for more calibration frames.
+
+        Returns:
+            :obj:`bool`: Flag that the masters are ready.
+        """
+        is_object = self.fitstbl.find_frames('science') | self.fitstbl.find_frames('standard')
+        in_grp = self.fitstbl.find_calib_group(calib_ID)
+        calib_files = self.fitstbl['filename'][in_grp & np.invert(is_object)]
+        if calib_ID in self.calibrated.keys():
+            status, built = self.calibrated[calib_ID]
+            # Report calibration frames that arrived too late
+            for f in calib_files:
+                if self.arrival[f] > built and f not in self.late_calibs:
+                    msgs.warn('{0} arrived after the masters of calibration group {1} were '
+                              'built and is not used.'.format(f, calib_ID))
+                    self.late_calibs += [f]
+            return status == 'ok'
+
+        arcs = self.fitstbl.find_frames('arc', calib_ID=calib_ID, index=True)
+        if len(arcs) == 0:
+            return False
+        pypeIt = self.pypeits[self.fitstbl['setup'][arcs[0]]]
+        missing = calibrations.missing_calibs(pypeIt.par, self.fitstbl, calib_ID)
+        if missing != self.missing.get(calib_ID):
+            if len(missing) > 0:
+                msgs.info('Calibration group {0} is missing frames of type: {1}'.format(
+                            calib_ID, ', '.join(missing)))
+            self.missing[calib_ID] = missing
+        if len(missing) > 0:
+            return False
+
+        # Wait for more calibration frames?
+        last = np.amax([self.arrival[f] for f in calib_files])
+        if not flush and not np.any(in_grp & is_object) \
+                and time.time() - last < self.calib_wait:
+            return False
+
+        msgs.info('Building the masters for calibration group {0}'.format(calib_ID))
+        try:
+            pypeIt.calib_one(arcs[0])
+        except Exception as e:
+            # Keep watching for the other groups
+            msgs.warn('Could not build the masters for calibration group {0}: {1}'.format(
+                        calib_ID, e))
+            self.calibrated[calib_ID] = ('failed', time.time())
+            return False
+        self.calibrated[calib_ID] = ('ok', time.time())
+        return True
+
+    def reduce_group(self, calib_ID):
+        """
+        Reduce the standard and science exposures of a calibration group
+        that have not been reduced yet.
+
+        The standards are reduced first, and the first reduced standard
+        of the group is used for the science frames.
+
+        Args:
+            calib_ID (:obj:`int`):
+                Calibration group.
+        """
+        pypeIt = self.pypeits[self.fitstbl['setup'][
+                                    self.fitstbl.find_frames('arc', calib_ID=calib_ID, index=True)[0]]]
+        standards = self.fitstbl.find_frames('standard', calib_ID=calib_ID, index=True)
+        for ftype in ['standard', 'science']:
+            std_outfile = None if ftype == 'standard' else pypeIt.get_std_outfile(
+                    [s for s in standards if os.path.isfile(pypeIt.spec_output_file(s))])
+            grp_frames = self.fitstbl.find_frames(ftype, calib_ID=calib_ID, index=True)
+            for comb_id in np.unique(self.fitstbl['comb_id'][grp_frames]):
+                frames = np.where(self.fitstbl['comb_id'] == comb_id)[0]
+                filename = self.fitstbl['filename'][frames[0]]
+                if filename in self.reduced.keys():
+                    continue
+                if pypeIt.outfile_exists(frames[0]):
+                    msgs.info('Output file for {0} already exists.'.format(filename))
+                    self.reduced[filename] = 'exists'
+                    continue
+                bg_frames = np.where((self.fitstbl['comb_id'] == self.fitstbl['bkg_id'][frames][0])
+                                     & (self.fitstbl['comb_id'] >= 0))[0]
+                try:
+                    spec2d, sobjs = pypeIt.reduce_exposure(frames, bg_frames=bg_frames,
+                                                           std_outfile=std_outfile)
+                    pypeIt.save_exposure(frames[0], spec2d, sobjs, pypeIt.basename)
+                except Exception as e:
+                    # Keep watching for the other frames
+                    msgs.warn('Could not reduce {0}: {1}'.format(filename, e))
+                    self.reduced[filename] = 'failed'
+                    continue
+                self.reduced[filename] = 'ok'
+                msgs.info('Reduced {0} {1:.1f} s after it was read.'.format(
+                            filename, time.time() - self.arrival[filename]))
+
+    def run(self, poll=30., max_idle=None):
+        """
+        Watch the raw directory until no new frames have arrived for
+        ``max_idle`` seconds.
+
+        Args:
+            poll (:obj:`float`, optional):
+                Seconds between checks for new frames.
+            max_idle (:obj:`float`, optional):
+                Stop after this many seconds without new frames.  If
+                None, watch until interrupted.
+        """
+        msgs.info('Watching {0} for new frames'.format(self.raw_path))
+        last_new = time.time()
+        try:
+            while max_idle is None or time.time() - last_new < max_idle:
+                if self.update() > 0:
+                    last_new = time.time()
+                time.sleep(poll)
+        except KeyboardInterrupt:
+            msgs.info('Interrupted')
+        # Build the masters of any complete group that was still waiting
+        # for calibration frames
+        self.update(flush=True)
+        self.report()
+
+    def report(self):
+        """
+        Report the status of the reduced exposures.
+        """
+        msg = 'Incremental reduction of {0}'.format(self.raw_path)
+        for status in ['ok', 'exists', 'failed']:
+            files = [f for f, s in self.reduced.items() if s == status]
+            msg += msgs.newline() + '    {0:<7} {1:3d} {2}'.format(status, len(files),
+                                                                  ', '.join(files))
+        msgs.info(msg)
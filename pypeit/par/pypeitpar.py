@@ -188,7 +188,7 @@ class ProcessImagesPar(ParSet):
                  rmcompact=None, sigclip=None, sigfrac=None, objlim=None,
                  use_biasimage=None, use_overscan=None, use_darkimage=None,
                  use_pixelflat=None, use_illumflat=None,
-                 spat_flexure_correct=None):
+                 spat_flexure_correct=None, float_dtype=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -259,6 +259,18 @@ class ProcessImagesPar(ParSet):
         dtypes['spat_flexure_correct'] = bool
         descr['spat_flexure_correct'] = 'Correct slits, illumination flat, etc. for flexure'
 
+        # Precision
+        defaults['float_dtype'] = 'float64'
+        options['float_dtype'] = ProcessImagesPar.valid_float_dtypes()
+        dtypes['float_dtype'] = str
+        descr['float_dtype'] = 'Floating-point type used to store the processed images (image, ' \
+                               'inverse variance, read-noise, and, for science frames, the ' \
+                               'sky, object and inverse-variance models of the reduction).  ' \
+                               'float32 halves the memory and disk footprint of these images ' \
+                               'at the cost of a relative precision of ~1e-7; the processing ' \
+                               'arithmetic and the tilts and wavelength images are always ' \
+                               'float64.  Options are: {0}'.format(', '.join(options['float_dtype']))
+
 
         defaults['combine'] = 'weightmean'
         options['combine'] = ProcessImagesPar.valid_combine_methods()
@@ -341,7 +353,7 @@ class ProcessImagesPar(ParSet):
                    'spat_flexure_correct', 'use_illumflat', 'use_pixelflat',
                    'combine', 'satpix', 'sigrej', 'n_lohi', 'mask_cr',
                    'sig_lohi', 'replace', 'lamaxiter', 'grow',
-            'rmcompact', 'sigclip', 'sigfrac', 'objlim']
+            'rmcompact', 'sigclip', 'sigfrac', 'objlim', 'float_dtype']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -373,6 +385,13 @@ class ProcessImagesPar(ParSet):
         """
         return [ 'reject', 'force', 'nothing' ]
 
+    @staticmethod
+    def valid_float_dtypes():
+        """
+        Return the valid floating-point types for the processed images.
+        """
+        return [ 'float64', 'float32' ]
+
     @staticmethod
     def valid_rejection_replacements():
         """
@@ -464,7 +483,8 @@ class FlatFieldPar(ParSet):
     def __init__(self, method=None, pixelflat_file=None, spec_samp_fine=None,
                  spec_samp_coarse=None, spat_samp=None, tweak_slits=None, tweak_slits_thresh=None,
                  tweak_slits_maxfrac=None, rej_sticky=None, slit_trim=None, slit_illum_pad=None,
-                 illum_iter=None, illum_rej=None, twod_fit_npoly=None, saturated_slits=None):
+                 illum_iter=None, illum_rej=None, twod_fit_npoly=None, saturated_slits=None,
+                 n_proc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -576,6 +596,12 @@ class FlatFieldPar(ParSet):
                                    'extracted from the slit; \'continue\' - ignore the ' \
                                    'flat-field correction, but continue with the reduction.'
 
+        defaults['n_proc'] = 1
+        dtypes['n_proc'] = int
+        descr['n_proc'] = 'Number of processes used to model the flat-field response of the ' \
+                          'slits concurrently.  The results do not depend on the number of ' \
+                          'processes.  Use -1 to use all available CPUs.'
+
         # Instantiate the parameter set
         super(FlatFieldPar, self).__init__(list(pars.keys()),
                                            values=list(pars.values()),
@@ -593,7 +619,7 @@ class FlatFieldPar(ParSet):
         parkeys = ['method', 'pixelflat_file', 'spec_samp_fine', 'spec_samp_coarse',
                    'spat_samp', 'tweak_slits', 'tweak_slits_thresh', 'tweak_slits_maxfrac',
                    'rej_sticky', 'slit_trim', 'slit_illum_pad', 'illum_iter', 'illum_rej',
-                   'twod_fit_npoly', 'saturated_slits']
+                   'twod_fit_npoly', 'saturated_slits', 'n_proc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -655,7 +681,7 @@ class FlexurePar(ParSet):
     For a table with the current keywords, defaults, and descriptions,
     see :ref:`pypeitpar`.
     """
-    def __init__(self, spec_method=None, spec_maxshift=None, spectrum=None):
+    def __init__(self, spec_method=None, spec_maxshift=None, spectrum=None, spec_smooth_bin=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -688,6 +714,16 @@ class FlexurePar(ParSet):
         dtypes['spectrum'] = str
         descr['spectrum'] = 'Archive sky spectrum to be used for the flexure correction.'
 
+        defaults['spec_smooth_bin'] = 0
+        dtypes['spec_smooth_bin'] = [int, float]
+        descr['spec_smooth_bin'] = 'Width, in pixels, of the bins in the Gaussian kernel used to ' \
+                                   'match the resolution of the archive sky spectrum to each ' \
+                                   'object.  Objects whose kernel falls in the same bin share ' \
+                                   'one smoothed archive spectrum, at the cost of slightly ' \
+                                   'changing the measured shifts (e.g., 0.25).  The default (0) ' \
+                                   'smooths the archive spectrum with the exact kernel of each ' \
+                                   'object.'
+
         # Instantiate the parameter set
         super(FlexurePar, self).__init__(list(pars.keys()),
                                          values=list(pars.values()),
@@ -700,7 +736,7 @@ class FlexurePar(ParSet):
     @classmethod
     def from_dict(cls, cfg):
         k = numpy.array([*cfg.keys()])
-        parkeys = ['spec_method', 'spec_maxshift', 'spectrum']
+        parkeys = ['spec_method', 'spec_maxshift', 'spectrum', 'spec_smooth_bin']
 #                   'spat_frametypes']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
@@ -818,7 +854,7 @@ class Coadd1DPar(ParSet):
                  sn_smooth_npix=None, wave_method=None, samp_fact=None, ref_percentile=None, maxiter_scale=None,
                  sigrej_scale=None, scale_method=None, sn_min_medscale=None, sn_min_polyscale=None, maxiter_reject=None,
                  lower=None, upper=None, maxrej=None, sn_clip=None, nbest=None, sensfuncfile=None, coaddfile=None,
-                 mag_type=None, filter=None, filter_mag=None, filter_mask=None):
+                 mag_type=None, filter=None, filter_mag=None, filter_mask=None, n_proc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -971,6 +1007,12 @@ class Coadd1DPar(ParSet):
         dtypes['coaddfile'] = str
         descr['coaddfile'] = 'Output filename'
 
+        defaults['n_proc'] = 1
+        dtypes['n_proc'] = int
+        descr['n_proc'] = 'Number of processes used to coadd and write the spectra of different ' \
+                          'objects concurrently when coadding many objects at once.  Use -1 to ' \
+                          'use all available CPUs.'
+
         # Instantiate the parameter set
         super(Coadd1DPar, self).__init__(list(pars.keys()),
                                          values=list(pars.values()),
@@ -986,7 +1028,7 @@ class Coadd1DPar(ParSet):
                    'samp_fact', 'ref_percentile', 'maxiter_scale', 'sigrej_scale', 'scale_method',
                    'sn_min_medscale', 'sn_min_polyscale', 'maxiter_reject', 'lower', 'upper',
                    'maxrej', 'sn_clip', 'nbest', 'sensfuncfile', 'coaddfile',
-                   'filter', 'mag_type', 'filter_mag', 'filter_mask']
+                   'filter', 'mag_type', 'filter_mag', 'filter_mask', 'n_proc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1080,7 +1122,7 @@ class CubePar(ParSet):
     """
 
     def __init__(self, slit_spec=None, cube_spat_num=None, cube_wave_num=None,
-                 cube_wave_min=None, cube_wave_max=None):
+                 cube_wave_min=None, cube_wave_max=None, slice_width=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1125,6 +1167,10 @@ class CubePar(ParSet):
         descr['cube_wave_max'] = 'Maximum wavelength to use. If None, default is maximum wavelength' \
                                  'based on wavelength solution of all spaxels'
 
+        defaults['slice_width'] = None
+        dtypes['slice_width'] = [int, float]
+        descr['slice_width'] = 'Width of each slice on the sky in arcsec.  This is required ' \
+                               'to resample slit-based IFU data onto a cube.'
 
         # Instantiate the parameter set
         super(CubePar, self).__init__(list(pars.keys()),
@@ -1140,7 +1186,8 @@ class CubePar(ParSet):
         k = numpy.array([*cfg.keys()])
 
         # Basic keywords
-        parkeys = ['slit_spec', 'cube_spat_num', 'cube_wave_num', 'cube_wave_min', 'cube_wave_max']
+        parkeys = ['slit_spec', 'cube_spat_num', 'cube_wave_num', 'cube_wave_min', 'cube_wave_max',
+                   'slice_width']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1163,7 +1210,7 @@ class FluxCalibratePar(ParSet):
     For a table with the current keywords, defaults, and descriptions,
     see :ref:`pypeitpar`.
     """
-    def __init__(self, extinct_correct=None, extrap_sens=None):
+    def __init__(self, extinct_correct=None, extrap_sens=None, n_proc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1186,6 +1233,11 @@ class FluxCalibratePar(ParSet):
                                    'extinction correct the data below 10000A. Note that this correction makes no ' \
                                    'sense if one is telluric correcting and this shold be set to False'
 
+        defaults['n_proc'] = 1
+        dtypes['n_proc'] = int
+        descr['n_proc'] = 'Number of processes used to flux calibrate and write the spec1d ' \
+                          'files concurrently.  Use -1 to use all available CPUs.'
+
         # Instantiate the parameter set
         super(FluxCalibratePar, self).__init__(list(pars.keys()),
                                                  values=list(pars.values()),
@@ -1197,7 +1249,7 @@ class FluxCalibratePar(ParSet):
     @classmethod
     def from_dict(cls, cfg):
         k = numpy.array([*cfg.keys()])
-        parkeys = ['extinct_correct', 'extrap_sens']
+        parkeys = ['extinct_correct', 'extrap_sens', 'n_proc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1459,7 +1511,7 @@ class TelluricPar(ParSet):
 
     def __init__(self, telgridfile=None, sn_clip=None, resln_guess=None, resln_frac_bounds=None, pix_shift_bounds=None, maxiter=None,
                  sticky=None, lower=None, upper=None, seed=None, tol=None, popsize=None, recombination=None, polish=None,
-                 disp=None):
+                 disp=None, grid_interp=None, vectorized=None, workers=None, n_proc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -1469,6 +1521,7 @@ class TelluricPar(ParSet):
         # Initialize the other used specifications for this parameter
         # set
         defaults = OrderedDict.fromkeys(pars.keys())
+        options = OrderedDict.fromkeys(pars.keys())
         dtypes = OrderedDict.fromkeys(pars.keys())
         descr = OrderedDict.fromkeys(pars.keys())
 
@@ -1597,10 +1650,39 @@ class TelluricPar(ParSet):
                         'screen indicating the status of the optimization. See documentation for telluric.Telluric ' \
                         'for a description of the output and how to know if things are working well.'
 
+        defaults['grid_interp'] = 'nearest'
+        options['grid_interp'] = TelluricPar.valid_grid_interp()
+        dtypes['grid_interp'] = str
+        descr['grid_interp'] = 'Method used to interpolate the telluric model grid in (pressure, temperature, ' \
+                               'humidity, airmass). Use nearest for a nearest gridpoint lookup, or linear for ' \
+                               'multilinear interpolation, which gives a smooth loss function and typically ' \
+                               'converges in fewer evaluations.  Options are: {0}'.format(
+                                    ', '.join(options['grid_interp']))
+
+        defaults['vectorized'] = False
+        dtypes['vectorized'] = bool
+        descr['vectorized'] = 'If True, the differential evolution population is evaluated with a single ' \
+                              'vectorized call for each generation, including a batched FFT convolution of the ' \
+                              'telluric models.  This is much faster than evaluating each member separately but ' \
+                              'requires scipy>=1.9.'
+
+        defaults['workers'] = 1
+        dtypes['workers'] = int
+        descr['workers'] = 'Number of processes used to evaluate the differential evolution population in ' \
+                           'parallel if vectorized is False.  Use -1 to use all available CPUs.  Ignored ' \
+                           'if the orders are fit concurrently (see n_proc).'
+
+        defaults['n_proc'] = 1
+        dtypes['n_proc'] = int
+        descr['n_proc'] = 'Number of processes used to fit the orders (or slits) concurrently.  Each order is ' \
+                          'fit with its own seed, such that the results do not depend on the number of ' \
+                          'processes.  Use -1 to use all available CPUs.'
+
         # Instantiate the parameter set
         super(TelluricPar, self).__init__(list(pars.keys()),
                                           values=list(pars.values()),
                                           defaults=list(defaults.values()),
+                                          options=list(options.values()),
                                           dtypes=list(dtypes.values()),
                                           descr=list(descr.values()))
         self.validate()
@@ -1610,7 +1692,8 @@ class TelluricPar(ParSet):
         k = numpy.array([*cfg.keys()])
         parkeys = ['telgridfile', 'sn_clip', 'resln_guess', 'resln_frac_bounds',
                    'pix_shift_bounds', 'maxiter', 'sticky', 'lower', 'upper', 'seed', 'tol',
-                   'popsize', 'recombination', 'polish', 'disp']
+                   'popsize', 'recombination', 'polish', 'disp', 'grid_interp', 'vectorized', 'workers',
+                   'n_proc']
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
@@ -1621,6 +1704,13 @@ class TelluricPar(ParSet):
             kwargs[pk] = cfg[pk] if pk in k else None
         return cls(**kwargs)
 
+    @staticmethod
+    def valid_grid_interp():
+        """
+        Return the valid methods for interpolating the telluric grid.
+        """
+        return ['nearest', 'linear']
+
     def validate(self):
         """
         Check the parameters are valid for the provided method.
@@ -2744,7 +2834,7 @@ class WaveTiltsPar(ParSet):
     def __init__(self, idsonly=None, tracethresh=None, sig_neigh=None, nfwhm_neigh=None,
                  maxdev_tracefit=None, sigrej_trace=None, spat_order=None, spec_order=None,
                  func2d=None, maxdev2d=None, sigrej2d=None, rm_continuum=None, cont_rej=None,
-                 minmax_extrap=None):
+                 minmax_extrap=None, n_proc=None):
 
         # Grab the parameter names and values from the function
         # arguments
@@ -2873,6 +2963,12 @@ class WaveTiltsPar(ParSet):
         #dtypes['params'] = [ int, list ]
         #descr['params'] = 'Parameters to use for the provided method.  TODO: Need more explanation'
 
+        defaults['n_proc'] = 1
+        dtypes['n_proc'] = int
+        descr['n_proc'] = 'Number of processes used to trace and fit the tilts of the slits ' \
+                          'concurrently.  The results do not depend on the number of ' \
+                          'processes.  Use -1 to use all available CPUs.'
+
         # Instantiate the parameter set
         super(WaveTiltsPar, self).__init__(list(pars.keys()),
                                            values=list(pars.values()),
@@ -2887,7 +2983,7 @@ class WaveTiltsPar(ParSet):
         k = numpy.array([*cfg.keys()])
         parkeys = ['idsonly', 'tracethresh', 'sig_neigh', 'maxdev_tracefit', 'sigrej_trace',
                    'nfwhm_neigh', 'spat_order', 'spec_order', 'func2d', 'maxdev2d', 'sigrej2d',
-                   'rm_continuum', 'cont_rej', 'minmax_extrap'] #'cont_function', 'cont_order',
+                   'rm_continuum', 'cont_rej', 'minmax_extrap', 'n_proc'] #'cont_function', 'cont_order',
 
         badkeys = numpy.array([pk not in parkeys for pk in k])
         if numpy.any(badkeys):
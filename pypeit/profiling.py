@@ -0,0 +1,254 @@
+"""
+Stage-level timing and memory profiling of the reduction.
+
+The module-level :data:`profiler` is disabled by default, such that the
+:func:`StageProfiler.stage` context manager placed around each stage of
+the reduction (each calibration step, the processing of the science
+frames, object finding, sky subtraction, extraction, flexure, and
+writing the outputs) costs nothing.  Once enabled (e.g., with
+``run_pypeit --profile``), each stage records its wall-clock and CPU
+time and the peak resident set size (RSS) of the process, along with
+the frame and detector being reduced.  The records can be written to a
+JSON or CSV file with :func:`StageProfiler.write`, and each stage can
+also be run under `cProfile`_, with one dump per stage.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import os
+import sys
+import csv
+import json
+import time
+import cProfile
+
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+from IPython import embed
+
+from pypeit import msgs
+
+
+def peak_rss():
+    """
+    Return the peak resident set size of the process in MB.
+
+    Returns:
+        :obj:`float`: The peak RSS, or None if it cannot be determined
+        on this platform.
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return maxrss / 1024**2 if sys.platform == 'darwin' else maxrss / 1024
+
+
+class StageProfiler(object):
+    """
+    Record the time and memory used by each stage of the reduction.
+
+    Stages can be nested, in which case they are identified by their
+    full path (e.g., ``calibrations/arc``).  When run under `cProfile`_,
+    the dump for a stage excludes the nested stages, which have their
+    own.
+
+    Attributes:
+        enabled (:obj:`bool`):
+            Flag that the stages are recorded.
+        cprofile_dir (:obj:`str`):
+            Directory for the `cProfile`_ dumps.  If None, the stages
+            are not run under `cProfile`_.
+        records (:obj:`list`):
+            One dictionary per completed stage; see :attr:`columns`.
+        context (:obj:`dict`):
+            The frame and detector being reduced; see
+            :func:`set_context`.
+    """
+    columns = ['frame', 'det', 'stage', 'start', 'wall', 'cpu', 'max_rss', 'rss_increase']
+    """
+    Items in each record.  ``start`` is the time in seconds since the
+    profiler was enabled, ``wall`` and ``cpu`` are the wall-clock and CPU
+    time in seconds, ``max_rss`` is the peak RSS of the process in MB at
+    the end of the stage, and ``rss_increase`` is the increase of the
+    peak RSS during the stage.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.cprofile_dir = None
+        self.records = []
+        self.context = dict(frame=None, det=None)
+        self._stack = []
+        self._tstart = None
+
+    def enable(self, cprofile_dir=None):
+        """
+        Start recording the stages.
+
+        Args:
+            cprofile_dir (:obj:`str`, optional):
+                Run each stage under `cProfile`_ and write the dumps to
+                this directory.
+        """
+        self.enabled = True
+        self.cprofile_dir = cprofile_dir
+        if self.cprofile_dir is not None and not os.path.isdir(self.cprofile_dir):
+            os.makedirs(self.cprofile_dir)
+        self.reset()
+
+    def disable(self):
+        """
+        Stop recording the stages.
+        """
+        self.enabled = False
+        self.cprofile_dir = None
+
+    def reset(self):
+        """
+        Remove all records.
+        """
+        self.records = []
+        self.set_context()
+        self._tstart = time.perf_counter()
+
+    def set_context(self, frame=None, det=None):
+        """
+        Set the frame and detector included in the following records.
+
+        Args:
+            frame (:obj:`str`, optional):
+                Name of the frame being reduced.
+            det (:obj:`int`, optional):
+                Detector being reduced.
+        """
+        self.context = dict(frame=None if frame is None else str(frame),
+                            det=None if det is None else int(det))
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager that records a stage of the reduction.
+
+        Args:
+            name (:obj:`str`):
+                Name of the stage.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        # Suspend the profile of the enclosing stage
+        outer = self._stack[-1][1] if len(self._stack) > 0 else None
+        if outer is not None:
+            outer.disable()
+        prof = None if self.cprofile_dir is None else cProfile.Profile()
+        self._stack.append((name, prof))
+        path = '/'.join([s[0] for s in self._stack])
+
+        rss = peak_rss()
+        cpu = time.process_time()
+        t = time.perf_counter()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+            record = dict(self.context, stage=path, start=t - self._tstart,
+                          wall=time.perf_counter() - t, cpu=time.process_time() - cpu,
+                          max_rss=peak_rss())
+            record['rss_increase'] = None if rss is None else record['max_rss'] - rss
+            if prof is not None:
+                prof.dump_stats(self.cprofile_file(len(self.records), record))
+            self.records += [record]
+            self._stack.pop()
+            if outer is not None:
+                outer.enable()
+
+    def cprofile_file(self, index, record):
+        """
+        Return the name of the `cProfile`_ dump for a record.
+
+        Args:
+            index (:obj:`int`):
+                Index of the record.
+            record (:obj:`dict`):
+                The record.
+
+        Returns:
+            :obj:`str`: The file name.
+        """
+        root = '_'.join(['{0:04d}'.format(index)]
+                        + ([] if record['frame'] is None else [record['frame']])
+                        + ([] if record['det'] is None else ['det{0:02d}'.format(record['det'])])
+                        + [record['stage'].replace('/', '-')])
+        return os.path.join(self.cprofile_dir, '{0}.prof'.format(root))
+
+    def summary(self):
+        """
+        Return the number of calls, the total wall-clock and CPU time,
+        and the maximum peak RSS of each stage.
+
+        Returns:
+            :obj:`dict`: Dictionary with the summary of each stage, in
+            the order in which they were first completed.
+        """
+        summary = {}
+        for record in self.records:
+            if record['stage'] not in summary.keys():
+                summary[record['stage']] = dict(calls=0, wall=0., cpu=0., max_rss=None)
+            s = summary[record['stage']]
+            s['calls'] += 1
+            s['wall'] += record['wall']
+            s['cpu'] += record['cpu']
+            if record['max_rss'] is not None:
+                s['max_rss'] = record['max_rss'] if s['max_rss'] is None \
+                                    else max(s['max_rss'], record['max_rss'])
+        return summary
+
+    def report(self):
+        """
+        Print the summary of each stage.
+        """
+        msg = 'Time and memory used by each stage' + msgs.newline() \
+                + '    {0:<32} {1:>5} {2:>9} {3:>9} {4:>9}'.format('Stage', 'Calls', 'Wall (s)',
+                                                                  'CPU (s)', 'RSS (MB)')
+        for stage, s in self.summary().items():
+            msg += msgs.newline() + '    {0:<32} {1:5d} {2:9.2f} {3:9.2f} {4:>9}'.format(
+                        stage, s['calls'], s['wall'], s['cpu'],
+                        'None' if s['max_rss'] is None else '{0:.1f}'.format(s['max_rss']))
+        msgs.info(msg)
+
+    def write(self, ofile):
+        """
+        Write the records to a file.
+
+        Args:
+            ofile (:obj:`str`):
+                Output file name.  The format is set by the extension,
+                which must be ``.json`` or ``.csv``.
+        """
+        ext = os.path.splitext(ofile)[1]
+        if ext == '.json':
+            with open(ofile, 'w') as f:
+                json.dump(self.records, f, indent=1)
+        elif ext == '.csv':
+            with open(ofile, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.columns)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            msgs.error('Profile file must have a .json or .csv extension: {0}'.format(ofile))
+        msgs.info('Profile written to {0}'.format(ofile))
+
+
+profiler = StageProfiler()
+"""Profiler used by all stages of the reduction."""
@@ -24,6 +24,8 @@ from configobj import ConfigObj
 from pypeit.par.util import parse_pypeit_file
 from pypeit.par import PypeItPar
 from pypeit.metadata import PypeItMetaData
+from pypeit.profiling import profiler
+from pypeit.images.framecache import frame_cache
 
 from IPython import embed
 
@@ -59,6 +61,17 @@ class PypeIt(object):
             Over-ride reduction path in PypeIt file (e.g. Notebook usage)
         calib_only: (:obj:`bool`, optional):
             Only generate the calibration files that you can
+        profile (:obj:`bool`, optional):
+            Record the time and memory used by each stage of the
+            reduction and write them to the QA directory; see
+            :mod:`pypeit.profiling`.
+        cprofile (:obj:`bool`, optional):
+            Also run each stage under cProfile, writing one dump per
+            stage to the ``cProfile`` directory in the QA directory.
+        proc_cache (:obj:`str`, optional):
+            Directory with a cache of the processed raw frames, reused
+            by later runs with the same processing parameters and
+            master calibrations; see :mod:`pypeit.images.framecache`.
 
     Attributes:
         pypeit_file (:obj:`str`):
@@ -71,7 +84,8 @@ class PypeIt(object):
 #    __metaclass__ = ABCMeta
 
     def __init__(self, pypeit_file, verbosity=2, overwrite=True, reuse_masters=False, logname=None,
-                 show=False, redux_path=None, calib_only=False):
+                 show=False, redux_path=None, calib_only=False, profile=False, cprofile=False,
+                 proc_cache=None):
 
         # Load
         cfg_lines, data_files, frametype, usrdata, setups \
@@ -141,6 +155,15 @@ class PypeIt(object):
         # Set paths
         self.calibrations_path = os.path.join(self.par['rdx']['redux_path'], self.par['calibrations']['master_dir'])
 
+        # Profile the reduction stages?
+        if profile or cprofile:
+            profiler.enable(cprofile_dir=os.path.join(self.qa_path, 'cProfile')
+                                            if cprofile else None)
+
+        # Cache the processed raw frames?
+        if proc_cache is not None:
+            frame_cache.enable(proc_cache)
+
         # Check for calibrations
         if not self.calib_only:
             calibrations.check_for_calibs(self.par, self.fitstbl,
@@ -181,6 +204,9 @@ class PypeIt(object):
         # TODO: I don't think this ever used
 
         self.det = None
+        # Calibration products shared by all the frames (and detectors)
+        # of a calibration group
+        self.calib_cache = calibrations.CalibrationCache()
 
         self.tstart = None
         self.basename = None
@@ -277,23 +303,39 @@ class PypeIt(object):
             # Find all the frames in this calibration group
             in_grp = self.fitstbl.find_calib_group(i)
             grp_frames = frame_indx[in_grp]
-
-            # Find the detectors to reduce
-            detectors = PypeIt.select_detectors(detnum=self.par['rdx']['detnum'],
-                                            ndet=self.spectrograph.ndet)
-            # Loop on Detectors
-            for self.det in detectors:
-                # Instantiate Calibrations class
-                self.caliBrate = calibrations.Calibrations.get_instance(
-                    self.fitstbl, self.par['calibrations'], self.spectrograph,
-                    self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
-                    show=self.show, slitspat_num=self.par['rdx']['slitspatnum'])
-                # Do it
-                self.caliBrate.set_config(grp_frames[0], self.det, self.par['calibrations'])
-                self.caliBrate.run_the_steps()
+            self.calib_one(grp_frames[0])
 
         # Finish
+        frame_cache.report()
         self.print_end_time()
+        self.write_profile()
+
+    def calib_one(self, frame):
+        """
+        Create the calibrations of one calibration group for all
+        detectors.
+
+        Args:
+            frame (:obj:`int`):
+                Frame index from :attr:`fitstbl` used to set the
+                configuration and calibration group.
+        """
+        # Find the detectors to reduce
+        detectors = PypeIt.select_detectors(detnum=self.par['rdx']['detnum'],
+                                            ndet=self.spectrograph.ndet)
+        # Loop on Detectors
+        for self.det in detectors:
+            profiler.set_context(frame=self.fitstbl['filename'][frame], det=self.det)
+            # Instantiate Calibrations class
+            self.caliBrate = calibrations.Calibrations.get_instance(
+                self.fitstbl, self.par['calibrations'], self.spectrograph,
+                self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
+                show=self.show, slitspat_num=self.par['rdx']['slitspatnum'],
+                cache=self.calib_cache)
+            # Do it
+            self.caliBrate.set_config(frame, self.det, self.par['calibrations'])
+            with profiler.stage('calibrations'):
+                self.caliBrate.run_the_steps()
 
     def reduce_all(self):
         """
@@ -318,6 +360,8 @@ class PypeIt(object):
 
         # Iterate over each calibration group and reduce the standards
         for i in range(self.fitstbl.n_calib_groups):
+            # Only keep the calibrations of one group in memory
+            self.calib_cache.clear()
 
             # Find all the frames in this calibration group
             in_grp = self.fitstbl.find_calib_group(i)
@@ -340,6 +384,7 @@ class PypeIt(object):
 
         # Iterate over each calibration group again and reduce the science frames
         for i in range(self.fitstbl.n_calib_groups):
+            self.calib_cache.clear()
             # Find all the frames in this calibration group
             in_grp = self.fitstbl.find_calib_group(i)
 
@@ -374,7 +419,11 @@ class PypeIt(object):
             msgs.info('Finished calibration group {0}'.format(i))
 
         # Finish
+        self.calib_cache.clear()
+        self.calib_cache.report()
+        frame_cache.report()
         self.print_end_time()
+        self.write_profile()
 
     # This is a static method to allow for use in coadding script 
     @staticmethod
@@ -474,14 +523,17 @@ class PypeIt(object):
         # TODO: Attempt to put in a multiprocessing call here?
         for self.det in detectors:
             msgs.info("Working on detector {0}".format(self.det))
+            profiler.set_context(frame=self.fitstbl['filename'][frames[0]], det=self.det)
             # Instantiate Calibrations class
             self.caliBrate = calibrations.Calibrations.get_instance(
                 self.fitstbl, self.par['calibrations'], self.spectrograph,
                 self.calibrations_path, qadir=self.qa_path, reuse_masters=self.reuse_masters,
-                show=self.show, slitspat_num=self.par['rdx']['slitspatnum'])
+                show=self.show, slitspat_num=self.par['rdx']['slitspatnum'],
+                cache=self.calib_cache)
             # These need to be separate to accomodate COADD2D
             self.caliBrate.set_config(frames[0], self.det, self.par['calibrations'])
-            self.caliBrate.run_the_steps()
+            with profiler.stage('calibrations'):
+                self.caliBrate.run_the_steps()
             # Extract
             # TODO: pass back the background frame, pass in background
             # files as an argument. extract one takes a file list as an
@@ -614,24 +666,25 @@ class PypeIt(object):
 
         # Build Science image
         sci_files = self.fitstbl.frame_paths(frames)
-        sciImg = buildimage.buildimage_fromlist(
-            self.spectrograph, det, frame_par,
-            sci_files, bias=self.caliBrate.msbias, bpm=self.caliBrate.msbpm,
-            dark=self.caliBrate.msdark,
-            flatimages=self.caliBrate.flatimages,
-            slits=self.caliBrate.slits,  # For flexure correction
-            ignore_saturation=False)
-
-        # Background Image?
-        if len(bg_frames) > 0:
-            bg_file_list = self.fitstbl.frame_paths(bg_frames)
-            sciImg = sciImg.sub(
-                buildimage.buildimage_fromlist(
-                self.spectrograph, det, frame_par,bg_file_list,
-                bpm=self.caliBrate.msbpm, bias=self.caliBrate.msbias,
+        with profiler.stage('process'):
+            sciImg = buildimage.buildimage_fromlist(
+                self.spectrograph, det, frame_par,
+                sci_files, bias=self.caliBrate.msbias, bpm=self.caliBrate.msbpm,
+                dark=self.caliBrate.msdark,
                 flatimages=self.caliBrate.flatimages,
                 slits=self.caliBrate.slits,  # For flexure correction
-                ignore_saturation=False), frame_par['process'])
+                ignore_saturation=False)
+
+            # Background Image?
+            if len(bg_frames) > 0:
+                bg_file_list = self.fitstbl.frame_paths(bg_frames)
+                sciImg = sciImg.sub(
+                    buildimage.buildimage_fromlist(
+                    self.spectrograph, det, frame_par,bg_file_list,
+                    bpm=self.caliBrate.msbpm, bias=self.caliBrate.msbias,
+                    flatimages=self.caliBrate.flatimages,
+                    slits=self.caliBrate.slits,  # For flexure correction
+                    ignore_saturation=False), frame_par['process'])
 
         # Instantiate Reduce object
         # Required for pypeline specific object
@@ -653,10 +706,19 @@ class PypeIt(object):
         # Prep for manual extraction (if requested)
         manual_extract_dict = self.fitstbl.get_manual_extract(frames, det)
 
-        skymodel, objmodel, ivarmodel, outmask, sobjs, waveImg, tilts = self.redux.run(
-            std_trace=std_trace, manual_extract_dict=manual_extract_dict, show_peaks=self.show,
-            basename=self.basename, ra=self.fitstbl["ra"][frames[0]], dec=self.fitstbl["dec"][frames[0]],
-            obstime=self.obstime)
+        with profiler.stage('reduce'):
+            skymodel, objmodel, ivarmodel, outmask, sobjs, waveImg, tilts = self.redux.run(
+                std_trace=std_trace, manual_extract_dict=manual_extract_dict,
+                show_peaks=self.show, basename=self.basename,
+                ra=self.fitstbl["ra"][frames[0]], dec=self.fitstbl["dec"][frames[0]],
+                obstime=self.obstime)
+
+        # Write the datacube of an IFU exposure
+        if getattr(self.redux, 'cube_sums', None) is not None:
+            if not os.path.isdir(self.science_path):
+                os.makedirs(self.science_path)
+            self.redux.write_cube(os.path.join(self.science_path, 'spec3d_{0}_DET{1:02d}.fits'.format(
+                                    self.basename, self.det)))
 
         # TODO -- Save the slits yet again?
 
@@ -680,6 +742,7 @@ class PypeIt(object):
                                         tilts=tilts,
                                         slits=copy.deepcopy(self.caliBrate.slits))
         spec2DObj.process_steps = sciImg.process_steps
+        spec2DObj.set_float_dtype(self.par['scienceframe']['process']['float_dtype'])
 
         # Return
         return spec2DObj, sobjs
@@ -706,39 +769,40 @@ class PypeIt(object):
         """
         # TODO: Need some checks here that the exposure has been reduced?
 
-        # Determine the headers
-        row_fitstbl = self.fitstbl[frame]
-        # Need raw file header information
-        rawfile = self.fitstbl.frame_paths(frame)
-        head2d = fits.getheader(rawfile, ext=self.spectrograph.primary_hdrext)
-
-        # Check for the directory
-        if not os.path.isdir(self.science_path):
-            os.makedirs(self.science_path)
-
-        subheader = self.spectrograph.subheader_for_spec(row_fitstbl, head2d)
-        # 1D spectra
-        if all_specobjs.nobj > 0:
-            # Spectra
-            outfile1d = os.path.join(self.science_path, 'spec1d_{:s}.fits'.format(basename))
-            all_specobjs.write_to_fits(subheader, outfile1d,
-                                       update_det=self.par['rdx']['detnum'],
-                                       slitspatnum=self.par['rdx']['slitspatnum'])
-            # Info
-            outfiletxt = os.path.join(self.science_path, 'spec1d_{:s}.txt'.format(basename))
-            all_specobjs.write_info(outfiletxt, self.spectrograph.pypeline)
-
-        # 2D spectra
-        outfile2d = os.path.join(self.science_path, 'spec2d_{:s}.fits'.format(basename))
-        # Build header
-        pri_hdr = all_spec2d.build_primary_hdr(head2d, self.spectrograph,
-                                               redux_path=self.par['rdx']['redux_path'],
-                                               master_key_dict=self.caliBrate.master_key_dict,
-                                               master_dir=self.caliBrate.master_dir,
-                                               subheader=subheader)
-        # Write
-        all_spec2d.write_to_fits(outfile2d, pri_hdr=pri_hdr, update_det=self.par['rdx']['detnum'])
-
+        profiler.set_context(frame=self.fitstbl['filename'][frame])
+        with profiler.stage('save'):
+            # Determine the headers
+            row_fitstbl = self.fitstbl[frame]
+            # Need raw file header information
+            rawfile = self.fitstbl.frame_paths(frame)
+            head2d = fits.getheader(rawfile, ext=self.spectrograph.primary_hdrext)
+
+            # Check for the directory
+            if not os.path.isdir(self.science_path):
+                os.makedirs(self.science_path)
+
+            subheader = self.spectrograph.subheader_for_spec(row_fitstbl, head2d)
+            # 1D spectra
+            if all_specobjs.nobj > 0:
+                # Spectra
+                outfile1d = os.path.join(self.science_path, 'spec1d_{:s}.fits'.format(basename))
+                all_specobjs.write_to_fits(subheader, outfile1d,
+                                           update_det=self.par['rdx']['detnum'],
+                                           slitspatnum=self.par['rdx']['slitspatnum'])
+                # Info
+                outfiletxt = os.path.join(self.science_path, 'spec1d_{:s}.txt'.format(basename))
+                all_specobjs.write_info(outfiletxt, self.spectrograph.pypeline)
+
+            # 2D spectra
+            outfile2d = os.path.join(self.science_path, 'spec2d_{:s}.fits'.format(basename))
+            # Build header
+            pri_hdr = all_spec2d.build_primary_hdr(head2d, self.spectrograph,
+                                                   redux_path=self.par['rdx']['redux_path'],
+                                                   master_key_dict=self.caliBrate.master_key_dict,
+                                                   master_dir=self.caliBrate.master_dir,
+                                                   subheader=subheader)
+            # Write
+            all_spec2d.write_to_fits(outfile2d, pri_hdr=pri_hdr, update_det=self.par['rdx']['detnum'])
 
     def msgs_reset(self):
         """
@@ -768,6 +832,29 @@ class PypeIt(object):
             scs = codetime - 60.0*mns - 3600.0*hrs
             msgs.info('Execution time: {0:d}h {1:d}m {2:.2f}s'.format(hrs, mns, scs))
 
+    def write_profile(self):
+        """
+        Write the time and memory used by each stage of the reduction to
+        JSON and CSV files in the QA directory, if profiling is enabled.
+
+        The profiler is then disabled and its records removed, such
+        that they are not included in the profile of any subsequent
+        reduction in the same process.
+        """
+        if not profiler.enabled:
+            return
+        try:
+            profiler.report()
+            if not os.path.isdir(self.qa_path):
+                os.makedirs(self.qa_path)
+            root = os.path.join(self.qa_path, '{0}_profile'.format(
+                                    os.path.splitext(os.path.basename(self.pypeit_file))[0]))
+            profiler.write(root + '.json')
+            profiler.write(root + '.csv')
+        finally:
+            profiler.disable()
+            profiler.reset()
+
     # TODO: Move this to fitstbl?
     def show_science(self):
         """
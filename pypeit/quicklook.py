@@ -0,0 +1,368 @@
+"""
+Persistent quick-look reductions.
+
+:class:`QuickLook` builds (or loads) the calibrations for a single
+instrument setup once and keeps them in memory, along with the
+spectrograph, the parameters, and the reduction driver.  Each new
+science frame is then reduced with the fast quick-look settings of
+``pypeit_ql_mos`` without re-importing the package or re-loading any
+master frames.  :func:`QuickLook.serve` exposes the reductions through a
+local socket; see :func:`request_quicklook` for the client side.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import os
+import copy
+import time
+import json
+import socket
+import socketserver
+
+from IPython import embed
+
+import numpy as np
+
+from pypeit import msgs
+from pypeit import pypeit
+from pypeit import pypeitsetup
+from pypeit import calibrations
+from pypeit import specobjs
+from pypeit import spec2dobj
+from pypeit.core import framematch
+from pypeit.metadata import PypeItMetaData
+
+default_port = 9876
+"""Default port used by the quick-look server."""
+
+
+def quicklook_cfg_lines(spectrograph, redux_path, det=1, slit_spat=None, ignore_headers=False,
+                        user_pixflat=None, box_radius=None):
+    """
+    Construct the configuration lines for a quick-look reduction.
+
+    The science frames are reduced without cosmic-ray masking, bias
+    subtraction, optimal extraction, or a second object-finding pass.
+
+    Args:
+        spectrograph (:obj:`str`):
+            Name of the spectrograph.
+        redux_path (:obj:`str`):
+            Path for the reduction outputs.
+        det (:obj:`int`, optional):
+            Detector to reduce.  Ignored if ``slit_spat`` is provided.
+        slit_spat (:obj:`str`, optional):
+            Reduce only this slit on this detector, DET:SPAT_ID.
+        ignore_headers (:obj:`bool`, optional):
+            Ignore bad headers.
+        user_pixflat (:obj:`str`, optional):
+            User-supplied pixel flat.
+        box_radius (:obj:`float`, optional):
+            Radius for the boxcar extraction in arcsec.
+
+    Returns:
+        :obj:`list`: The configuration lines.
+    """
+    cfg_lines = ['[rdx]']
+    cfg_lines += ['    spectrograph = {0}'.format(spectrograph)]
+    cfg_lines += ['    redux_path = {0}'.format(redux_path)]
+    if slit_spat is not None:
+        msgs.info("--slit_spat provided.  Ignoring --det")
+    else:
+        cfg_lines += ['    detnum = {0}'.format(det)]
+    # Restrict on slit
+    if slit_spat is not None:
+        cfg_lines += ['    slitspatnum = {0}'.format(slit_spat)]
+    # Allow for bad headers
+    if ignore_headers:
+        cfg_lines += ['    ignore_bad_headers = True']
+    cfg_lines += ['[scienceframe]']
+    cfg_lines += ['    [[process]]']
+    cfg_lines += ['        mask_cr = False']
+    # Calibrations
+    cfg_lines += ['[baseprocess]']
+    cfg_lines += ['    use_biasimage = False']
+    cfg_lines += ['[calibrations]']
+    # Input pixel flat?
+    if user_pixflat is not None:
+        cfg_lines += ['    [[flatfield]]']
+        cfg_lines += ['        pixelflat_file = {0}'.format(user_pixflat)]
+    # Reduction restrictions
+    cfg_lines += ['[reduce]']
+    cfg_lines += ['    [[extraction]]']
+    cfg_lines += ['         skip_optimal = True']
+    # Set boxcar radius
+    if box_radius is not None:
+        cfg_lines += ['    boxcar_radius = {0}'.format(box_radius)]
+    cfg_lines += ['    [[findobj]]']
+    cfg_lines += ['         skip_second_find = True']
+    return cfg_lines
+
+
+class QuickLook(object):
+    """
+    Quick-look reductions of MOS or long-slit science frames with
+    calibrations kept in memory.
+
+    At instantiation, a PypeIt file is written for the arc and flat
+    frames, and the calibrations for each detector are built (or loaded
+    from existing masters).  Each call to :func:`reduce_frame` then only
+    reads the metadata of the new frame, reduces it, and writes the
+    spec1d and spec2d files.
+
+    Args:
+        spectrograph (:obj:`str`):
+            Name of the spectrograph.
+        raw_path (:obj:`str`):
+            Full path to the raw files.  Frames with relative file names
+            are assumed to be in this directory.
+        arc (:obj:`str`):
+            Arc frame filename.
+        flat (:obj:`str`):
+            Flat frame filename.
+        redux_path (:obj:`str`, optional):
+            Path for the reduction outputs.  If None, set to
+            ``<spectrograph>_A`` in the current working directory.
+        **kwargs:
+            Passed to :func:`quicklook_cfg_lines`.
+
+    Attributes:
+        pypeIt (:class:`pypeit.pypeit.PypeIt`):
+            Reduction driver.
+        calibrations (:obj:`dict`):
+            The :class:`pypeit.calibrations.Calibrations` object for each
+            detector.
+        latency (:obj:`dict`):
+            Time in seconds spent in each stage to build the
+            calibrations.
+    """
+    def __init__(self, spectrograph, raw_path, arc, flat, redux_path=None, **kwargs):
+        t = time.perf_counter()
+        self.raw_path = raw_path
+        _redux_path = '{0}_A'.format(os.path.join(os.getcwd(), spectrograph)) \
+                            if redux_path is None else redux_path
+        self.cfg_lines = quicklook_cfg_lines(spectrograph, _redux_path, **kwargs)
+
+        # Setup the calibration frames
+        self.calib_files = [self.frame_path(arc), self.frame_path(flat)]
+        ps = pypeitsetup.PypeItSetup(self.calib_files, path='./', spectrograph_name=spectrograph,
+                                     cfg_lines=self.cfg_lines)
+        ps.build_fitstbl()
+        bm = framematch.FrameTypeBitMask()
+        file_bits = np.zeros(2, dtype=bm.minimum_dtype())
+        file_bits[0] = bm.turn_on(file_bits[0], ['arc', 'tilt'])
+        file_bits[1] = bm.turn_on(file_bits[1], ['trace', 'illumflat']
+                                  if kwargs.get('user_pixflat') is not None
+                                  else ['pixelflat', 'trace', 'illumflat'])
+        # PypeItSetup sorts according to MJD
+        asrt = np.array([ps.fitstbl['filename'].data.tolist().index(os.path.basename(f))
+                         for f in self.calib_files])
+        ps.fitstbl.set_frame_types(file_bits[asrt])
+        ps.fitstbl.set_combination_groups()
+        ps.fitstbl['setup'] = 'A'
+        self.frametype = dict(zip(ps.fitstbl['filename'], ps.fitstbl['frametype']))
+        ofiles = ps.fitstbl.write_pypeit('', configs=['A'], write_bkg_pairs=True,
+                                         cfg_lines=self.cfg_lines)
+        if len(ofiles) > 1:
+            msgs.error("Bad things happened..")
+
+        # Instantiate the main pipeline reduction object once
+        self.pypeIt = pypeit.PypeIt(ofiles[0], verbosity=2, reuse_masters=True, overwrite=True,
+                                    show=False, calib_only=True)
+        self.pypeIt.ir_redux = False
+        # The reduction QA is still written
+        if not os.path.isdir(os.path.join(self.pypeIt.qa_path, 'PNGs')):
+            os.makedirs(os.path.join(self.pypeIt.qa_path, 'PNGs'))
+        self.latency = dict(setup=time.perf_counter() - t)
+
+        # Build or load the calibrations for each detector; QA plots are
+        # skipped for speed
+        t = time.perf_counter()
+        self.detectors = pypeit.PypeIt.select_detectors(
+                                detnum=self.pypeIt.par['rdx']['detnum'],
+                                slitspatnum=self.pypeIt.par['rdx']['slitspatnum'],
+                                ndet=self.pypeIt.spectrograph.ndet)
+        self.calibrations = {}
+        for det in self.detectors:
+            self.calibrations[det] = calibrations.Calibrations.get_instance(
+                self.pypeIt.fitstbl, self.pypeIt.par['calibrations'], self.pypeIt.spectrograph,
+                self.pypeIt.calibrations_path, qadir=None, reuse_masters=True, show=False,
+                slitspat_num=self.pypeIt.par['rdx']['slitspatnum'])
+            self.calibrations[det].set_config(0, det, self.pypeIt.par['calibrations'])
+            self.calibrations[det].run_the_steps()
+        self.latency['calibrations'] = time.perf_counter() - t
+        self.report_latency(self.latency, 'Quick-look calibrations ready')
+
+    def frame_path(self, filename):
+        """
+        Return the full path to a raw frame.
+        """
+        return filename if os.path.isabs(filename) else os.path.join(self.raw_path, filename)
+
+    def build_fitstbl(self, science):
+        """
+        Build the metadata table for the calibration frames and a new
+        science frame.
+
+        Args:
+            science (:obj:`str`):
+                Full path to the science frame.
+
+        Returns:
+            :class:`pypeit.metadata.PypeItMetaData`: The metadata
+            table, with all frames in the same setup and calibration
+            group.
+        """
+        fitstbl = PypeItMetaData(self.pypeIt.spectrograph, self.pypeIt.par,
+                                 files=self.calib_files + [science], strict=True)
+        frametype = copy.copy(self.frametype)
+        frametype[os.path.basename(science)] = 'science'
+        fitstbl.finalize_usr_build(frametype, 'A')
+        return fitstbl
+
+    def warm_calibrations(self, fitstbl, frame, det):
+        """
+        Return the in-memory calibrations for a new science frame.
+
+        The calibration objects are shared between frames, except for
+        the slits, whose mask is edited by the reduction.
+
+        Args:
+            fitstbl (:class:`pypeit.metadata.PypeItMetaData`):
+                Metadata table with the science frame.
+            frame (:obj:`int`):
+                Row of the science frame in ``fitstbl``.
+            det (:obj:`int`):
+                Detector number.
+
+        Returns:
+            :class:`pypeit.calibrations.Calibrations`: The
+            calibrations configured for the science frame.
+        """
+        caliBrate = copy.copy(self.calibrations[det])
+        caliBrate.fitstbl = fitstbl
+        caliBrate.master_key_dict = copy.copy(self.calibrations[det].master_key_dict)
+        caliBrate.set_config(frame, det, self.pypeIt.par['calibrations'])
+        if caliBrate.master_key_dict['frame'] != self.calibrations[det].master_key_dict['frame']:
+            msgs.error('{0} is not in the same setup as the calibrations.'.format(
+                        fitstbl['filename'][frame]))
+        caliBrate.slits = copy.deepcopy(self.calibrations[det].slits)
+        return caliBrate
+
+    def reduce_frame(self, science):
+        """
+        Reduce a new science frame.
+
+        Args:
+            science (:obj:`str`):
+                Science frame filename.
+
+        Returns:
+            :obj:`dict`: The names of the spec2d and spec1d output
+            files, the number of extracted objects, and the time in
+            seconds spent in each stage (``latency``).
+        """
+        latency = dict(metadata=0., calibrations=0., reduce=0., write=0.)
+        t = time.perf_counter()
+        fitstbl = self.build_fitstbl(self.frame_path(science))
+        frame = np.where(fitstbl.find_frames('science'))[0][0]
+        self.pypeIt.fitstbl = fitstbl
+        latency['metadata'] = time.perf_counter() - t
+
+        all_spec2d = spec2dobj.AllSpec2DObj()
+        all_spec2d['meta']['ir_redux'] = self.pypeIt.ir_redux
+        all_specobjs = specobjs.SpecObjs()
+        for det in self.detectors:
+            _t = time.perf_counter()
+            self.pypeIt.det = det
+            self.pypeIt.caliBrate = self.warm_calibrations(fitstbl, frame, det)
+            latency['calibrations'] += time.perf_counter() - _t
+            _t = time.perf_counter()
+            all_spec2d[det], sobjs = self.pypeIt.reduce_one([frame], det, [])
+            if sobjs.nobj > 0:
+                all_specobjs.add_sobj(sobjs)
+            latency['reduce'] += time.perf_counter() - _t
+
+        _t = time.perf_counter()
+        self.pypeIt.save_exposure(frame, all_spec2d, all_specobjs, self.pypeIt.basename)
+        latency['write'] = time.perf_counter() - _t
+        latency['total'] = time.perf_counter() - t
+        self.report_latency(latency, 'Quick-look reduction of {0}'.format(science))
+        return dict(spec2d=self.pypeIt.spec_output_file(frame, twod=True),
+                    spec1d=self.pypeIt.spec_output_file(frame) if all_specobjs.nobj > 0 else None,
+                    nobj=int(all_specobjs.nobj), latency=latency)
+
+    @staticmethod
+    def report_latency(latency, title):
+        """
+        Print the time spent in each stage.
+        """
+        msg = title + msgs.newline() + '    {0:<14} {1:>8}'.format('Stage', 'Time (s)')
+        for key, value in latency.items():
+            msg += msgs.newline() + '    {0:<14} {1:8.2f}'.format(key, value)
+        msgs.info(msg)
+
+    def serve(self, host='localhost', port=default_port):
+        """
+        Reduce frames sent through a local socket until a ``shutdown``
+        request is received.
+
+        Each request is a single line with the name of the science
+        frame; the reply is a single line with the JSON-encoded result
+        of :func:`reduce_frame`, or an error message.  Requests are
+        reduced one at a time.
+
+        Args:
+            host (:obj:`str`, optional):
+                Host name to bind.
+            port (:obj:`int`, optional):
+                Port to bind.
+        """
+        with socketserver.TCPServer((host, port), _QuickLookHandler) as server:
+            server.quicklook = self
+            server.stop = False
+            msgs.info('Quick-look server listening on {0}:{1}'.format(host, port))
+            while not server.stop:
+                server.handle_request()
+        msgs.info('Quick-look server stopped')
+
+
+class _QuickLookHandler(socketserver.StreamRequestHandler):
+    """
+    Handle a single quick-look request.
+    """
+    def handle(self):
+        request = self.rfile.readline().decode().strip()
+        if request == 'shutdown':
+            self.server.stop = True
+            result = dict(status='shutdown')
+        else:
+            try:
+                result = self.server.quicklook.reduce_frame(request)
+                result['status'] = 'ok'
+            except Exception as e:
+                # Keep the server alive for the next frame
+                result = dict(status='error', message='{0}: {1}'.format(type(e).__name__, e))
+        self.wfile.write((json.dumps(result) + '\n').encode())
+
+
+def request_quicklook(filename, host='localhost', port=default_port):
+    """
+    Ask a running quick-look server to reduce a frame.
+
+    Args:
+        filename (:obj:`str`):
+            Science frame filename, or ``shutdown`` to stop the server.
+        host (:obj:`str`, optional):
+            Host name of the server.
+        port (:obj:`int`, optional):
+            Port of the server.
+
+    Returns:
+        :obj:`dict`: The reply from the server; see
+        :func:`QuickLook.reduce_frame`.
+    """
+    with socket.create_connection((host, port)) as sock:
+        sock.sendall((filename + '\n').encode())
+        with sock.makefile('r') as f:
+            return json.loads(f.readline())
@@ -7,6 +7,7 @@ Main driver class for skysubtraction and extraction
 
 import os
 import inspect
+import hashlib
 import numpy as np
 import os
 
@@ -20,9 +21,11 @@ from scipy.interpolate import interp1d
 from pypeit import specobjs, specobj
 from pypeit import ginga, msgs, utils
 from pypeit import masterframe
-from pypeit.core import skysub, extract, wave, flexure, flat
+from pypeit.core import skysub, extract, wave, flexure, flat, datacube
 from pypeit.images import buildimage
 from pypeit import wavecalib
+from pypeit import flatfield
+from pypeit.profiling import profiler
 
 from IPython import embed
 
@@ -204,6 +207,44 @@ class Reduce(object):
         # For echelle
         self.spatial_coo = self.slits.spatial_coordinates(initial=initial, flexure=self.spat_flexure_shift)
 
+    def build_tilts_waveimg(self, tilt_flexure_shift):
+        """
+        Build the tilts and wavelength images for this exposure.
+
+        The images only depend on the master calibrations, the flexure
+        shifts and the slit mask, so they are served from the
+        calibration cache (if there is one) when another exposure of
+        the same calibration group has already built them.
+
+        Args:
+            tilt_flexure_shift (:obj:`float`):
+                Spatial flexure shift to apply to the tilts.
+
+        Sets:
+            - :attr:`tilts`
+            - :attr:`waveimg`
+        """
+        cache = getattr(self.caliBrate, 'cache', None)
+        master_key_dict = getattr(self.caliBrate, 'master_key_dict', {})
+        if cache is None or 'tilt' not in master_key_dict or 'arc' not in master_key_dict:
+            self.tilts = self.waveTilts.fit2tiltimg(self.slitmask, flexure=tilt_flexure_shift)
+            # Wavelengths (on unmasked slits)
+            self.waveimg = wavecalib.build_waveimg(self.spectrograph, self.tilts, self.slits,
+                                                   self.wv_calib,
+                                                   spat_flexure=self.spat_flexure_shift)
+            return
+
+        # Identify the slit image by a digest instead of a copy of its data
+        key = (master_key_dict['tilt'], tilt_flexure_shift, self.spat_flexure_shift,
+               self.slitmask.shape, hashlib.sha1(np.ascontiguousarray(self.slitmask)).hexdigest())
+        self.tilts = cache.evaluate('tiltimg_eval', key, self.waveTilts.fit2tiltimg,
+                                    self.slitmask, flexure=tilt_flexure_shift)
+        # Wavelengths (on unmasked slits)
+        self.waveimg = cache.evaluate('waveimg', (master_key_dict['arc'],) + key,
+                                      wavecalib.build_waveimg, self.spectrograph, self.tilts,
+                                      self.slits, self.wv_calib,
+                                      spat_flexure=self.spat_flexure_shift)
+
     def parse_manual_dict(self, manual_dict, neg=False):
         """
         Parse the manual dict
@@ -341,31 +382,31 @@ class Reduce(object):
             tilt_flexure_shift = _spat_flexure - self.waveTilts.spat_flexure
         else:
             tilt_flexure_shift = self.spat_flexure_shift
-        self.tilts = self.waveTilts.fit2tiltimg(self.slitmask, flexure=tilt_flexure_shift)
-
-        # Wavelengths (on unmasked slits)
-        self.waveimg = wavecalib.build_waveimg(self.spectrograph, self.tilts, self.slits,
-                                               self.wv_calib, spat_flexure=self.spat_flexure_shift)
+        with profiler.stage('waveimg'):
+            self.build_tilts_waveimg(tilt_flexure_shift)
 
         # First pass object finding
-        self.sobjs_obj, self.nobj, skymask_init = \
-            self.find_objects(self.sciImg.image, std_trace=std_trace,
-                              show_peaks=show_peaks,
-                              show=self.reduce_show & (not self.std_redux),
-                              manual_extract_dict=manual_extract_dict)
+        with profiler.stage('find_objects'):
+            self.sobjs_obj, self.nobj, skymask_init = \
+                self.find_objects(self.sciImg.image, std_trace=std_trace,
+                                  show_peaks=show_peaks,
+                                  show=self.reduce_show & (not self.std_redux),
+                                  manual_extract_dict=manual_extract_dict)
 
         # Global sky subtract
-        self.initial_sky = \
-            self.global_skysub(skymask=skymask_init).copy()
+        with profiler.stage('global_sky'):
+            self.initial_sky = \
+                self.global_skysub(skymask=skymask_init).copy()
 
         # Second pass object finding on sky-subtracted image
         if (not self.std_redux) and (not self.par['reduce']['findobj']['skip_second_find']):
-            self.sobjs_obj, self.nobj, self.skymask = \
-                self.find_objects(self.sciImg.image - self.initial_sky,
-                                  std_trace=std_trace,
-                                  show=self.reduce_show,
-                                  show_peaks=show_peaks,
-                                  manual_extract_dict=manual_extract_dict)
+            with profiler.stage('find_objects'):
+                self.sobjs_obj, self.nobj, self.skymask = \
+                    self.find_objects(self.sciImg.image - self.initial_sky,
+                                      std_trace=std_trace,
+                                      show=self.reduce_show,
+                                      show_peaks=show_peaks,
+                                      manual_extract_dict=manual_extract_dict)
         else:
             msgs.info("Skipping 2nd run of finding objects")
 
@@ -376,11 +417,13 @@ class Reduce(object):
                     self.par['reduce']['findobj']['skip_second_find']):
                 self.global_sky = self.initial_sky.copy()
             else:
-                self.global_sky = self.global_skysub(skymask=self.skymask,
-                                                     show=self.reduce_show)
-            # Extract + Return
-            self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs \
-                = self.extract(self.global_sky, self.sobjs_obj)
+                with profiler.stage('global_sky'):
+                    self.global_sky = self.global_skysub(skymask=self.skymask,
+                                                         show=self.reduce_show)
+            # Local sky subtraction and extraction
+            with profiler.stage('extract'):
+                self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs \
+                    = self.extract(self.global_sky, self.sobjs_obj)
         else:  # No objects, pass back what we have
             self.skymodel = self.initial_sky
             self.objmodel = np.zeros_like(self.sciImg.image)
@@ -402,10 +445,12 @@ class Reduce(object):
             # TODO -- Should we move these to redux.run()?
             # Flexure correction if this is not a standard star
             if not self.std_redux:
-                self.spec_flexure_correct(self.sobjs, basename)
+                with profiler.stage('flexure'):
+                    self.spec_flexure_correct(self.sobjs, basename)
             # Heliocentric
-            radec = ltu.radec_to_coord((ra, dec))
-            self.helio_correct(self.sobjs, radec, obstime)
+            with profiler.stage('helio'):
+                radec = ltu.radec_to_coord((ra, dec))
+                self.helio_correct(self.sobjs, radec, obstime)
 
         # Update the mask
         reduce_masked = np.where(np.invert(self.reduce_bpm_init) & self.reduce_bpm)[0]
@@ -627,7 +672,8 @@ class Reduce(object):
             flex_list = flexure.spec_flexure_obj(sobjs, self.slits.slitord_id, self.reduce_bpm,
                                                  self.par['flexure']['spec_method'],
                                                  self.par['flexure']['spectrum'],
-                                                 mxshft=self.par['flexure']['spec_maxshift'])
+                                                 mxshft=self.par['flexure']['spec_maxshift'],
+                                                 smooth_bin=self.par['flexure']['spec_smooth_bin'])
             # QA
             flexure.spec_flexure_qa(sobjs, self.slits.slitord_id, self.reduce_bpm, basename, self.det, flex_list,
                                     out_dir=os.path.join(self.par['rdx']['redux_path'], 'QA'))
@@ -955,7 +1001,7 @@ class MultiSlitReduce(Reduce):
         # Set the bit for pixels which were masked by the extraction.
         # For extractmask, True = Good, False = Bad
         iextract = (self.sciImg.fullmask == 0) & (self.extractmask == False)
-        self.outmask[iextract] = self.sciImg.bitmask.turn_on(self.outmask[iextract], 'EXTRACT')
+        self.sciImg.bitmask.turn_on_inplace(self.outmask, 'EXTRACT', where=iextract)
 
         # Step
         self.steps.append(inspect.stack()[0][3])
@@ -1144,19 +1190,57 @@ class IFUReduce(Reduce):
 
     See parent doc string for Args and Attributes
 
+    Attributes:
+        cube_grid (dict):
+            Datacube grid of the exposure, set by :func:`run`; see
+            :func:`pypeit.core.datacube.cube_grid`.  None if the
+            exposure was not resampled.
+        cube_weights (`scipy.sparse.csr_matrix`_):
+            Resampling weights of the exposure, set by :func:`run`.
+        cube_sums (dict):
+            Accumulated sums of the exposure, set by :func:`run`; see
+            :func:`pypeit.core.datacube.accumulate_cube`.  Use
+            :func:`write_cube` to write the datacube, or pass them to
+            :func:`resample_cube` to add further exposures.
     """
     def __init__(self, sciImg, spectrograph, par, caliBrate, objtype, **kwargs):
         super(IFUReduce, self).__init__(sciImg, spectrograph, par, caliBrate, objtype, **kwargs)
         self.initialise_slits(initial=True)
+        self.cube_grid = None
+        self.cube_weights = None
+        self.cube_sums = None
 
     def build_scaleimg(self):
         """
         Generate a relative scaling image for slit-based IFU.
-        All slits are scaled relative to ref_slit
+
+        The scaling only depends on the calibrations, such that it is
+        saved as a master frame (keyed by the flat, tilt, and arc
+        masters) and reused by all science frames reduced with the
+        same calibrations.  The scaling is recomputed if the slits
+        are shifted by a spatial flexure correction.
         TODO :: Consider including this routine in FlatImages
+
         Returns:
             ndarray: An image containing the appropriate scaling
         """
+        # Try to reuse the master
+        master_key = self.caliBrate.master_key_dict.get('flat')
+        tilt_key = self.caliBrate.master_key_dict.get('tilt')
+        arc_key = self.caliBrate.master_key_dict.get('arc')
+        reuse = master_key is not None and not self.spat_flexure_shift
+        if reuse:
+            master_file = masterframe.construct_file_name(flatfield.RelativeScale, master_key,
+                                                          master_dir=self.caliBrate.master_dir)
+            if os.path.isfile(master_file) and self.caliBrate.reuse_masters:
+                relscale = flatfield.RelativeScale.from_file(master_file)
+                if relscale.is_synced(self.slits, tilt_key=tilt_key, arc_key=arc_key):
+                    msgs.info('Loaded the relative scaling of the slits from:'
+                              + msgs.newline() + master_file)
+                    return relscale.scaleimg
+                msgs.warn('Relative slit scaling is out of sync with the calibrations; '
+                          'recomputing.')
+
         msgs.info('Performing a joint flat-field response using all slits')
         # Grab some parameters
         trim = 0  #self.par['calibrations']['flatfield']['slit_trim']
@@ -1169,70 +1253,10 @@ class IFUReduce(Reduce):
         blaze_model = np.ones_like(rawflat)
         # Find all good slits, and create a mask of pixels to include (True=include)
         wgd = self.slits.spat_id[np.where(self.slits.mask == 0)]
-        # Obtain the minimum and maximum wavelength of all slits
-        mnmx_wv = np.zeros((self.slits.nslits,2))
-        for slit_idx, slit_spat in enumerate(self.slits.spat_id):
-            onslit_init = (slitid_img_init == slit_spat)
-            mnmx_wv[slit_idx, 0] = np.min(self.waveimg[onslit_init])
-            mnmx_wv[slit_idx, 1] = np.max(self.waveimg[onslit_init])
-        # Sort by increasing minimum wavelength
-        swslt = np.argsort(mnmx_wv[:,0])
-        # Go through the slits and calculate the overlapping flux
-        relscl_model = np.ones_like(rawflat)
-        scalefact = 1.0
-        for slit_idx in range(1, self.slits.spat_id.size):
-            # Only use the overlapping regions of the slits, where the same wavelength range is covered
-            onslit_a_olap = (slitid_img_init == self.slits.spat_id[swslt[slit_idx-1]]) & gpm & \
-                            (self.waveimg > mnmx_wv[swslt[slit_idx], 0]) & \
-                            (self.waveimg < mnmx_wv[swslt[slit_idx], 1])
-            onslit_b      = (slitid_img_init == self.slits.spat_id[swslt[slit_idx]])
-            onslit_b_olap = onslit_b & (self.waveimg > mnmx_wv[swslt[slit_idx-1], 0]) & gpm & \
-                            (self.waveimg < mnmx_wv[swslt[slit_idx-1], 1])
-
-            # Take the median of the overlapping regions
-            print(scalefact, np.median(rawflat[onslit_a_olap])/np.median(rawflat[onslit_b_olap]))
-            scalefact *= np.median(rawflat[onslit_a_olap])/np.median(rawflat[onslit_b_olap])
-            relscl_model[onslit_b] = scalefact
-
-        # Test how well the above code does
-        # TODO :: DELETE THE DEBUGGING CODE BELOW BEFORE MERGING!!
-        if False:
-            plate_scale = self.get_platescale(None)
-            plt.subplot(211)
-            flat_modl = self.caliBrate.flatimages.flat_model
-            flat_ivar = np.ones_like(flat_modl)
-            glob_skym = np.zeros_like(flat_modl)
-            rn2img = self.sciImg.rn2img
-            for slit_idx in range(0, self.slits.spat_id.size):
-                print(1, slit_idx)
-                relspec = specobj.SpecObj("IFU", self.det, SLITID=slit_idx)
-                relspec.TRACE_SPAT = 0.5 * (self.slits_left[:, slit_idx] + self.slits_right[:, slit_idx])
-                # Do a boxcar extraction - assume standard is in the middle of the slit
-                extract.extract_boxcar(flat_modl, flat_ivar, self.sciImg.fullmask == 0,
-                                       self.waveimg, glob_skym, rn2img,
-                                       60.0,#self.par['reduce']['extraction']['boxcar_radius'] / plate_scale,
-                                       relspec)
-                plt.plot(relspec.BOX_WAVE, relspec.BOX_COUNTS / relspec.BOX_NPIX)
-            plt.plot(wave, flux, 'k--', linewidth=3)
-            plt.subplot(212)
-            flat_modl = self.caliBrate.flatimages.flat_model*relscl_model
-            flat_ivar = np.ones_like(flat_modl)
-            glob_skym = np.zeros_like(flat_modl)
-            rn2img = self.sciImg.rn2img
-            for slit_idx in range(0, self.slits.spat_id.size):
-                print(2, slit_idx)
-                relspec = specobj.SpecObj("IFU", self.det, SLITID=slit_idx)
-                relspec.TRACE_SPAT = 0.5 * (self.slits_left[:, slit_idx] + self.slits_right[:, slit_idx])
-                # Do a boxcar extraction - assume standard is in the middle of the slit
-                extract.extract_boxcar(flat_modl, flat_ivar, self.sciImg.fullmask == 0,
-                                       self.waveimg, glob_skym, rn2img,
-                                       60.0,#self.par['reduce']['extraction']['boxcar_radius'] / plate_scale,
-                                       relspec)
-                plt.plot(relspec.BOX_WAVE, relspec.BOX_COUNTS / relspec.BOX_NPIX)
-            plt.plot(wave, flux, 'k--', linewidth=3)
-            plt.show()
-
-
+        # Scale each slit to the overlapping flux of the slit that
+        # precedes it in wavelength
+        relscl_model = flat.relative_slit_scale(rawflat, self.waveimg, slitid_img_init,
+                                                self.slits.spat_id, gpm=gpm)
 
         # Get the pixels containing good slits
         spec_tot = np.isin(slitid_img_init, wgd)  # & (rawflat < nonlinear_counts)
@@ -1280,10 +1304,12 @@ class IFUReduce(Reduce):
             corr_model *= self.caliBrate.flatimages.pixelflat
             scale_model = self.caliBrate.flatimages.procflat/corr_model
             scale_model /= blaze_model
-        embed()
-        import astropy.io.fits as fits
-        hdu = fits.PrimaryHDU(scale_model)
-        hdu.writeto('scale_model.fits', overwrite=True)
+
+        if reuse:
+            # Save to Masters
+            flatfield.RelativeScale(scaleimg=scale_model, tilt_key=tilt_key, arc_key=arc_key,
+                                    PYP_SPEC=self.spectrograph.spectrograph,
+                                    spat_id=self.slits.spat_id).to_master_file(master_file)
         return scale_model
 
     def build_scaleimg_old(self, ref_slit, trim=10):
@@ -1401,8 +1427,110 @@ class IFUReduce(Reduce):
         plate_scale = self.sciImg.detector.platescale
         return plate_scale
 
-    def resample_cube(self):
-        pass
+    def resample_cube(self, ra, dec, posang=0., grid=None, weights=None, sums=None):
+        """
+        Resample the sky-subtracted science frame onto a datacube.
+
+        Each good detector pixel is mapped to (RA, Dec, wavelength)
+        using the wavelength image, the slit edges and, if available,
+        the alignment traces, and drizzled onto the cube using a
+        sparse weight matrix; see :mod:`pypeit.core.datacube`.  To
+        combine multiple exposures, pass the ``grid`` and ``sums``
+        returned for the previous exposures, and the ``weights`` if
+        the exposure has the same calibrations and pointing.  Use
+        :func:`pypeit.core.datacube.finalize_cube` to construct the
+        cube from the sums.
+
+        Args:
+            ra (float):
+                Right ascension of the field center in degrees.
+            dec (float):
+                Declination of the field center in degrees.
+            posang (float, optional):
+                Position angle of the field in degrees East of North.
+            grid (dict, optional):
+                The datacube grid; see
+                :func:`pypeit.core.datacube.cube_grid`.  If None, the
+                grid is set by the ``cube`` parameters and covers
+                this exposure.
+            weights (`scipy.sparse.csr_matrix`_, optional):
+                Resampling weights from a previous exposure with the
+                same calibrations and pointing.  If None, they are
+                computed.
+            sums (dict, optional):
+                Sums from the previous exposures; see
+                :func:`pypeit.core.datacube.accumulate_cube`.
+
+        Returns:
+            tuple: The datacube grid (dict), the resampling weights
+            (`scipy.sparse.csr_matrix`_), and the sums (dict) that
+            include this exposure.
+        """
+        msgs.info("Resampling the science frame onto a datacube")
+        cubepar = self.par['reduce']['cube']
+        if cubepar['slice_width'] is None:
+            msgs.error('Must set the width of the slices to resample onto a cube; '
+                       'see the cube parameters.')
+        platescale = self.get_platescale(None)
+        gdslits = self.slits.mask == 0
+        slit_length = np.median(self.slits_right[:, gdslits] - self.slits_left[:, gdslits]) \
+                        * platescale
+
+        if grid is None or weights is None:
+            # Alignment traces were measured without the flexure shift
+            align_traces = None
+            if self.caliBrate.alignments is not None:
+                self.caliBrate.alignments.is_synced(self.slits)
+                align_traces = self.caliBrate.alignments.traces
+                if self.spat_flexure_shift is not None:
+                    align_traces = align_traces + self.spat_flexure_shift
+            footprint = datacube.pixel_footprints(
+                            self.waveimg, self.slitmask, self.slits.spat_id, self.slits_left,
+                            self.slits_right,
+                            gpm=np.isin(self.slitmask, self.slits.spat_id[gdslits]),
+                            align_traces=align_traces,
+                            locations=self.par['calibrations']['alignment']['locations'])
+        if grid is None:
+            spat_scale = platescale if cubepar['cube_spat_num'] is None \
+                            else slit_length / cubepar['cube_spat_num']
+            grid = datacube.cube_grid(footprint, ra, dec, slit_length, cubepar['slice_width'],
+                                      spat_scale, posang=posang,
+                                      wave_min=cubepar['cube_wave_min'],
+                                      wave_max=cubepar['cube_wave_max'],
+                                      nwave=cubepar['cube_wave_num'])
+        if weights is None:
+            weights = datacube.generate_cube_weights(footprint, grid, ra, dec, slit_length,
+                                                     cubepar['slice_width'], posang=posang)
+
+        sums = datacube.accumulate_cube(weights, self.sciImg.image - self.global_sky,
+                                        utils.inverse(self.sciImg.ivar),
+                                        gpm=self.sciImg.fullmask == 0, sums=sums)
+        return grid, weights, sums
+
+    def write_cube(self, outfile, overwrite=True):
+        """
+        Write the datacube resampled by :func:`run` to a file.
+
+        The file has the flux, variance, and summed weights of each
+        voxel in the ``FLUX``, ``VARIANCE``, and ``WEIGHT`` extensions,
+        with the WCS of the cube in their headers.
+
+        Args:
+            outfile (str):
+                Output file name.
+            overwrite (bool, optional):
+                Overwrite any existing file.
+        """
+        if self.cube_sums is None:
+            msgs.error('No datacube to write; the exposure was not resampled.')
+        flux, var, wgt = datacube.finalize_cube(self.cube_sums, self.cube_grid)
+        hdr = datacube.cube_wcs(self.cube_grid).to_header()
+        hdus = [fits.PrimaryHDU()]
+        for name, data in zip(['FLUX', 'VARIANCE', 'WEIGHT'], [flux, var, wgt]):
+            # Transpose to match the axis order of the WCS
+            hdus += [fits.ImageHDU(data=data.T, header=hdr, name=name)]
+        fits.HDUList(hdus).writeto(outfile, overwrite=overwrite)
+        msgs.info('Datacube written to {0}'.format(outfile))
 
     def load_skyregions(self):
         skymask_init = None
@@ -1476,8 +1604,11 @@ class IFUReduce(Reduce):
             :obj:`tuple`: Returns ``skymodel`` (ndarray),
             ``objmodel`` (ndarray), ``ivarmodel`` (ndarray),
             ``outmask`` (ndarray), ``sobjs``
-            (:class:`~pypeit.specobjs.SpecObjs`). See main doc string
-            for description
+            (:class:`~pypeit.specobjs.SpecObjs`), ``waveimg``
+            (ndarray), and ``tilts`` (ndarray). See main doc string
+            for description.  The sky-subtracted data are resampled
+            onto a datacube, held by :attr:`cube_sums`; see
+            :func:`write_cube`.
         """
         # Deal with dynamic calibrations
         # Tilts
@@ -1489,11 +1620,7 @@ class IFUReduce(Reduce):
             tilt_flexure_shift = _spat_flexure - self.waveTilts.spat_flexure
         else:
             tilt_flexure_shift = self.spat_flexure_shift
-        self.tilts = self.waveTilts.fit2tiltimg(self.slitmask, flexure=tilt_flexure_shift)
-
-        # Wavelengths (on unmasked slits)
-        self.waveimg = wavecalib.build_waveimg(self.spectrograph, self.tilts, self.slits,
-                                               self.wv_calib, spat_flexure=self.spat_flexure_shift)
+        self.build_tilts_waveimg(tilt_flexure_shift)
 
         # If this is a slit-based IFU, perform a relative scaling of the IFU slits
         scaleImg = 1.0
@@ -1515,19 +1642,22 @@ class IFUReduce(Reduce):
         # Recalculate the global sky subtract based on flatfield model
         self.global_sky = self.global_skysub(scaleImg=scaleImg, skymask=skymask_init, trim_edg=(0, 0), show_fit=False).copy()
 
-        from pypeit.io import write_to_fits
-        write_to_fits(self.sciImg.image, "science.fits", overwrite=True)
-        write_to_fits(self.global_sky, "initial_sky.fits", overwrite=True)
-        write_to_fits(self.sciImg.image-self.global_sky, "skysub_science.fits", overwrite=True)
-        msgs.error("SUCCESSFUL -- UP TO HERE!")
-
-        # Resample data onto desired grid
-        # TODO :: still need to implement this step...
+        # Resample the sky-subtracted data onto a datacube
+        if self.par['reduce']['cube']['slice_width'] is None or ra is None or dec is None:
+            msgs.warn('Cannot resample onto a datacube without the slice width and the '
+                      'coordinates of the field; skipping.')
+        else:
+            radec = ltu.radec_to_coord((ra, dec))
+            self.cube_grid, self.cube_weights, self.cube_sums \
+                    = self.resample_cube(radec.ra.deg, radec.dec.deg)
 
-        # TODO -- Should we move these to redux.run()?
-        # Heliocentric
-        radec = ltu.radec_to_coord((ra, dec))
-        self.helio_correct(self.sobjs, radec, obstime)
+        # No objects are extracted from IFU data
+        self.skymodel = self.global_sky
+        self.objmodel = np.zeros_like(self.sciImg.image)
+        self.ivarmodel = np.copy(self.sciImg.ivar)
+        self.outmask = self.sciImg.fullmask
+        self.sobjs = specobjs.SpecObjs()
 
         # Return
-        return self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs
+        return self.skymodel, self.objmodel, self.ivarmodel, self.outmask, self.sobjs, \
+               self.waveimg, self.tilts
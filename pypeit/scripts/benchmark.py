@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+# See top-level LICENSE file for Copyright information
+#
+# -*- coding: utf-8 -*-
+"""
+This script runs the performance benchmarks and reports how their run
+time scales with the size of the data
+"""
+import argparse
+
+def parser(options=None):
+
+    parser = argparse.ArgumentParser(description='Run the performance benchmarks on synthetic '
+                                                 'data and report how their run time scales '
+                                                 'with the detector size, number of slits, '
+                                                 'objects, and exposures')
+    parser.add_argument('-b', '--benchmarks', type=str, nargs='+',
+                        help='Benchmarks to run; default is to run all of them.  Options are: '
+                             'bspline_profile, global_skysub, local_skysub_extract, auto_trace, '
+                             'reidentify, weighted_combine, combspec')
+    parser.add_argument('-r', '--repeat', type=int, default=1,
+                        help='Number of times to run each benchmark; the minimum time is '
+                             'reported')
+    parser.add_argument('-s', '--scripts', default=False, action='store_true',
+                        help='Instead of the benchmarks, time the start-up of each console '
+                             'script')
+    parser.add_argument('-m', '--memory', default=False, action='store_true',
+                        help='Instead of the benchmarks, measure the memory used by the images '
+                             'at each processing stage for each floating-point precision')
+    parser.add_argument('-o', '--ofile', type=str,
+                        help='Write the timings to this file; the format is set by the '
+                             'extension (e.g., .csv, .fits, .ecsv)')
+    parser.add_argument('-p', '--plot', type=str,
+                        help='Plot the scaling curves to this file')
+
+    if options is None:
+        pargs = parser.parse_args()
+    else:
+        pargs = parser.parse_args(options)
+    return pargs
+
+
+def main(pargs):
+
+    import numpy as np
+    from matplotlib import pyplot as plt
+
+    from pypeit import msgs
+    from pypeit.tests import benchmarks
+
+    if pargs.scripts:
+        tbl = benchmarks.time_scripts()
+        benchmarks.report_scripts(tbl)
+    elif pargs.memory:
+        tbl = benchmarks.image_memory()
+        benchmarks.report_memory(tbl)
+    else:
+        tbl = benchmarks.run_scaling(names=pargs.benchmarks, repeat=pargs.repeat)
+        benchmarks.report(tbl)
+
+    if pargs.ofile is not None:
+        tbl.write(pargs.ofile, overwrite=True)
+        msgs.info('Timings written to {0}'.format(pargs.ofile))
+
+    if pargs.scripts or pargs.memory:
+        return
+
+    if pargs.plot is not None:
+        pars = np.unique(tbl['parameter'])
+        fig, axes = plt.subplots(1, len(pars), figsize=(5*len(pars), 4), squeeze=False)
+        for ax, par in zip(axes[0], pars):
+            _tbl = tbl[tbl['parameter'] == par]
+            for name in np.unique(_tbl['benchmark']):
+                grp = _tbl[_tbl['benchmark'] == name]
+                ax.plot(grp['value'], grp['time'], marker='o', label=name)
+            ax.set_xscale('log')
+            ax.set_yscale('log')
+            ax.set_xlabel(par)
+            ax.set_ylabel('Time (s)')
+            ax.legend(fontsize='small')
+        fig.tight_layout()
+        fig.savefig(pargs.plot)
+        plt.close(fig)
+        msgs.info('Scaling curves plotted to {0}'.format(pargs.plot))
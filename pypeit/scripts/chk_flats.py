@@ -3,12 +3,6 @@ This script displays the flat images in an RC Ginga window.
 """
 import argparse
 
-from astropy.io import fits
-
-from pypeit import flatfield
-from pypeit import slittrace
-from pypeit import masterframe
-from pypeit import msgs
 from IPython import embed
 
 
@@ -22,6 +16,9 @@ def parser(options=None):
 
 
 def main(pargs):
+
+    from pypeit import flatfield
+
     # Load
     flatImages = flatfield.FlatImages.from_file(pargs.master_file)
     flatImages.show()
@@ -3,10 +3,7 @@ This script displays the flat images in an RC Ginga window.
 """
 import argparse
 
-from pypeit import slittrace
-from pypeit import msgs
 from IPython import embed
-from pypeit import spec2dobj
 
 
 def parser(options=None):
@@ -17,6 +14,10 @@ def parser(options=None):
 
 
 def main(pargs):
+
+    from pypeit import slittrace
+    from pypeit import spec2dobj
+
     # bitmask
     bitmask = slittrace.SlitTraceBitMask()
     # Load
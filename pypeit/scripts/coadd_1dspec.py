@@ -6,12 +6,8 @@ import os
 
 from configobj import ConfigObj
 import numpy as np
-from pypeit import par, msgs
 import argparse
-from pypeit import coadd1d
-from pypeit.core import coadd
-from pypeit.par import pypeitpar
-from pypeit.spectrographs.util import load_spectrograph
+from pypeit import msgs
 from astropy.io import fits
 
 from IPython import embed
@@ -58,6 +54,8 @@ def read_coaddfile(ifile):
 
 
     """
+    from pypeit import par
+
     # Read in the pypeit reduction file
     msgs.info('Loading the coadd1d file')
     lines = par.util._read_pypeit_file_lines(ifile)
@@ -101,44 +99,52 @@ def read_coaddfile(ifile):
     return cfg_lines, spec1dfiles, objids
 
 
-def coadd1d_filelist(files, outroot, det, debug=False, show=False):
+def coadd1d_filelist(files, outroot, det, debug=False, show=False, n_proc=1):
     """
+    Coadd all the objects found in a set of spec1d files.
+
+    Objects are matched between the files using
+    :func:`pypeit.core.coadd.sync_pair`, and each object is written to
+    its own file. Each spec1d file is read only once.
 
     Args:
-        files:
-        outroot:
-        det:
-        debug:
-        show:
+        files (list):
+            List of spec1d files
+        outroot (str):
+            Root of the output file names; the spatial position and
+            detector of each object are appended.
+        det (int):
+            Detector with the objects to coadd
+        debug (bool, optional):
+        show (bool, optional):
+        n_proc (int, optional):
+            Number of processes used to coadd the objects
+            concurrently. Use -1 to use all available CPUs.
+    """
+    from pypeit import coadd1d
+    from pypeit.core import coadd
+    from pypeit.spectrographs.util import load_spectrograph
 
-    Returns:
+    # Read each file once
+    specobjs_dict, _ = coadd1d.build_object_index(files)
 
-    """
     # Build sync_dict
     sync_dict = None
     for ifile in files[1:]:
-        sync_dict = coadd.sync_pair(files[0], ifile, det, sync_dict=sync_dict)
+        sync_dict = coadd.sync_pair(files[0], ifile, det, sync_dict=sync_dict, spec1=specobjs_dict[files[0]],
+                                    spec2=specobjs_dict[ifile])
     #
-    header = fits.getheader(files[0])
-    spectrograph = load_spectrograph(header['PYP_SPEC'])
+    spectrograph = load_spectrograph(specobjs_dict[files[0]].header['PYP_SPEC'])
     par = spectrograph.default_pypeit_par()
 
     par['coadd1d']['flux_value'] = False
+    par['coadd1d']['n_proc'] = n_proc
 
-    sensfile = None
-    # Loop on entries
-    for key in sync_dict:
-
-        coaddfile = outroot+'-SPAT{:04d}-DET{:02d}'.format(key, det)+'.fits'
-
-        coAdd1d = coadd1d.CoAdd1D.get_instance(sync_dict[key]['files'],
-                                               sync_dict[key]['names'],
-                                               spectrograph=spectrograph, par=par['coadd1d'],
-                                               sensfile=sensfile, debug=debug, show=show)
-        # Run
-        coAdd1d.run()
-        # Save to file
-        coAdd1d.save(coaddfile)
+    # Coadd all the entries
+    objects = [list(zip(sync_dict[key]['files'], sync_dict[key]['names'])) for key in sync_dict]
+    coaddfiles = [outroot+'-SPAT{:04d}-DET{:02d}'.format(key, det)+'.fits' for key in sync_dict]
+    coadd1d.coadd_objects(objects, coaddfiles, spectrograph=spectrograph, par=par['coadd1d'], debug=debug,
+                          show=show)
 
 
 def parser(options=None):
@@ -191,6 +197,10 @@ def parser(options=None):
 def main(args):
     """ Runs the 1d coadding steps
     """
+    from pypeit import coadd1d
+    from pypeit.par import pypeitpar
+    from pypeit.spectrographs.util import load_spectrograph
+
     # Load the file
     config_lines, spec1dfiles, objids = read_coaddfile(args.coadd1d_file)
     # Append path for testing
@@ -12,14 +12,8 @@ from configobj import ConfigObj
 
 from astropy.io import fits
 
-from pypeit.pypeit import PypeIt
-from pypeit import par, msgs
-from pypeit import coadd2d
+from pypeit import msgs
 #from pypeit.core import save
-from pypeit import io
-from pypeit.spectrographs.util import load_spectrograph
-from pypeit import specobjs
-from pypeit import spec2dobj
 
 from IPython import embed
 
@@ -47,6 +41,8 @@ def read_coadd2d_file(ifile):
         default :class`pypeit.par.pypeitpar.PypeItPar` parameters, and
         (3) the list of spec2d files to combine.
     """
+    from pypeit import par
+    from pypeit.spectrographs.util import load_spectrograph
 
     # Read in the pypeit reduction file
     msgs.info('Loading the coadd2d file')
@@ -110,6 +106,14 @@ def parser(options=None):
 def main(args):
     """ Executes 2d coadding
     """
+    from pypeit import par
+    from pypeit.pypeit import PypeIt
+    from pypeit.spectrographs.util import load_spectrograph
+    from pypeit import coadd2d
+    from pypeit import io
+    from pypeit import specobjs
+    from pypeit import spec2dobj
+
     msgs.warn('PATH =' + os.getcwd())
     # Load the file
     if args.file is not None:
@@ -4,13 +4,9 @@ Script for fluxing PYPEIT 1d spectra
 """
 from configobj import ConfigObj
 import numpy as np
-from pypeit import par, msgs
-from pypeit.spectrographs.util import load_spectrograph
+from pypeit import msgs
 import argparse
 import os
-from pypeit import fluxcalibrate
-from pypeit.par import pypeitpar
-from pypeit.spectrographs.util import load_spectrograph
 from astropy.io import fits
 
 from IPython import embed
@@ -48,6 +44,8 @@ def read_fluxfile(ifile):
           Empty if no flux block is specified
 
     """
+    from pypeit import par
+
     # Read in the pypeit reduction file
     msgs.info('Loading the fluxcalib file')
     lines = par.util._read_pypeit_file_lines(ifile)
@@ -130,6 +128,10 @@ def parser(options=None):
 def main(args):
     """ Runs fluxing steps
     """
+    from pypeit import fluxcalibrate
+    from pypeit.par import pypeitpar
+    from pypeit.spectrographs.util import load_spectrograph
+
     # Load the file
     config_lines, spec1dfiles, sensfiles = read_fluxfile(args.flux_file)
     # Read in spectrograph from spec1dfile header
@@ -5,7 +5,6 @@ import numpy as np
 from astropy.io import fits
 from astropy.table import Table
 from pypeit import msgs
-from pypeit.par.util import make_pypeit_file
 
 
 class SmartFormatter(argparse.HelpFormatter):
@@ -44,6 +43,8 @@ def main(args):
       It will produce three files named as your_spectragraph.flux, your_spectragraph.coadd1d,
       and your_spectragraph.tell
     """
+    from pypeit.par.util import make_pypeit_file
+
     allfiles = os.listdir(args.sci_path)
     allfiles = np.sort(allfiles)
     spec1dfiles = []
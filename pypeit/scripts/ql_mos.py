@@ -43,45 +43,18 @@ def main(pargs):
 
     from pypeit import pypeit
     from pypeit import pypeitsetup
+    from pypeit import quicklook
     from pypeit.core import framematch
     from pypeit import msgs
 
     spec = pargs.spectrograph
 
     # Config the run
-    cfg_lines = ['[rdx]']
-    cfg_lines += ['    spectrograph = {0}'.format(spec)]
-    cfg_lines += ['    redux_path = {0}_A'.format(os.path.join(os.getcwd(),spec))]
-    if pargs.slit_spat is not None:
-        msgs.info("--slit_spat provided.  Ignoring --det")
-    else:
-        cfg_lines += ['    detnum = {0}'.format(pargs.det)]
-    # Restrict on slit
-    if pargs.slit_spat is not None:
-        cfg_lines += ['    slitspatnum = {0}'.format(pargs.slit_spat)]
-    # Allow for bad headers
-    if pargs.ignore_headers:
-        cfg_lines += ['    ignore_bad_headers = True']
-    cfg_lines += ['[scienceframe]']
-    cfg_lines += ['    [[process]]']
-    cfg_lines += ['        mask_cr = False']
-    # Calibrations
-    cfg_lines += ['[baseprocess]']
-    cfg_lines += ['    use_biasimage = False']
-    cfg_lines += ['[calibrations]']
-    # Input pixel flat?
-    if pargs.user_pixflat is not None:
-        cfg_lines += ['    [[flatfield]]']
-        cfg_lines += ['        pixelflat_file = {0}'.format(pargs.user_pixflat)]
-    # Reduction restrictions
-    cfg_lines += ['[reduce]']
-    cfg_lines += ['    [[extraction]]']
-    cfg_lines += ['         skip_optimal = True']
-    # Set boxcar radius
-    if pargs.box_radius is not None:
-        cfg_lines += ['    boxcar_radius = {0}'.format(pargs.box_radius)]
-    cfg_lines += ['    [[findobj]]']
-    cfg_lines += ['         skip_second_find = True']
+    cfg_lines = quicklook.quicklook_cfg_lines(spec, '{0}_A'.format(os.path.join(os.getcwd(),spec)),
+                                              det=pargs.det, slit_spat=pargs.slit_spat,
+                                              ignore_headers=pargs.ignore_headers,
+                                              user_pixflat=pargs.user_pixflat,
+                                              box_radius=pargs.box_radius)
 
     # Data files
     data_files = [os.path.join(pargs.full_rawpath, pargs.arc),
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+#
+# See top-level LICENSE file for Copyright information
+#
+# -*- coding: utf-8 -*-
+"""
+This script sends science frames to a running quick-look server
+"""
+import argparse
+
+def parser(options=None):
+
+    parser = argparse.ArgumentParser(description='Send science frames to be reduced by a running '
+                                                 'pypeit_ql_server')
+    parser.add_argument('files', type=str, nargs='+',
+                        help='Science frame filenames, relative to the raw path of the server '
+                             'if not absolute.  Use "shutdown" to stop the server.')
+    parser.add_argument('--host', type=str, default='localhost', help='Host name of the server')
+    parser.add_argument('--port', type=int, help='Port of the server; default is 9876')
+
+    if options is None:
+        pargs = parser.parse_args()
+    else:
+        pargs = parser.parse_args(options)
+    return pargs
+
+
+def main(pargs):
+
+    from pypeit import quicklook
+
+    port = quicklook.default_port if pargs.port is None else pargs.port
+    rtval = 0
+    for f in pargs.files:
+        result = quicklook.request_quicklook(f, host=pargs.host, port=port)
+        if result['status'] == 'error':
+            print('{0}: {1}'.format(f, result['message']))
+            rtval = 1
+        elif result['status'] == 'ok':
+            print('{0}: {1} object(s) in {2} ({3:.1f}s)'.format(f, result['nobj'], result['spec2d'],
+                                                             result['latency']['total']))
+    return rtval
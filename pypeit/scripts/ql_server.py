@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+#
+# See top-level LICENSE file for Copyright information
+#
+# -*- coding: utf-8 -*-
+"""
+This script starts a quick-look server that keeps the MOS calibrations in
+memory and reduces each science frame it receives
+"""
+import argparse
+
+from pypeit import msgs
+
+import warnings
+
+def parser(options=None):
+
+    parser = argparse.ArgumentParser(description='Start a QuickLook server that reduces MOS science '
+                                                 'frames sent by pypeit_ql_send')
+    parser.add_argument('spectrograph', type=str, help='Name of spectograph, e.g. shane_kast_blue')
+    parser.add_argument('full_rawpath', type=str, help='Full path to the raw files')
+    parser.add_argument('arc', type=str, help='Arc frame filename')
+    parser.add_argument('flat', type=str, help='Flat frame filename')
+    parser.add_argument('-b', '--box_radius', type=float, help='Set the radius for the boxcar extraction (arcsec)')
+    parser.add_argument('-d', '--det', type=int, default=1, help='Detector number. Cannot use with --slit_spat')
+    parser.add_argument("--ignore_headers", default=False, action="store_true",
+                        help="Ignore bad headers?")
+    parser.add_argument("--user_pixflat", type=str, help="Use a user-supplied pixel flat (e.g. keck_lris_blue)")
+    parser.add_argument("--slit_spat", type=str, help="Reduce only this slit on this detector DET:SPAT_ID, e.g. 1:175")
+    parser.add_argument('--host', type=str, default='localhost', help='Host name to bind')
+    parser.add_argument('--port', type=int, help='Port to bind; default is 9876')
+
+    if options is None:
+        pargs = parser.parse_args()
+    else:
+        pargs = parser.parse_args(options)
+    return pargs
+
+
+def main(pargs):
+
+    from pypeit import quicklook
+
+    ql = quicklook.QuickLook(pargs.spectrograph, pargs.full_rawpath, pargs.arc, pargs.flat,
+                             det=pargs.det, slit_spat=pargs.slit_spat,
+                             ignore_headers=pargs.ignore_headers, user_pixflat=pargs.user_pixflat,
+                             box_radius=pargs.box_radius)
+    ql.serve(host=pargs.host, port=quicklook.default_port if pargs.port is None else pargs.port)
+
+    return 0
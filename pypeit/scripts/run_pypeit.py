@@ -42,6 +42,15 @@ def parser(options=None):
     group.add_argument('-d', '--detector', default=None, help='Detector to limit reductions on.  If the output files exist and -o is used, the outputs for the input detector will be replaced.')
     parser.add_argument('-c', '--calib_only', default=False, action='store_true',
                          help='Only run on calibrations')
+    parser.add_argument('--profile', default=False, action='store_true',
+                        help='Write the time and memory used by each stage of the reduction to '
+                             'the QA directory')
+    parser.add_argument('--cprofile', default=False, action='store_true',
+                        help='Same as --profile, and also write a cProfile dump for each stage')
+    parser.add_argument('--proc_cache', default=None, type=str,
+                        help='Directory in which to cache the processed raw frames.  Later runs '
+                             'with the same processing parameters and master calibrations '
+                             'read them instead of processing the raw frames again.')
 
 #    parser.add_argument('-q', '--quick', default=False, help='Quick reduction',
 #                        action='store_true')
@@ -81,7 +90,8 @@ def main(args):
                            overwrite=args.overwrite,
                            redux_path=args.redux_path,
                            calib_only=args.calib_only,
-                           logname=logname, show=args.show)
+                           logname=logname, show=args.show, profile=args.profile,
+                           cprofile=args.cprofile, proc_cache=args.proc_cache)
 
     # JFH I don't see why this is an optional argument here. We could allow the user to modify an infinite number of parameters
     # from the command line? Why do we have the PypeIt file then? This detector can be set in the pypeit file.
@@ -1,14 +1,11 @@
 
 from configobj import ConfigObj
 import numpy as np
-from pypeit import par, msgs
+from pypeit import msgs
 from astropy.io import fits
-from pypeit.par import pypeitpar
-from pypeit.spectrographs.util import load_spectrograph
 import argparse
 from IPython import embed
 import textwrap
-from pypeit import sensfunc
 import os
 
 
@@ -42,6 +39,7 @@ def read_sensfile(ifile):
           Empty if no flux block is specified
 
     """
+    from pypeit import par
 
     # Read in the pypeit reduction file
     msgs.info('Loading the fluxcalib file')
@@ -112,6 +110,9 @@ def parser(options=None):
 def main(args):
     """ Executes sensitivity function computation.
     """
+    from pypeit import sensfunc
+    from pypeit.par import pypeitpar
+    from pypeit.spectrographs.util import load_spectrograph
 
     # Check parameter inputs
     if args.algorithm is not None and args.sens_file is not None:
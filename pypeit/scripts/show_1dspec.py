@@ -4,11 +4,7 @@ Wrapper to the linetools XSpecGUI
 """
 import argparse
 import sys
-from linetools.guis.xspecgui import XSpecGui
-from PyQt5.QtWidgets import QApplication
 
-from pypeit import specobjs
-from pypeit import msgs
 import numpy as np
 from IPython import embed
 
@@ -30,6 +26,11 @@ def parser(options=None):
 def main(args):
     """ Runs the XSpecGui on an input file
     """
+    from linetools.guis.xspecgui import XSpecGui
+    from PyQt5.QtWidgets import QApplication
+
+    from pypeit import specobjs
+    from pypeit import msgs
 
     sobjs = specobjs.SpecObjs.from_fitsfile(args.file)
     # List only?
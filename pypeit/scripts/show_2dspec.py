@@ -15,17 +15,6 @@ import numpy as np
 from IPython import embed
 
 from astropy.io import fits
-from astropy.stats import sigma_clipped_stats
-
-from pypeit import msgs
-from pypeit import ginga
-from pypeit import slittrace
-from pypeit import specobjs
-
-from pypeit.core.parse import get_dnum
-from pypeit.images.imagebitmask import ImageBitMask
-from pypeit import masterframe
-from pypeit import spec2dobj
 
 
 def parser(options=None):
@@ -52,6 +41,8 @@ def parser(options=None):
 
 def show_trace(specobjs, det, viewer, ch):
 
+    from pypeit import ginga
+
     if specobjs is None:
         return
     in_det = np.where(specobjs.DET == det)[0]
@@ -63,6 +54,15 @@ def show_trace(specobjs, det, viewer, ch):
 
 def main(args):
 
+    from astropy.stats import sigma_clipped_stats
+
+    from pypeit import msgs
+    from pypeit import ginga
+    from pypeit import specobjs
+    from pypeit.core.parse import get_dnum
+    from pypeit.images.imagebitmask import ImageBitMask
+    from pypeit import spec2dobj
+
     # List only?
     if args.list:
         hdu = fits.open(args.file)
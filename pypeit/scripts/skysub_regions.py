@@ -12,12 +12,6 @@ Run above the Science/ folder.
 import os
 import argparse
 
-from pypeit.core.gui.skysub_regions import SkySubGUI
-from pypeit.core import flexure
-from pypeit.scripts import utils
-from pypeit import masterframe
-from pypeit.images import buildimage
-
 
 def parser(options=None):
 
@@ -42,6 +36,12 @@ def parser(options=None):
 
 def main(args):
 
+    from pypeit.core.gui.skysub_regions import SkySubGUI
+    from pypeit.core import flexure
+    from pypeit.scripts import utils
+    from pypeit import masterframe
+    from pypeit.images import buildimage
+
     # Generate a utilities class
     info = utils.Utilities(args.file, args.det)
 
@@ -4,12 +4,9 @@
 #
 # -*- coding: utf-8 -*-
 
-from pypeit import par, msgs
+from pypeit import msgs
 from astropy.io import fits
-from pypeit.par import pypeitpar
-from pypeit.spectrographs.util import load_spectrograph
 import argparse
-from pypeit.core import telluric
 import os
 from pkg_resources import resource_filename
 
@@ -41,6 +38,7 @@ def read_tellfile(ifile):
     cfg_lines: list
         Config lines to modify ParSet values
     """
+    from pypeit import par
 
     # Read in the pypeit reduction file
     msgs.info('Loading the telluric file')
@@ -110,6 +108,9 @@ def main(args):
     """
     Executes telluric correction.
     """
+    from pypeit.core import telluric
+    from pypeit.par import pypeitpar
+    from pypeit.spectrographs.util import load_spectrograph
 
     # Determine the spectrograph
     header = fits.getheader(args.spec1dfile)
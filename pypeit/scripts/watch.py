@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# See top-level LICENSE file for Copyright information
+#
+# -*- coding: utf-8 -*-
+"""
+This script watches a raw directory and reduces the frames as they
+arrive
+"""
+import argparse
+
+def parser(options=None):
+
+    parser = argparse.ArgumentParser(description='Watch a directory of raw frames and reduce them '
+                                                 'as they arrive: masters are built as soon as '
+                                                 'their calibration group is complete and each '
+                                                 'science frame is reduced as soon as its '
+                                                 'masters are ready')
+    parser.add_argument('spectrograph', type=str, help='Name of spectograph, e.g. shane_kast_blue')
+    parser.add_argument('raw_path', type=str, help='Directory with the raw frames')
+    parser.add_argument('-r', '--redux_path', type=str,
+                        help='Top-level directory for the outputs; default is the current '
+                             'directory')
+    parser.add_argument('-e', '--extension', default='.fits',
+                        help='File extension; compression indicators (e.g. .gz) not required.')
+    parser.add_argument('-c', '--cfg_file', type=str,
+                        help='File with user-level parameters to include in each PypeIt file')
+    parser.add_argument('-p', '--poll', type=float, default=30.,
+                        help='Seconds between checks for new frames')
+    parser.add_argument('-s', '--settle', type=float, default=10.,
+                        help='Seconds a new file must remain unmodified before it is read')
+    parser.add_argument('-w', '--calib_wait', type=float, default=300.,
+                        help='Seconds to wait for more calibration frames before building the '
+                             'masters of a complete calibration group, if none of its science '
+                             'frames has arrived')
+    parser.add_argument('-i', '--max_idle', type=float,
+                        help='Stop after this many seconds without new frames; default is to '
+                             'watch until interrupted')
+
+    if options is None:
+        pargs = parser.parse_args()
+    else:
+        pargs = parser.parse_args(options)
+    return pargs
+
+
+def main(pargs):
+
+    from pypeit import incremental
+
+    cfg_lines = None
+    if pargs.cfg_file is not None:
+        with open(pargs.cfg_file, 'r') as f:
+            cfg_lines = f.read().split('\n')
+
+    watcher = incremental.IncrementalReduction(pargs.spectrograph, pargs.raw_path,
+                                               redux_path=pargs.redux_path, cfg_lines=cfg_lines,
+                                               extension=pargs.extension, settle=pargs.settle,
+                                               calib_wait=pargs.calib_wait)
+    watcher.run(poll=pargs.poll, max_idle=pargs.max_idle)
+
+    return 0
@@ -51,8 +51,6 @@ class Spec2DObj(datamodel.DataContainer):
     # tslits_dict -- flexure compensation implies that each frame will have a unique set of slit boundaries, so we probably need to
     #                 write these for each file as well. Alternatively we could just write the offsets to the header.
 
-    # TODO -- Hold, save the non-wavelength images as FLOAT32 ??
-
     # Becase we are including nested DataContainers, be careful not to duplicate variable names!!
     datamodel = {
         'sciimg': dict(otype=np.ndarray, atype=np.floating, desc='2D processed science image'),
@@ -104,6 +102,21 @@ class Spec2DObj(datamodel.DataContainer):
     def _init_internals(self):
         self.process_steps = None
 
+    def set_float_dtype(self, dtype):
+        """
+        Change the type of the image data, in place.
+
+        Only the science, model and inverse-variance images are
+        converted; the tilts and wavelength images are coordinates and
+        keep their precision.
+
+        Args:
+            dtype (:obj:`str`, `numpy.dtype`_):
+                The floating-point type; e.g., ``'float32'``.
+        """
+        super(Spec2DObj, self).set_float_dtype(dtype, keys=['sciimg', 'ivarraw', 'skymodel',
+                                                             'objmodel', 'ivarmodel'])
+
     def _validate(self):
         """
         Assert that the detector has been set
@@ -469,6 +469,13 @@ class SpecObjs(object):
         # Recast as an array
         return lst_to_array(lst)
 
+    # Pickling; required because of the overloaded attribute access
+    def __getstate__(self):
+        return {'specobjs': self.specobjs, 'header': self.header}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
     # Printing
     def __repr__(self):
         txt = '<{:s}:'.format(self.__class__.__name__)
@@ -1,24 +1,70 @@
+"""
+Spectrograph-specific code.
+
+The instrument modules are only imported when first needed, either
+when a spectrograph is instantiated by
+:func:`pypeit.spectrographs.util.load_spectrograph` or when the module
+is accessed as an attribute of this package (e.g.,
+``spectrographs.keck_deimos``), such that using one spectrograph does
+not require importing the code (and dependencies) of all the others.
+"""
+import importlib
 
 from pypeit.spectrographs import spectrograph
-from pypeit.spectrographs import gemini_gnirs
-from pypeit.spectrographs import gemini_gmos
-from pypeit.spectrographs import gemini_flamingos
-from pypeit.spectrographs import keck_deimos
-from pypeit.spectrographs import keck_kcwi
-from pypeit.spectrographs import keck_lris
-from pypeit.spectrographs import keck_nires
-from pypeit.spectrographs import keck_hires
-from pypeit.spectrographs import keck_nirspec
-from pypeit.spectrographs import keck_mosfire
-from pypeit.spectrographs import magellan_fire
-from pypeit.spectrographs import magellan_mage
-from pypeit.spectrographs import shane_kast
-from pypeit.spectrographs import tng_dolores
-from pypeit.spectrographs import vlt_xshooter
-from pypeit.spectrographs import wht_isis
-from pypeit.spectrographs import lbt_mods
-from pypeit.spectrographs import vlt_fors
-from pypeit.spectrographs import mdm_osmos
-from pypeit.spectrographs import lbt_luci
-from pypeit.spectrographs import mmt_binospec
-from pypeit.spectrographs import not_alfosc
+
+spectrograph_classes = {'gemini_gnirs': ('gemini_gnirs', 'GeminiGNIRSSpectrograph'),
+                        'gemini_flamingos1': ('gemini_flamingos', 'GeminiFLAMINGOS1Spectrograph'),
+                        'gemini_flamingos2': ('gemini_flamingos', 'GeminiFLAMINGOS2Spectrograph'),
+                        'gemini_gmos_south_ham': ('gemini_gmos', 'GeminiGMOSSHamSpectrograph'),
+                        'gemini_gmos_north_e2v': ('gemini_gmos', 'GeminiGMOSNE2VSpectrograph'),
+                        'gemini_gmos_north_ham': ('gemini_gmos', 'GeminiGMOSNHamSpectrograph'),
+                        'keck_deimos': ('keck_deimos', 'KeckDEIMOSSpectrograph'),
+                        'keck_hires_red': ('keck_hires', 'KECKHIRESRSpectrograph'),
+                        'keck_kcwi': ('keck_kcwi', 'KeckKCWISpectrograph'),
+                        'keck_lris_blue': ('keck_lris', 'KeckLRISBSpectrograph'),
+                        'keck_lris_red': ('keck_lris', 'KeckLRISRSpectrograph'),
+                        'keck_mosfire': ('keck_mosfire', 'KeckMOSFIRESpectrograph'),
+                        'keck_nires': ('keck_nires', 'KeckNIRESSpectrograph'),
+                        'keck_nirspec_low': ('keck_nirspec', 'KeckNIRSPECLowSpectrograph'),
+                        'lbt_luci1': ('lbt_luci', 'LBTLUCI1Spectrograph'),
+                        'lbt_luci2': ('lbt_luci', 'LBTLUCI2Spectrograph'),
+                        'lbt_mods1r': ('lbt_mods', 'LBTMODS1RSpectrograph'),
+                        'lbt_mods1b': ('lbt_mods', 'LBTMODS1BSpectrograph'),
+                        'lbt_mods2r': ('lbt_mods', 'LBTMODS2RSpectrograph'),
+                        'lbt_mods2b': ('lbt_mods', 'LBTMODS2BSpectrograph'),
+                        'magellan_fire': ('magellan_fire', 'MagellanFIREEchelleSpectrograph'),
+                        'magellan_fire_long': ('magellan_fire', 'MagellanFIRELONGSpectrograph'),
+                        'magellan_mage': ('magellan_mage', 'MagellanMAGESpectrograph'),
+                        'mdm_osmos_mdm4k': ('mdm_osmos', 'MDMOSMOSMDM4KSpectrograph'),
+                        'mmt_binospec': ('mmt_binospec', 'MMTBINOSPECSpectrograph'),
+                        'not_alfosc': ('not_alfosc', 'NOTALFOSCSpectrograph'),
+                        'shane_kast_blue': ('shane_kast', 'ShaneKastBlueSpectrograph'),
+                        'shane_kast_red': ('shane_kast', 'ShaneKastRedSpectrograph'),
+                        'shane_kast_red_ret': ('shane_kast', 'ShaneKastRedRetSpectrograph'),
+                        'tng_dolores': ('tng_dolores', 'TNGDoloresSpectrograph'),
+                        'vlt_fors2': ('vlt_fors', 'VLTFORS2Spectrograph'),
+                        'vlt_xshooter_uvb': ('vlt_xshooter', 'VLTXShooterUVBSpectrograph'),
+                        'vlt_xshooter_vis': ('vlt_xshooter', 'VLTXShooterVISSpectrograph'),
+                        'vlt_xshooter_nir': ('vlt_xshooter', 'VLTXShooterNIRSpectrograph'),
+                        'wht_isis_blue': ('wht_isis', 'WHTISISBlueSpectrograph'),
+                        'wht_isis_red': ('wht_isis', 'WHTISISRedSpectrograph')}
+"""
+The module and class name of each supported spectrograph.  This must be
+kept consistent with :attr:`pypeit.defs.pypeit_spectrographs`.
+"""
+
+_modules = ['slitmask', 'opticalmodel', 'util'] \
+                + sorted(set([m for m, c in spectrograph_classes.values()]))
+
+
+def __getattr__(name):
+    """
+    Import the spectrograph modules on first access.
+    """
+    if name in _modules:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + _modules)
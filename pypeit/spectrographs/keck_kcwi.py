@@ -127,6 +127,12 @@ class KeckKCWISpectrograph(spectrograph.Spectrograph):
             par['calibrations']['wavelengths']['reid_arxiv'] = 'keck_kcwi_BM.fits'
             par['calibrations']['wavelengths']['lamps'] = ['FeI', 'ArI', 'ArII']
 
+        # Width of the slices on the sky
+        slice_width = dict(Large=1.35, Medium=0.69, Small=0.35)
+        ifunam = self.get_meta_value(headarr, 'decker')
+        if ifunam in slice_width.keys():
+            par['reduce']['cube']['slice_width'] = slice_width[ifunam]
+
         # FWHM
         # binning = parse.parse_binning(self.get_meta_value(headarr, 'binning'))
         # par['calibrations']['wavelengths']['fwhm'] = 6.0 / binning[1]
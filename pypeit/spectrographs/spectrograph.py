@@ -36,10 +36,7 @@ from pkg_resources import resource_filename
 import numpy as np
 from astropy.io import fits
 
-from linetools import utils as ltu
-
 from pypeit import msgs
-from pypeit.core.wavecal import wvutils
 from pypeit.core import parse
 from pypeit.core import procimg
 from pypeit.core import meta
@@ -995,6 +992,10 @@ class Spectrograph(object):
 
         """
 
+        # Deferred to avoid importing the wavelength calibration code
+        # with every spectrograph
+        from pypeit.core.wavecal import wvutils
+
         binspectral, binspatial = parse.parse_binning(binning)
         logmin, logmax = self.loglam_minmax
         loglam_grid = wvutils.wavegrid(logmin, logmax, self.dloglam*binspectral, samp_fact=samp_fact)
@@ -0,0 +1,670 @@
+"""
+Performance benchmarks of the most expensive reduction steps.
+
+Each benchmark builds synthetic data that mimic a real observation, so
+that the benchmarks can be run offline and without the dev-suite data,
+and times a single call to the function being benchmarked; building
+the data is not included in the timing.  The synthetic data are
+parametrized by the size of the detector (``nspec``), the number of
+slits (``nslits``), the number of objects per slit (``nobj``), the
+number of archived arc spectra (``narxiv``), and the number of
+exposures (``nexp``).
+
+:func:`run_scaling` runs each benchmark over a grid in each of its
+parameters, holding the others at their default, and :func:`fit_scaling`
+fits the power-law index of the run time with each parameter.  These
+are run by ``pypeit/tests/test_benchmarks.py`` when the
+``PYPEIT_BENCHMARK`` environment variable is set, and by the
+``pypeit_benchmark`` script.
+
+:func:`time_scripts` measures the start-up time of each console script,
+and :func:`image_memory` measures the memory used by the images at each
+processing stage for each floating-point precision.
+
+.. include common links, assuming primary doc root is up one directory
+.. include:: ../links.rst
+"""
+import sys
+import time
+import tracemalloc
+import pkgutil
+import subprocess
+
+from IPython import embed
+
+import numpy as np
+
+from astropy.io import fits
+from astropy.table import Table
+
+from pypeit import msgs
+from pypeit import utils
+from pypeit import edgetrace
+from pypeit import spec2dobj
+from pypeit.images import buildimage
+from pypeit.images import imagebitmask
+from pypeit.images import pypeitimage
+from pypeit.par.pypeitpar import ProcessImagesPar
+from pypeit.core import skysub
+from pypeit.core import extract
+from pypeit.core import combine
+from pypeit.core import coadd
+from pypeit.core.wavecal import autoid
+from pypeit.spectrographs.util import load_spectrograph
+
+
+def fake_science(nspec=1024, nslits=1, nobj=1, slit_width=60., seed=1):
+    """
+    Construct a multi-slit science frame with sky lines and objects.
+
+    The slits are slightly tilted with respect to the detector columns,
+    and the sky lines are slightly tilted with respect to the detector
+    rows.  The objects are Gaussian traces evenly spaced along each
+    slit.
+
+    Args:
+        nspec (:obj:`int`, optional):
+            Number of spectral pixels.
+        nslits (:obj:`int`, optional):
+            Number of slits.
+        nobj (:obj:`int`, optional):
+            Number of objects in each slit.
+        slit_width (:obj:`float`, optional):
+            Width of each slit in pixels.  The number of spatial pixels
+            is set by the number and width of the slits.
+        seed (:obj:`int`, optional):
+            Seed for the random number generator.
+
+    Returns:
+        :obj:`dict`: Dictionary with the science image (``image``), its
+        inverse variance (``ivar``), read-noise variance (``rn2img``),
+        tilts (``tilts``), wavelengths (``waveimg``), true sky
+        (``sky``), slit ID of each pixel (``slitmask``; -1 for pixels
+        outside the slits), and the left and right edges of each slit
+        (``left`` and ``right``; shape is :math:`(N_{\rm spec}, N_{\rm
+        slits})`).
+    """
+    rng = np.random.RandomState(seed)
+    gap, margin = 6., 10.
+    nspat = int(nslits*(slit_width+gap) + 2*margin)
+    spec = np.arange(nspec, dtype=float)
+    spat = np.arange(nspat, dtype=float)
+
+    # Slit edges
+    left = margin + gap/2 + np.arange(nslits)[None,:]*(slit_width+gap) \
+                + 0.002*(spec[:,None]-nspec/2)
+    right = left + slit_width
+
+    # Sky with one emission line every 20 pixels
+    tilts = (spec[:,None] + 0.01*(spat[None,:]-nspat/2))/(nspec-1)
+    piximg = tilts*(nspec-1)
+    sky = np.full((nspec, nspat), 50., dtype=float)
+    for c, a in zip(rng.uniform(0, nspec, size=nspec//20), rng.uniform(100, 1000, size=nspec//20)):
+        sky += a*np.exp(-0.5*((piximg-c)/1.3)**2)
+
+    # Objects
+    slitmask = np.full((nspec, nspat), -1, dtype=int)
+    obj = np.zeros_like(sky)
+    for i in range(nslits):
+        slitmask[(spat[None,:] >= left[:,i,None]) & (spat[None,:] <= right[:,i,None])] = i
+        for j in range(nobj):
+            cen = left[:,i] + (j+1)*slit_width/(nobj+1)
+            obj += 200.*np.exp(-0.5*((spat[None,:]-cen[:,None])/2.)**2)
+
+    rn2img = np.full_like(sky, 16.)
+    model = sky + obj
+    image = model + rng.normal(size=model.shape)*np.sqrt(model + rn2img)
+    ivar = utils.inverse(model + rn2img)
+    ivar[slitmask < 0] = 0.
+    return dict(image=image, ivar=ivar, rn2img=rn2img, tilts=tilts, waveimg=4000. + piximg,
+                sky=sky, slitmask=slitmask, left=left, right=right)
+
+
+def fake_trace(nspec=1024, nslits=1, slit_width=60., seed=1):
+    """
+    Construct a trace image of a set of illuminated slits.
+
+    Args:
+        nspec (:obj:`int`, optional):
+            Number of spectral pixels.
+        nslits (:obj:`int`, optional):
+            Number of slits.
+        slit_width (:obj:`float`, optional):
+            Width of each slit in pixels.
+        seed (:obj:`int`, optional):
+            Seed for the random number generator.
+
+    Returns:
+        :obj:`tuple`: The :class:`~pypeit.images.buildimage.TraceImage`
+        and the left and right edges of each slit; see
+        :func:`fake_science`.
+    """
+    rng = np.random.RandomState(seed)
+    d = fake_science(nspec=nspec, nslits=nslits, nobj=0, slit_width=slit_width, seed=seed)
+    spat = np.arange(d['image'].shape[1], dtype=float)
+    img = np.zeros_like(d['image'])
+    for i in range(nslits):
+        img += 1000. * 0.5*(1+np.tanh((spat[None,:]-d['left'][:,i,None])/0.7)) \
+                    * 0.5*(1-np.tanh((spat[None,:]-d['right'][:,i,None])/0.7))
+    img += rng.normal(size=img.shape)*np.sqrt(img+16.)
+    detector = load_spectrograph('shane_kast_blue').get_detector_par(fits.HDUList([]), 1)
+    return buildimage.TraceImage(image=img, ivar=np.ones_like(img), detector=detector), \
+                d['left'], d['right']
+
+
+def fake_arc(nspec=2048, narxiv=1, nlines=None, seed=1):
+    """
+    Construct an arc spectrum and an archive of arc spectra with known
+    wavelength solutions.
+
+    The archived spectra are shifted and stretched with respect to the
+    arc spectrum by different amounts.
+
+    Args:
+        nspec (:obj:`int`, optional):
+            Number of spectral pixels.
+        narxiv (:obj:`int`, optional):
+            Number of archived spectra.
+        nlines (:obj:`int`, optional):
+            Number of arc lines.  If None, there is one line every 35
+            pixels.
+        seed (:obj:`int`, optional):
+            Seed for the random number generator.
+
+    Returns:
+        :obj:`tuple`: The arc spectrum, its true wavelengths, the
+        archived spectra, their wavelengths (both with shape
+        :math:`(N_{\rm spec}, N_{\rm arxiv})`), and the line list.
+    """
+    rng = np.random.RandomState(seed)
+    wave_min, dwave = 4000., 1.2
+    pix = np.arange(nspec, dtype=float)
+    _nlines = nspec//35 if nlines is None else nlines
+    line_wave = np.sort(rng.uniform(wave_min+10*dwave, wave_min+(nspec-10)*dwave, _nlines))
+    amp = rng.uniform(200., 5000., _nlines)
+
+    def spectrum(wave):
+        return 20. + np.sum(amp[:,None]*np.exp(-0.5*((wave[None,:]-line_wave[:,None])
+                                                     /(1.5*dwave))**2), axis=0)
+
+    wave = wave_min - 7.3*dwave + 1.001*dwave*pix
+    spec = spectrum(wave)
+    spec += rng.normal(size=nspec)*np.sqrt(spec)
+    wave_arxiv = np.stack([wave_min + rng.uniform(-5,5)*dwave
+                                + rng.uniform(0.9995,1.0005)*dwave*pix for i in range(narxiv)],
+                          axis=1)
+    spec_arxiv = np.stack([spectrum(w) for w in wave_arxiv.T], axis=1)
+    return spec, wave, spec_arxiv, wave_arxiv, Table([line_wave], names=['wave'])
+
+
+def fake_stack(nspec=1024, nexp=3, seed=1):
+    """
+    Construct a stack of exposures of a flat field.
+
+    The number of spatial pixels is a quarter of the number of spectral
+    pixels, and 0.1% of the pixels are masked.
+
+    Args:
+        nspec (:obj:`int`, optional):
+            Number of spectral pixels.
+        nexp (:obj:`int`, optional):
+            Number of exposures.
+        seed (:obj:`int`, optional):
+            Seed for the random number generator.
+
+    Returns:
+        :obj:`tuple`: The images, their variances, and the good-pixel
+        mask (all with shape :math:`(N_{\rm exp}, N_{\rm spec}, N_{\rm
+        spat})`).
+    """
+    rng = np.random.RandomState(seed)
+    shape = (nexp, nspec, nspec//4)
+    sci = 100. + 10.*rng.normal(size=shape)
+    return sci, np.full(shape, 100.), rng.uniform(size=shape) > 0.001
+
+
+def fake_spectra(nspec=2048, nexp=3, seed=1):
+    """
+    Construct a set of 1D spectra of the same object, each on a
+    slightly different wavelength grid.
+
+    Args:
+        nspec (:obj:`int`, optional):
+            Number of spectral pixels.
+        nexp (:obj:`int`, optional):
+            Number of exposures.
+        seed (:obj:`int`, optional):
+            Seed for the random number generator.
+
+    Returns:
+        :obj:`tuple`: The wavelengths, fluxes, inverse variances, and
+        good-pixel masks (all with shape :math:`(N_{\rm spec}, N_{\rm
+        exp})`).
+    """
+    rng = np.random.RandomState(seed)
+    waves = 4000. + np.arange(nspec, dtype=float)[:,None] + 0.3*np.arange(nexp)[None,:]
+    fluxes = 10. + 2*np.sin(waves/50.) + rng.normal(size=waves.shape)
+    return waves, fluxes, np.ones_like(waves), np.ones(waves.shape, dtype=bool)
+
+
+def timeit(func, *args, **kwargs):
+    """
+    Time a single function call.
+
+    Returns:
+        :obj:`tuple`: The elapsed wall-clock time in seconds and the
+        result of the call.
+    """
+    t = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - t, result
+
+
+def bench_bspline_profile(nspec=1024, seed=1):
+    """
+    Time :func:`pypeit.utils.bspline_profile` fitting the sky in a slit.
+    """
+    d = fake_science(nspec=nspec, nobj=0, seed=seed)
+    thismask = d['slitmask'] == 0
+    srt = np.argsort(d['tilts'][thismask])
+    pix = d['tilts'][thismask][srt]*(nspec-1)
+    sky = d['image'][thismask][srt]
+    return timeit(utils.bspline_profile, pix, sky, d['ivar'][thismask][srt], np.ones_like(sky),
+                  kwargs_bspline={'bkspace':0.6},
+                  kwargs_reject={'groupbadpix':True, 'maxrej':10})
+
+
+def bench_global_skysub(nspec=1024, nslits=1, seed=1):
+    """
+    Time :func:`pypeit.core.skysub.global_skysub` for all slits.
+    """
+    d = fake_science(nspec=nspec, nslits=nslits, seed=seed)
+
+    def _global_skysub():
+        skymodel = np.zeros_like(d['image'])
+        for i in range(nslits):
+            thismask = d['slitmask'] == i
+            skymodel[thismask] = skysub.global_skysub(d['image'], d['ivar'], d['tilts'],
+                                                      thismask, d['left'][:,i], d['right'][:,i],
+                                                      inmask=d['ivar'] > 0)
+        return skymodel
+
+    return timeit(_global_skysub)
+
+
+def bench_local_skysub_extract(nspec=1024, nobj=1, seed=1):
+    """
+    Time :func:`pypeit.core.skysub.local_skysub_extract` for all
+    objects in a slit.
+
+    The objects are found using the true sky; the returned result is
+    the list of extracted objects.
+    """
+    d = fake_science(nspec=nspec, nobj=nobj, slit_width=100., seed=seed)
+    thismask = d['slitmask'] == 0
+    sobjs, _ = extract.objfind(d['image']-d['sky'], thismask, d['left'][:,0], d['right'][:,0],
+                               inmask=d['ivar'] > 0, fwhm=4.7, sig_thresh=5.,
+                               specobj_dict=dict(SLITID=0, DET=1, OBJTYPE='science',
+                                                 PYPELINE='MultiSlit'))
+    t, _ = timeit(skysub.local_skysub_extract, d['image'], d['ivar'], d['tilts'], d['waveimg'],
+                  d['sky'], d['rn2img'], thismask, d['left'][:,0], d['right'][:,0], sobjs,
+                  ingpm=d['ivar'] > 0, box_rad=7.)
+    return t, sobjs
+
+
+def bench_auto_trace(nspec=1024, nslits=1, seed=1):
+    """
+    Time :func:`pypeit.edgetrace.EdgeTraceSet.auto_trace`.
+
+    The returned result is the :class:`~pypeit.edgetrace.EdgeTraceSet`.
+    """
+    trace_img = fake_trace(nspec=nspec, nslits=nslits, seed=seed)[0]
+    spectrograph = load_spectrograph('shane_kast_blue')
+    edges = edgetrace.EdgeTraceSet(trace_img, spectrograph,
+                                   spectrograph.default_pypeit_par()['calibrations']['slitedges'])
+    t, _ = timeit(edges.auto_trace, bpm=np.zeros(trace_img.image.shape, dtype=bool), det=1,
+                  binning='1,1')
+    return t, edges
+
+
+def bench_reidentify(nspec=2048, narxiv=1, seed=1):
+    """
+    Time :func:`pypeit.core.wavecal.autoid.reidentify`.
+    """
+    spec, _, spec_arxiv, wave_arxiv, line_list = fake_arc(nspec=nspec, narxiv=narxiv, seed=seed)
+    return timeit(autoid.reidentify, spec, spec_arxiv, wave_arxiv, line_list, 1)
+
+
+def bench_weighted_combine(nspec=1024, nexp=3, seed=1):
+    """
+    Time :func:`pypeit.core.combine.weighted_combine` with sigma
+    clipping.
+    """
+    sci, var, gpm = fake_stack(nspec=nspec, nexp=nexp, seed=seed)
+    return timeit(combine.weighted_combine, np.ones(nexp), [sci], [var], gpm, sigma_clip=True,
+                  sigma_clip_stack=sci, sigrej=3.)
+
+
+def bench_combspec(nspec=2048, nexp=3, seed=1):
+    """
+    Time :func:`pypeit.core.coadd.combspec`.
+    """
+    waves, fluxes, ivars, gpms = fake_spectra(nspec=nspec, nexp=nexp, seed=seed)
+    return timeit(coadd.combspec, waves, fluxes, ivars, gpms, 100)
+
+
+def bench_combspec_median(nspec=2048, nexp=8, seed=1):
+    """
+    Time :func:`pypeit.core.coadd.combspec` using median rescaling,
+    which avoids the per-exposure polynomial fits and isolates the
+    batched operations on the full set of exposures.
+    """
+    waves, fluxes, ivars, gpms = fake_spectra(nspec=nspec, nexp=nexp, seed=seed)
+    return timeit(coadd.combspec, waves, fluxes, ivars, gpms, 100, scale_method='median')
+
+
+def bench_bitmask(nspec=4096, seed=1):
+    """
+    Time building and querying a :class:`~pypeit.images.imagebitmask.ImageBitMask`
+    mask for an image, using the same flags as
+    :func:`pypeit.images.pypeitimage.PypeItImage.build_mask`.
+    """
+    rng = np.random.RandomState(seed)
+    img = rng.normal(size=(nspec, nspec))
+    bm = imagebitmask.ImageBitMask()
+    flags = ['BPM', 'CR', 'SATURATION', 'MINCOUNTS', 'IS_NAN', 'IVAR0', 'OFFSLITS']
+    selections = [img > 3.5 - 0.1*i for i in range(len(flags))]
+
+    def _build():
+        mask = np.zeros(img.shape, dtype=bm.minimum_dtype(asuint=True))
+        for flag, indx in zip(flags, selections):
+            bm.turn_on_inplace(mask, flag, where=indx)
+        bm.turn_off_inplace(mask, 'SATURATION')
+        return bm.flagged(mask, flag=flags[:3]), bm.flagged(mask)
+
+    return timeit(_build)
+
+
+benchmarks = {'bspline_profile': dict(func=bench_bspline_profile,
+                                      grid=dict(nspec=[512, 1024, 2048, 4096]),
+                                      smoke=dict(nspec=256)),
+              'global_skysub': dict(func=bench_global_skysub,
+                                    grid=dict(nspec=[512, 1024, 2048, 4096],
+                                              nslits=[1, 2, 4, 8]),
+                                    smoke=dict(nspec=256, nslits=2)),
+              'local_skysub_extract': dict(func=bench_local_skysub_extract,
+                                           grid=dict(nspec=[256, 512, 1024, 2048],
+                                                     nobj=[1, 2, 3, 4]),
+                                           smoke=dict(nspec=256, nobj=2)),
+              'auto_trace': dict(func=bench_auto_trace,
+                                 grid=dict(nspec=[512, 1024, 2048, 4096],
+                                           nslits=[1, 2, 4, 8, 16]),
+                                 smoke=dict(nspec=512, nslits=2)),
+              'reidentify': dict(func=bench_reidentify,
+                                 grid=dict(nspec=[1024, 2048, 3072, 4096],
+                                           narxiv=[1, 2, 4, 8]),
+                                 smoke=dict(nspec=1024, narxiv=2)),
+              'weighted_combine': dict(func=bench_weighted_combine,
+                                       grid=dict(nspec=[512, 1024, 2048, 4096],
+                                                 nexp=[2, 4, 8, 16]),
+                                       smoke=dict(nspec=256, nexp=3)),
+              'combspec': dict(func=bench_combspec,
+                               grid=dict(nspec=[1024, 2048, 4096, 8192],
+                                         nexp=[2, 4, 8, 16]),
+                               smoke=dict(nspec=1024, nexp=2)),
+              'combspec_median': dict(func=bench_combspec_median,
+                                      grid=dict(nexp=[4, 8, 16, 32, 64]),
+                                      smoke=dict(nspec=1024, nexp=4)),
+              'bitmask': dict(func=bench_bitmask,
+                              grid=dict(nspec=[1024, 2048, 4096, 8192]),
+                              smoke=dict(nspec=256))}
+"""
+The available benchmarks.  For each benchmark, ``func`` is the function
+that builds the data and times the call, ``grid`` provides the values
+of each parameter used by :func:`run_scaling`, and ``smoke`` provides a
+small set of parameters used to quickly check that the benchmark runs.
+"""
+
+
+def run_scaling(names=None, repeat=1):
+    """
+    Run the benchmarks over their grid of parameters.
+
+    Each parameter is varied in turn, with the other parameters held at
+    the function defaults.  Each benchmark is first run once with its
+    ``smoke`` parameters, such that any one-time cost (e.g., compiling
+    code) is not included in the timings.
+
+    Args:
+        names (:obj:`list`, optional):
+            Names of the benchmarks to run.  If None, all benchmarks in
+            :data:`benchmarks` are run.
+        repeat (:obj:`int`, optional):
+            Number of times to run each benchmark; the minimum time is
+            reported.
+
+    Returns:
+        `astropy.table.Table`_: Table with the name of the benchmark,
+        the parameter varied, its value, and the run time in seconds.
+    """
+    _names = list(benchmarks.keys()) if names is None else names
+    rows = []
+    for name in _names:
+        if name not in benchmarks.keys():
+            msgs.error('Unknown benchmark: {0}.  Options are: {1}'.format(
+                       name, ', '.join(benchmarks.keys())))
+        func = benchmarks[name]['func']
+        func(**benchmarks[name]['smoke'])
+        for par, values in benchmarks[name]['grid'].items():
+            for value in values:
+                t = min([func(**{par:value})[0] for i in range(repeat)])
+                rows += [(name, par, value, t)]
+    return Table(rows=rows, names=['benchmark', 'parameter', 'value', 'time'],
+                 dtype=[str, str, int, float])
+
+
+def fit_scaling(tbl):
+    """
+    Fit the power-law index of the run time with each parameter.
+
+    Args:
+        tbl (`astropy.table.Table`_):
+            Table returned by :func:`run_scaling`.
+
+    Returns:
+        `astropy.table.Table`_: Table with the name of the benchmark, the
+        parameter, and the fitted index; e.g., an index of 1 means the
+        run time scales linearly with the parameter.
+    """
+    rows = []
+    for grp in tbl.group_by(['benchmark', 'parameter']).groups:
+        index = np.polyfit(np.log(grp['value']), np.log(grp['time']), 1)[0] \
+                    if len(grp) > 1 else np.nan
+        rows += [(grp['benchmark'][0], grp['parameter'][0], index)]
+    return Table(rows=rows, names=['benchmark', 'parameter', 'index'], dtype=[str, str, float])
+
+
+def report(tbl):
+    """
+    Print the scaling curves.
+
+    Args:
+        tbl (`astropy.table.Table`_):
+            Table returned by :func:`run_scaling`.
+    """
+    index = fit_scaling(tbl)
+    msg = 'Benchmark scaling' + msgs.newline() \
+            + '    {0:<22} {1:<9} {2:>6}  {3}'.format('Benchmark', 'Parameter', 'Index',
+                                                       'Time (s) at each value')
+    for row in index:
+        grp = tbl[(tbl['benchmark'] == row['benchmark']) & (tbl['parameter'] == row['parameter'])]
+        msg += msgs.newline() + '    {0:<22} {1:<9} {2:6.2f}  {3}'.format(
+                    row['benchmark'], row['parameter'], row['index'],
+                    ', '.join(['{0}: {1:.3f}'.format(v, t) for v, t in zip(grp['value'],
+                                                                            grp['time'])]))
+    msgs.info(msg)
+
+
+def time_scripts(names=None):
+    """
+    Measure the start-up time of the console scripts.
+
+    For each script, a new python interpreter imports the script module
+    and constructs its command-line parser (with the ``-h`` option).
+    The time excludes the start-up of the interpreter itself.
+
+    Args:
+        names (:obj:`list`, optional):
+            Names of the script modules in :mod:`pypeit.scripts` (e.g.,
+            ``view_fits``).  If None, all scripts are timed.
+
+    Returns:
+        `astropy.table.Table`_: Table with the name of each script and
+        its start-up time in seconds.  The time is NaN if the script
+        could not be started.
+    """
+    from pypeit import scripts
+    _names = sorted([m.name for m in pkgutil.iter_modules(scripts.__path__) if m.name != 'utils']) \
+                if names is None else names
+    code = 'import time\nt = time.perf_counter()\nfrom pypeit.scripts import {0} as s\n' \
+           'try:\n    s.parser([\'-h\'])\nexcept SystemExit:\n    pass\n' \
+           'print(\'STARTUP\', time.perf_counter() - t)'
+    rows = []
+    for name in _names:
+        result = subprocess.run([sys.executable, '-c', code.format(name)], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+        t = [float(l.split()[1]) for l in result.stdout.splitlines() if l.startswith('STARTUP')]
+        if len(t) == 0:
+            msgs.warn('Could not start {0}:'.format(name) + msgs.newline()
+                      + result.stderr.strip().splitlines()[-1])
+        rows += [(name, t[0] if len(t) > 0 else np.nan)]
+    return Table(rows=rows, names=['script', 'time'], dtype=[str, float])
+
+
+def report_scripts(tbl):
+    """
+    Print the start-up time of the console scripts.
+
+    Args:
+        tbl (`astropy.table.Table`_):
+            Table returned by :func:`time_scripts`.
+    """
+    msg = 'Script start-up time' + msgs.newline() \
+            + '    {0:<22} {1:>8}'.format('Script', 'Time (s)')
+    for row in tbl:
+        msg += msgs.newline() + '    {0:<22} {1:8.2f}'.format(row['script'], row['time'])
+    msgs.info(msg)
+
+
+def _nbytes(obj):
+    """
+    Return the number of bytes in the arrays held by a DataContainer.
+    """
+    return sum([obj[key].nbytes for key in obj.keys() if isinstance(obj[key], np.ndarray)])
+
+
+def image_memory(nspec=4096, nslits=16, nexp=3, seed=1):
+    """
+    Measure the memory used by the images at each processing stage.
+
+    For each valid ``float_dtype`` in
+    :class:`~pypeit.par.pypeitpar.ProcessImagesPar`, this measures the
+    memory of the images produced by the following stages, built from
+    the same synthetic science frame (see :func:`fake_science`):
+
+        - ``process``: The :class:`~pypeit.images.pypeitimage.PypeItImage`
+          of a processed frame, including its mask.
+        - ``combine``: The image stacks used to combine ``nexp`` frames
+          (see :class:`~pypeit.images.combineimage.CombineImage`) and
+          their combination.
+        - ``reduce``: The :class:`~pypeit.spec2dobj.Spec2DObj` with the
+          reduced images.
+
+    Args:
+        nspec (:obj:`int`, optional):
+            Number of spectral pixels.
+        nslits (:obj:`int`, optional):
+            Number of slits; this sets the number of spatial pixels.
+        nexp (:obj:`int`, optional):
+            Number of combined frames.
+        seed (:obj:`int`, optional):
+            Seed for the random number generator.
+
+    Returns:
+        `astropy.table.Table`_: Table with the stage, the floating-point
+        type, the number of bytes in the images kept at the end of the
+        stage, and the peak memory allocated during the stage (measured
+        with :mod:`tracemalloc`).
+    """
+    d = fake_science(nspec=nspec, nslits=nslits, nobj=0, seed=seed)
+    bpm = np.zeros(d['image'].shape, dtype=np.int8)
+    rows = []
+    for float_dtype in ProcessImagesPar.valid_float_dtypes():
+        # Processed frame
+        tracemalloc.start()
+        img = pypeitimage.PypeItImage(d['image'].copy(), ivar=d['ivar'].copy(),
+                                      rn2img=d['rn2img'].copy(), bpm=bpm)
+        img.build_mask(saturation=1e10, mincounts=-1e10)
+        img.set_float_dtype(float_dtype)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows += [('process', float_dtype, _nbytes(img), peak)]
+
+        # Combined frames
+        tracemalloc.start()
+        shape = (nexp,) + img.image.shape
+        img_stack = np.zeros(shape, dtype=float_dtype)
+        ivar_stack = np.zeros(shape, dtype=float_dtype)
+        rn2img_stack = np.zeros(shape, dtype=float_dtype)
+        mask_stack = np.zeros(shape, dtype=img.bitmask.minimum_dtype(asuint=True))
+        for i in range(nexp):
+            img_stack[i] = img.image
+            ivar_stack[i] = img.ivar
+            rn2img_stack[i] = img.rn2img
+            mask_stack[i] = img.fullmask
+        img_list_out, var_list_out, outmask, nused \
+                = combine.weighted_combine(np.full(nexp, 1./nexp), [img_stack],
+                                           [utils.inverse(ivar_stack), rn2img_stack],
+                                           mask_stack == 0, sigma_clip=True,
+                                           sigma_clip_stack=img_stack, sigrej=3.)
+        nbytes = img_stack.nbytes + ivar_stack.nbytes + rn2img_stack.nbytes + mask_stack.nbytes
+        combined = pypeitimage.PypeItImage(img_list_out[0], ivar=utils.inverse(var_list_out[0]),
+                                           rn2img=var_list_out[1], bpm=bpm,
+                                           crmask=np.invert(outmask))
+        combined.set_float_dtype(float_dtype)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows += [('combine', float_dtype, nbytes + _nbytes(combined), peak)]
+        del img_stack, ivar_stack, rn2img_stack, mask_stack, img_list_out, var_list_out
+
+        # Reduced frame
+        tracemalloc.start()
+        spec2DObj = spec2dobj.Spec2DObj(det=1, sciimg=combined.image, ivarraw=combined.ivar,
+                                        skymodel=np.zeros_like(combined.image),
+                                        objmodel=np.zeros_like(combined.image),
+                                        ivarmodel=np.copy(combined.ivar),
+                                        waveimg=d['waveimg'], bpmmask=np.copy(img.fullmask),
+                                        detector=None, sci_spat_flexure=None, slits=None,
+                                        tilts=d['tilts'])
+        spec2DObj.set_float_dtype(float_dtype)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows += [('reduce', float_dtype, _nbytes(spec2DObj), peak)]
+    return Table(rows=rows, names=['stage', 'float_dtype', 'nbytes', 'peak'],
+                 dtype=[str, str, int, int])
+
+
+def report_memory(tbl):
+    """
+    Print the memory used by the images at each processing stage.
+
+    Args:
+        tbl (`astropy.table.Table`_):
+            Table returned by :func:`image_memory`.
+    """
+    msg = 'Image memory (MB)' + msgs.newline() \
+            + '    {0:<10} {1:<10} {2:>10} {3:>10}'.format('Stage', 'Type', 'Kept', 'Peak')
+    for row in tbl:
+        msg += msgs.newline() + '    {0:<10} {1:<10} {2:10.1f} {3:10.1f}'.format(
+                    row['stage'], row['float_dtype'], row['nbytes']/2**20, row['peak']/2**20)
+    msgs.info(msg)
@@ -0,0 +1,90 @@
+"""
+Module to run the performance benchmarks
+"""
+import pytest
+
+import numpy as np
+
+from pypeit.tests.tstutils import benchmark_required
+from pypeit.tests import benchmarks
+
+
+def test_smoke():
+    """
+    Run each benchmark at its smallest size and check the results.
+    """
+    b = benchmarks.benchmarks
+
+    t, (sset, gpm, yfit, _, exit_status) \
+            = b['bspline_profile']['func'](**b['bspline_profile']['smoke'])
+    assert exit_status < 2, 'Bad bspline fit'
+
+    t, skymodel = b['global_skysub']['func'](**b['global_skysub']['smoke'])
+    d = benchmarks.fake_science(**b['global_skysub']['smoke'])
+    inslit = d['slitmask'] >= 0
+    assert np.median(np.absolute(skymodel-d['sky'])[inslit]/d['sky'][inslit]) < 0.05, \
+            'Bad sky model'
+
+    t, sobjs = b['local_skysub_extract']['func'](**b['local_skysub_extract']['smoke'])
+    assert sobjs.nobj == b['local_skysub_extract']['smoke']['nobj'], 'Objects not found'
+    # Each object has a total flux of 200*sqrt(2 pi)*2 ~ 1000 per row
+    assert np.all(np.absolute(np.median(sobjs.OPT_COUNTS, axis=1)/1000.-1) < 0.05), \
+            'Bad extraction'
+
+    t, edges = b['auto_trace']['func'](**b['auto_trace']['smoke'])
+    _, left, right = benchmarks.fake_trace(**b['auto_trace']['smoke'])
+    assert edges.ntrace == 2*b['auto_trace']['smoke']['nslits'], 'Wrong number of edges'
+    assert np.allclose(edges.spat_fit[:,0::2], left, atol=1.) \
+                and np.allclose(edges.spat_fit[:,1::2], right, atol=1.), 'Bad edge traces'
+
+    t, (detections, _, patt_dict) = b['reidentify']['func'](**b['reidentify']['smoke'])
+    _, wave, _, _, _ = benchmarks.fake_arc(**b['reidentify']['smoke'])
+    indx = patt_dict['IDs'] > 0
+    assert np.sum(indx) > 20, 'Too few lines identified'
+    assert np.allclose(np.interp(detections[indx], np.arange(wave.size), wave),
+                       patt_dict['IDs'][indx], atol=2.), 'Bad line identifications'
+
+    t, (sci, var, gpm, nused) = b['weighted_combine']['func'](**b['weighted_combine']['smoke'])
+    assert np.absolute(np.mean(sci[0])-100.) < 0.1, 'Bad combined image'
+
+    t, (wave, flux, ivar, gpm) = b['combspec']['func'](**b['combspec']['smoke'])
+    assert np.absolute(np.median(ivar[gpm]) - b['combspec']['smoke']['nexp']) < 0.5, \
+            'Bad coadd inverse variance'
+
+    tbl = benchmarks.image_memory(nspec=256, nslits=2)
+    for stage in ['process', 'combine', 'reduce']:
+        nbytes = [tbl['nbytes'][(tbl['stage'] == stage) & (tbl['float_dtype'] == t)][0]
+                    for t in ['float64', 'float32']]
+        assert nbytes[1] < 0.7*nbytes[0], 'float32 images should be about half the size'
+
+    tbl = benchmarks.time_scripts(['view_fits'])
+    assert np.isfinite(tbl['time'][0]), 'Script failed to start'
+
+
+@benchmark_required
+def test_scaling():
+    """
+    Run all the benchmarks and print the scaling curves.
+    """
+    tbl = benchmarks.run_scaling()
+    benchmarks.report(tbl)
+    index = benchmarks.fit_scaling(tbl)
+    assert np.all(np.isfinite(index['index'])), 'Bad scaling fit'
+
+
+@benchmark_required
+def test_script_startup():
+    """
+    Time the start-up of all the console scripts.
+    """
+    tbl = benchmarks.time_scripts()
+    benchmarks.report_scripts(tbl)
+
+
+@benchmark_required
+def test_image_memory():
+    """
+    Measure the memory used by the images at each processing stage.
+    """
+    tbl = benchmarks.image_memory()
+    benchmarks.report_memory(tbl)
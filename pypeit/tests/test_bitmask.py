@@ -72,6 +72,45 @@ def test_flagging():
     assert numpy.sum(s_indx) == 0
 
 
+def test_multiflag_inplace():
+    image_bm = ImageBitMask()
+    rng = numpy.random.RandomState(1)
+    mask = numpy.zeros((128,128), dtype=image_bm.minimum_dtype(asuint=True))
+    cosmics_indx = rng.uniform(size=mask.shape) > 0.9
+    saturated_indx = rng.uniform(size=mask.shape) > 0.9
+
+    # In-place operations match the indexed operations
+    _mask = mask.copy()
+    _mask[cosmics_indx] = image_bm.turn_on(_mask[cosmics_indx], 'COSMIC')
+    _mask[saturated_indx] = image_bm.turn_on(_mask[saturated_indx], ['BPM', 'SATURATED'])
+    image_bm.turn_on_inplace(mask, 'COSMIC', where=cosmics_indx)
+    image_bm.turn_on_inplace(mask, ['BPM', 'SATURATED'], where=numpy.where(saturated_indx))
+    assert mask.dtype == _mask.dtype
+    assert numpy.array_equal(mask, _mask)
+
+    # A single pass over multiple flags matches the separate checks
+    assert numpy.array_equal(image_bm.flagged(mask, flag=['COSMIC', 'SATURATED']),
+                             cosmics_indx | saturated_indx)
+    assert numpy.array_equal(image_bm.flagged(mask), cosmics_indx | saturated_indx)
+
+    # Turning off bits does not change the type
+    assert image_bm.turn_off(mask, 'COSMIC').dtype == mask.dtype
+    image_bm.turn_off_inplace(mask, ['BPM', 'SATURATED'])
+    assert numpy.array_equal(mask, image_bm.turn_on(numpy.zeros_like(mask), 'COSMIC')
+                                        * cosmics_indx)
+    assert numpy.array_equal(image_bm.flagged(image_bm.toggle(mask, 'COSMIC'), flag='COSMIC'),
+                             numpy.invert(cosmics_indx))
+
+    # Scalars
+    assert image_bm.turn_on(0, ['BPM', 'SATURATED']) == 5
+    assert image_bm.turn_off(7, ['BPM', 'SATURATED']) == 2
+    assert image_bm.flagged(4, flag=['BPM', 'SATURATED'])
+
+    # Bad flags are still caught
+    with pytest.raises(ValueError):
+        image_bm.turn_on_inplace(mask, ['COSMIC', 'JUNK'])
+
+
 def test_hdr_io():
     
     image_bm = ImageBitMask()
@@ -9,6 +9,7 @@ import glob
 import numpy as np
 
 from pypeit.images import buildimage
+from pypeit.images.framecache import frame_cache
 from pypeit.tests.tstutils import dev_suite_required
 from pypeit.par import pypeitpar
 from pypeit.spectrographs.util import load_spectrograph
@@ -16,6 +17,10 @@ from pypeit.core import procimg
 
 kast_blue = load_spectrograph('shane_kast_blue')
 
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
 @pytest.fixture
 @dev_suite_required
 def deimos_flat_files():
@@ -46,3 +51,27 @@ def test_combine(deimos_flat_files):
     assert deimos_flat.image.shape == (4096,2048)
 
 
+def test_proc_cache(tmp_path):
+    par = kast_blue.default_pypeit_par()['scienceframe']
+    par['process']['use_biasimage'] = False
+    par['process']['use_pixelflat'] = False
+    par['process']['use_illumflat'] = False
+    files = [data_path('b27.fits.gz')]
+    frame_cache.enable(str(tmp_path))
+    try:
+        sciImg = buildimage.buildimage_fromlist(kast_blue, 1, par, files)
+        assert (frame_cache.hits, frame_cache.misses) == (0, 1)
+        cached = buildimage.buildimage_fromlist(kast_blue, 1, par, files)
+        assert (frame_cache.hits, frame_cache.misses) == (1, 1)
+        # Stored in single precision
+        assert np.allclose(cached.image, sciImg.image, rtol=1e-6)
+        assert np.array_equal(cached.fullmask, sciImg.fullmask)
+        assert np.array_equal(cached.crmask, sciImg.crmask)
+        assert cached.process_steps == sciImg.process_steps
+        assert len(cached.rawheadlist) == len(sciImg.rawheadlist)
+        # A different processing parameter yields a new entry
+        par['process']['sigclip'] = 5.
+        buildimage.buildimage_fromlist(kast_blue, 1, par, files)
+        assert (frame_cache.hits, frame_cache.misses) == (1, 2)
+    finally:
+        frame_cache.disable()
@@ -114,6 +114,44 @@ def test_bpm(multi_caliBrate):
     assert np.sum(bpm) == 0.
 
 
+def test_cache():
+    cache = calibrations.CalibrationCache()
+    assert cache.get('bias', 'A_1_01') is None
+    # None is not cached
+    cache.set('bias', 'A_1_01', None)
+    assert ('bias', 'A_1_01') not in cache
+    # Cached arrays cannot be changed
+    cache.set('bpm', 'A_1_01', np.zeros((10,10), dtype=int))
+    bpm = cache.get('bpm', 'A_1_01')
+    with pytest.raises(ValueError):
+        bpm[0,0] = 1
+    # Evaluate only once
+    calls = []
+    func = lambda x: calls.append(x) or x**2
+    assert cache.evaluate('waveimg', ('A_1_01', 0.), func, 3) == 9
+    assert cache.evaluate('waveimg', ('A_1_01', 0.), func, 3) == 9
+    assert len(calls) == 1
+    # Statistics survive clearing the products
+    cache.clear()
+    assert ('bpm', 'A_1_01') not in cache
+    stats = cache.stats()
+    assert stats['hits'][stats['ctype'] == 'waveimg'][0] == 1
+    assert stats['misses'][stats['ctype'] == 'bias'][0] == 1
+
+
+def test_shared_cache(multi_caliBrate):
+    arc = multi_caliBrate.get_arc()
+    # A new instance for another frame of the same group reuses the arc
+    caliBrate = calibrations.MultiSlitCalibrations(multi_caliBrate.fitstbl, multi_caliBrate.par,
+                                                   multi_caliBrate.spectrograph,
+                                                   data_path('Masters'),
+                                                   cache=multi_caliBrate.cache)
+    caliBrate = reset_calib(caliBrate)
+    assert caliBrate.get_arc() is arc
+    stats = caliBrate.cache.stats()
+    assert stats['hits'][stats['ctype'] == 'arc'][0] == 1
+
+
 @dev_suite_required
 def test_it_all(multi_caliBrate):
     # Setup
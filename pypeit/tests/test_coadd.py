@@ -5,8 +5,10 @@ import os
 
 import pytest
 import numpy as np
+import scipy
 
 from astropy import units
+from astropy import convolution
 from linetools.spectra.utils import collate
 from linetools.spectra.xspectrum1d import XSpectrum1D
 
@@ -339,3 +341,83 @@ def test_sigma_clip():
 
 
 '''
+
+
+def fake_exposures(nspec=1024, nexp=4, seed=1):
+    """
+    Construct a set of exposures of the same object on slightly different
+    wavelength grids, with different S/N and flux levels, some masked
+    pixels, and a few zero wavelengths at the end of one exposure.
+    """
+    rng = np.random.RandomState(seed)
+    waves = 4000. + np.arange(nspec, dtype=float)[:,None] + 0.3*np.arange(nexp)[None,:]
+    sig = np.linspace(0.3, 8., nexp)
+    fluxes = (1 + 0.1*np.arange(nexp))[None,:] * (10. + 2*np.sin(waves/50.)
+                                                  + sig[None,:]*rng.normal(size=waves.shape))
+    ivars = np.ones_like(waves)/sig[None,:]**2
+    masks = rng.uniform(size=waves.shape) > 0.02
+    masks[-10:,1] = False
+    waves[-10:,1] = 0.
+    ivars[np.invert(masks)] = 0.
+    return waves, fluxes, ivars, masks
+
+
+def test_interp_spec():
+    waves, fluxes, ivars, masks = fake_exposures()
+    wave_new = waves[:,0] + 0.1
+    # Many spectra onto one grid
+    flux_new, ivar_new, mask_new = coadd.interp_spec(wave_new, waves, fluxes, ivars, masks)
+    for iexp in range(waves.shape[1]):
+        gpm = waves[:,iexp] > 1.0
+        _flux = scipy.interpolate.interp1d(waves[gpm,iexp], fluxes[gpm,iexp], kind='cubic',
+                                           bounds_error=False, fill_value=np.nan)(wave_new)
+        assert np.allclose(flux_new[:,iexp], _flux, equal_nan=True), 'Bad interpolated flux'
+        _flux, _ivar, _mask = coadd.interp_oned(wave_new, waves[:,iexp], fluxes[:,iexp], ivars[:,iexp],
+                                                masks[:,iexp])
+        assert np.array_equal(mask_new[:,iexp], _mask), 'Bad interpolated mask'
+        assert np.allclose(ivar_new[:,iexp], _ivar, equal_nan=True), 'Bad interpolated ivar'
+    # One spectrum onto many grids, including its own
+    flux_new, ivar_new, mask_new = coadd.interp_spec(waves, waves[:,0], fluxes[:,0], ivars[:,0], masks[:,0])
+    assert np.array_equal(flux_new[:,0], fluxes[:,0]), 'Should not interpolate onto the same grid'
+    for iexp in range(1, waves.shape[1]):
+        _flux, _ivar, _mask = coadd.interp_oned(waves[:,iexp], waves[:,0], fluxes[:,0], ivars[:,0], masks[:,0])
+        assert np.allclose(flux_new[:,iexp], _flux, equal_nan=True), 'Bad interpolated flux'
+        assert np.array_equal(mask_new[:,iexp], _mask), 'Bad interpolated mask'
+
+
+def test_batched_scaling():
+    waves, fluxes, ivars, masks = fake_exposures()
+    # Median ratios of all exposures at once match those computed one at a time
+    ratio = coadd.robust_median_ratio(fluxes, ivars, fluxes[:,-1], ivars[:,-1], mask=masks, mask_ref=masks[:,-1])
+    for iexp in range(waves.shape[1]):
+        assert np.isclose(ratio[iexp], coadd.robust_median_ratio(fluxes[:,iexp], ivars[:,iexp], fluxes[:,-1],
+                                                                 ivars[:,-1], mask=masks[:,iexp],
+                                                                 mask_ref=masks[:,-1])), 'Bad median ratio'
+    # Smoothed weights match the convolution of each exposure separately
+    sn_smooth_npix = 50
+    smooth = coadd.smooth_weights(ivars, masks, sn_smooth_npix)
+    kernel = convolution.Gaussian1DKernel(np.fmax(sn_smooth_npix/10.0, 3.0))
+    spec_vec = np.arange(waves.shape[0])
+    for iexp in range(waves.shape[1]):
+        sn_med = scipy.interpolate.interp1d(spec_vec[masks[:,iexp]],
+                                            utils.fast_running_median(ivars[masks[:,iexp],iexp], sn_smooth_npix),
+                                            kind='cubic', bounds_error=False, fill_value=0.0)(spec_vec)
+        assert np.allclose(smooth[:,iexp], convolution.convolve(sn_med, kernel, boundary='extend')), \
+                'Bad smoothed weights'
+    # The batched stack matches np.histogram
+    wave_grid = np.linspace(4000., 5100., 800)
+    weights = np.ones_like(fluxes)
+    wave_stack, flux_stack, ivar_stack, mask_stack, nused \
+            = coadd.compute_stack(wave_grid, waves, fluxes, ivars, masks, weights)
+    gpm = masks & (waves > 1.0)
+    _nused = np.histogram(waves[gpm], bins=wave_grid)[0]
+    _flux = np.histogram(waves[gpm], bins=wave_grid, weights=fluxes[gpm])[0]
+    assert np.array_equal(nused, _nused), 'Bad number of pixels in each bin'
+    assert np.allclose(flux_stack, _flux/(_nused + (_nused == 0))), 'Bad stacked flux'
+    # The coadd does not depend on the order of the exposures
+    coadd1 = coadd.combspec(waves, fluxes, ivars, masks, sn_smooth_npix, scale_method='median')
+    srt = np.arange(waves.shape[1])[::-1]
+    coadd2 = coadd.combspec(waves[:,srt], fluxes[:,srt], ivars[:,srt], masks[:,srt], sn_smooth_npix,
+                            scale_method='median')
+    for c1, c2 in zip(coadd1, coadd2):
+        assert np.allclose(c1, c2), 'Coadd depends on the order of the exposures'
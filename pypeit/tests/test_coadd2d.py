@@ -0,0 +1,205 @@
+"""
+Module to run tests on the 2D coadding routines
+"""
+import os
+import time
+import tracemalloc
+
+import pytest
+
+import numpy as np
+
+from pypeit import coadd2d
+from pypeit.pypmsgs import PypeItError
+from pypeit import slittrace
+from pypeit import spec2dobj
+from pypeit.core import coadd
+from pypeit.tests.tstutils import get_kastb_detector, benchmark_required
+
+
+def rebin2d_histogram2d(spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack,
+                        inmask_stack, sci_list, var_list):
+    """
+    Version of rebin2d with separate calls to histogram2d used to check
+    the single-pass rebinning.
+    """
+    nimgs = waveimg_stack.shape[0]
+    shape_out = (nimgs, spec_bins.size - 1, spat_bins.size - 1)
+    nsmp_rebin_stack = np.zeros(shape_out)
+    norm_rebin_stack = np.zeros(shape_out)
+    sci_list_out = [np.zeros(shape_out) for sci in sci_list]
+    var_list_out = [np.zeros(shape_out) for var in var_list]
+    for img in range(nimgs):
+        thismask = thismask_stack[img]
+        nsmp_rebin_stack[img] = np.histogram2d(waveimg_stack[img][thismask],
+                                               spatimg_stack[img][thismask],
+                                               bins=[spec_bins, spat_bins])[0]
+        finmask = thismask & inmask_stack[img]
+        spec_rebin = waveimg_stack[img][finmask]
+        spat_rebin = spatimg_stack[img][finmask]
+        norm_img = np.histogram2d(spec_rebin, spat_rebin, bins=[spec_bins, spat_bins])[0]
+        norm_rebin_stack[img] = norm_img
+        for indx, sci in enumerate(sci_list):
+            weigh_sci = np.histogram2d(spec_rebin, spat_rebin, bins=[spec_bins, spat_bins],
+                                       weights=sci[img][finmask])[0]
+            sci_list_out[indx][img] = (norm_img > 0.0) * weigh_sci/(norm_img + (norm_img == 0.0))
+        for indx, var in enumerate(var_list):
+            weigh_var = np.histogram2d(spec_rebin, spat_rebin, bins=[spec_bins, spat_bins],
+                                       weights=var[img][finmask])[0]
+            var_list_out[indx][img] = (norm_img > 0.0)*weigh_var/(norm_img + (norm_img == 0.0))**2
+    return sci_list_out, var_list_out, norm_rebin_stack.astype(int), nsmp_rebin_stack.astype(int)
+
+
+def fake_rebin_stacks(nimgs=5, nspec=1000, nspat=100):
+    """
+    Stacks of tilted wavelength images and dithered spatial offsets.
+    """
+    rng = np.random.RandomState(5)
+    spec = np.arange(nspec)[None,:,None]
+    spat = np.arange(nspat)[None,None,:]
+    shift = rng.uniform(-3, 3, size=nimgs)[:,None,None]
+    waveimg_stack = 4000. + (spec + 0.02*spat + shift)*1.1
+    spatimg_stack = np.broadcast_to(spat - nspat/2 + shift, waveimg_stack.shape).copy()
+    thismask_stack = (np.absolute(spatimg_stack) < 40.5)
+    inmask_stack = rng.uniform(size=waveimg_stack.shape) > 0.05
+    sci_list = [rng.normal(size=waveimg_stack.shape) for i in range(4)]
+    # Include samples on the last bin edge
+    spec_bins = np.linspace(4010., 5000., 901)
+    waveimg_stack[:,500,50] = spec_bins[-1]
+    spat_bins = np.arange(-41., 42.)
+    var_list = [rng.uniform(0.5, 2., size=waveimg_stack.shape)]
+    return spec_bins, spat_bins, waveimg_stack, spatimg_stack, thismask_stack, inmask_stack, \
+                sci_list, var_list
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def fake_spec2d_files(nfiles=3, nspec=200, nspat=300):
+    """
+    Write a few spec2d files with three slits and different spatial
+    flexure.
+    """
+    rng = np.random.RandomState(4)
+    spec = np.arange(nspec)
+    left = np.stack([10.5+0.01*spec, 105.2+0*spec, 200.7-0.02*spec], axis=1)
+    right = left + 70.
+    files = []
+    for i, flexure in enumerate([0., 1.5, -2.2][:nfiles]):
+        slits = slittrace.SlitTraceSet(left, right, 'MultiSlit', nspat=nspat, PYP_SPEC='dummy')
+        sciimg = rng.normal(size=(nspec, nspat)) + 10.
+        waveimg = np.outer(np.linspace(4000., 5000., nspec), np.ones(nspat)) + 0.1*i
+        spec2DObj = spec2dobj.Spec2DObj(det=1, sciimg=sciimg, ivarraw=np.ones_like(sciimg),
+                                        skymodel=np.full_like(sciimg, 10.),
+                                        objmodel=np.zeros_like(sciimg),
+                                        ivarmodel=rng.uniform(0.5, 1., size=sciimg.shape),
+                                        waveimg=waveimg,
+                                        bpmmask=(rng.uniform(size=sciimg.shape) < 0.01).astype(int),
+                                        detector=get_kastb_detector(), sci_spat_flexure=flexure,
+                                        slits=slits,
+                                        tilts=np.outer(np.linspace(0., 1., nspec), np.ones(nspat)))
+        allspec2D = spec2dobj.AllSpec2DObj()
+        allspec2D['meta']['ir_redux'] = False
+        allspec2D[1] = spec2DObj
+        files += [data_path('tmp_spec2d_{0}.fits'.format(i))]
+        allspec2D.write_to_fits(files[-1])
+    return files
+
+
+def test_spec2d_stack():
+    files = fake_spec2d_files()
+    objs = [spec2dobj.Spec2DObj.from_file(f, 1) for f in files]
+    slit_idx = 2
+    spat_id = objs[0].slits.spat_id[slit_idx]
+
+    # Full-detector stacks, as previously read by CoAdd2D
+    full = dict(sciimg_stack=np.stack([o.sciimg for o in objs]),
+                sciivar_stack=np.stack([o.ivarmodel for o in objs]),
+                skymodel_stack=np.stack([o.skymodel for o in objs]),
+                mask_stack=np.stack([o.bpmmask for o in objs]),
+                tilts_stack=np.stack([o.tilts for o in objs]),
+                waveimg_stack=np.stack([o.waveimg for o in objs]),
+                thismask_stack=np.stack([o.slits.slit_img(flexure=o.sci_spat_flexure) == spat_id
+                                         for o in objs]))
+
+    stack = coadd2d.Spec2DStack(files, 1, dtype=float)
+    assert len(stack) == 3, 'Wrong number of files'
+    assert stack.spat_flexure == [o.sci_spat_flexure for o in objs], 'Bad flexure'
+    tracemalloc.start()
+    stacks = stack.slit_stacks(slit_idx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Only the slit region should have been read
+    eager = np.sum([s.nbytes for s in full.values()])
+    assert peak < 0.4*eager, 'Too much memory used: {0} vs {1}'.format(peak, eager)
+
+    spat = slice(stacks['spat_offset'], stacks['spat_offset']+stacks['sciimg_stack'].shape[2])
+    assert not np.any(np.delete(full['thismask_stack'], np.arange(spat.start, spat.stop), axis=2)), \
+            'Slit region does not cover the slit'
+    for key in full.keys():
+        assert np.array_equal(full[key][...,spat], stacks[key]), '{0} differs'.format(key)
+
+    # Coadds are identical when the reference traces are shifted
+    ref_trace_stack = np.stack([o.slits.center[:,slit_idx] for o in objs], axis=1)
+    wave_grid = np.linspace(3990., 5010., 250)
+    _coadd = coadd.compute_coadd2d(ref_trace_stack, full['sciimg_stack'], full['sciivar_stack'],
+                                   full['skymodel_stack'], full['mask_stack'] == 0,
+                                   full['tilts_stack'], full['thismask_stack'],
+                                   full['waveimg_stack'], wave_grid)
+    coadd_dict = coadd.compute_coadd2d(ref_trace_stack - stacks['spat_offset'],
+                                       stacks['sciimg_stack'], stacks['sciivar_stack'],
+                                       stacks['skymodel_stack'], stacks['mask_stack'] == 0,
+                                       stacks['tilts_stack'], stacks['thismask_stack'],
+                                       stacks['waveimg_stack'], wave_grid)
+    for key in ['dspat_bins', 'sciimg', 'sciivar', 'imgminsky', 'outmask', 'nused', 'waveimg',
+                'dspat']:
+        assert np.array_equal(_coadd[key], coadd_dict[key]), '{0} differs'.format(key)
+
+    # Closing the files leaves the stacks intact
+    stack.close()
+    assert all([hdul._file.closed for hdul in stack.hdul]), 'Files not closed'
+    assert np.array_equal(full['sciimg_stack'][...,spat], stacks['sciimg_stack']), \
+            'Stacks changed by closing the files'
+    with pytest.raises(PypeItError):
+        stack.slit_stacks(slit_idx)
+
+    # Single precision by default
+    with coadd2d.Spec2DStack(files, 1) as stack:
+        stacks = stack.slit_stacks(slit_idx)
+    assert all([hdul._file.closed for hdul in stack.hdul]), 'Files not closed'
+    assert stacks['sciimg_stack'].dtype == np.float32, 'Bad science image type'
+    assert stacks['waveimg_stack'].dtype == float, 'Wavelengths should be double precision'
+
+    # Files are closed if the requested detector is missing
+    with pytest.raises(PypeItError):
+        coadd2d.Spec2DStack(files, 2)
+    for f in files:
+        os.remove(f)
+
+
+def test_rebin2d():
+    args = fake_rebin_stacks()
+    sci_list_out, var_list_out, norm, nsmp = coadd.rebin2d(*args)
+    _sci_list_out, _var_list_out, _norm, _nsmp = rebin2d_histogram2d(*args)
+    assert np.array_equal(norm, _norm), 'Normalization differs'
+    assert np.array_equal(nsmp, _nsmp), 'Sample count differs'
+    for sci, _sci in zip(sci_list_out + var_list_out, _sci_list_out + _var_list_out):
+        assert np.array_equal(sci, _sci), 'Rebinned image differs'
+
+
+@benchmark_required
+def test_rebin2d_benchmark():
+    """
+    Time the single-pass rebinning against separate calls to
+    histogram2d for each rebinned image.
+    """
+    args = fake_rebin_stacks(nimgs=10, nspec=2000, nspat=120)
+    t = time.perf_counter()
+    coadd.rebin2d(*args)
+    t_bincount = time.perf_counter() - t
+    t = time.perf_counter()
+    rebin2d_histogram2d(*args)
+    t_hist = time.perf_counter() - t
+    print('rebin2d: histogram2d {0:.2f}s, bincount {1:.2f}s'.format(t_hist, t_bincount))
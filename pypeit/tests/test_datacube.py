@@ -0,0 +1,136 @@
+"""
+Module to test the datacube resampling
+"""
+import os
+
+import numpy as np
+
+from astropy.io import fits
+
+from pypeit import reduce
+from pypeit import slittrace
+from pypeit.core import datacube
+from pypeit.images import pypeitimage
+from pypeit.par import pypeitpar
+from pypeit.tests.tstutils import get_kastb_detector
+
+
+def fake_slices(nspec=200, nslits=3, slit_width=30):
+    """
+    Construct the wavelength and slit images of a simple slicer.
+    """
+    nspat = nslits*slit_width + 20
+    left = np.tile(10. + slit_width*np.arange(nslits), (nspec, 1)) - 0.5
+    right = left + slit_width
+    spat_id = np.round(0.5*(left[nspec//2]+right[nspec//2])).astype(int)
+    slitid_img = np.full((nspec, nspat), -1, dtype=int)
+    for s in range(nslits):
+        slitid_img[:, int(left[0,s]+0.5):int(right[0,s]+0.5)] = spat_id[s]
+    waveimg = np.tile(4000. + np.arange(nspec, dtype=float)[:,None], (1, nspat))
+    waveimg[slitid_img < 0] = 0.
+    return waveimg, slitid_img, spat_id, left, right
+
+
+def test_alignment():
+    waveimg, slitid_img, spat_id, left, right = fake_slices()
+    # Alignment traces at fixed fractions of the slit give the same
+    # slit positions as the slit edges
+    locations = [0.1, 0.5, 0.9]
+    traces = left[:,None,:] + np.array(locations)[None,:,None]*(right-left)[:,None,:]
+    fp = datacube.pixel_footprints(waveimg, slitid_img, spat_id, left, right)
+    _fp = datacube.pixel_footprints(waveimg, slitid_img, spat_id, left, right,
+                                    align_traces=traces, locations=locations)
+    assert np.allclose(fp['frac'], _fp['frac']) and np.allclose(fp['dfrac'], _fp['dfrac']), \
+            'Alignment traces should match the slit edges'
+    assert np.all((fp['frac'] > 0) & (fp['frac'] < 1)), 'Bad slit positions'
+    assert np.allclose(fp['dwave'], 1.), 'Bad wavelength extent'
+
+
+def test_resample():
+    waveimg, slitid_img, spat_id, left, right = fake_slices()
+    fp = datacube.pixel_footprints(waveimg, slitid_img, spat_id, left, right)
+    slit_length, slice_width = 30*0.15, 0.5
+    grid = datacube.cube_grid(fp, 150., 30., slit_length, slice_width, 0.15, nwave=100,
+                              wave_min=4050., wave_max=4149.)
+    weights = datacube.generate_cube_weights(fp, grid, 150., 30., slit_length, slice_width)
+    assert weights.shape == (grid['nx']*grid['ny']*grid['nwave'], waveimg.size), \
+            'Bad weight matrix shape'
+
+    # Pixels within the wavelength range of the cube are fully
+    # distributed
+    wsum = np.asarray(weights.sum(axis=0)).ravel()[fp['pix']]
+    indx = (fp['wave'] > 4051) & (fp['wave'] < 4148)
+    assert np.allclose(wsum[indx], 1.), 'Pixel weights should sum to one'
+
+    # Combine two exposures of a flat source
+    flux = np.full(waveimg.shape, 10.)
+    var = np.full(waveimg.shape, 4.)
+    sums = datacube.accumulate_cube(weights, flux, var)
+    _flux, _var, _ = datacube.finalize_cube(sums, grid)
+    sums = datacube.accumulate_cube(weights, flux, var, sums=sums)
+    cube, cube_var, cube_wgt = datacube.finalize_cube(sums, grid)
+    good = cube_wgt > 0
+    assert np.sum(good) > 0.5*good.size, 'Cube is mostly empty'
+    assert np.allclose(cube[good], 10.), 'Flat source not recovered'
+    assert np.allclose(cube_var[good], 0.5*_var[good]), 'Variance should halve'
+
+    # Masked pixels do not contribute
+    gpm = np.ones(waveimg.shape, dtype=bool)
+    gpm[:, :waveimg.shape[1]//2] = False
+    flux[:, :waveimg.shape[1]//2] = 1e6
+    cube, _, _ = datacube.finalize_cube(datacube.accumulate_cube(weights, flux, var, gpm=gpm),
+                                        grid)
+    assert np.all(cube < 11), 'Masked pixels were included'
+
+    # The WCS matches the grid
+    w = datacube.cube_wcs(grid)
+    ra, dec, wave = w.wcs_pix2world([[0.5*(grid['nx']-1), 0.5*(grid['ny']-1), 0.]], 0)[0]
+    assert np.isclose(ra, 150.) and np.isclose(dec, 30.), 'Bad WCS reference'
+
+
+def test_ifureduce_resample_cube(tmp_path):
+    waveimg, _, _, left, right = fake_slices()
+    slits = slittrace.SlitTraceSet(left, right, 'IFU', nspat=waveimg.shape[1],
+                                   PYP_SPEC='keck_kcwi')
+    # Set only what the resampling needs
+    redux = reduce.IFUReduce.__new__(reduce.IFUReduce)
+    redux.par = pypeitpar.PypeItPar()
+    redux.par['reduce']['cube']['slice_width'] = 0.5
+    redux.par['reduce']['cube']['cube_wave_min'] = 4050.
+    redux.par['reduce']['cube']['cube_wave_max'] = 4149.
+    redux.par['reduce']['cube']['cube_wave_num'] = 100
+    redux.sciImg = pypeitimage.PypeItImage(image=np.full(waveimg.shape, 12.),
+                                           ivar=np.full(waveimg.shape, 0.25),
+                                           fullmask=np.zeros(waveimg.shape, dtype=np.int16),
+                                           detector=get_kastb_detector())
+    redux.global_sky = np.full(waveimg.shape, 2.)
+    redux.slits = slits
+    redux.slits_left, redux.slits_right, _ = slits.select_edges()
+    redux.slitmask = slits.slit_img()
+    redux.waveimg = waveimg
+    redux.spat_flexure_shift = None
+    redux.caliBrate = type('Calibrations', (), dict(alignments=None))()
+
+    grid, weights, sums = redux.resample_cube(150., 30.)
+    assert grid['nwave'] == 100, 'Bad wavelength grid'
+    cube, cube_var, cube_wgt = datacube.finalize_cube(sums, grid)
+    good = cube_wgt > 0
+    assert np.sum(good) > 0.5*good.size, 'Cube is mostly empty'
+    assert np.allclose(cube[good], 10.), 'Sky-subtracted flux not recovered'
+
+    # Add a second exposure reusing the grid and weights
+    _grid, _weights, sums = redux.resample_cube(150., 30., grid=grid, weights=weights,
+                                                sums=sums)
+    assert _grid is grid and _weights is weights, 'Grid and weights should be reused'
+    _cube, _cube_var, _cube_wgt = datacube.finalize_cube(sums, grid)
+    assert np.allclose(_cube[good], 10.), 'Combined flux not recovered'
+    assert np.allclose(_cube_var[good], 0.5*cube_var[good]), 'Variance should halve'
+
+    # Write the cube
+    redux.cube_grid, redux.cube_weights, redux.cube_sums = grid, weights, sums
+    ofile = str(tmp_path / 'spec3d_test.fits')
+    redux.write_cube(ofile)
+    with fits.open(ofile) as hdu:
+        assert hdu['FLUX'].data.shape == (grid['nwave'], grid['ny'], grid['nx']), \
+                'Bad cube shape'
+        assert hdu['FLUX'].header['CTYPE3'] == 'AWAV', 'Bad WCS'
@@ -0,0 +1,85 @@
+"""
+Module to run tests on the extraction routines
+"""
+import numpy as np
+
+from pypeit import specobj
+from pypeit.core import extract
+
+
+def fake_slit(nspec=300, nspat=120):
+    """
+    Build a fake sky-dominated slit with a few Gaussian objects.
+    """
+    rng = np.random.RandomState(3)
+    spec_vec = np.arange(nspec)
+    spat_vec = np.arange(nspat)
+    traces = [30.3+0.01*spec_vec, 60.7-0.02*spec_vec, 90.1+0.0*spec_vec]
+    skyimg = rng.uniform(5., 10., (nspec, nspat))
+    rn2_img = np.full((nspec, nspat), 4.)
+    oprofs = np.zeros((nspec, nspat, len(traces)))
+    sciimg = skyimg + rng.normal(size=skyimg.shape)
+    for i, trace in enumerate(traces):
+        prof = np.exp(-0.5*((spat_vec[None,:]-trace[:,None])/2.)**2)
+        prof[prof < 1e-3] = 0.
+        oprofs[:,:,i] = prof
+        sciimg += 100*prof
+    ivar = np.ones_like(sciimg)
+    ivar[rng.uniform(size=ivar.shape) < 0.05] = 0.
+    waveimg = np.outer(np.linspace(4000., 5000., nspec), np.ones(nspat))
+    thismask = np.ones(sciimg.shape, dtype=bool)
+    return sciimg, ivar, ivar > 0, waveimg, skyimg, rn2_img, thismask, oprofs, traces
+
+
+def make_sobjs(traces):
+    sobjs = []
+    for trace in traces:
+        sobjs += [specobj.SpecObj('MultiSlit', 1, SLITID=0)]
+        sobjs[-1].TRACE_SPAT = trace
+    return sobjs
+
+
+def test_extract_batch():
+    sciimg, ivar, mask, waveimg, skyimg, rn2_img, thismask, oprofs, traces = fake_slit()
+    spat_img = np.outer(np.ones(sciimg.shape[0]), np.arange(sciimg.shape[1]))
+    box_radius = 4.
+
+    # One object at a time, with the object masks built explicitly
+    sobjs = make_sobjs(traces)
+    for i, sobj in enumerate(sobjs):
+        trace = np.outer(sobj.TRACE_SPAT, np.ones(sciimg.shape[1]))
+        objmask = (spat_img >= trace - 2*box_radius) & (spat_img <= trace + 2*box_radius)
+        extract.extract_boxcar(sciimg, ivar, mask & objmask, waveimg, skyimg, rn2_img, box_radius, sobj)
+        extract.extract_optimal(sciimg, ivar, mask & objmask, waveimg, skyimg, rn2_img, thismask,
+                                oprofs[:,:,i], box_radius, sobj)
+
+    # All objects at once
+    batch_sobjs = make_sobjs(traces)
+    box = extract.extract_boxcar_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, box_radius,
+                                       batch_sobjs, objmask_radius=2*box_radius)
+    opt = extract.extract_optimal_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, thismask,
+                                        oprofs, box_radius, batch_sobjs,
+                                        objmask_radius=2*box_radius)
+    assert box['BOX_COUNTS'].shape == (3, sciimg.shape[0]), 'Bad boxcar output shape'
+    assert opt['OPT_COUNTS'].shape == (3, sciimg.shape[0]), 'Bad optimal output shape'
+
+    for sobj, batch_sobj in zip(sobjs, batch_sobjs):
+        for key in ['BOX_WAVE', 'BOX_COUNTS', 'BOX_COUNTS_IVAR', 'BOX_MASK', 'BOX_COUNTS_SKY',
+                    'BOX_NPIX']:
+            assert np.array_equal(sobj[key], batch_sobj[key]), '{0} differs'.format(key)
+        for key in ['OPT_WAVE', 'OPT_COUNTS', 'OPT_COUNTS_IVAR', 'OPT_COUNTS_NIVAR', 'OPT_COUNTS_SKY',
+                    'OPT_FRAC_USE', 'OPT_CHI2']:
+            assert np.allclose(sobj[key], batch_sobj[key], rtol=1e-10, atol=0.), \
+                    '{0} differs'.format(key)
+        assert np.array_equal(sobj.OPT_MASK, batch_sobj.OPT_MASK), 'OPT_MASK differs'
+
+    # Junk profiles are skipped
+    oprofs[:,:,1] = 0.
+    junk_sobjs = make_sobjs(traces)
+    opt = extract.extract_optimal_batch(sciimg, ivar, mask, waveimg, skyimg, rn2_img, thismask,
+                                        oprofs, box_radius, junk_sobjs)
+    assert not np.any(opt['OPT_MASK'][1]), 'Junk profile should be masked'
+    assert 'OPT_COUNTS' not in junk_sobjs[1].keys() or junk_sobjs[1].OPT_COUNTS is None, \
+            'Junk object should not be filled'
+    assert np.any(opt['OPT_MASK'][0]), 'Good object should be extracted'
+
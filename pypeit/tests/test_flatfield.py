@@ -11,11 +11,15 @@ import numpy as np
 from astropy.io import fits
 
 from pypeit.tests.tstutils import dev_suite_required, load_kast_blue_masters, cooked_required
+from pypeit.tests.tstutils import get_kastb_detector
 from pypeit import flatfield
+from pypeit import wavetilts
+from pypeit.par import pypeitpar
 from pypeit import slittrace
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit.images import pypeitimage
 from pypeit import bspline
+from pypeit.core import flat
 
 def data_path(filename):
     data_dir = os.path.join(os.path.dirname(__file__), 'files')
@@ -107,3 +111,135 @@ def test_flatimages():
 #    # Use the trace image
 #    flatImages = flatField.run()
 #    assert np.isclose(np.median(flatImages.pixelflat), 1.0)
+
+
+def fake_flat(nslits=4, sticky=False):
+    """
+    Construct a FlatField object for a fake multislit flat.
+    """
+    nspec, nspat = 400, 60*nslits
+    rng = np.random.RandomState(11)
+    spec = np.arange(nspec)
+    spat = np.arange(nspat)
+    left = np.tile(5. + 60*np.arange(nslits), (nspec,1)) + 0.005*spec[:,None]
+    right = left + 48.
+    blaze = 2e4*np.exp(-0.5*((spec-200.)/150.)**2)
+    flat = np.full((nspec, nspat), 0.1)
+    for i in range(nslits):
+        onslit = (spat[None,:] > left[:,i,None]) & (spat[None,:] < right[:,i,None])
+        illum = 1 - 0.1*((spat[None,:] - (left[:,i,None]+right[:,i,None])/2)/24.)**2
+        flat[onslit] = (blaze[:,None]*illum)[onslit]
+    flat *= rng.normal(loc=1., scale=0.01, size=flat.shape)
+    rawflatimg = pypeitimage.PypeItImage(image=flat, detector=get_kastb_detector())
+
+    slits = slittrace.SlitTraceSet(left, right, 'MultiSlit', nspat=nspat, PYP_SPEC='shane_kast_blue')
+    coeffs = np.zeros((2, 2, nslits))
+    coeffs[:,0,:] = 0.5
+    tilts = wavetilts.WaveTilts(coeffs, nslits, slits.spat_id, np.ones(nslits, dtype=int),
+                                np.ones(nslits, dtype=int), 'legendre2d')
+    par = pypeitpar.FlatFieldPar(rej_sticky=sticky, spat_samp=1., tweak_slits=True)
+    return flatfield.FlatField(rawflatimg, load_spectrograph('shane_kast_blue'), par, slits, tilts)
+
+
+def test_flatfield_n_proc():
+    for sticky in [False, True]:
+        flatImages = []
+        for n_proc in [1, 2]:
+            flatField = fake_flat(sticky=sticky)
+            flatField.flatpar['n_proc'] = n_proc
+            flatImages += [flatField.run()]
+            if n_proc == 1:
+                tweak = (flatField.slits.left_tweak.copy(), flatField.slits.right_tweak.copy())
+        assert np.all(flatImages[0].bpmflats == 0), 'Unexpected failure of the flat-field model'
+        for key in ['pixelflat', 'flat_model']:
+            assert np.array_equal(flatImages[0][key], flatImages[1][key]), \
+                    'Parallel {0} differs from the serial result'.format(key)
+        assert np.array_equal(tweak[0], flatField.slits.left_tweak) \
+                    and np.array_equal(tweak[1], flatField.slits.right_tweak), 'Tweaks differ'
+        for s1, s2 in zip(flatImages[0].spat_bsplines, flatImages[1].spat_bsplines):
+            assert np.array_equal(s1.coeff, s2.coeff), 'Illumination bsplines differ'
+
+
+def test_packed_bsplines():
+    flatField = fake_flat()
+    flatImages = flatField.run()
+    assert len(flatImages.spat_bspl_table) == np.sum([s.breakpoints.size
+                                                      for s in flatImages.spat_bsplines]), \
+            'Bad number of packed breakpoints'
+
+    # Write and read; the bsplines are all in one extension
+    outfile = data_path('tst_flatimages.fits')
+    flatImages.to_file(outfile, overwrite=True)
+    with fits.open(outfile) as hdu:
+        assert 'SPAT_BSPL_TABLE' in hdu and not any(['BSPLINE' in h.name for h in hdu]), \
+                'Bsplines should be written to a single table'
+    _flatImages = flatfield.FlatImages.from_file(outfile)
+    os.remove(outfile)
+
+    # Lazy reconstruction
+    assert _flatImages.__dict__['spat_bsplines'] is None, 'Bsplines should not be reconstructed'
+    for i, spat_bspl in enumerate(flatImages.spat_bsplines):
+        _spat_bspl = _flatImages.get_spat_bspline(i)
+        for key in ['breakpoints', 'mask', 'coeff', 'icoeff', 'nord', 'npoly', 'xmin', 'xmax',
+                    'funcname']:
+            assert np.array_equal(spat_bspl[key], _spat_bspl[key]), '{0} changed'.format(key)
+    assert _flatImages.__dict__['spat_bsplines'] is None, 'Bsplines should not be reconstructed'
+    assert len(_flatImages.spat_bsplines) == flatImages.spat_id.size, 'Bad reconstruction'
+
+    # Batched evaluation matches the slit-by-slit evaluation
+    slits = flatField.slits
+    illumflat = np.ones_like(flatImages.procflat)
+    for slit_idx in range(slits.nslits):
+        slitid_img = slits.slit_img(slitidx=slit_idx)
+        onslit = slitid_img == slits.spat_id[slit_idx]
+        spat_coo = slits.spatial_coordinate_image(slitidx=slit_idx, slitid_img=slitid_img)
+        illumflat[onslit] = flatImages.spat_bsplines[slit_idx].value(spat_coo[onslit])[0]
+    assert np.allclose(_flatImages.fit2illumflat(slits), illumflat, rtol=1e-12, atol=0.), \
+            'Batched evaluation of the illumination flat differs'
+
+    # Masked slits are skipped
+    slits.mask[1] = slits.bitmask.turn_on(slits.mask[1], 'BADFLATCALIB')
+    _illumflat = _flatImages.fit2illumflat(slits)
+    onslit = slits.slit_img(slitidx=1, initial=True) > -1
+    assert np.all(_illumflat[onslit] == 1.), 'Masked slit should not be corrected'
+
+
+def test_relative_slit_scale():
+    # Three slits with overlapping wavelength coverage and different
+    # throughput
+    nspec, nspat = 100, 60
+    spat_id = np.array([10, 30, 50])
+    slitid_img = np.full((nspec, nspat), -1, dtype=int)
+    waveimg = np.zeros((nspec, nspat), dtype=float)
+    flatimg = np.zeros((nspec, nspat), dtype=float)
+    for s, (sid, w0, thru) in enumerate(zip(spat_id, [4050., 4000., 4100.], [2., 1., 4.])):
+        slitid_img[:, sid-8:sid+8] = sid
+        waveimg[:, sid-8:sid+8] = w0 + np.arange(nspec)[:,None]
+        flatimg[:, sid-8:sid+8] = 100.*thru
+    gpm = np.ones(flatimg.shape, dtype=bool)
+    gpm[:, 12] = False
+    flatimg[:, 12] = 1e6
+
+    relscl = flat.relative_slit_scale(flatimg, waveimg, slitid_img, spat_id, gpm=gpm)
+    # Slits are scaled to the bluest slit
+    assert np.allclose(relscl[slitid_img == 30], 1.), 'Bluest slit should not be scaled'
+    assert np.allclose(relscl[slitid_img == 10], 0.5), 'Bad relative scaling'
+    assert np.allclose(relscl[slitid_img == 50], 0.25), 'Bad relative scaling'
+    assert np.all(relscl[slitid_img < 0] == 1.), 'Pixels off the slits should not be scaled'
+
+
+def test_relative_scale_master():
+    slits = slittrace.SlitTraceSet(left_init=np.full((10,2), 2.) + np.array([0., 10.]),
+                                   right_init=np.full((10,2), 8.) + np.array([0., 10.]),
+                                   pypeline='IFU', nspat=20, PYP_SPEC='keck_kcwi')
+    relscale = flatfield.RelativeScale(scaleimg=np.ones((10,20)), tilt_key='A_1_01',
+                                       arc_key='A_1_01', PYP_SPEC='keck_kcwi',
+                                       spat_id=slits.spat_id)
+    ofile = data_path('MasterRelScale_A_1_01.fits')
+    relscale.to_master_file(ofile)
+    _relscale = flatfield.RelativeScale.from_file(ofile)
+    assert np.array_equal(_relscale.scaleimg, relscale.scaleimg), 'Bad scale image'
+    assert _relscale.is_synced(slits, tilt_key='A_1_01', arc_key='A_1_01'), 'Should be synced'
+    assert not _relscale.is_synced(slits, tilt_key='A_1_01', arc_key='A_2_01'), \
+            'Different arc should not be synced'
+    os.remove(ofile)
@@ -15,6 +15,7 @@ import pypeit
 from pypeit.core import flexure
 from pypeit import slittrace
 from pypeit import wavetilts
+from pypeit.par import pypeitpar
 
 
 def data_path(filename):
@@ -68,3 +69,44 @@ def test_flex_shift():
 #    pyplot.show()
     assert np.abs(flex_dict['shift'] - 43.7) < 0.1
 
+
+
+def test_flex_shift_batch():
+    obj_spec = readspec(data_path('obj_lrisb_600_sky.fits'))
+    arx_file = pypeit.__path__[0]+'/data/sky_spec/sky_LRISb_600.fits'
+    arx_spec = readspec(arx_file)
+    flex_dict = flexure.spec_flex_shift(obj_spec, arx_spec, mxshft=60)
+
+    # Batched calculation for a set of objects must match
+    arx_sky = flexure.get_arx_sky(arx_file)
+    assert flexure.get_arx_sky(arx_file) is arx_sky, 'Archive should only be loaded once'
+    obj_trim = obj_spec.rebin(obj_spec.wavelength[100:-100])
+    flex_dicts = flexure.spec_flex_shift_batch([obj_spec, obj_trim, obj_spec], arx_sky, mxshft=60)
+    assert np.isclose(flex_dicts[0]['shift'], flex_dict['shift']), 'Batched shift differs'
+    assert np.isclose(flex_dicts[2]['shift'], flex_dict['shift']), 'Batched shift differs'
+    assert np.allclose(flex_dicts[0]['corr'], flex_dict['corr']), 'Batched correlation differs'
+    assert np.isclose(flex_dicts[1]['shift'],
+                      flexure.spec_flex_shift(obj_trim, arx_spec, mxshft=60)['shift']), \
+                'Batched shift differs'
+
+
+def test_smooth_cache():
+    obj_spec = readspec(data_path('obj_lrisb_600_sky.fits'))
+    arx_file = pypeit.__path__[0]+'/data/sky_spec/sky_LRISb_600.fits'
+    arx_sky = flexure.get_arx_sky(arx_file)
+    # Two objects with slightly lower and different resolutions
+    obj_skys = [obj_spec.gauss_smooth(3.95), obj_spec.gauss_smooth(4.)]
+    # Binning is off by default, such that the shifts are unchanged
+    default_bin = pypeitpar.FlexurePar()['spec_smooth_bin']
+    for smooth_bin, nsmooth in zip([default_bin, 0.25], [2, 1]):
+        smooth_cache = {}
+        for obj_sky in obj_skys:
+            flexure._spec_flex_prep(obj_sky, arx_sky['spec'], arx_lines=arx_sky['lines'],
+                                    smooth_cache=smooth_cache, smooth_bin=smooth_bin)
+        assert len(smooth_cache) == nsmooth, 'Smoothed archive spectrum not reused'
+    # The cache is bounded
+    smooth_cache = {}
+    for fwhm in np.linspace(3.5, 12., 3*flexure._max_smoothed):
+        flexure._spec_flex_prep(obj_spec.gauss_smooth(fwhm), arx_sky['spec'],
+                                arx_lines=arx_sky['lines'], smooth_cache=smooth_cache)
+    assert len(smooth_cache) == flexure._max_smoothed, 'Too many smoothed spectra'
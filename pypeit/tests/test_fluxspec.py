@@ -6,12 +6,18 @@ import os
 
 import pytest
 
+import numpy as np
+
+from astropy.io import fits
+from astropy.table import Table
+
 from pypeit import fluxcalibrate
 from pypeit import sensfunc
 from pypeit.scripts import flux_calib
 from pypeit.tests.tstutils import cooked_required
 from pypeit.spectrographs.util import load_spectrograph
 from pypeit import specobjs
+from pypeit import specobj
 
 
 def data_path(filename):
@@ -73,3 +79,67 @@ def test_from_sens_func(kast_blue_files):
     sobjs = specobjs.SpecObjs.from_fitsfile(outfile)
     assert 'OPT_FLAM' in sobjs[0].keys()
 
+
+
+def fake_spec1d_and_sensfunc(spec1dfile, sensfile, nobj=5, nspec=500):
+    """
+    Write a MultiSlit spec1d file and a matching sensitivity function
+    """
+    rng = np.random.default_rng(7)
+    sobjs = specobjs.SpecObjs()
+    for i in range(nobj):
+        sobj = specobj.SpecObj('MultiSlit', 1, SLITID=i)
+        for attr in ['BOX', 'OPT']:
+            sobj[attr+'_WAVE'] = 3500. + 1.5*np.arange(nspec) + rng.uniform(0, 10)
+            sobj[attr+'_WAVE'][:3] = 0.
+            sobj[attr+'_COUNTS'] = rng.uniform(10, 100, nspec)
+            sobj[attr+'_COUNTS_IVAR'] = rng.uniform(0, 1, nspec)
+        sobjs.add_sobj(sobj)
+    header = fits.PrimaryHDU().header
+    header['PYP_SPEC'] = 'shane_kast_blue'
+    header['PYPELINE'] = 'MultiSlit'
+    header['EXPTIME'] = 300.
+    header['AIRMASS'] = 1.3
+    sobjs.write_to_fits(header, spec1dfile, overwrite=True)
+
+    wave = np.linspace(3000., 5000., 1000)
+    hdul = fits.HDUList([fits.PrimaryHDU(),
+                         fits.ImageHDU(wave, name='WAVE'),
+                         fits.ImageHDU(1e-17*(1+(wave/4000.)**2), name='SENSFUNC'),
+                         fits.BinTableHDU(Table({'EXPTIME': [300.]}), name='METADATA'),
+                         fits.BinTableHDU(Table({'WAVE': [wave]}), name='OUT_TABLE')])
+    hdul.writeto(sensfile, overwrite=True)
+
+
+def test_batch_flux_calib():
+    spec1dfile = data_path('spec1d_tst_flux.fits')
+    sensfile = data_path('sens_tst_flux.fits')
+    fake_spec1d_and_sensfunc(spec1dfile, sensfile)
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = spectrograph.default_pypeit_par()['fluxcalib']
+
+    # Flux each object with the single-spectrum method
+    sobjs = specobjs.SpecObjs.from_fitsfile(spec1dfile)
+    wave, sens, _, _, _ = sensfunc.SensFunc.load(sensfile)
+    for sobj in sobjs:
+        sobj.apply_flux_calib(wave, sens, sobjs.header['EXPTIME'],
+                              extinct_correct=par['extinct_correct'],
+                              longitude=spectrograph.telescope['longitude'],
+                              latitude=spectrograph.telescope['latitude'],
+                              airmass=float(sobjs.header['AIRMASS']))
+
+    # Flux all of them in a batch, both serially and in parallel
+    outfiles = [data_path('spec1d_tst_flux_{0}.fits'.format(i)) for i in range(3)]
+    fluxcalibrate.MultiSlitFC([spec1dfile]*2, [sensfile]*2, par=par, outfiles=outfiles[:2])
+    par['n_proc'] = 2
+    fluxcalibrate.MultiSlitFC([spec1dfile], [sensfile], par=par, outfiles=outfiles[2:])
+    for outfile in outfiles:
+        _sobjs = specobjs.SpecObjs.from_fitsfile(outfile)
+        for sobj, _sobj in zip(sobjs, _sobjs):
+            for attr in ['BOX', 'OPT']:
+                for key in ['_FLAM', '_FLAM_SIG', '_FLAM_IVAR']:
+                    assert np.allclose(sobj[attr+key], _sobj[attr+key]), \
+                            'Batch fluxing differs for {0}'.format(attr+key)
+        os.remove(outfile)
+    os.remove(spec1dfile)
+    os.remove(sensfile)
@@ -0,0 +1,53 @@
+"""
+Module to test the incremental reductions
+"""
+import os
+import shutil
+
+import numpy as np
+
+from pypeit import incremental
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def test_incremental():
+    raw_path = data_path('watch_raw')
+    redux_path = data_path('watch_redux')
+    for path in [raw_path, redux_path]:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+    watcher = incremental.IncrementalReduction('shane_kast_blue', raw_path, redux_path=redux_path,
+                                               extension='.fits', settle=1000.,
+                                               cfg_lines=['[baseprocess]', 'use_biasimage = False'])
+
+    # Frames still being written are not read
+    shutil.copy(data_path('b1.fits.gz'), raw_path)
+    assert watcher.update() == 0, 'New frame should not be read yet'
+    assert watcher.fitstbl is None, 'No frames should be typed'
+
+    watcher.settle = 0.
+    assert watcher.update() == 1, 'Arc should be read'
+    assert watcher.fitstbl['frametype'][0] == 'arc,tilt', 'Bad frame type'
+    assert os.path.isfile(os.path.join(redux_path, 'shane_kast_blue_A',
+                                       'shane_kast_blue_A.pypeit')), 'No PypeIt file'
+
+    # The science frame cannot be reduced without a trace frame
+    shutil.copy(data_path('b27.fits.gz'), raw_path)
+    assert watcher.update() == 1, 'Science frame should be read'
+    assert watcher.update() == 0, 'Frames should only be read once'
+    assert np.array_equal(watcher.fitstbl['filename'], ['b1.fits.gz', 'b27.fits.gz']), \
+            'Frames should be in order of arrival'
+    assert watcher.fitstbl['frametype'][1] == 'science', 'Bad frame type'
+    assert np.all(watcher.fitstbl['setup'] == 'A'), 'Bad setup'
+    assert np.all(watcher.fitstbl['calib'] == '0'), 'Bad calibration group'
+    assert 'trace' in watcher.missing[0], 'Trace frame should be missing'
+    assert len(watcher.calibrated) == 0, 'Masters should not be built'
+    assert len(watcher.reduced) == 0, 'No frame should be reduced'
+
+    for path in [raw_path, redux_path]:
+        shutil.rmtree(path)
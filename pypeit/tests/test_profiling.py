@@ -0,0 +1,104 @@
+"""
+Module to test the stage profiler
+"""
+import os
+import csv
+import json
+import time
+import pstats
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+from pypeit import profiling
+from pypeit.pypeit import PypeIt
+from pypeit.pypmsgs import PypeItError
+
+
+def data_path(filename):
+    data_dir = os.path.join(os.path.dirname(__file__), 'files')
+    return os.path.join(data_dir, filename)
+
+
+def run_stages(profiler):
+    profiler.set_context(frame='b1.fits.gz', det=1)
+    with profiler.stage('calibrations'):
+        with profiler.stage('arc'):
+            time.sleep(0.05)
+        with profiler.stage('flats'):
+            time.sleep(0.1)
+    profiler.set_context(frame='b1.fits.gz')
+    with profiler.stage('save'):
+        pass
+
+
+def test_stages():
+    profiler = profiling.StageProfiler()
+    run_stages(profiler)
+    assert len(profiler.records) == 0, 'Disabled profiler should not record anything'
+
+    profiler.enable()
+    run_stages(profiler)
+    assert [r['stage'] for r in profiler.records] \
+                == ['calibrations/arc', 'calibrations/flats', 'calibrations', 'save'], \
+                'Bad stages'
+    assert profiler.records[0]['det'] == 1 and profiler.records[-1]['det'] is None, \
+                'Bad context'
+    summary = profiler.summary()
+    assert summary['calibrations']['wall'] \
+                >= summary['calibrations/arc']['wall'] + summary['calibrations/flats']['wall'], \
+                'Nested stages should be included in the enclosing stage'
+    assert summary['calibrations/flats']['wall'] > 0.09, 'Bad wall time'
+    assert summary['calibrations/flats']['cpu'] < 0.05, 'Sleeping should not use the CPU'
+
+    # Write and read
+    ofile = data_path('tst_profile.json')
+    profiler.write(ofile)
+    with open(ofile, 'r') as f:
+        records = json.load(f)
+    assert records == profiler.records, 'Bad JSON profile'
+    ofile = data_path('tst_profile.csv')
+    profiler.write(ofile)
+    with open(ofile, 'r') as f:
+        records = list(csv.DictReader(f))
+    assert [r['stage'] for r in records] == [r['stage'] for r in profiler.records], \
+                'Bad CSV profile'
+    os.remove(data_path('tst_profile.json'))
+    os.remove(data_path('tst_profile.csv'))
+    with pytest.raises(PypeItError):
+        profiler.write(data_path('tst_profile.txt'))
+
+
+def test_cprofile():
+    cprofile_dir = data_path('tst_cprofile')
+    profiler = profiling.StageProfiler()
+    profiler.enable(cprofile_dir=cprofile_dir)
+    run_stages(profiler)
+    files = sorted(os.listdir(cprofile_dir))
+    assert files == ['0000_b1.fits.gz_det01_calibrations-arc.prof',
+                     '0001_b1.fits.gz_det01_calibrations-flats.prof',
+                     '0002_b1.fits.gz_det01_calibrations.prof',
+                     '0003_b1.fits.gz_save.prof'], 'Bad cProfile dumps'
+    # Nested stages are excluded from the enclosing stage
+    stats = pstats.Stats(os.path.join(cprofile_dir, files[1]))
+    assert stats.total_tt > 0.09, 'Sleep should be in the nested stage'
+    stats = pstats.Stats(os.path.join(cprofile_dir, files[2]))
+    assert stats.total_tt < 0.05, 'Nested stages should not be in the enclosing stage'
+    profiler.disable()
+    shutil.rmtree(cprofile_dir)
+
+
+def test_write_profile():
+    qa_path = data_path('tst_QA')
+    profiling.profiler.enable()
+    run_stages(profiling.profiler)
+    # Only the attributes used by write_profile are needed
+    pypeIt = SimpleNamespace(qa_path=qa_path, pypeit_file='tst.pypeit')
+    PypeIt.write_profile(pypeIt)
+    assert os.path.isfile(os.path.join(qa_path, 'tst_profile.json')), 'Profile not written'
+    assert not profiling.profiler.enabled, 'Profiler should be disabled once written'
+    assert len(profiling.profiler.records) == 0, 'Records should be removed once written'
+    run_stages(profiling.profiler)
+    assert len(profiling.profiler.records) == 0, 'Disabled profiler should not record anything'
+    shutil.rmtree(qa_path)
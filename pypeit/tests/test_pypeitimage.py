@@ -30,3 +30,34 @@ def test_full():
     assert isinstance(_pypeitImage.image, np.ndarray)
     assert _pypeitImage.ivar is None
 
+
+
+def test_float_dtype():
+    rng = np.random.RandomState(1)
+    image = 100. + 10*rng.normal(size=(500, 500))
+    pypeitImage = pypeitimage.PypeItImage(image, ivar=np.full(image.shape, 0.01),
+                                          rn2img=np.full(image.shape, 16.))
+    pypeitImage.build_mask(saturation=140., mincounts=60.)
+    assert pypeitImage.fullmask.dtype == pypeitImage.bitmask.minimum_dtype(asuint=True)
+
+    nbytes = pypeitImage.image.nbytes
+    pypeitImage.set_float_dtype('float32')
+    assert all([pypeitImage[key].dtype == np.float32 for key in ['image', 'ivar', 'rn2img']])
+    assert pypeitImage.image.nbytes == nbytes // 2
+    # Differences are at the level of the float32 precision
+    assert np.max(np.absolute(pypeitImage.image/image - 1)) < np.finfo(np.float32).eps
+    # Masking is not affected
+    _pypeitImage = pypeitimage.PypeItImage(pypeitImage.image, ivar=pypeitImage.ivar)
+    _pypeitImage.build_mask(saturation=140., mincounts=60.)
+    assert np.array_equal(_pypeitImage.fullmask, pypeitImage.fullmask)
+
+    # I/O keeps the precision
+    outfile = data_path('tst_pypeitimage.fits')
+    pypeitImage.to_file(outfile, overwrite=True)
+    _pypeitImage = pypeitimage.PypeItImage.from_file(outfile)
+    os.remove(outfile)
+    assert _pypeitImage.image.dtype == np.float32
+    assert np.array_equal(_pypeitImage.image, pypeitImage.image)
+
+    with pytest.raises(Exception):
+        pypeitImage.set_float_dtype('int16')
@@ -12,6 +12,7 @@ from astropy.io import fits
 
 from pypeit.scripts import setup, show_1dspec, coadd_1dspec, chk_edges, view_fits, chk_flats
 from pypeit.scripts import trace_edges, run_pypeit, ql_mos, show_2dspec, tellfit, flux_setup
+from pypeit import quicklook
 from pypeit.tests.tstutils import dev_suite_required, cooked_required
 from pypeit import edgetrace
 from pypeit import ginga
@@ -46,6 +47,27 @@ def test_quicklook():
                                    os.path.join(calib_dir,
                                         'PYPEIT_LRISb_pixflat_B600_2x2_17sep2009.fits.gz'))]))
 
+@dev_suite_required
+def test_quicklook_server():
+    # Define the output directories (HARDCODED!!)
+    outdir = os.path.join(os.getcwd(), 'shane_kast_blue_A')
+    # Remove them if they already exist
+    if os.path.isdir(outdir):
+        shutil.rmtree(outdir)
+
+    droot = os.path.join(os.environ['PYPEIT_DEV'], 'RAW_DATA', 'shane_kast_blue', '600_4310_d55')
+    ql = quicklook.QuickLook('shane_kast_blue', droot, 'b1.fits.gz', 'b10.fits.gz')
+    # The calibrations are only built once
+    for science in ['b27.fits.gz', 'b27.fits.gz']:
+        result = ql.reduce_frame(science)
+        assert os.path.isfile(result['spec2d']), 'spec2d file not written'
+        assert result['latency']['total'] < ql.latency['calibrations'], \
+                'Calibrations should not be rebuilt'
+
+    # Clean-up
+    shutil.rmtree(outdir)
+
+
 @dev_suite_required
 def test_trace_edges():
     # Define the output directories (HARDCODED!!)
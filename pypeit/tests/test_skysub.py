@@ -6,6 +6,7 @@ import numpy as np
 
 from pypeit.core import skysub
 from pypeit.slittrace import SlitTraceSet
+from pypeit.tests import benchmarks
 
 
 def test_userregions():
@@ -42,3 +43,20 @@ def test_generatemask():
                          pypeline='IFU', nspat=1000, PYP_SPEC='dummy')
     skymask = skysub.generate_mask("IFU", regs, slits, slits.left_init, slits.right_init, resolution=resolution)
     assert(np.array_equal(skymask, tstmsk))
+
+
+def test_global_skysub_float32():
+    """
+    Quantify the difference in the sky model when the image is stored in
+    single precision.
+    """
+    d = benchmarks.fake_science(nspec=256, seed=1)
+    thismask = d['slitmask'] == 0
+    args = (d['tilts'], thismask, d['left'][:,0], d['right'][:,0])
+    sky64 = skysub.global_skysub(d['image'], d['ivar'], *args, inmask=d['ivar'] > 0)
+    sky32 = skysub.global_skysub(d['image'].astype(np.float32), d['ivar'].astype(np.float32),
+                                 *args, inmask=d['ivar'] > 0)
+    # The differences are at the level of the float32 precision and
+    # much smaller than the noise
+    assert np.max(np.absolute(sky32/sky64 - 1)) < 1e-6
+    assert np.median(np.absolute(d['image'][thismask] - sky64)/d['sky'][thismask]) > 1e-2
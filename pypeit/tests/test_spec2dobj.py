@@ -86,6 +86,25 @@ def test_spec2dobj_io(init_dict):
     _spec2DObj = spec2dobj.Spec2DObj.from_file(ofile, init_dict['det'])
     os.remove(ofile)
 
+def test_spec2dobj_float_dtype(init_dict):
+    spec2DObj = spec2dobj.Spec2DObj(**init_dict)
+    spec2DObj.detector = tstutils.get_kastb_detector()
+    spec2DObj.set_float_dtype('float32')
+    # The tilts and wavelengths are kept in double precision
+    for key in ['sciimg', 'ivarraw', 'skymodel', 'objmodel', 'ivarmodel']:
+        assert spec2DObj[key].dtype == np.float32
+    assert spec2DObj.tilts.dtype == np.float64
+    assert spec2DObj.waveimg.dtype == np.float64
+    # Write and read
+    ofile = data_path('tst_spec2d.fits')
+    spec2DObj.to_file(ofile, overwrite=True)
+    _spec2DObj = spec2dobj.Spec2DObj.from_file(ofile, init_dict['det'])
+    os.remove(ofile)
+    assert _spec2DObj.sciimg.dtype == np.float32
+    assert _spec2DObj.waveimg.dtype == np.float64
+    assert np.allclose(_spec2DObj.ivarmodel, init_dict['ivarmodel'], rtol=1e-7, atol=0)
+
+
 def test_spec2dobj_update_slit(init_dict):
     # Build two
     spec2DObj1 = spec2dobj.Spec2DObj(**init_dict)
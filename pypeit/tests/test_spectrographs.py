@@ -8,12 +8,35 @@ import glob
 
 from pkg_resources import resource_filename
 
+import sys
+import subprocess
+
+from pypeit import defs
 from pypeit import spectrographs
 from pypeit.core import procimg
+from pypeit.spectrographs.util import load_spectrograph
 
 from pypeit.tests.tstutils import dev_suite_required
 
 
+def test_registry():
+    # The registry must include all the supported spectrographs
+    assert set(spectrographs.spectrograph_classes.keys()) == set(defs.pypeit_spectrographs), \
+            'Spectrograph registry is inconsistent with defs.pypeit_spectrographs'
+    for name in defs.pypeit_spectrographs:
+        assert load_spectrograph(name).spectrograph == name, 'Wrong spectrograph loaded'
+
+
+def test_lazy_import():
+    # Loading one spectrograph should not import the others
+    code = 'import sys\nfrom pypeit.spectrographs.util import load_spectrograph\n' \
+           'load_spectrograph(\'shane_kast_blue\')\n' \
+           'print(\'pypeit.spectrographs.keck_deimos\' in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    assert result.stdout.strip().splitlines()[-1] == 'False', 'Imported unused spectrographs'
+
+
 @dev_suite_required
 def test_mdm_osmos():
     s = spectrographs.mdm_osmos.MDMOSMOSMDM4KSpectrograph()
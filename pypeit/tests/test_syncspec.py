@@ -1,8 +1,13 @@
 import os
+import glob
 
 import pytest
 
+import numpy as np
+
+from pypeit import coadd1d
 from pypeit.scripts import coadd_1dspec
+from pypeit.spectrographs.util import load_spectrograph
 from pypeit.tests.tstutils import dev_suite_required, cooked_required
 
 #def test_lrisr():
@@ -29,3 +34,38 @@ def test_kastb():
                                 os.path.join(dpath, file2)],
                                'tst_coadd_files',
                                1)
+
+
+def test_coadd_objects():
+    dpath = os.path.join(os.path.dirname(__file__), 'files')
+    files = [os.path.join(dpath, 'spec1d_b27-J1217p3905_KASTb_2015May20T045733.560.fits'),
+             os.path.join(dpath, 'spec1d_b28-J1217p3905_KASTb_2015May20T051801.470.fits')]
+    objids = ['SPAT0176-SLIT0175-DET01', 'SPAT0175-SLIT0175-DET01']
+
+    # Index
+    specobjs_dict, index = coadd1d.build_object_index(files)
+    assert list(specobjs_dict.keys()) == files, 'Files should be read once'
+    assert list(index[objids[0]].keys()) == files[:1], 'Bad object index'
+
+    # Single object
+    spectrograph = load_spectrograph('shane_kast_blue')
+    par = spectrograph.default_pypeit_par()['coadd1d']
+    par['flux_value'] = False
+    coAdd1d = coadd1d.CoAdd1D.get_instance(files, objids, spectrograph=spectrograph, par=par)
+    coAdd1d.run()
+
+    # Many objects, in parallel
+    par['n_proc'] = 2
+    coaddfiles = ['tst_coadd_objects_{0}.fits'.format(i) for i in range(2)]
+    coadd1d.coadd_objects([list(zip(files, objids))]*2, coaddfiles, spectrograph=spectrograph, par=par)
+    for coaddfile in coaddfiles:
+        onespec = coadd1d.OneSpec.from_file(coaddfile)
+        wave_mask = coAdd1d.wave_coadd > 1.0
+        assert np.allclose(onespec.flux, coAdd1d.flux_coadd[wave_mask]), 'Coadds should be identical'
+        os.remove(coaddfile)
+
+    # Objects synced between files
+    coadd_1dspec.coadd1d_filelist(files, 'tst_coadd_files', 1, n_proc=2)
+    coaddfiles = glob.glob('tst_coadd_files-SPAT*-DET01.fits')
+    assert len(coaddfiles) == 1, 'Both spectra should be synced to the same object'
+    os.remove(coaddfiles[0])
@@ -0,0 +1,168 @@
+"""
+Module to run tests on the telluric grid utilities
+"""
+import os
+
+import pytest
+
+import numpy as np
+
+from astropy.io import fits
+
+from pypeit.core import telluric
+
+
+def make_fake_grid(ofile):
+    """
+    Write a small telluric grid whose models are linear in the grid parameters.
+    """
+    npres, ntemp, nhum, nam, nspec = 3, 4, 5, 2, 2000
+    wave = np.linspace(900., 1000., nspec)      # in nm
+    header = fits.Header()
+    for key, n, v0, dv in zip(['PRES', 'TEMP', 'HUM', 'AM'], [npres, ntemp, nhum, nam],
+                              [600., 250., 0., 1.], [10., 5., 20., 0.5]):
+        header['N'+key] = n
+        header[key+'0'] = v0
+        header['D'+key] = dv
+    p, t, h, a = np.meshgrid(np.arange(npres), np.arange(ntemp), np.arange(nhum), np.arange(nam),
+                             indexing='ij')
+    model = 1.0 - 0.01*(p + 2*t + 3*h + 4*a)[...,None] * np.exp(-0.5*((wave-950.)/0.5)**2)[None,None,None,None,:]
+    fits.HDUList([fits.PrimaryHDU(data=model, header=header),
+                  fits.ImageHDU(data=wave)]).writeto(ofile, overwrite=True)
+
+
+@pytest.fixture
+def telgrid(tmp_path):
+    """
+    Write a fake telluric grid to a temporary file and empty the grid
+    cache before and after the test.
+    """
+    ofile = str(tmp_path / 'tmp_telgrid.fits')
+    make_fake_grid(ofile)
+    telluric.clear_telluric_grid_cache()
+    try:
+        yield ofile
+    finally:
+        telluric.clear_telluric_grid_cache()
+
+
+def test_read_telluric_grid(telgrid):
+    tell_dict = telluric.read_telluric_grid(telgrid)
+    assert tell_dict['tell_grid'].shape == (3,4,5,2,2000), 'Bad grid shape'
+    assert np.allclose(tell_dict['pressure_grid'], [600., 610., 620.]), 'Bad pressure grid'
+
+    # The grid is read into memory and the file closed
+    assert not isinstance(tell_dict['tell_grid'], np.memmap), 'Grid should not be memory-mapped'
+    assert not tell_dict['tell_grid'].flags.writeable, 'Cached grid should be read-only'
+    if os.path.isdir('/proc/self/fd'):
+        open_files = [os.path.realpath(os.path.join('/proc/self/fd', fd))
+                      for fd in os.listdir('/proc/self/fd')]
+        assert os.path.realpath(telgrid) not in open_files, 'Grid file left open'
+
+    # The grid should only be read once
+    _tell_dict = telluric.read_telluric_grid(telgrid, wave_min=9400., wave_max=9600., pad=10)
+    _tell_dict = telluric.read_telluric_grid(telgrid, wave_min=9400., wave_max=9600., pad=10)
+    assert telluric.load_telluric_grid.cache_info().hits == 1, 'Grid read twice'
+    assert telluric.load_telluric_grid.cache_info().currsize == 2, 'Grids not cached'
+    indx = (tell_dict['wave_grid'] >= _tell_dict['wave_grid'][0]) \
+                & (tell_dict['wave_grid'] <= _tell_dict['wave_grid'][-1])
+    assert np.array_equal(_tell_dict['tell_grid'], tell_dict['tell_grid'][...,indx]), 'Bad trimmed slab'
+
+    # The cache is bounded
+    for wave_min in np.linspace(9100., 9300., 2*telluric._max_telluric_grids):
+        telluric.read_telluric_grid(telgrid, wave_min=wave_min, wave_max=9600.)
+    assert telluric.load_telluric_grid.cache_info().currsize == telluric._max_telluric_grids, \
+            'Cache is not bounded'
+
+
+def test_interp_telluric_grid(telgrid):
+    tell_dict = telluric.read_telluric_grid(telgrid)
+
+    # At grid points both methods must agree
+    theta = np.array([610., 260., 40., 1.5])
+    nearest = telluric.interp_telluric_grid(theta, tell_dict)
+    tell_dict['grid_interp'] = 'linear'
+    linear = telluric.interp_telluric_grid(theta, tell_dict)
+    assert np.allclose(nearest, linear), 'Interpolation at a grid point should be exact'
+
+    # Models are linear in the parameters, so multilinear interpolation is exact
+    theta = np.array([604., 262.5, 33., 1.2])
+    linear = telluric.interp_telluric_grid(theta, tell_dict, ind_lower=900, ind_upper=1099)
+    frac = (theta - np.array([600., 250., 0., 1.]))/np.array([10., 5., 20., 0.5])
+    expected = 1.0 - 0.01*np.sum(frac*np.array([1,2,3,4])) \
+                        * np.exp(-0.5*((tell_dict['wave_grid'][900:1100]/10.-950.)/0.5)**2)
+    assert linear.size == 200, 'Bad trimmed size'
+    assert np.allclose(linear, expected), 'Bad multilinear interpolation'
+
+    # Full model evaluation is unchanged in size for either method
+    theta_tell = np.append(theta, [5000., 0.0, 1.0])
+    tell_dict['grid_interp'] = 'nearest'
+    nearest = telluric.eval_telluric(theta_tell, tell_dict, ind_lower=500, ind_upper=1500)
+    tell_dict['grid_interp'] = 'linear'
+    linear = telluric.eval_telluric(theta_tell, tell_dict, ind_lower=500, ind_upper=1500)
+    assert nearest.shape == linear.shape, 'Bad model shape'
+
+
+def test_eval_telluric_vec(telgrid):
+    tell_dict = telluric.read_telluric_grid(telgrid)
+
+    rng = np.random.RandomState(1)
+    npop = 20
+    theta_tell = np.vstack([rng.uniform(600., 620., npop), rng.uniform(250., 265., npop),
+                            rng.uniform(0., 80., npop), rng.uniform(1., 1.5, npop),
+                            rng.uniform(4000., 8000., npop), rng.uniform(-5., 5., npop),
+                            rng.uniform(0.9, 1.1, npop)])
+    for grid_interp in ['nearest', 'linear']:
+        tell_dict['grid_interp'] = grid_interp
+        models = telluric.eval_telluric_vec(theta_tell, tell_dict, ind_lower=500, ind_upper=1500)
+        for i in range(npop):
+            model = telluric.eval_telluric(theta_tell[:,i], tell_dict, ind_lower=500, ind_upper=1500)
+            assert np.allclose(models[i], model), 'Vectorized evaluation does not match'
+
+    # Models evaluated on the trimmed grid should be identical
+    _tell_dict, ind_lower, ind_upper = telluric.trim_tell_dict(tell_dict, 500, 1500)
+    assert _tell_dict['tell_grid'].shape[-1] < tell_dict['tell_grid'].shape[-1], 'Grid not trimmed'
+    assert np.array_equal(telluric.eval_telluric(theta_tell[:,0], tell_dict, ind_lower=500, ind_upper=1500),
+                          telluric.eval_telluric(theta_tell[:,0], _tell_dict, ind_lower=ind_lower,
+                                                 ind_upper=ind_upper)), 'Trimmed grid changes the model'
+
+    # The vectorized loss function should match the scalar one
+    def eval_obj_model(theta_obj, obj_dict):
+        return np.full(obj_dict['nspec'], theta_obj[0]), np.ones(obj_dict['nspec'], dtype=bool)
+    nspec = 1001
+    flux = rng.normal(size=nspec) + 1.0
+    arg_dict = dict(ivar=np.ones(nspec), tell_dict=tell_dict, ind_lower=500, ind_upper=1500,
+                    obj_model_func=eval_obj_model, obj_dict=dict(nspec=nspec))
+    theta = np.vstack([rng.uniform(0.5, 1.5, npop), theta_tell])
+    thismask = np.ones(nspec, dtype=bool)
+    loss = telluric.tellfit_chi2_vec(theta, flux, thismask, arg_dict)
+    assert loss.shape == (npop,), 'Bad loss shape'
+    assert np.allclose(loss, [telluric.tellfit_chi2(theta[:,i], flux, thismask, arg_dict)
+                              for i in range(npop)]), 'Vectorized loss function does not match'
+
+
+def test_telluric_n_proc(telgrid):
+
+    # Two fake orders with a constant continuum
+    nspec = 400
+    wave = np.stack([np.linspace(9100., 9500., nspec), np.linspace(9450., 9900., nspec)], axis=1)
+    flux = 10. + np.random.RandomState(2).normal(scale=0.1, size=wave.shape)
+    ivar = np.full(wave.shape, 100.)
+    mask = np.ones(wave.shape, dtype=bool)
+    obj_params = dict(z_obj=0.0, mask_lyman_a=False, polyorder_vec=np.array([1,1]), func='legendre',
+                      model='exp', delta_coeff_bounds=(-20.0, 20.0), minmax_coeff_bounds=(-5.0, 5.0),
+                      debug=False)
+
+    # Pools of processes are not nested when the orders are fit concurrently
+    for workers in [1, 2]:
+        tables = []
+        for n_proc in [1, 2]:
+            TelObj = telluric.Telluric(wave, flux, ivar, mask, telgrid, obj_params, telluric.init_poly_model,
+                                       telluric.eval_poly_model, maxiter=1, popsize=5, tol=0.1, polish=False,
+                                       workers=workers, n_proc=n_proc)
+            fit_args = TelObj.get_fit_args(0, parallel=n_proc != 1)
+            assert fit_args[-1]['workers'] == (workers if n_proc == 1 else 1), 'Nested pools'
+            TelObj.run()
+            tables += [TelObj.out_table]
+        for key in ['TELLURIC', 'OBJ_MODEL', 'TELL_THETA', 'OBJ_THETA', 'CHI2']:
+            assert np.array_equal(tables[0][key], tables[1][key]), 'Parallel fit differs from serial fit'
@@ -0,0 +1,112 @@
+"""
+Module to run tests on the core tracing routines
+"""
+import os
+import time
+
+import pytest
+
+import numpy as np
+
+from pypeit.tests.tstutils import cooked_required
+from pypeit.core import trace
+from pypeit import edgetrace
+
+
+def follow_centroid_loop(flux, start_row, start_cen, ivar=None, bpm=None, fwgt=None, width=6.0,
+                         maxshift_start=0.5, maxshift_follow=0.15, maxerror=0.2, bitmask=None):
+    """
+    Row-by-row version of follow_centroid used to check the compiled
+    kernel.
+    """
+    nr = flux.shape[0]
+    _ivar = np.ones_like(flux, dtype=float) if ivar is None else ivar
+    _bpm = np.zeros_like(flux, dtype=bool) if bpm is None else bpm
+    _fwgt = np.ones_like(flux, dtype=float) if fwgt is None else fwgt
+    xc = np.tile(np.atleast_1d(start_cen), (nr,1)).astype(float)
+    xe = np.zeros_like(xc, dtype=float)
+    xm = np.zeros_like(xc, dtype=bool) if bitmask is None \
+                else np.zeros_like(xc, dtype=bitmask.minimum_dtype())
+    i = start_row
+    xc[i,:], xe[i,:], xm[i,:] = trace.masked_centroid(flux, xc[i,:], width, ivar=_ivar, bpm=_bpm,
+                                                      fwgt=_fwgt, row=i, maxshift=maxshift_start,
+                                                      maxerror=maxerror, bitmask=bitmask,
+                                                      fill='bound')
+    for i in list(range(start_row+1,nr)) + list(range(start_row-1,-1,-1)):
+        j = i-1 if i > start_row else i+1
+        xc[i,:], xe[i,:], xm[i,:] = trace.masked_centroid(flux, xc[j,:], width, ivar=_ivar,
+                                                          bpm=_bpm, fwgt=_fwgt, row=i,
+                                                          maxshift=maxshift_follow,
+                                                          maxerror=maxerror, bitmask=bitmask,
+                                                          fill='bound')
+    return xc, xe, xm
+
+
+def fake_edges(nspec=500, nspat=200):
+    """
+    Image with a few tilted and curved edges, noise, and bad pixels.
+    """
+    rng = np.random.RandomState(7)
+    spec = np.arange(nspec)
+    spat = np.arange(nspat)
+    centers = [20.3 + 0.01*spec, 75.0 + 5*np.sin(spec/100.), 140.6 - 0.02*spec, 170.2+0*spec]
+    img = np.zeros((nspec, nspat), dtype=float)
+    for cen in centers:
+        img += np.exp(-0.5*((spat[None,:]-cen[:,None])/1.5)**2)
+    # Fade out the second edge so that it becomes discontinuous
+    img[300:,60:90] *= 0.01
+    img += rng.normal(scale=0.05, size=img.shape)
+    bpm = rng.uniform(size=img.shape) < 0.01
+    ivar = np.full(img.shape, 400.)
+    return img, ivar, bpm, np.array([c[250] for c in centers])
+
+
+def test_follow_centroid():
+    img, ivar, bpm, start_cen = fake_edges()
+    bitmask = edgetrace.EdgeTraceBitMask()
+    for _bitmask in [None, bitmask]:
+        for kwargs in [dict(), dict(ivar=ivar, bpm=bpm, width=np.array([6., 5., 6., 4.])),
+                       dict(ivar=ivar, maxerror=None, maxshift_follow=0.3)]:
+            xc, xe, xm = trace.follow_centroid(img, 250, start_cen, continuous=False,
+                                               bitmask=_bitmask, **kwargs)
+            _xc, _xe, _xm = follow_centroid_loop(img, 250, start_cen, bitmask=_bitmask, **kwargs)
+            assert np.array_equal(xc, _xc), 'Centroids changed'
+            assert np.array_equal(xe, _xe), 'Centroid errors changed'
+            assert np.array_equal(xm, _xm), 'Centroid flags changed'
+            assert xm.dtype == _xm.dtype, 'Flag type changed'
+
+    # The faded part of the second trace should be flagged as discontinuous
+    xc, xe, xm = trace.follow_centroid(img, 250, start_cen, ivar=ivar, bpm=bpm, bitmask=bitmask)
+    assert np.all(bitmask.flagged(xm[-1,1], flag='DISCONTINUOUS')), 'Discontinuity not flagged'
+    assert not np.any(bitmask.flagged(xm[250], flag='DISCONTINUOUS')), 'Bad discontinuity'
+
+
+@cooked_required
+def test_follow_centroid_benchmark():
+    """
+    Time the compiled centroid follower against the row-by-row
+    calculation using the DEIMOS and LRIS trace images.
+    """
+    for root in ['MasterEdges_KeckDEIMOS_830G_8500_det3.fits.gz',
+                 'MasterEdges_KeckLRISr_400_8500_det1.fits.gz']:
+        trace_file = os.path.join(os.getenv('PYPEIT_DEV'), 'Cooked', 'Trace', root)
+        if not os.path.isfile(trace_file):
+            continue
+        edges = edgetrace.EdgeTraceSet.from_file(trace_file)
+        flux = trace.prepare_sobel_for_trace(edges.sobel_sig, boxcar=5, side='left')
+        start_row = edges.nspec//2
+        start_cen = edges.spat_cen[start_row, edges.traceid < 0]
+
+        # Compile first
+        trace.follow_centroid(flux[:10], 5, start_cen, bitmask=edges.bitmask)
+        t = time.perf_counter()
+        xc, xe, xm = trace.follow_centroid(flux, start_row, start_cen, continuous=False,
+                                           bitmask=edges.bitmask)
+        t_kernel = time.perf_counter() - t
+        t = time.perf_counter()
+        _xc, _xe, _xm = follow_centroid_loop(flux, start_row, start_cen, bitmask=edges.bitmask)
+        t_loop = time.perf_counter() - t
+        print('{0}: {1} traces; loop {2:.2f}s, compiled {3:.3f}s'.format(root, start_cen.size,
+                                                                        t_loop, t_kernel))
+        assert np.array_equal(xc, _xc) and np.array_equal(xm, _xm), 'Compiled follower differs'
+
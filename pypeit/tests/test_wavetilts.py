@@ -9,9 +9,11 @@ import numpy as np
 
 
 from pypeit.tests.tstutils import dev_suite_required, load_kast_blue_masters, cooked_required
+from pypeit.tests.tstutils import get_kastb_detector
 from pypeit import wavetilts
 from pypeit import slittrace
 from pypeit.core import tracewave, pixels
+from pypeit.images import pypeitimage
 from pypeit.par import pypeitpar
 from pypeit.spectrographs.util import load_spectrograph
 
@@ -134,3 +136,66 @@ def test_run(master_dir):
     waveTilts = buildwaveTilts.run(doqa=False)
     assert isinstance(waveTilts.fit2tiltimg(slits.slit_img()), np.ndarray)
 
+
+
+def fake_arc(nslits=3, nspec=600, nlines=25, seed=1):
+    """
+    Fake arc image with tilted lines in a few slits.
+    """
+    rng = np.random.RandomState(seed)
+    nspat = 60*nslits
+    spec = np.arange(nspec)[:,None]
+    spat = np.arange(nspat)[None,:]
+    left = np.tile(5. + 60*np.arange(nslits), (nspec,1))
+    right = left + 48.
+    lines = np.linspace(8, nspec-9, nlines) + rng.uniform(-3, 3, nlines)
+    img = np.full((nspec, nspat), 20.)
+    for i in range(nslits):
+        dspat = spat - (left[0,i]+right[0,i])/2
+        for c in lines:
+            img += rng.uniform(500, 5000) * (np.absolute(dspat) < 30) \
+                        * np.exp(-0.5*((spec - c - 0.05*dspat - 1e-4*dspat**2)/1.5)**2)
+    img += rng.normal(scale=5., size=img.shape)
+    return img, left, right
+
+
+def test_trace_tilts_work():
+    img, left, right = fake_arc(nslits=1)
+    spat = np.arange(img.shape[1])
+    thismask = (spat[None,:] > left) & (spat[None,:] < right)
+    slit_cen = (left[:,0] + right[:,0])/2
+    arcspec = np.median(img[:,int(slit_cen[0])-2:int(slit_cen[0])+3], axis=1)
+    lines_spec, lines_spat, good = tracewave.tilts_find_lines(arcspec, slit_cen, fwhm=3.)
+    lines_spec, lines_spat = lines_spec[good], lines_spat[good]
+    # Lines traced together in spectral windows vs. one at a time
+    # using the full slit sub-image
+    kwargs = dict(fwhm=3., tcrude_maxerr=0.75, tcrude_maxshift=2.25, tcrude_maxshift0=3.)
+    _trc = tracewave.trace_tilts_work(img, lines_spec, lines_spat, thismask, slit_cen,
+                                      batch_lines=False, **kwargs)
+    # All the batched lines in one group, and split in groups of a few
+    # lines
+    for max_stack_pix in [2**22, 20000]:
+        trc = tracewave.trace_tilts_work(img, lines_spec, lines_spat, thismask, slit_cen,
+                                         max_stack_pix=max_stack_pix, **kwargs)
+        assert np.array_equal(trc['tilts_mask'], _trc['tilts_mask']), 'Traced pixels changed'
+        for key in ['tilts', 'tilts_fit', 'tilts_spec']:
+            assert np.allclose(trc[key], _trc[key], rtol=0, atol=1e-8), \
+                    '{0} changed'.format(key)
+
+
+def test_buildwavetilts_n_proc():
+    img, left, right = fake_arc()
+    spectrograph = load_spectrograph('shane_kast_blue')
+    mstilt = pypeitimage.PypeItImage(image=img, detector=get_kastb_detector())
+    wavepar = pypeitpar.WavelengthSolutionPar(fwhm=3.)
+    tilts = []
+    for n_proc in [1, 2]:
+        slits = slittrace.SlitTraceSet(left, right, 'MultiSlit', nspat=img.shape[1],
+                                       PYP_SPEC='shane_kast_blue')
+        par = pypeitpar.WaveTiltsPar(spat_order=2, spec_order=3, n_proc=n_proc)
+        buildwaveTilts = wavetilts.BuildWaveTilts(mstilt, slits, spectrograph, par, wavepar)
+        tilts += [buildwaveTilts.run(doqa=False)]
+        assert np.all(slits.mask == 0), 'Tilts fit failed'
+    assert np.array_equal(tilts[0].coeffs, tilts[1].coeffs), 'Parallel tilts differ'
+    assert np.array_equal(buildwaveTilts.final_tilts[img.shape[0]//2] > 0, slits.slit_img()[0] > -1), \
+            'Tilt image not filled'
@@ -41,6 +41,10 @@ except:
 else:
     bspline_ext = True
 bspline_ext_required = pytest.mark.skipif(not bspline_ext, reason='Could not import C extension')
+
+# Run the full set of performance benchmarks
+benchmark_required = pytest.mark.skipif(os.getenv('PYPEIT_BENCHMARK') is None,
+                                        reason='set PYPEIT_BENCHMARK to run the benchmarks')
 # ----------------------------------------------------------------------
 
 
@@ -8,6 +8,7 @@ import os
 import pickle
 import warnings
 import itertools
+import concurrent.futures
 from collections import deque
 from bisect import insort, bisect_left
 
@@ -19,9 +20,6 @@ from numpy.lib.stride_tricks import as_strided
 from scipy.optimize import curve_fit
 from scipy import interpolate, ndimage
 
-import matplotlib
-from matplotlib import pyplot as plt
-
 from astropy import units
 from astropy import stats
 
@@ -325,6 +323,8 @@ def pyplot_rcparams():
     Returns:
 
     """
+    from matplotlib import pyplot as plt
+
     # set some plotting parameters
     plt.rcParams["xtick.top"] = True
     plt.rcParams["ytick.right"] = True
@@ -357,6 +357,8 @@ def pyplot_rcparams_default():
     Returns:
 
     """
+    import matplotlib
+
     matplotlib.rcParams.update(matplotlib.rcParamsDefault)
 
 
@@ -883,6 +885,8 @@ def bspline_qa(xdata, ydata, sset, gpm, yfit, xlabel=None, ylabel=None, title=No
         `matplotlib.axes.Axes`_: Axes instance with the data, model,
         and breakpoints.  Only returned if ``show`` is False.
     """
+    from matplotlib import pyplot as plt
+
     goodbk = sset.mask
     bkpt, _ = sset.value(sset.breakpoints[goodbk])
     was_fit_and_masked = np.invert(gpm)
@@ -2019,3 +2023,47 @@ def load_pickle(fname):
     msgs.info('Loading file: {0:s}'.format(fname))
     with open(fname, 'rb') as f:
         return pickle.load(f)
+
+
+def parallel_map(func, iterable, n_proc=1, initializer=None, initargs=()):
+    """
+    Apply a function to each element of an iterable, optionally using a
+    pool of processes.
+
+    The results are always returned in the order of the input
+    iterable. If the calculation is performed in parallel, ``func``
+    and the elements of ``iterable`` must be picklable; i.e., ``func``
+    must be defined at the top level of a module.
+
+    Args:
+        func (callable):
+            Function to apply to each element of ``iterable``.
+        iterable (iterable):
+            Arguments passed to ``func``, one at a time.
+        n_proc (:obj:`int`, optional):
+            Number of processes to use. If 1, the calculation is
+            performed serially in the current process. If less than
+            1, use all available CPUs.
+        initializer (callable, optional):
+            Function called with ``initargs`` once in each process
+            before any calls to ``func``; e.g., to set up large,
+            read-only data shared by all calculations so that it is
+            only pickled once per process. If the calculation is
+            performed serially, it is called once in the current
+            process.
+        initargs (:obj:`tuple`, optional):
+            Arguments passed to ``initializer``.
+
+    Returns:
+        :obj:`list`: The results of applying ``func`` to each element
+        of ``iterable``.
+    """
+    if n_proc == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [func(item) for item in iterable]
+    if n_proc < 1:
+        n_proc = os.cpu_count()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_proc, initializer=initializer,
+                                                initargs=initargs) as executor:
+        return list(executor.map(func, iterable))
@@ -14,6 +14,7 @@ from matplotlib import pyplot as plt
 from astropy import stats, visualization
 
 from pypeit import msgs
+from pypeit import utils
 from pypeit import datamodel
 from pypeit import ginga
 from pypeit.core import arc
@@ -591,58 +592,29 @@ class BuildWaveTilts(object):
         if show:
             viewer,ch = ginga.show_image(self.mstilt.image*(self.slitmask > -1),chname='tilts')
 
-        # Loop on all slits
-        for slit_idx, slit_spat in enumerate(self.slits.spat_id):
-            if self.tilt_bpm[slit_idx]:
-                continue
-            #msgs.info('Computing tilts for slit {0}/{1}'.format(slit, self.slits.nslits-1))
-            msgs.info('Computing tilts for slit {0}/{1}'.format(slit_idx, self.slits.nslits))
-            # Identify lines for tracing tilts
-            msgs.info('Finding lines for tilt analysis')
-            self.lines_spec, self.lines_spat \
-                    = self.find_lines(self.arccen[:,slit_idx], self.slitcen[:,slit_idx],
-                                      slit_idx,
-                                      bpm=self.arccen_bpm[:,slit_idx], debug=debug)
-
-            if self.lines_spec is None:
-                self.slits.mask[slit_idx] = self.slits.bitmask.turn_on(self.slits.mask[slit_idx], 'BADTILTCALIB')
-                continue
-
-            thismask = self.slitmask == slit_spat
-
-            # Performs the initial tracing of the line centroids as a
-            # function of spatial position resulting in 1D traces for
-            # each line.
-            msgs.info('Trace the tilts')
-            self.trace_dict = self.trace_tilts(_mstilt, self.lines_spec, self.lines_spat,
-                                               thismask, self.slitcen[:, slit_idx])
-
-            # TODO: Show the traces before running the 2D fit
-
-            if show:
-                ginga.show_tilts(viewer, ch, self.trace_dict)
-
-            self.spat_order[slit_idx] = self._parse_param(self.par, 'spat_order', slit_idx)
-            self.spec_order[slit_idx] = self._parse_param(self.par, 'spec_order', slit_idx)
-            # 2D model of the tilts, includes construction of QA
-            # NOTE: This also fills in self.all_fit_dict and self.all_trace_dict
-            coeff_out = self.fit_tilts(self.trace_dict, thismask, self.slitcen[:,slit_idx],
-                                       self.spat_order[slit_idx], self.spec_order[slit_idx],
-                                       slit_idx,
-                                       doqa=doqa, show_QA=show, debug=show)
-            self.coeffs[:self.spec_order[slit_idx]+1,:self.spat_order[slit_idx]+1,slit_idx] = coeff_out
-
-            # TODO: Need a way to assess the success of fit_tilts and
-            # flag the slit if it fails
-
-            # Tilts are created with the size of the original slitmask,
-            # which corresonds to the same binning as the science
-            # images, trace images, and pixelflats etc.
-            self.tilts = tracewave.fit2tilts(self.slitmask_science.shape, coeff_out,
-                                             self.par['func2d'])
-            # Save to final image
-            thismask_science = self.slitmask_science == slit_spat
-            self.final_tilts[thismask_science] = self.tilts[thismask_science]
+        # Trace and fit the tilts in each slit
+        trace_slits = np.where(np.invert(self.tilt_bpm))[0]
+        n_proc = 1 if show or debug else self.par['n_proc']
+        results = None
+        if n_proc != 1 and len(trace_slits) > 1:
+            msgs.info('Computing tilts for {0} slits using {1} processes.'.format(
+                      len(trace_slits), n_proc))
+            # Only send the data needed to trace the tilts to each process
+            _self = copy.copy(self)
+            _self.final_tilts = None
+            results = dict(zip(trace_slits,
+                               utils.parallel_map(_trace_slit, trace_slits, n_proc=n_proc,
+                                                  initializer=_init_trace_slit,
+                                                  initargs=(_self, _mstilt, doqa))))
+
+        for slit_idx in trace_slits:
+            result = self._trace_slit(slit_idx, _mstilt, doqa=doqa, debug=debug,
+                                      show=(viewer, ch) if show else None) \
+                        if results is None else results[slit_idx]
+            if results is not None:
+                # Steps taken by a different process
+                self.steps += result['steps']
+            self._assign_slit_tilts(slit_idx, result)
 
         if debug:
             # TODO: Add this to the show method?
@@ -684,6 +656,112 @@ class BuildWaveTilts(object):
                       'PYP_SPEC': self.spectrograph.spectrograph}
         return WaveTilts(**tilts_dict)
 
+    def _trace_slit(self, slit_idx, arcimg, doqa=True, debug=False, show=None):
+        """
+        Find, trace, and fit the tilts of the arc lines in a single slit.
+
+        This is the body of the loop over slits in :func:`run`; see
+        there for the details. The object is only altered by the
+        steps taken; all results are returned so that the slits can
+        be processed concurrently.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Zero-based index of the slit.
+            arcimg (`numpy.ndarray`_):
+                Arc image used for tracing, possibly
+                continuum-subtracted.
+            doqa (:obj:`bool`, optional):
+                Construct the QA plot.
+            debug (:obj:`bool`, optional):
+                Show plots useful for debugging.
+            show (:obj:`tuple`, optional):
+                The ginga viewer and channel used to show the traced
+                tilts. If None, nothing is shown.
+
+        Returns:
+            :obj:`dict`: Dictionary with the lines found, the
+            traced tilts, the fit results, and the tilts for the
+            pixels in the slit. If no lines were found, the
+            dictionary only has the lines found, which are None.
+        """
+        nsteps = len(self.steps)
+        #msgs.info('Computing tilts for slit {0}/{1}'.format(slit, self.slits.nslits-1))
+        msgs.info('Computing tilts for slit {0}/{1}'.format(slit_idx, self.slits.nslits))
+        # Identify lines for tracing tilts
+        msgs.info('Finding lines for tilt analysis')
+        lines_spec, lines_spat = self.find_lines(self.arccen[:,slit_idx], self.slitcen[:,slit_idx],
+                                                 slit_idx, bpm=self.arccen_bpm[:,slit_idx],
+                                                 debug=debug)
+        if lines_spec is None:
+            return dict(lines_spec=None, lines_spat=None, steps=self.steps[nsteps:])
+
+        slit_spat = self.slits.spat_id[slit_idx]
+        thismask = self.slitmask == slit_spat
+
+        # Performs the initial tracing of the line centroids as a
+        # function of spatial position resulting in 1D traces for
+        # each line.
+        msgs.info('Trace the tilts')
+        trace_dict = self.trace_tilts(arcimg, lines_spec, lines_spat, thismask,
+                                      self.slitcen[:, slit_idx])
+
+        # TODO: Show the traces before running the 2D fit
+
+        if show is not None:
+            ginga.show_tilts(*show, trace_dict)
+
+        spat_order = self._parse_param(self.par, 'spat_order', slit_idx)
+        spec_order = self._parse_param(self.par, 'spec_order', slit_idx)
+        # 2D model of the tilts, includes construction of QA
+        # NOTE: This also fills in self.all_fit_dict and self.all_trace_dict
+        coeff_out = self.fit_tilts(trace_dict, thismask, self.slitcen[:,slit_idx], spat_order,
+                                   spec_order, slit_idx, doqa=doqa, show_QA=show is not None,
+                                   debug=show is not None)
+
+        # TODO: Need a way to assess the success of fit_tilts and
+        # flag the slit if it fails
+
+        # Tilts are created with the size of the original slitmask,
+        # which corresonds to the same binning as the science
+        # images, trace images, and pixelflats etc.
+        tilts = tracewave.fit2tilts(self.slitmask_science.shape, coeff_out, self.par['func2d'])
+        thismask_science = self.slitmask_science == slit_spat
+
+        return dict(lines_spec=lines_spec, lines_spat=lines_spat, trace_dict=trace_dict,
+                    spat_order=spat_order, spec_order=spec_order, coeff=coeff_out,
+                    fit_dict=self.all_fit_dict[slit_idx],
+                    all_trace_dict=self.all_trace_dict[slit_idx],
+                    tilts=tilts[thismask_science], steps=self.steps[nsteps:])
+
+    def _assign_slit_tilts(self, slit_idx, result):
+        """
+        Save the results of :func:`_trace_slit` for a single slit.
+
+        Args:
+            slit_idx (:obj:`int`):
+                Zero-based index of the slit.
+            result (:obj:`dict`):
+                Object returned by :func:`_trace_slit`.
+        """
+        self.lines_spec = result['lines_spec']
+        self.lines_spat = result['lines_spat']
+
+        if self.lines_spec is None:
+            self.slits.mask[slit_idx] = self.slits.bitmask.turn_on(self.slits.mask[slit_idx], 'BADTILTCALIB')
+            return
+
+        self.trace_dict = result['trace_dict']
+        self.spat_order[slit_idx] = result['spat_order']
+        self.spec_order[slit_idx] = result['spec_order']
+        self.all_fit_dict[slit_idx] = result['fit_dict']
+        self.all_trace_dict[slit_idx] = result['all_trace_dict']
+        self.coeffs[:self.spec_order[slit_idx]+1,:self.spat_order[slit_idx]+1,slit_idx] \
+                = result['coeff']
+        # Save to final image
+        thismask_science = self.slitmask_science == self.slits.spat_id[slit_idx]
+        self.final_tilts[thismask_science] = result['tilts']
+
     def _parse_param(self, par, key, slit):
         """
         Grab a parameter for a given slit
@@ -717,3 +795,34 @@ class BuildWaveTilts(object):
         txt += '>'
         return txt
 
+
+# Data shared by all slits traced by a process; see _init_trace_slit
+_trace_slit_data = None
+
+
+def _init_trace_slit(buildwavetilts, arcimg, doqa):
+    """
+    Set the data shared by all slits traced by a process; see
+    :func:`_trace_slit`.
+    """
+    global _trace_slit_data
+    _trace_slit_data = (buildwavetilts, arcimg, doqa)
+
+
+def _trace_slit(slit_idx):
+    """
+    Find, trace, and fit the arc-line tilts in a single slit.
+
+    This is the function executed by each process when tracing slits
+    in parallel; see :func:`BuildWaveTilts.run`. The data shared by
+    all slits must have first been set by :func:`_init_trace_slit`.
+
+    Args:
+        slit_idx (:obj:`int`):
+            Zero-based index of the slit.
+
+    Returns:
+        :obj:`dict`: The result of :func:`BuildWaveTilts._trace_slit`.
+    """
+    buildwavetilts, arcimg, doqa = _trace_slit_data
+    return buildwavetilts._trace_slit(slit_idx, arcimg, doqa=doqa)